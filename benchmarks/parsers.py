@@ -0,0 +1,125 @@
+'''
+Time the Raidcomparser host group, lun, hba_wwn and port login parsers against a baseline parser on large synthetic raidcom output,\none output per port or host group as the getters issue them.\n
+python benchmarks/parsers.py [--ports 32] [--gids 64] [--rows 16] [--repeat 5] [--baseline hiraid/raidcomparser_old.py]\n
+Both parsers must produce the same data and views, the timings are the best of repeat runs.
+'''
+import sys
+import time
+import logging
+import argparse
+import importlib.util
+from pathlib import Path
+
+sys.path.insert(0,str(Path(__file__).resolve().parent.parent))
+
+from hiraid.cmdview import Cmdview
+from hiraid.raidcomparser import Raidcomparser
+
+serial = 53511
+
+class Stubraidcom():
+    serial = serial
+    log = logging
+
+def loadparser(path: str):
+    ''' Import a Raidcomparser from path as a module of the hiraid package so its relative imports resolve '''
+    spec = importlib.util.spec_from_file_location(f"hiraid._baseline_{Path(path).stem}",path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module.Raidcomparser
+
+def portname(p: int) -> str:
+    return f"CL{p % 8 + 1}-{chr(65 + p // 8)}"
+
+def hostgrps(ports: int,gids: int) -> list:
+    ''' One raidcom get host_grp output per port, every fourth group name is quoted and contains spaces '''
+    outputs = []
+    for p in range(ports):
+        lines = ['PORT   GID  GROUP_NAME                       RGID  Serial#  HMD          HMO_BITs']
+        for g in range(gids):
+            name = (f"hg{p}_{g}",f'"host group {p} {g}"')[g % 4 == 0]
+            lines.append(f"{portname(p)}   {g:>3}  {name:<32} 0  {serial}  VMWARE_EX    -")
+        outputs.append('\n'.join(lines))
+    return outputs
+
+def luns(ports: int,gids: int,rows: int) -> list:
+    ''' One raidcom get lun output per host group '''
+    outputs = []
+    for p in range(ports):
+        for g in range(gids):
+            lines = ['PORT   GID  HMD            LUN  NUM     LDEV  CM    Serial#  HMO_BITs']
+            for l in range(rows):
+                lines.append(f"{portname(p)}   {g:>3}  VMWARE_EX      {l:>3}    1  {(p * gids + g) * rows + l:>7}  -    {serial}  54 63 114")
+            outputs.append('\n'.join(lines))
+    return outputs
+
+def hbawwns(ports: int,gids: int,rows: int) -> list:
+    ''' One raidcom get hba_wwn output per host group, nick names contain spaces '''
+    outputs = []
+    for p in range(ports):
+        for g in range(gids):
+            lines = ['PORT   GID  GROUP_NAME                       HWWN               Serial#  NICK_NAME']
+            for w in range(rows):
+                lines.append(f"{portname(p)}   {g:>3}  hg{p}_{g:<28} {(p * gids + g) * rows + w:016x}   {serial}  nick {w}")
+            outputs.append('\n'.join(lines))
+    return outputs
+
+def portlogins(ports: int,rows: int) -> list:
+    ''' One raidcom get port -port <port> output per port '''
+    outputs = []
+    for p in range(ports):
+        lines = ['PORT   LOGIN_WWN         Serial#  -']
+        for w in range(rows):
+            lines.append(f"{portname(p)}   {p * rows + w:016x}  {serial}  -")
+        outputs.append('\n'.join(lines))
+    return outputs
+
+def parse(parser,method: str,stdouts: list) -> list:
+    cmdreturns = []
+    for stdout in stdouts:
+        cmdreturn = Cmdview(method)
+        cmdreturn.stdout = stdout
+        cmdreturns.append(getattr(parser,method)(cmdreturn))
+    return cmdreturns
+
+def best(parser,method: str,stdouts: list,repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        parse(parser,method,stdouts)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+def main():
+    argparser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    argparser.add_argument('--ports',type=int,default=32)
+    argparser.add_argument('--gids',type=int,default=64)
+    argparser.add_argument('--rows',type=int,default=16)
+    argparser.add_argument('--repeat',type=int,default=5)
+    argparser.add_argument('--baseline',default=str(Path(__file__).resolve().parent.parent / 'hiraid' / 'raidcomparser_old.py'))
+    args = argparser.parse_args()
+
+    baseline = loadparser(args.baseline)(Stubraidcom(),log=logging)
+    current = Raidcomparser(Stubraidcom(),log=logging)
+    outputs = {
+        'gethostgrp': hostgrps(args.ports,args.gids),
+        'getlun': luns(args.ports,args.gids,args.rows),
+        'gethbawwn': hbawwns(args.ports,args.gids,args.rows),
+        'getportlogin': portlogins(args.ports,args.rows * 4)
+    }
+    print(f"{'parser':<14}{'outputs':>9}{'rows':>9}{'baseline s':>12}{'current s':>12}{'speedup':>9}")
+    for method, stdouts in outputs.items():
+        new = parse(current,method,stdouts)
+        rows = sum(len(cmdreturn.data) for cmdreturn in new)
+        try:
+            old = parse(baseline,method,stdouts)
+        except Exception as e:
+            print(f"{method:<14}{len(stdouts):>9}{rows:>9}{'failed':>12}{best(current,method,stdouts,args.repeat):>12.4f}  baseline {type(e).__name__}: {e}")
+            continue
+        if [(cmdreturn.data,cmdreturn.view) for cmdreturn in old] != [(cmdreturn.data,cmdreturn.view) for cmdreturn in new]:
+            raise Exception(f"{method} output differs between {args.baseline} and hiraid/raidcomparser.py")
+        oldtime, newtime = best(baseline,method,stdouts,args.repeat), best(current,method,stdouts,args.repeat)
+        print(f"{method:<14}{len(stdouts):>9}{rows:>9}{oldtime:>12.4f}{newtime:>12.4f}{oldtime / newtime:>8.2f}x")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,220 @@
+import asyncio
+from .cmdview import Cmdview, CmdviewConcurrent
+from .raidcom import Raidcom
+
+class AsyncRaidcom():
+    '''
+    Awaitable raidcom client for use inside an asyncio event loop.\n
+    Commands run through the executor's arun(), a Shellexecutor runs them as asyncio subprocesses so no thread\n
+    is held per command. Parsing, view merging, stats, the view cache, the instance scheduler and the concurrency\n
+    governor are those of the wrapped Raidcom, so storage.raidcom.views reflects everything fetched here.\n
+    Commands are built by the Raidcom's request methods ( getlunrequest, addlunrequest ... ) shared with Raidcom itself,\n
+    parsing and view merges run in worker threads so the event loop is never held by a parse or a lookup it issues.\n
+    storage = await AsyncRaidcom.connect(53511,0)\n
+    ports = await storage.getport()\n
+    inventory = await storage.hostgroup_inventory(['cl1-a','cl2-a'])
+    '''
+    def __init__(self,raidcom: Raidcom):
+        self.raidcom = raidcom
+        self.log = raidcom.log
+
+    @classmethod
+    async def connect(cls,serial,instance,**kwargs) -> 'AsyncRaidcom':
+        ''' Construct the Raidcom in a worker thread, construction itself issues blocking commands '''
+        return cls(await asyncio.to_thread(Raidcom,serial,instance,**kwargs))
+
+    @property
+    def views(self) -> dict:
+        return self.raidcom.views
+
+    @property
+    def data(self) -> dict:
+        return self.raidcom.data
+
+    @property
+    def serial(self) -> str:
+        return self.raidcom.serial
+
+    def prefix(self) -> str:
+        return f"{self.raidcom.path}raidcom"
+
+    def suffix(self,**kwargs) -> str:
+        return f"-I{kwargs.get('instance',self.raidcom.instance)} -s {self.raidcom.serial}"
+
+    async def execute(self,cmd,undocmds=[],undodefs=[],expectedreturn=0,raise_err=True,**kwargs) -> object:
+        '''
+        Awaitable Raidcom.execute, stream=True is not supported.\n
+        raidcom_asyncronous=True resets the command status before and checks it after the command, as Raidcom does.
+        '''
+        cmdreturn = Cmdview(cmd=cmd)
+        cmdreturn.expectedreturn = expectedreturn
+        cmdreturn.serial = self.raidcom.serial
+        if kwargs.get('noexec'):
+            return cmdreturn
+        kwargs.pop('stream',None)
+        asyncronous = kwargs.pop('raidcom_asyncronous',False)
+        if asyncronous:
+            await self.resetcommandstatus(**kwargs)
+        self.log.debug(f"Executing: {self.raidcom.obfuscatepwd(cmd)}")
+        cmdreturn.stdout, cmdreturn.stderr, cmdreturn.returncode = await self.raidcom.executor.arun(cmd)
+        self.raidcom.completecmd(cmdreturn,undocmds,undodefs,expectedreturn,raise_err,**kwargs)
+        if asyncronous:
+            await self.getcommandstatus(**kwargs)
+        return cmdreturn
+
+    async def runrequest(self,request) -> object:
+        '''
+        Await a Raidcomrequest built by the wrapped Raidcom. The command runs through arun(), its completion ( parsing,\n
+        view merges, stats, view cache ) runs in a worker thread: parsers may issue lookups of their own, e.g. the host\n
+        groups of the ports an ldev is mapped to, and views such as _resource_groups load on first read.
+        '''
+        if request.cached:
+            return request.cached
+        cmdreturn = await self.execute(request.cmd,request.undocmds,request.undodefs,**request.kwargs)
+        return await asyncio.to_thread(request.complete,cmdreturn)
+
+    async def getcommandstatus(self,request_id: str=None,**kwargs) -> object:
+        requestid_cmd = ('',f"-request_id {request_id}")[request_id is not None]
+        cmdreturn = await self.execute(f"{self.prefix()} get command_status {requestid_cmd} {self.suffix(**kwargs)}")
+        self.raidcom.parser.getcommandstatus(cmdreturn)
+        return cmdreturn
+
+    async def resetcommandstatus(self,request_id: str='',**kwargs) -> object:
+        requestid_cmd = ('',f"-request_id {request_id}")[bool(request_id)]
+        return await self.execute(f"{self.prefix()} reset command_status {requestid_cmd} {self.suffix(**kwargs)}")
+
+    async def raidqry(self,view_keyname: str='_raidqry',**kwargs) -> object:
+        return await self.runrequest(self.raidcom.raidqryrequest(view_keyname,**kwargs))
+
+    async def getresource(self,view_keyname: str='_resource_groups',key='opt',**kwargs) -> object:
+        return await self.runrequest(self.raidcom.getresourcerequest(view_keyname,key,**kwargs))
+
+    async def getport(self,view_keyname: str='_ports',update_view=True,**kwargs) -> object:
+        return await self.runrequest(self.raidcom.getportrequest(view_keyname,update_view,**kwargs))
+
+    async def getldev(self,ldev_id: str,view_keyname: str='_ldevs',update_view=True,**kwargs) -> object:
+        return await self.runrequest(self.raidcom.getldevrequest(ldev_id,view_keyname,update_view,**kwargs))
+
+    async def gethostgrp_key_detail(self,port: str,view_keyname: str='_ports',update_view: bool=True,**kwargs) -> object:
+        return await self.runrequest(self.raidcom.gethostgrprequest(port,view_keyname,update_view,**kwargs))
+
+    async def gethostgrp(self,port: str,view_keyname: str='_ports',update_view: bool=True,**kwargs) -> object:
+        return await self.gethostgrp_key_detail(port=port,view_keyname=view_keyname,update_view=update_view,hostgrp_usage=['_GIDS'],**kwargs)
+
+    async def getlun(self,port: str,view_keyname: str='_ports',update_view=True,**kwargs) -> object:
+        return await self.runrequest(self.raidcom.getlunrequest(port,view_keyname,update_view,**kwargs))
+
+    async def gethbawwn(self,port: str,view_keyname: str='_ports',update_view=True,**kwargs) -> object:
+        return await self.runrequest(self.raidcom.gethbawwnrequest(port,view_keyname,update_view,**kwargs))
+
+    async def getportlogin(self,port: str,view_keyname: str='_ports',update_view=True,**kwargs) -> object:
+        return await self.runrequest(self.raidcom.getportloginrequest(port,view_keyname,update_view,**kwargs))
+
+    async def getpool(self,key: str=None,view_keyname: str='_pools',**kwargs) -> object:
+        return await self.runrequest(self.raidcom.getpoolrequest(key,view_keyname,**kwargs))
+
+    async def addhostgrp(self,port: str,host_grp_name: str,**kwargs) -> object:
+        cmdreturn = await self.runrequest(self.raidcom.addhostgrprequest(port,host_grp_name,**kwargs))
+        if not kwargs.get('noexec') and (cmdreturn.returncode == cmdreturn.expectedreturn):
+            host_grp = await self.gethostgrp_key_detail(port='-'.join(port.split('-')[:2]),host_grp_name=host_grp_name)
+            cmdreturn.data = host_grp.data
+            cmdreturn.view = host_grp.view
+        return cmdreturn
+
+    async def addhbawwn(self,port: str,hba_wwn: str,**kwargs) -> object:
+        return await self.runrequest(self.raidcom.addhbawwnrequest(port,hba_wwn,**kwargs))
+
+    async def addlun(self,port: str,ldev_id: str,**kwargs) -> object:
+        request = self.raidcom.addlunrequest(port,ldev_id,**kwargs)
+        cmdreturn = await self.runrequest(request)
+        if not kwargs.get('noexec') and kwargs.get('return_lun'):
+            getlun = await self.getlun(port=port,**{ k:v for k,v in kwargs.items() if k in ('gid','host_grp_name') })
+            cmdreturn.data = [row for row in getlun.data if str(row.get('LUN')) == str(request.lun_id)]
+            cmdreturn.view = getlun.view
+        return cmdreturn
+
+    async def deletelun(self,port: str,ldev_id: str,lun_id: int='',host_grp_name: str='',gid: int='',**kwargs) -> object:
+        return await self.runrequest(self.raidcom.deletelunrequest(port,ldev_id,lun_id,host_grp_name,gid,**kwargs))
+
+    async def extendldev(self,ldev_id: str,capacity: int,**kwargs) -> object:
+        return await self.runrequest(self.raidcom.extendldevrequest(ldev_id,capacity,**kwargs))
+
+    async def deleteldev(self,ldev_id: str,**kwargs) -> object:
+        return await self.runrequest(self.raidcom.deleteldevrequest(ldev_id,**kwargs))
+
+    async def modifyldevname(self,ldev_id: str,ldev_name: str,**kwargs) -> object:
+        return await self.runrequest(self.raidcom.modifyldevnamerequest(ldev_id,ldev_name,**kwargs))
+
+    def concurrentreturn(self,tasks: list) -> object:
+        cmdreturn = CmdviewConcurrent(returncodes=[],stdout=[],stderr=[])
+        for task in tasks:
+            self.raidcom.update_concurrent_cmdreturn(cmdreturn,task)
+        cmdreturn.serial = self.raidcom.serial
+        cmdreturn.view = dict(sorted(cmdreturn.view.items()))
+        self.raidcom.updatetimer(cmdreturn)
+        return cmdreturn
+
+    async def gather(self,fn,items: list,**kwargs) -> list:
+        ''' Await fn(item) for each distinct item, each call dispatched to an instance by the scheduler '''
+        tasks = [asyncio.ensure_future(self.raidcom.scheduler.adispatch(fn,item,**kwargs)) for item in dict.fromkeys(items)]
+        if tasks:
+            await asyncio.gather(*tasks)
+        return tasks
+
+    async def gethostgrps(self,ports: list,**kwargs) -> object:
+        ''' host_grps = await gethostgrps(['cl1-a','cl2-a']) '''
+        for port in ports: self.raidcom.checkport(port)
+        return self.concurrentreturn(await self.gather(lambda port,**kw: self.gethostgrp_key_detail(port=port,**kw),ports,**kwargs))
+
+    async def getluns(self,portgids: list,**kwargs) -> object:
+        ''' luns = await getluns(['cl1-a-1','cl1-a-2']) '''
+        for portgid in portgids: self.raidcom.checkportgid(portgid)
+        return self.concurrentreturn(await self.gather(lambda port,**kw: self.getlun(port=port,**kw),portgids,**kwargs))
+
+    async def gethbawwns(self,portgids: list,**kwargs) -> object:
+        ''' hbawwns = await gethbawwns(['cl1-a-1','cl1-a-2']) '''
+        for portgid in portgids: self.raidcom.checkportgid(portgid)
+        return self.concurrentreturn(await self.gather(lambda port,**kw: self.gethbawwn(port=port,**kw),portgids,**kwargs))
+
+    async def getldevs(self,ldev_ids: list,**kwargs) -> object:
+        ''' ldevs = await getldevs([1000,1001,'00:03:E9']) '''
+        return self.concurrentreturn(await self.gather(lambda ldev_id,**kw: self.getldev(ldev_id=ldev_id,**kw),ldev_ids,**kwargs))
+
+    async def hostgroup_inventory(self,ports: list,hbawwns: bool=True,ldevs: bool=True) -> dict:
+        '''
+        Host groups, then luns and hba wwns of each host group, then every ldev mapped to those luns.\n
+        Stages are pipelined rather than barriered, a port's luns are requested as soon as its host groups arrive\n
+        and an ldev as soon as the first lun presenting it arrives, each ldev is fetched once.\n
+        Returns { 'hostgrps': [cmdreturn], 'luns': [cmdreturn], 'hbawwns': [cmdreturn], 'ldevs': [cmdreturn] }, views are updated as results arrive.
+        '''
+        for port in ports: self.raidcom.checkport(port)
+        dispatch = self.raidcom.scheduler.adispatch
+        results = { 'hostgrps': [], 'luns': [], 'hbawwns': [], 'ldevs': [] }
+        ldevtasks = {}
+
+        async def getldev(ldev_id):
+            results['ldevs'].append(await dispatch(self.getldev,ldev_id=ldev_id))
+
+        async def getlun(portgid):
+            lun = await dispatch(self.getlun,port=portgid)
+            results['luns'].append(lun)
+            if ldevs:
+                for row in lun.data:
+                    if row.get('LDEV') not in (None,'') and row['LDEV'] not in ldevtasks:
+                        ldevtasks[row['LDEV']] = asyncio.ensure_future(getldev(row['LDEV']))
+                await asyncio.gather(*(ldevtasks[row['LDEV']] for row in lun.data if row.get('LDEV') in ldevtasks))
+
+        async def gethbawwn(portgid):
+            results['hbawwns'].append(await dispatch(self.gethbawwn,port=portgid))
+
+        async def gethostgrp(port):
+            hostgrp = await dispatch(self.gethostgrp_key_detail,port=port,hostgrp_usage=['_GIDS'])
+            results['hostgrps'].append(hostgrp)
+            portgids = [f"{hostport}-{gid}" for hostport, detail in hostgrp.view.items() for gid in detail.get('_GIDS',{})]
+            stages = [getlun(portgid) for portgid in portgids]
+            if hbawwns:
+                stages.extend(gethbawwn(portgid) for portgid in portgids)
+            await asyncio.gather(*stages)
+
+        await asyncio.gather(*(gethostgrp(port) for port in dict.fromkeys(ports)))
+        return results
@@ -0,0 +1,229 @@
+import os
+import re
+import time
+import signal
+import uuid
+import shlex
+import codecs
+import queue
+import locale
+import logging
+import selectors
+import threading
+import subprocess
+from .executor import Executor, splitlines
+
+class Cmdserver():
+    '''
+    Long-lived shell worker.\n
+    Commands are streamed to the shell's stdin and their stdout, stderr and returncode are framed\n
+    with a marker unique to this worker, so one /bin/sh serves any number of raidcom calls.\n
+    Each command runs quoted in its own sh -c, a command the shell cannot parse fails with a returncode and leaves the worker running.\n
+    A command still running after timeout seconds kills the worker, and every process the command started, and raises.\n
+    stdout, stderr, returncode = Cmdserver(timeout=3600).run("raidcom get port -I0 -s 53511")
+    '''
+    def __init__(self,shell: str='/bin/sh',log=logging,timeout: float=None):
+        self.shell = shell
+        self.log = log
+        self.timeout = timeout
+        self.marker = f"__HIRAID_{uuid.uuid4().hex}__".encode()
+        self.encoding = locale.getpreferredencoding(False)
+        self.proc = None
+        self.start()
+
+    def start(self):
+        # Its own session, so the worker and whatever raidcom it is running can be killed as one process group
+        self.proc = subprocess.Popen([self.shell], stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.PIPE, bufsize=0, start_new_session=True)
+        self.log.debug(f"Started command server pid {self.proc.pid}")
+
+    def alive(self) -> bool:
+        return self.proc is not None and self.proc.poll() is None
+
+    def frame(self,cmd: str) -> bytes:
+        ''' Run cmd as a single quoted sh -c argument, stdin detached, then print the end of frame markers '''
+        marker = self.marker.decode()
+        return (f"{self.shell} -c {shlex.quote(cmd)} </dev/null\n"
+                f"printf '\\n{marker} %d\\n' $?\n"
+                f"printf '\\n{marker}\\n' >&2\n").encode(self.encoding)
+
+    def decode(self,data: bytes) -> str:
+        return data.decode(self.encoding,errors='replace').replace('\r\n','\n')
+
+    def exchange(self,cmd: str,result: dict):
+        '''
+        Generator yielding decoded stdout as it arrives.\n
+        result['stderr'] and result['returncode'] are set once the command completes.
+        '''
+        if not self.alive():
+            raise Exception(f"Command server is not running, unable to execute '{cmd}'")
+
+        stdout, stderr = bytearray(), bytearray()
+        stdout_end = b"\n" + self.marker + b" "
+        stderr_end = b"\n" + self.marker + b"\n"
+        stdout_done, stderr_done = False, False
+        decoder = codecs.getincrementaldecoder(self.encoding)(errors='replace')
+        deadline = time.monotonic() + self.timeout if self.timeout is not None else None
+
+        self.proc.stdin.write(self.frame(cmd))
+        self.proc.stdin.flush()
+
+        with selectors.DefaultSelector() as selector:
+            selector.register(self.proc.stdout,selectors.EVENT_READ,'stdout')
+            selector.register(self.proc.stderr,selectors.EVENT_READ,'stderr')
+            while not (stdout_done and stderr_done):
+                events = selector.select(None if deadline is None else max(deadline - time.monotonic(),0))
+                if not events and deadline is not None and time.monotonic() >= deadline:
+                    self.kill()
+                    raise Exception(f"Command server timed out after {self.timeout}s executing '{cmd}'")
+                for key, _ in events:
+                    chunk = key.fileobj.read(65536)
+                    if not chunk:
+                        self.close()
+                        raise Exception(f"Command server exited while executing '{cmd}'")
+                    if key.data == 'stdout':
+                        stdout.extend(chunk)
+                        end = stdout.find(stdout_end)
+                        if end != -1:
+                            if not stdout.endswith(b"\n"):
+                                continue
+                            result['returncode'] = int(stdout[end + len(stdout_end):].strip())
+                            text = decoder.decode(bytes(stdout[:end]),final=True)
+                            stdout_done = True
+                            selector.unregister(self.proc.stdout)
+                        else:
+                            # Hold back enough bytes to catch a marker straddling two reads
+                            keep = max(0,len(stdout) - len(stdout_end) + 1)
+                            text = decoder.decode(bytes(stdout[:keep]))
+                            del stdout[:keep]
+                        if text:
+                            yield text
+                    else:
+                        searchfrom = max(0,len(stderr) - len(stderr_end))
+                        stderr.extend(chunk)
+                        end = stderr.find(stderr_end,searchfrom)
+                        if end != -1:
+                            del stderr[end:]
+                            stderr_done = True
+                            selector.unregister(self.proc.stderr)
+
+        result['stderr'] = self.decode(stderr)
+
+    def run(self,cmd: str) -> tuple:
+        result = {}
+        stdout = ''.join(self.exchange(cmd,result)).replace('\r\n','\n')
+        return stdout, result['stderr'], result['returncode']
+
+    def close(self,timeout: int=5):
+        if self.alive():
+            try:
+                self.proc.stdin.close()
+                self.proc.wait(timeout=timeout)
+            except Exception:
+                self.kill()
+        self.log.debug(f"Closed command server pid {self.proc.pid}")
+
+    def kill(self):
+        ''' Kill the worker's process group, a command it was running does not outlive it holding the command device '''
+        try:
+            os.killpg(self.proc.pid,signal.SIGKILL)
+        except ProcessLookupError:
+            pass
+        self.proc.wait()
+
+
+class Cmdserverpool(Executor):
+    '''
+    Pool of long-lived Cmdserver shells per HORCM instance.\n
+    The horcm instance is taken from the -I<inst> argument of each command, up to workers shells are\n
+    started per instance on demand and reused for every subsequent command.\n
+    pool = Cmdserverpool(workers=4,timeout=3600)\n
+    stdout, stderr, returncode = pool.run("raidcom get ldev -ldev_id 1000 -I0 -s 53511")\n
+    pool.close()
+    '''
+    instance_regex = re.compile(r'\s-I[A-Za-z]*(\d+)')
+
+    def __init__(self,workers: int=4,shell: str='/bin/sh',log=logging,timeout: float=None):
+        self.workers = workers
+        self.shell = shell
+        self.log = log
+        self.timeout = timeout
+        self.idle = {}
+        self.started = {}
+        self.servers = set()
+        self.closed = False
+        self.lock = threading.Lock()
+        self.local = threading.local()
+
+    def instanceof(self,cmd: str) -> str:
+        instance = self.instance_regex.search(cmd)
+        return instance.group(1) if instance else None
+
+    def acquire(self,instance: str) -> Cmdserver:
+        # A thread already holding a shell ( e.g. parsing a stream which issues a lookup ) must not wait on itself
+        nested = getattr(self.local,'held',0) > 0
+        server, spawn = None, False
+        with self.lock:
+            idle = self.idle.setdefault(instance,queue.LifoQueue())
+            if not idle.empty():
+                server = idle.get_nowait()
+            elif self.started.get(instance,0) < self.workers or nested:
+                self.started[instance] = self.started.get(instance,0) + 1
+                spawn = True
+        if spawn:
+            try:
+                server = Cmdserver(shell=self.shell,log=self.log,timeout=self.timeout)
+            except Exception:
+                with self.lock:
+                    self.started[instance] -= 1
+                raise
+            with self.lock:
+                self.servers.add(server)
+        elif not server:
+            server = idle.get()
+        self.local.held = getattr(self.local,'held',0) + 1
+        return server
+
+    def release(self,instance: str,server: Cmdserver):
+        self.local.held -= 1
+        with self.lock:
+            if server.alive() and not self.closed:
+                self.idle[instance].put(server)
+                return
+            self.started[instance] -= 1
+            self.servers.discard(server)
+        server.close(timeout=0)
+
+    def run(self,cmd: str) -> tuple:
+        instance = self.instanceof(cmd)
+        server = self.acquire(instance)
+        try:
+            return server.run(cmd)
+        finally:
+            self.release(instance,server)
+
+    def stream(self,cmd: str,cmdreturn: object):
+        instance = self.instanceof(cmd)
+        server = self.acquire(instance)
+        result = {}
+        try:
+            yield from splitlines(server.exchange(cmd,result))
+            cmdreturn.stdout, cmdreturn.stderr, cmdreturn.returncode = '', result['stderr'], result['returncode']
+        except GeneratorExit:
+            # Abandoned mid command, this shell is still busy so discard it
+            server.close(timeout=0)
+            raise
+        finally:
+            self.release(instance,server)
+
+    def close(self):
+        ''' Close every shell, idle or busy, a command still running on a busy shell fails '''
+        with self.lock:
+            self.closed = True
+            servers = list(self.servers)
+            self.servers.clear()
+            for instance, idle in self.idle.items():
+                while not idle.empty():
+                    idle.get_nowait()
+                    self.started[instance] -= 1
+        for server in servers:
+            server.close()
@@ -0,0 +1,72 @@
+from operator import itemgetter
+from typing import Callable
+
+_missing = object()
+
+def acceptall(row: dict) -> bool:
+    return True
+
+def rejectall(row: dict) -> bool:
+    return False
+
+def compilefilter(datafilter: dict={}) -> Callable[[dict],bool]:
+    '''
+    Compile a parser datafilter into a single predicate, once per parse rather than once per row.\n
+    datafilter={'PORT':'CL1-A'} - row value equals string\n
+    datafilter={'PORT':['CL1-A','CL2-A']} - row value is one of, checked against a precomputed set\n
+    datafilter={'Anykey_when_val_is_callable':lambda row : row['TYPE'] == 'FIBRE'} - callable receives the row\n
+    Every key must match. A row missing a non callable key does not match, any other value type never matches.\n
+    rows = list(filter(compilefilter(datafilter),rows))
+    '''
+    if not datafilter:
+        return acceptall
+
+    equals, members, callables = {}, [], []
+    for key, val in datafilter.items():
+        if isinstance(val,str):
+            equals[key] = val
+        elif isinstance(val,(list,tuple,set,frozenset)):
+            members.append((key,membership(val)))
+        elif callable(val):
+            callables.append(val)
+        else:
+            return rejectall
+
+    # itemgetter compares every equality key in one call, it returns a bare value for a single key
+    keys = list(equals)
+    getter = itemgetter(*keys) if keys else None
+    expected = tuple(equals.values()) if len(keys) > 1 else equals.get(keys[0]) if keys else None
+
+    def predicate(row: dict) -> bool:
+        if getter:
+            try:
+                if getter(row) != expected:
+                    return False
+            except KeyError:
+                return False
+        for key, ismember in members:
+            value = row.get(key,_missing)
+            if value is _missing or not ismember(value):
+                return False
+        for check in callables:
+            if not check(row):
+                return False
+        return True
+
+    return predicate
+
+def membership(values) -> Callable:
+    ''' Set membership where possible, falling back to list membership for unhashable values '''
+    values = list(values)
+    try:
+        valueset = frozenset(values)
+    except TypeError:
+        return values.__contains__
+
+    def ismember(value) -> bool:
+        try:
+            return value in valueset
+        except TypeError:
+            return value in values
+
+    return ismember
@@ -0,0 +1,190 @@
+import io
+import os
+import abc
+import re
+import json
+import time
+import shlex
+import random
+import asyncio
+import hashlib
+import locale
+import logging
+import tempfile
+import threading
+import subprocess
+
+class Executor(abc.ABC):
+    '''
+    Executor interface shared by Raidcom.execute, execute_cci.execute and Cci.execute.\n
+    run(cmd) returns a ( stdout, stderr, returncode ) tuple and must be implemented, close() releases any resources.\n
+    stream(cmd,cmdreturn) yields stdout lines, stderr and returncode are set on cmdreturn once stdout is exhausted.\n
+    await arun(cmd) is the awaitable run used by AsyncRaidcom, by default run in a worker thread.
+    '''
+    @abc.abstractmethod
+    def run(self,cmd: str) -> tuple:
+        ...
+
+    async def arun(self,cmd: str) -> tuple:
+        return await asyncio.to_thread(self.run,cmd)
+
+    def stream(self,cmd: str,cmdreturn: object):
+        stdout, cmdreturn.stderr, cmdreturn.returncode = self.run(cmd)
+        yield from io.StringIO(stdout)
+        cmdreturn.stdout = ''
+
+    def close(self):
+        pass
+
+
+class Shellexecutor(Executor):
+    ''' One shell fork per command, the original behaviour '''
+    def run(self,cmd: str) -> tuple:
+        proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, universal_newlines=True, shell=True)
+        stdout, stderr = proc.communicate()
+        return stdout, stderr, proc.returncode
+
+    def stream(self,cmd: str,cmdreturn: object):
+        # stderr is spooled to a file so a chatty stderr cannot block the stdout pipe
+        with tempfile.TemporaryFile(mode='w+') as stderr:
+            proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=stderr, universal_newlines=True, shell=True)
+            try:
+                yield from proc.stdout
+            finally:
+                proc.stdout.close()
+                cmdreturn.returncode = proc.wait()
+                stderr.seek(0)
+                cmdreturn.stderr = stderr.read()
+        cmdreturn.stdout = ''
+
+    async def arun(self,cmd: str) -> tuple:
+        # Only pipelines and redirects need a shell, everything else is exec'd directly
+        if shell_regex.search(cmd):
+            proc = await asyncio.create_subprocess_shell(cmd, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE)
+        else:
+            args = shlex.split(cmd)
+            proc = await asyncio.create_subprocess_exec(*args, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE)
+        stdout, stderr = await proc.communicate()
+        encoding = locale.getpreferredencoding(False)
+        return stdout.decode(encoding,errors='replace').replace('\r\n','\n'), stderr.decode(encoding,errors='replace').replace('\r\n','\n'), proc.returncode
+
+
+class Replayexecutor(Executor):
+    '''
+    Serve recorded raidcom / raidscan / pairdisplay output from a fixture directory.\n
+    Fixtures are keyed by the normalized command line ( binary path, -I<inst> and -login credentials removed ),\n
+    so the same fixture answers a command issued through any horcm instance.\n
+    fixturedir: directory of <sha1>.json files { "cmd", "stdout", "stderr", "returncode" }\n
+    latency: seconds added to every command, use to emulate array response times\n
+    jitter: up to this many random seconds added on top of latency\n
+    storage = Raidcom(53511,0,executor=Replayexecutor('/var/tmp/fixtures/53511',latency=0.2))
+    '''
+    def __init__(self,fixturedir: str=None,latency: float=0,jitter: float=0,log=logging):
+        self.fixturedir = fixturedir
+        self.latency = latency
+        self.jitter = jitter
+        self.log = log
+        self.fixtures = {}
+        self.lock = threading.Lock()
+
+    def load(self,key: str) -> dict:
+        with self.lock:
+            if key not in self.fixtures and self.fixturedir:
+                fixturefile = f"{self.fixturedir}{os.sep}{key}.json"
+                if os.path.exists(fixturefile):
+                    with open(fixturefile) as f:
+                        self.fixtures[key] = json.load(f)
+            return self.fixtures.get(key)
+
+    def add(self,cmd: str,stdout: str='',stderr: str='',returncode: int=0):
+        ''' Register fixture output in memory, useful for generating synthetic arrays '''
+        with self.lock:
+            self.fixtures[fixturekey(cmd)] = { 'cmd': normalizecmd(cmd), 'stdout': stdout, 'stderr': stderr, 'returncode': returncode }
+
+    def fixture(self,cmd: str) -> dict:
+        fixture = self.load(fixturekey(cmd))
+        if fixture is None:
+            raise Exception(f"No recorded output for command '{normalizecmd(cmd)}'")
+        return fixture
+
+    def run(self,cmd: str) -> tuple:
+        fixture = self.fixture(cmd)
+        if self.latency or self.jitter:
+            time.sleep(self.latency + random.uniform(0,self.jitter))
+        return fixture['stdout'], fixture['stderr'], fixture['returncode']
+
+    async def arun(self,cmd: str) -> tuple:
+        fixture = self.fixture(cmd)
+        if self.latency or self.jitter:
+            await asyncio.sleep(self.latency + random.uniform(0,self.jitter))
+        return fixture['stdout'], fixture['stderr'], fixture['returncode']
+
+
+class Recordexecutor(Executor):
+    '''
+    Execute through another executor and record each result as a Replayexecutor fixture.\n
+    storage = Raidcom(53511,0,executor=Recordexecutor('/var/tmp/fixtures/53511'))
+    '''
+    def __init__(self,fixturedir: str,executor: Executor=None,log=logging):
+        self.fixturedir = fixturedir
+        self.executor = executor or Shellexecutor()
+        self.log = log
+        os.makedirs(fixturedir,exist_ok=True)
+
+    def run(self,cmd: str) -> tuple:
+        return self.record(cmd,*self.executor.run(cmd))
+
+    async def arun(self,cmd: str) -> tuple:
+        return self.record(cmd,*await self.executor.arun(cmd))
+
+    def record(self,cmd: str,stdout: str,stderr: str,returncode: int) -> tuple:
+        fixturefile = f"{self.fixturedir}{os.sep}{fixturekey(cmd)}.json"
+        tmpfile = f"{fixturefile}.{threading.get_ident()}.tmp"
+        with open(tmpfile,"w") as f:
+            f.write(json.dumps({ 'cmd': normalizecmd(cmd), 'stdout': stdout, 'stderr': stderr, 'returncode': returncode },indent=4))
+        os.replace(tmpfile,fixturefile)
+        self.log.debug(f"Recorded '{normalizecmd(cmd)}' to {fixturefile}")
+        return stdout, stderr, returncode
+
+    def close(self):
+        self.executor.close()
+
+
+normalize_regexes = [
+    (re.compile(r'-login\s+\S+\s+\S+'),'-login'),
+    (re.compile(r'(^|[|;&]\s*)\S*[\\/]([^\\/\s]+?)(?:\.sh|\.exe)?(?=\s|$)'),r'\1\2'),
+    (re.compile(r'\s-I[A-Za-z]*\d+(?=\s|$)'),''),
+    (re.compile(r'\s+'),' ')
+]
+
+shell_regex = re.compile(r'[|;&<>`$*?]')
+
+def splitlines(chunks):
+    ''' Reassemble lines from arbitrary text chunks '''
+    pending = ''
+    for chunk in chunks:
+        pending += chunk
+        *lines, pending = pending.split('\n')
+        for line in lines:
+            yield f"{line}\n"
+    if pending:
+        yield pending
+
+def normalizecmd(cmd: str) -> str:
+    for regex, replacement in normalize_regexes:
+        cmd = regex.sub(replacement,cmd)
+    return cmd.strip()
+
+def fixturekey(cmd: str) -> str:
+    return hashlib.sha1(normalizecmd(cmd).encode()).hexdigest()
+
+
+default_executor = Shellexecutor()
+
+def getexecutor() -> Executor:
+    return default_executor
+
+def setexecutor(executor: Executor):
+    ''' Replace the module default executor used wherever no executor is passed in '''
+    global default_executor
+    default_executor = executor
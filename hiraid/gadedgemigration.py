@@ -1414,64 +1414,7 @@ class GadEdgeMigration(StorageMigration):
             raise Exception(message)
 
     def monitorpairevtwaits(self,pairevtwaits,status,taskid,horcm_inst=None,pairevtwaitvolumerole='-s'):
-        procs = {}
-        log = self.log
-        returncode = 0
-        taskname = inspect.currentframe().f_code.co_name
-        pairevtwaittimeout = self.config['pairevtwaittimeout']
-        pairevtwaitpollseconds = self.config['pairevtwaitpollseconds']
-        horcminst = self.config['source_cci_horcm_inst']
-        if horcm_inst:
-            horcminst = horcm_inst
-
-        if len(pairevtwaits):
-            for copy_grp_name in pairevtwaits:
-                storage = pairevtwaits[copy_grp_name]['storage']
-                pairevtwaits[copy_grp_name]['cmd'] = 'pairevtwait -g {} -I{} {} {} -t {}'.format(copy_grp_name,horcminst,pairevtwaitvolumerole,status,pairevtwaittimeout)
-                self.logtaskstart(taskname,host=pairevtwaits[copy_grp_name]['host'],taskid=taskid)
-                pairevtwaits[copy_grp_name]['proc'] = storage.pairevtwaitexec(pairevtwaits[copy_grp_name]['cmd'])
-                procs[copy_grp_name] = 1
-
-            time.sleep(pairevtwaitpollseconds)
-
-            log.info('Number of pairevtwait processes to monitor: {}'.format(len(procs)))
-            while len(procs):
-                for copy_grp_name in pairevtwaits:
-                    poll = pairevtwaits[copy_grp_name]['proc'].poll()
-                    log.info('Polled pairevtwait for horcm group {} - result {}'.format(copy_grp_name,poll))
-                    
-    
-                    if poll is not None:
-                        log.info('pairevtwait completed for copy_grp \'{}\' return {}'.format(copy_grp_name,poll))
-                        procs.pop(copy_grp_name, None)
-                        log.info('Popped copy_grp_name \'{}\' from procs list'.format(copy_grp_name))
-                        pairevtwaits[copy_grp_name]['returncode'] = poll
-                        pairdisplay = storage.pairdisplay(inst=horcminst,group=copy_grp_name,opts='-fcxe')
-                        print(pairdisplay['stdout'])
-                        if not pairevtwaits[copy_grp_name]['returncode']:
-                            status = 'completed'
-                        else:
-                            status = 'Error copy_grp_name \'{}\' pairevtwait returned: {}'.format(copy_grp_name,pairevtwaits[copy_grp_name]['returncode'])
-                            log.warn(status)
-                            returncode = 1
-                            self.warnings = 1
-                            self.warningmessages.append(status)
-                            self.endmessage = "Warning!"
-
-                        log.info('copy_grp \'{}\' status: {}'.format(copy_grp_name,status))
-
-                        self.logendtask(host=pairevtwaits[copy_grp_name]['host'],taskid=taskid,status=status)
-                    else:
-                        print(storage.pairdisplay(inst=horcminst,group=copy_grp_name,opts='-fcxe')['stdout'])
-                        log.info('Poll returned None, continuing to loop')
-
-                if len(procs):
-                    log.info('Number of pairevtwait processes left to monitor: {}'.format(len(procs)))
-                    time.sleep(pairevtwaitpollseconds)
-
-        log.info('returning from monitorpairevtwaits')
-
-        return returncode
+        return self.watchpairevtwaits(pairevtwaits,status,taskid,horcm_inst=horcm_inst,pairevtwaitvolumerole=pairevtwaitvolumerole)
 
 
     def paircreate(self,storage,copy_grp_name,horcminst,jp,js,fence='never'):
@@ -0,0 +1,241 @@
+import re
+import time
+import asyncio
+import logging
+import threading
+import contextvars
+import concurrent.futures
+from contextlib import contextmanager, asynccontextmanager
+from .executor import Executor
+
+class Governor():
+    '''
+    Bound the commands in flight against one storage array, per command class.\n
+    get      - raidcom get, raidqry, inqraid, horcctl, login, pairdisplay, pairvolchk, raidvchkdsp\n
+    raidscan - raidscan\n
+    write    - everything else, add, modify, delete, map, extend ...\n
+    One Governor is shared by every Raidcom and Cci for a serial in the process, see getgovernor().\n
+    Raidcom runs inqraid, which reads host devices of every array, outside its serial's Governor.\n
+    with governor.slot(cmd):\n
+        ...\n
+    async with governor.aslot(cmd):\n
+        ...\n
+    governor.metrics() reports per class limit, in flight, waiting, wait times, timeouts and EX_CMDRJE rejections.
+    '''
+    default_limits = { 'get': 16, 'raidscan': 8, 'write': 4 }
+    classes = [
+        ('raidscan', re.compile(r'(^|[\\/\s|;&])raidscan(\.sh|\.exe)?\s')),
+        ('get', re.compile(r'(^|[\\/\s|;&])(raidcom(\.sh|\.exe)?\s+(get|-login|-logout)\b|raidqry|inqraid|horcctl|pairdisplay|pairvolchk|raidvchkdsp)'))
+    ]
+
+    def __init__(self,serial: str,limits: dict=None,timeout: float=None,log=logging):
+        self.serial = serial
+        self.timeout = timeout
+        self.log = log
+        self.lock = threading.Lock()
+        self.local = threading.local()
+        self.aheld = contextvars.ContextVar(f"governor_{serial}_held",default=0)
+        self.waiters = {}
+        self.limits = {}
+        self.semaphores = {}
+        self.counters = {}
+        self.configure(limits or {})
+
+    def configure(self,limits: dict) -> None:
+        ''' Set limits per command class, classes not named keep their current ( or default ) limit '''
+        with self.lock:
+            for cmdclass, default in self.default_limits.items():
+                limit = limits.get(cmdclass,self.limits.get(cmdclass,default))
+                if limit != self.limits.get(cmdclass):
+                    # Commands holding a slot on the old semaphore release it there
+                    self.limits[cmdclass] = limit
+                    self.semaphores[cmdclass] = threading.BoundedSemaphore(limit)
+                self.counters.setdefault(cmdclass,{ 'acquired': 0, 'inflight': 0, 'waiting': 0, 'wait_total': 0.0, 'wait_max': 0.0, 'timeouts': 0, 'rejections': 0 })
+
+    def classify(self,cmd: str) -> str:
+        for cmdclass, regex in self.classes:
+            if regex.search(cmd):
+                return cmdclass
+        return 'write'
+
+    @contextmanager
+    def slot(self,cmd: str):
+        '''
+        Hold a slot of cmd's class for the duration of the block.\n
+        A thread already holding a slot ( e.g. a streamed parse issuing a lookup ) does not take a second one, so it cannot wait on itself.
+        '''
+        if getattr(self.local,'held',0):
+            self.local.held += 1
+            try:
+                yield None
+            finally:
+                self.local.held -= 1
+            return
+        cmdclass = self.classify(cmd)
+        semaphore = self.semaphores[cmdclass]
+        counters = self.counters[cmdclass]
+        with self.lock:
+            counters['waiting'] += 1
+        start = time.monotonic()
+        acquired = semaphore.acquire(timeout=self.timeout) if self.timeout is not None else semaphore.acquire()
+        waited = time.monotonic() - start
+        with self.lock:
+            counters['waiting'] -= 1
+            if not acquired:
+                counters['timeouts'] += 1
+            else:
+                counters['acquired'] += 1
+                counters['inflight'] += 1
+                counters['wait_total'] += waited
+                counters['wait_max'] = max(counters['wait_max'],waited)
+        if not acquired:
+            raise Exception(f"Timed out after {self.timeout}s waiting for a '{cmdclass}' command slot on storage {self.serial}, limit {self.limits[cmdclass]}")
+        self.local.held = 1
+        try:
+            yield cmdclass
+        finally:
+            self.local.held = 0
+            with self.lock:
+                counters['inflight'] -= 1
+            semaphore.release()
+
+    def waiter(self,cmdclass: str) -> concurrent.futures.ThreadPoolExecutor:
+        ''' The thread coroutines of cmdclass wait for a slot on, one per class so waiters are served in order '''
+        with self.lock:
+            if cmdclass not in self.waiters:
+                self.waiters[cmdclass] = concurrent.futures.ThreadPoolExecutor(max_workers=1,thread_name_prefix=f"governor-{self.serial}-{cmdclass}")
+            return self.waiters[cmdclass]
+
+    def waitslot(self,semaphore,deadline: float,abandoned: threading.Event) -> bool:
+        ''' Block on semaphore until it is acquired, deadline passes or the waiting coroutine is cancelled '''
+        while True:
+            wait = 1.0 if deadline is None else min(max(deadline - time.monotonic(),0),1.0)
+            if semaphore.acquire(timeout=wait):
+                if abandoned.is_set():
+                    semaphore.release()
+                    return False
+                return True
+            if abandoned.is_set() or (deadline is not None and time.monotonic() >= deadline):
+                return False
+
+    @asynccontextmanager
+    async def aslot(self,cmd: str):
+        '''
+        Awaitable slot for coroutines. The semaphores are shared with slot() so threads and coroutines\n
+        count against the same limits. A slot which is not free at once is waited for on the class's waiter thread,\n
+        not the event loop or its default executor which the commands holding slots may need to finish.\n
+        A coroutine already holding a slot ( and tasks it starts ) does not take a second one.
+        '''
+        if self.aheld.get():
+            yield None
+            return
+        cmdclass = self.classify(cmd)
+        semaphore = self.semaphores[cmdclass]
+        counters = self.counters[cmdclass]
+        with self.lock:
+            counters['waiting'] += 1
+        start = time.monotonic()
+        try:
+            acquired = semaphore.acquire(blocking=False)
+            if not acquired:
+                abandoned = threading.Event()
+                deadline = None if self.timeout is None else start + self.timeout
+                future = self.waiter(cmdclass).submit(self.waitslot,semaphore,deadline,abandoned)
+                try:
+                    acquired = await asyncio.wrap_future(future)
+                except asyncio.CancelledError:
+                    # A slot acquired as the coroutine was cancelled is given back
+                    abandoned.set()
+                    future.add_done_callback(lambda done: done.cancelled() or (done.result() and semaphore.release()))
+                    raise
+        finally:
+            with self.lock:
+                counters['waiting'] -= 1
+        waited = time.monotonic() - start
+        with self.lock:
+            if not acquired:
+                counters['timeouts'] += 1
+            else:
+                counters['acquired'] += 1
+                counters['inflight'] += 1
+                counters['wait_total'] += waited
+                counters['wait_max'] = max(counters['wait_max'],waited)
+        if not acquired:
+            raise Exception(f"Timed out after {self.timeout}s waiting for a '{cmdclass}' command slot on storage {self.serial}, limit {self.limits[cmdclass]}")
+        token = self.aheld.set(1)
+        try:
+            yield cmdclass
+        finally:
+            self.aheld.reset(token)
+            with self.lock:
+                counters['inflight'] -= 1
+            semaphore.release()
+
+    def rejected(self,cmd: str) -> None:
+        ''' Count an EX_CMDRJE returned by the storage '''
+        with self.lock:
+            self.counters[self.classify(cmd)]['rejections'] += 1
+        self.log.warning(f"Storage {self.serial} rejected '{self.classify(cmd)}' command (EX_CMDRJE), consider lowering its concurrency limit {self.limits}")
+
+    def metrics(self) -> dict:
+        with self.lock:
+            return { cmdclass: { 'limit': self.limits[cmdclass], **counters, 'wait_avg': counters['wait_total'] / counters['acquired'] if counters['acquired'] else 0.0 } for cmdclass, counters in self.counters.items() }
+
+
+class Governedexecutor(Executor):
+    '''
+    Run every command of another executor inside a Governor slot and count EX_CMDRJE rejections.\n
+    executor = Governedexecutor(Shellexecutor(),getgovernor(53511))
+    '''
+    rejected_returncode = 221
+
+    def __init__(self,executor: Executor,governor: Governor):
+        self.executor = executor
+        self.governor = governor
+
+    def checkrejected(self,cmd: str,stderr: str,returncode: int) -> None:
+        if returncode == self.rejected_returncode or 'EX_CMDRJE' in (stderr or ''):
+            self.governor.rejected(cmd)
+
+    def run(self,cmd: str) -> tuple:
+        with self.governor.slot(cmd):
+            stdout, stderr, returncode = self.executor.run(cmd)
+        self.checkrejected(cmd,stderr,returncode)
+        return stdout, stderr, returncode
+
+    async def arun(self,cmd: str) -> tuple:
+        async with self.governor.aslot(cmd):
+            stdout, stderr, returncode = await self.executor.arun(cmd)
+        self.checkrejected(cmd,stderr,returncode)
+        return stdout, stderr, returncode
+
+    def stream(self,cmd: str,cmdreturn: object):
+        with self.governor.slot(cmd):
+            yield from self.executor.stream(cmd,cmdreturn)
+        self.checkrejected(cmd,cmdreturn.stderr,cmdreturn.returncode)
+
+    def close(self):
+        self.executor.close()
+
+
+governors = {}
+governors_lock = threading.Lock()
+
+def getgovernor(serial: str,limits: dict=None,timeout: float=None,log=logging) -> Governor:
+    ''' The process wide Governor for serial, limits and timeout given here reconfigure it '''
+    with governors_lock:
+        governor = governors.get(str(serial))
+        if not governor:
+            governor = governors[str(serial)] = Governor(serial,limits,timeout,log)
+            return governor
+    if limits:
+        governor.configure(limits)
+    if timeout is not None:
+        governor.timeout = timeout
+    return governor
+
+def governedexecutor(executor: Executor,serial: str,limits: dict=None,timeout: float=None,log=logging) -> Executor:
+    ''' executor running inside serial's Governor, executors already governed are returned as they are '''
+    if serial is None or isinstance(executor,Governedexecutor):
+        return executor
+    return Governedexecutor(executor,getgovernor(serial,limits,timeout,log))
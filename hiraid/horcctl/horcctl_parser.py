@@ -1,4 +1,5 @@
 import logging 
+from ..datafilter import compilefilter
 
 class Horcctl_parser():
 
@@ -17,22 +18,8 @@ class Horcctl_parser():
             cmdreturn.headers = cmdreturn.header.split()
 
     def applyfilter(self,row,_filter):
-        if _filter:
-            for key, val in _filter.items():
-                if key not in row and not callable(val) :
-                    return False
-            for key, val in _filter.items():
-                if isinstance(val,str):
-                    if row[key] != val:
-                        return False
-                elif isinstance(val,list):
-                    if row[key] not in val:
-                        return False
-                elif callable(val):
-                    return val(row)
-                else:
-                    return False
-        return True
+        ''' Single row check, parsers compile the datafilter once with compilefilter '''
+        return compilefilter(_filter)(row)
 
     def showControlDeviceOfHorcm(self, cmdreturn: object, unitid: int):
         # Current control device = \\.\IPCMD-172.16.167.13-31001
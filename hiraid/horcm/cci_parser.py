@@ -1,4 +1,5 @@
 import logging 
+from ..datafilter import compilefilter
 
 class Cci_parser():
 
@@ -16,22 +17,8 @@ class Cci_parser():
             cmdreturn.headers = cmdreturn.header.split()
 
     def applyfilter(self,row,_filter):
-        if _filter:
-            for key, val in _filter.items():
-                if key not in row and not callable(val) :
-                    return False
-            for key, val in _filter.items():
-                if isinstance(val,str):
-                    if row[key] != val:
-                        return False
-                elif isinstance(val,list):
-                    if row[key] not in val:
-                        return False
-                elif callable(val):
-                    return val(row)
-                else:
-                    return False
-        return True
+        ''' Single row check, parsers compile the datafilter once with compilefilter '''
+        return compilefilter(_filter)(row)
 
     def raidqry(self, cmdreturn: object,datafilter: dict={}):
         self.initload(cmdreturn)
@@ -47,7 +34,7 @@ class Cci_parser():
             row = line.split()
             prefilter.append(dict(zip(cmdreturn.headers, row)))
         
-        cmdreturn.data = list(filter(lambda r: self.applyfilter(r,datafilter),prefilter))
+        cmdreturn.data = list(filter(compilefilter(datafilter),prefilter))
         createview(cmdreturn)
         return cmdreturn
 
@@ -7,6 +7,8 @@ import ast
 from hicciexceptions.cci_exceptions import *
 from hicciexceptions.cci_exceptions import cci_exceptions_table
 import re
+from ..executor import getexecutor
+from ..governor import governedexecutor
 
 def exception_string(cmdreturn):
     return json.dumps(ast.literal_eval(str(vars(cmdreturn))))
@@ -21,18 +23,19 @@ def return_cci_exception(cmdreturn):
         cmdreturn.cci_error = 'Unknown'
         return Exception
 
-def execute(cmd,log=logging,undocmds=[],acceptable_returns=[0],raise_err=True,**kwargs) -> object:
+def execute(cmd,log=logging,undocmds=[],acceptable_returns=[0],raise_err=True,executor=None,serial=None,**kwargs) -> object:
+    '''
+    Run cmd through executor, default the module default executor. With serial the command holds a slot of that serial's Governor.
+    '''
     cmdreturn = Cmdview(cmd=cmd)
     cmdreturn.expectedreturn = acceptable_returns
     log.info(f"Executing: {cmd}")
     log.debug(f"Acceptable return codes {acceptable_returns}")
-    proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, universal_newlines=True, shell=True)
-    cmdreturn.stdout, cmdreturn.stderr = proc.communicate()
-    cmdreturn.returncode = proc.returncode
+    cmdreturn.stdout, cmdreturn.stderr, cmdreturn.returncode = governedexecutor(executor or getexecutor(),serial,log=log).run(cmd)
     cmdreturn.executed = True
     
-    if proc.returncode and proc.returncode not in acceptable_returns:
-        log.error("Return > "+str(proc.returncode))
+    if cmdreturn.returncode and cmdreturn.returncode not in acceptable_returns:
+        log.error("Return > "+str(cmdreturn.returncode))
         log.error("Stdout > "+cmdreturn.stdout)
         log.error("Stderr > "+cmdreturn.stderr)
         if raise_err and cmdreturn.returncode not in acceptable_returns:
@@ -22,6 +22,10 @@ from datetime import datetime
 from ..historutils.historutils import Storcapunits as storagecaps
 from ..cmdview import Cmdview
 from .cci_parser import Cci_parser
+from .pairmonitor import Pairmonitor
+from .pairdisplay_parser import Pairdisplayparser, Raidvchkdspparser
+from ..executor import getexecutor
+from ..governor import governedexecutor
 
 try:
     from .horcm_template import default_template
@@ -52,9 +56,12 @@ class Cci():
     path: horcm binary path default = '/usr/bin'\n
     cciextension: '.sh' ( default ) | '.exe' ( windows )\n
     horcm_template_file: Use an alternate file as your horcm template rather than using the default_template.\n
+    executor: hiraid.executor.Executor used to run cci commands, default is the module default shell executor.\n
+    serial: storage serial, when given commands are bounded by the serial's process wide concurrency limits shared with Raidcom.\n
+    concurrency: limits per command class for serial's Governor e.g. {'get':8,'write':2}, concurrency_timeout seconds to wait for a slot.\n
     Add this horcm and see it break!! /etc/horcm21_tmp.conf
     '''
-    def __init__(self,log=logging,base_service_port: int=11000,horcm_dir: str='/etc',start: int=0,end: int=500,local_inst: str='even',path: str='/usr/bin/',cciextension: str='.sh',horcm_template_file: str=None,raise_err=True):
+    def __init__(self,log=logging,base_service_port: int=11000,horcm_dir: str='/etc',start: int=0,end: int=500,local_inst: str='even',path: str='/usr/bin/',cciextension: str='.sh',horcm_template_file: str=None,raise_err=True,executor=None,serial=None,concurrency: dict=None,concurrency_timeout: float=None):
         
         self.log = log
         self.horcm_template_file = horcm_template_file
@@ -72,7 +79,10 @@ class Cci():
         self.cciextension = cciextension
         self.undocmds = []
         self.parser = Cci_parser(log=self.log)
+        self.pairdisplayparsers = {}
         self.raise_err = raise_err
+        self.serial = serial
+        self.executor = governedexecutor(executor or getexecutor(),serial,limits=concurrency,timeout=concurrency_timeout,log=self.log)
 
     def now(self,format='%d-%m-%Y_%H.%M.%S'):
         return datetime.now().strftime(format)
@@ -96,7 +106,7 @@ class Cci():
 
     def raidqry(self, inst: int, acceptable_returns:list=[0], **kwargs):
         cmd = '{}raidqry -l -I{}'.format(self.path,inst)
-        cmdreturn = cci_execute(cmd,log=self.log,acceptable_returns=acceptable_returns,raise_err=self.raise_err)
+        cmdreturn = cci_execute(cmd,log=self.log,acceptable_returns=acceptable_returns,raise_err=self.raise_err,executor=self.executor)
         if cmdreturn.returncode in acceptable_returns:
             self.parser.raidqry(cmdreturn,datafilter=kwargs.get('datafilter',{}))
         
@@ -105,13 +115,13 @@ class Cci():
     def horcmshutdown(self, inst: int, acceptable_returns:list=[0], **kwargs):
         self.log.info(f'Shutdown horcm instance {inst}')
         cmd = f'{self.path}horcmshutdown{self.cciextension} {inst}'
-        cmdreturn = cci_execute(cmd,log=self.log,acceptable_returns=acceptable_returns,raise_err=self.raise_err)
+        cmdreturn = cci_execute(cmd,log=self.log,acceptable_returns=acceptable_returns,raise_err=self.raise_err,executor=self.executor)
         return cmdreturn
     
     def horcmstart(self, inst: int, acceptable_returns:list=[0], **kwargs):
         self.log.info(f'Start horcm instance {inst}')
         cmd = f'{self.path}horcmstart{self.cciextension} {inst}'
-        cmdreturn = cci_execute(cmd,log=self.log,acceptable_returns=acceptable_returns,raise_err=self.raise_err)
+        cmdreturn = cci_execute(cmd,log=self.log,acceptable_returns=acceptable_returns,raise_err=self.raise_err,executor=self.executor)
         return cmdreturn
     
     def Xhorcmstart(self,inst):
@@ -299,16 +309,14 @@ class Cci():
 
         self.log.info(f"Executing: {cmd}")
         self.log.debug(f"Acceptable return codes {acceptable_returns}")
-        proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, universal_newlines=True, shell=True)
-        cmdreturn.stdout, cmdreturn.stderr = proc.communicate()
-        cmdreturn.returncode = proc.returncode
+        cmdreturn.stdout, cmdreturn.stderr, cmdreturn.returncode = self.executor.run(cmd)
         cmdreturn.executed = True
         
-        if proc.returncode and proc.returncode not in acceptable_returns:
-            self.log.error("Return > "+str(proc.returncode))
+        if cmdreturn.returncode and cmdreturn.returncode not in acceptable_returns:
+            self.log.error("Return > "+str(cmdreturn.returncode))
             self.log.error("Stdout > "+cmdreturn.stdout)
             self.log.error("Stderr > "+cmdreturn.stderr)
-            message = {'return':proc.returncode,'stdout':cmdreturn.stdout, 'stderr':cmdreturn.stderr }
+            message = {'return':cmdreturn.returncode,'stdout':cmdreturn.stdout, 'stderr':cmdreturn.stderr }
             #raise Exception(f"Unable to execute Command '{cmd}'. Command dump > {message}")
             if raise_err:
                 raise Exception(f"{message}")
@@ -426,7 +434,8 @@ class Cci():
         cmd = '{}pairdisplay -g {} -I{}{} {} -fce -CLI'.format(self.path,group,mode,inst,opts)
         stdout, stderr, cmdreturn = self.execute(cmd)
         pairdisplayout = [row.strip() for row in list(filter(None,stdout.split('\n')))]
-        pairdisplaydata = self.parse_pairdisplay(pairdisplayout)
+        parser = self.pairdisplayparsers.setdefault((inst,group,mode,opts),Pairdisplayparser(hexldev=bool(re.search(r'-f\w*x',opts))))
+        pairdisplaydata = self.parse_pairdisplay(pairdisplayout,parser=parser)
         self.pairdisplay_include_capacities(pairdisplaydata,volume_capacities)
         pairdisplayx = self.print_pairdisplay(pairdisplaydata,print_pairdisplay=print_pairdisplay)
 
@@ -459,21 +468,17 @@ class Cci():
             
         return rows
 
-    def parse_pairdisplay(self,pairdisplay: list) -> dict:
+    def parse_pairdisplay(self,pairdisplay: list,parser: Pairdisplayparser=None) -> dict:
         '''
-        Returns dictionary of parsed pairdisplay:
-        { Group: { PairVol: { L/R: { heading:data } } } }
+        Returns dictionary of parsed pairdisplay, -CLI or default layout, header line first:
+        { 'pairs': { Group: { PairVol: { L/R: { heading:data } } } }, 'index': { (Seq#, LDEV#): row }, 'changes': { 'changed', 'added', 'removed' } }
+        parser: the Pairdisplayparser of a previous parse of the same group, changes are then relative to that parse
         '''
-        headings = pairdisplay.pop(0).split()
-        view = { 'pairs': {} }
-        for line in pairdisplay:
-            sline = line.split()
-            if len(sline) != len(headings): raise("header and data length mismatch")
-            data = {head:item for item,head in zip(sline,headings)}
-            view['pairs'][data['Group']] = view['pairs'].get(data['Group'],{})
-            view['pairs'][data['Group']][data['PairVol']] = view['pairs'][data['Group']].get(data['PairVol'],{})
-            view['pairs'][data['Group']][data['PairVol']][data['L/R']] = data
-
+        parser = parser or Pairdisplayparser()
+        parsed, changes = parser.update(pairdisplay)
+        view = parsed.view()
+        view['index'] = parsed.index
+        view['changes'] = changes
         return view
         
 
@@ -496,46 +501,56 @@ class Cci():
         return { 'return':returns, 'messages':messages }
                         
 
-    def pairmonitor(self, inst: int, groups: str, mode: str='', considered_complete_percent: int=100, acceptable_states: list=[], interval_seconds: int=40, timeout_seconds=8000,volume_capacities: dict={}):
+    def pairmonitor(self, inst: int, groups: str, mode: str='', considered_complete_percent: int=100, acceptable_states: list=[], interval_seconds: int=40, timeout_seconds=8000,volume_capacities: dict={},stall_seconds: int=600):
         '''
         Normally pairevtwait and pairvolchk would be tools of choice for checking pair status but there are situations where the pairs can be in differing states.
         Take GAD-on-GAD migration for example. Some pairs have to be in COPY but some of the migrating volumes might be in PAIR because they are not in GAD at source.
         acceptable_states: list=['PAIR','COPY']
+        Groups are checked from one Pairmonitor loop, each at most every interval_seconds and sooner as its smoothed ETA nears.
+        With volume_capacities the copy throughput is tracked in GB, pairs whose % does not move for stall_seconds are logged as stalled.
         '''
-        completed = False
-        iterations = int(timeout_seconds / interval_seconds)
-        iterated = 0
-
-        while not completed and iterated < iterations:
-            all_complete = True
-            if iterated and not completed: time.sleep(interval_seconds)
-            for group in groups:
-                pairdisplay = self.pairdisplayx(inst=inst,group=group,mode=mode,volume_capacities=volume_capacities)
-                for group in pairdisplay['pairdisplaydata']['pairs']:
-                    for pairvol in pairdisplay['pairdisplaydata']['pairs'][group]:
-                        
-                        data = pairdisplay['pairdisplaydata']['pairs'][group][pairvol]['L']
-                        local_percentage_pass = False
-                        accept_state = False
-                        percent = (0,pairdisplay['pairdisplaydata']['pairs'][group][pairvol]['L']['%'])[data['%'] != "-"]
-                        if int(percent) >= int(considered_complete_percent):
-                            pairdisplay['pairdisplaydata']['pairs'][data['Group']][data['PairVol']][data['L/R']]['percent_completed'] = True
-                        else:
-                            all_complete = False
-                            
-                        if len(acceptable_states):    
-                            for local_remote in pairdisplay['pairdisplaydata']['pairs'][group][pairvol]:
-                                if pairdisplay['pairdisplaydata']['pairs'][group][pairvol][local_remote]['Status'] in acceptable_states:
-                                    pairdisplay['pairdisplaydata']['pairs'][data['Group']][data['PairVol']][data['L/R']]['acceptable_state'] = True
-                                else:
-                                    all_complete = False                         
-            completed = all_complete
-            print(f"Iteration: {iterated+1} of {iterations} completed {completed}\n")
-            self.log.info(f"Iteration: {iterated+1} of {iterations}")
-            iterated += 1
-        
+        def progress(group):
+            pairdisplay = self.pairdisplayx(inst=inst,group=group,mode=mode,volume_capacities=volume_capacities)
+            for key, (old, new) in pairdisplay['pairdisplaydata']['changes']['changed'].items():
+                self.log.debug(f"Group '{group}' Seq# {key[0]} LDEV# {key[1]} {old['Status']} {old['%']}% -> {new['Status']} {new['%']}%")
+            return self.pairprogress(pairdisplay['pairdisplaydata'],considered_complete_percent,acceptable_states)
+
+        monitor = Pairmonitor(log=self.log,min_interval=min(5,interval_seconds),max_interval=interval_seconds,stall_seconds=stall_seconds)
+        for group in groups:
+            monitor.watch(group,progress=progress)
+        results = monitor.run(timeout=timeout_seconds)
+        monitor.close()
+        completed = all(result['completed'] for result in results.values())
+        self.log.info(f"Pair monitor completed {completed} {({ group: result['percent'] for group, result in results.items() })}")
+        for group, result in results.items():
+            if result['stalled']:
+                self.log.warning(f"Group '{group}' stalled pairs {result['stalledpairs']}")
         return completed
 
+    def pairprogress(self,pairdisplaydata: dict,considered_complete_percent: int=100,acceptable_states: list=[]) -> tuple:
+        '''
+        ( { 'group/pairvol': { 'percent', 'gb' } }, complete ) for parsed pairdisplay data, gb is the local capacity when pairdisplay_include_capacities\n
+        added it. Complete when every local % reaches considered_complete_percent and, given acceptable_states, every local and remote Status is one of them.\n
+        Pairs are flagged percent_completed / acceptable_state.
+        '''
+        complete, samples = True, {}
+        for group in pairdisplaydata['pairs']:
+            for pairvol in pairdisplaydata['pairs'][group]:
+                pair = pairdisplaydata['pairs'][group][pairvol]
+                data = pair['L']
+                percent = (0,data['%'])[data['%'] != "-"]
+                samples[f"{group}/{pairvol}"] = { 'percent': int(percent), 'gb': data['GB'] if isinstance(data.get('GB'),(int,float)) else None }
+                if int(percent) >= int(considered_complete_percent):
+                    data['percent_completed'] = True
+                else:
+                    complete = False
+                if len(acceptable_states):
+                    if all(pair[local_remote]['Status'] in acceptable_states for local_remote in pair):
+                        data['acceptable_state'] = True
+                    else:
+                        complete = False
+        return (samples or None), complete
+
     def pairvolchk(self, inst: int, group: str, expectedreturn: int, device: str=None, opts: str='') -> dict:
         '''
         inst: horcm_inst
@@ -603,43 +618,20 @@ class Cci():
         cmd = '{}raidvchkdsp -g {} {} {} -I{}{} {}'.format(self.path,group,device,operation,mode,inst,opts)
         stdout, stderr, cmdreturn = self.execute(cmd)
         raidvchkdsplayout = [row.strip() for row in list(filter(None,stdout.split('\n')))]
-        raidvchkdspdata = self.parse_raidvchkdsp(raidvchkdsplayout)
+        raidvchkdspdata = self.parse_raidvchkdsp(raidvchkdsplayout,hexldev=bool(re.search(r'-f\w*x',opts)))
         return { 'stdout':stdout, 'stderr':stderr, 'cmdreturn':cmdreturn, 'raidvchkdspdata':raidvchkdspdata }
     
-    def parse_raidvchkdsp(self,raidvchkdsp: list) -> dict:
+    def parse_raidvchkdsp(self,raidvchkdsp: list,hexldev: bool=False) -> dict:
         '''
-        TODO THIS IS BROKEN
         Group	PairVol   Port#  TID  LU  Seq# LDEV# GI-C-R-W-S  PI-C-R-W-S  R-Time
         HUR	HUR1     CL1-A-11  0    0 612239   102  E E E E E   E E E E E       0
-        Returns dictionary of parsed raidvchkdsp:
-        { Group: { PairVol: { Port#: { heading:data } } } }
+        Returns dictionary of parsed raidvchkdsp, the flag headings split into GI GC GR GW GS and PI PC PR PW PS:
+        { 'pairs': { Group: { PairVol: { heading:data } } }, 'index': { (Seq#, LDEV#): row } }
         '''
-        headings = raidvchkdsp.pop(0).split()
-        stringExistsAtPosition = headings.index('GI-C-R-W-S')
-        if (stringExistsAtPosition != -1):
-            #'GI-C-R-W-S' and we need to split this
-            headings[stringExistsAtPosition] = 'GI'
-            headings.insert(stringExistsAtPosition+1,'GS')
-            headings.insert(stringExistsAtPosition+1,'GW')
-            headings.insert(stringExistsAtPosition+1,'GR')
-            headings.insert(stringExistsAtPosition+1,'GC')
-        stringExistsAtPosition = headings.index('PI-C-R-W-S')
-        if (stringExistsAtPosition != -1):
-            #'PI-C-R-W-S' and we need to split this
-            headings[stringExistsAtPosition] = 'PI'
-            headings.insert(stringExistsAtPosition+1,'PS')
-            headings.insert(stringExistsAtPosition+1,'PW')
-            headings.insert(stringExistsAtPosition+1,'PR')
-            headings.insert(stringExistsAtPosition+1,'PC')
-        view = { 'pairs': {} }
-        for line in raidvchkdsp:
-            sline = line.split()
-            if len(sline) != len(headings): raise("header and data length mismatch")
-            data = {head:item for item,head in zip(sline,headings)}
-            view['pairs'][data['Group']] = view['pairs'].get(data['Group'],{})
-            view['pairs'][data['Group']][data['PairVol']] = view['pairs'][data['Group']].get(data['PairVol'],{})
-            #view['pairs'][data['Group']][data['PairVol']][data['Port#']] = data
-            view['pairs'][data['Group']][data['PairVol']] = data
+        rows, index = Raidvchkdspparser(hexldev=hexldev).parse(raidvchkdsp)
+        view = { 'pairs': {}, 'index': index }
+        for row in rows:
+            view['pairs'].setdefault(row['Group'],{})[row['PairVol']] = row
         return view
     
     def pairevtwaitexec(self,cmd):
@@ -667,19 +659,18 @@ class Cci():
     def execute(self,cmd,expectedreturn=0):
         self.log.info(f"Executing: {cmd}")
         self.log.debug(f"Expecting return code {expectedreturn}")
-        proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, universal_newlines=True, shell=True)
-        stdout, stderr = proc.communicate()
-        self.log.info(f"Return Code: {proc.returncode}")
+        stdout, stderr, returncode = self.executor.run(cmd)
+        self.log.info(f"Return Code: {returncode}")
   
-        if proc.returncode and proc.returncode != expectedreturn and expectedreturn is not None:
+        if returncode and returncode != expectedreturn and expectedreturn is not None:
             #self.log.error("Return > "+str(proc.returncode))
             #self.log.error("Stdout > "+stdout.strip())
             #self.log.error("Stderr > "+stderr.strip())
-            message = {"return":proc.returncode,"stdout":stdout, "stderr":stderr, "cmd":cmd }
+            message = {"return":returncode,"stdout":stdout, "stderr":stderr, "cmd":cmd }
             #raise Exception('Unable to execute Command "{}". Command dump > {}'.format(cmd,message))
             
             raise Exception(message)
-        return stdout, stderr, proc.returncode
+        return stdout, stderr, returncode
 
 if __name__ == "__main__":
 
@@ -0,0 +1,159 @@
+import re
+from ..records import rowfactory
+
+def rowkey(row,hexldev: bool=False) -> tuple:
+    ''' (Seq#, LDEV#) as int, LDEV# decimal, the reported strings when either is not a number e.g. ---- '''
+    try:
+        return int(row['Seq#']), int(row['LDEV#'],16) if hexldev else int(row['LDEV#'])
+    except ValueError:
+        return row['Seq#'], row['LDEV#']
+
+class Pairdisplay():
+    '''
+    One parsed pairdisplay.\n
+    rows: row records in output order, one per L/R line\n
+    index: { (Seq#, LDEV#): row } with both as int, LDEV# decimal even with -fx\n
+    view(): { 'pairs': { Group: { PairVol: { L/R: row } } } } as returned by Cci.parse_pairdisplay\n
+    headings: the column names, the same for -CLI and default output
+    '''
+    def __init__(self,headings: tuple,rows: list,index: dict):
+        self.headings = headings
+        self.rows = rows
+        self.index = index
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def view(self) -> dict:
+        view = { 'pairs': {} }
+        for row in self.rows:
+            view['pairs'].setdefault(row['Group'],{}).setdefault(row['PairVol'],{})[row['L/R']] = row
+        return view
+
+class Pairdisplayparser():
+    '''
+    pairdisplay parser for the -CLI and the default ( punctuated ) layouts with any of -fc, -fx, -fe, -fcxe.\n
+    parser = Pairdisplayparser()\n
+    pairdisplay = parser.parse(stdout)      -> Pairdisplay, stdout or a list of lines with the header first\n
+    pairdisplay.index[(64034,400)]['Status']\n
+    changes = parser.diff(pairdisplay)      -> { 'changed': { key: (old,new) }, 'added': { key: new }, 'removed': { key: old } }\n
+    The parser keeps the previous parse: lines identical to one already parsed reuse its row without splitting it again and diff()\n
+    compares Status and % of the rows that did change. Keep one parser per horcm instance and group being monitored.\n
+    The default layout is reduced to the -CLI columns, e.g. oradb1(L) (CL1-A-0, 0, 0)64034  400.P-VOL COPY NEVER ,  45  500 -\n
+    gives PairVol oradb1, L/R L, Port# CL1-A-0, TID 0, LU 0, Seq# 64034, LDEV# 400, P/S P-VOL. A repeated Seq# heading ( the\n
+    partner serial without -fc ) is named P-Seq#.
+    '''
+    punctuation = re.compile(r'[(),]')
+    diffkeys = ('Status','%')
+
+    def __init__(self,hexldev: bool=False,compact: bool=True):
+        self.hexldev = hexldev
+        self.compact = compact
+        self.previous = None
+        self.lastheadings = None
+        self.lines = {}
+
+    def tokens(self,line: str,split: int=None) -> list:
+        ''' Whitespace tokens with the default layout punctuation removed, token split holds LDEV#.P/S '''
+        tokens = self.punctuation.sub(' ',line).split()
+        if split is not None and split < len(tokens) and '.' in tokens[split]:
+            tokens[split:split + 1] = tokens[split].rsplit('.',1)
+        return tokens
+
+    def headings(self,header: str) -> tuple:
+        headings, split, seen = [], None, set()
+        for position, heading in enumerate(self.punctuation.sub(' ',header).split()):
+            if heading == 'LDEV#.P/S':
+                split = position
+                headings += ['LDEV#','P/S']
+                continue
+            if heading in seen:
+                heading = f"P-{heading}"
+            seen.add(heading)
+            headings.append(heading)
+        if not {'Group','PairVol','L/R','Seq#','LDEV#'}.issubset(headings):
+            raise Exception(f"Not a pairdisplay header: '{header}'")
+        return tuple(headings), split
+
+    def parse(self,pairdisplay) -> Pairdisplay:
+        lines = pairdisplay.split('\n') if isinstance(pairdisplay,str) else pairdisplay
+        lines = [line.strip() for line in lines if line and line.strip()]
+        if not lines:
+            return Pairdisplay((),[],{})
+        headings, split = self.headings(lines[0])
+        if headings != self.lastheadings:
+            self.lines, self.lastheadings = {}, headings
+        createrow = rowfactory(headings,compact=self.compact)
+        rows, index, parsed = [], {}, {}
+        for line in lines[1:]:
+            row = self.lines.get(line)
+            if row is None:
+                values = self.tokens(line,split)
+                if len(values) != len(headings):
+                    raise Exception(f"pairdisplay header and data length mismatch, {len(headings)} headings {len(values)} values: '{line}'")
+                row = createrow(values)
+            parsed[line] = row
+            rows.append(row)
+            index[rowkey(row,self.hexldev)] = row
+        self.lines = parsed
+        return Pairdisplay(headings,rows,index)
+
+    def diff(self,pairdisplay: Pairdisplay) -> dict:
+        ''' Pairs whose Status or % changed since the previous diff, added and removed pairs, keyed by (Seq#, LDEV#) '''
+        previous = self.previous.index if self.previous is not None else {}
+        changes = { 'changed': {}, 'added': {}, 'removed': {} }
+        for key, row in pairdisplay.index.items():
+            old = previous.get(key)
+            if old is None:
+                changes['added'][key] = row
+            elif old is not row and any(old.get(field) != row.get(field) for field in self.diffkeys):
+                changes['changed'][key] = (old,row)
+        for key, old in previous.items():
+            if key not in pairdisplay.index:
+                changes['removed'][key] = old
+        self.previous = pairdisplay
+        return changes
+
+    def update(self,pairdisplay) -> tuple:
+        ''' parse() then diff(), returns ( Pairdisplay, changes ) '''
+        parsed = self.parse(pairdisplay)
+        return parsed, self.diff(parsed)
+
+class Raidvchkdspparser():
+    '''
+    raidvchkdsp parser, the GI-C-R-W-S and PI-C-R-W-S flag headings are split into one column per flag ( GI GC GR GW GS ... )\n
+    Group PairVol Port# TID LU Seq# LDEV# GI-C-R-W-S PI-C-R-W-S R-Time\n
+    HUR HUR1 CL1-A-11 0 0 612239 102 E E E E E E E E E E 0\n
+    parse(lines) -> ( rows, { (Seq#, LDEV#): row } )
+    '''
+    def __init__(self,hexldev: bool=False,compact: bool=True):
+        self.hexldev = hexldev
+        self.compact = compact
+
+    def headings(self,header: str) -> tuple:
+        headings = []
+        for heading in header.split():
+            flags = heading.split('-')
+            if len(flags) > 2 and all(len(flag) == 1 for flag in flags[1:]):
+                # GI-C-R-W-S -> GI GC GR GW GS
+                headings += [flags[0]] + [flags[0][0] + flag for flag in flags[1:]]
+            else:
+                headings.append(heading)
+        return tuple(headings)
+
+    def parse(self,raidvchkdsp) -> tuple:
+        lines = raidvchkdsp.split('\n') if isinstance(raidvchkdsp,str) else raidvchkdsp
+        lines = [line.strip() for line in lines if line and line.strip()]
+        if not lines:
+            return [], {}
+        headings = self.headings(lines[0])
+        createrow = rowfactory(headings,compact=self.compact)
+        rows, index = [], {}
+        for line in lines[1:]:
+            values = line.split()
+            if len(values) != len(headings):
+                raise Exception(f"raidvchkdsp header and data length mismatch, {len(headings)} headings {len(values)} values: '{line}'")
+            row = createrow(values)
+            rows.append(row)
+            index[rowkey(row,self.hexldev)] = row
+        return rows, index
@@ -0,0 +1,248 @@
+import os
+import re
+import time
+import logging
+import selectors
+from collections import deque
+from collections.abc import Mapping
+
+class Copyprogress():
+    '''
+    Time series of copy % and replicated GB per pair and per group, with a smoothed copy rate, ETA and stall flag.\n
+    tracker = Copyprogress(alpha=0.3,stall_seconds=600)\n
+    tracker.record('grp1',{ 'grp1/vol1': { 'percent': 45, 'gb': 1024 }, 'grp1/vol2': { 'percent': 80, 'gb': 512 } })\n
+    tracker.status('grp1')      -> { 'percent', 'repgb', 'totalgb', 'rate', 'throughput', 'eta', 'stalled', 'stalledpairs', 'samples' }\n
+    tracker.pairstatus('grp1')  -> { pair: { 'percent', 'repgb', 'rate', 'throughput', 'eta', 'stalled' } }\n
+    rate is %/s and throughput GB/s, both an exponentially weighted moving average of the change between samples. gb is the pair capacity, when it is\n
+    known the group % is capacity weighted. The group eta is that of its slowest pair, None while any incomplete pair is not moving.\n
+    A pair is stalled when its % has not changed for stall_seconds.
+    '''
+    def __init__(self,alpha: float=0.3,stall_seconds: float=600,history: int=720):
+        self.alpha = alpha
+        self.stall_seconds = stall_seconds
+        self.history = history
+        self.groups = {}
+        self.pairs = {}
+
+    def newseries(self) -> dict:
+        return { 'samples': deque(maxlen=self.history), 'rate': None, 'throughput': None, 'changed': None, 'eta': None, 'stalled': False }
+
+    def update(self,series: dict,at: float,percent: float,repgb) -> dict:
+        samples = series['samples']
+        if samples:
+            last, lastpercent, lastrepgb = samples[-1]
+            elapsed = at - last
+            if elapsed > 0:
+                series['rate'] = self.smooth(series['rate'],(percent - lastpercent) / elapsed)
+                if repgb is not None and lastrepgb is not None:
+                    series['throughput'] = self.smooth(series['throughput'],(repgb - lastrepgb) / elapsed)
+            if percent != lastpercent:
+                series['changed'] = at
+        else:
+            series['changed'] = at
+        samples.append((at,percent,repgb))
+        if percent >= 100:
+            series['eta'], series['stalled'] = 0, False
+        else:
+            series['eta'] = (100 - percent) / series['rate'] if series['rate'] and series['rate'] > 0 else None
+            series['stalled'] = at - series['changed'] >= self.stall_seconds
+        return series
+
+    def smooth(self,average,value: float) -> float:
+        return value if average is None else self.alpha * value + (1 - self.alpha) * average
+
+    def record(self,group: str,samples: dict,at: float=None) -> dict:
+        ''' samples: { pair: { 'percent': %, 'gb': pair capacity or None } } from one pairdisplay of group, returns status(group) '''
+        at = time.monotonic() if at is None else at
+        percents, totalgb, repgb = [], 0, 0
+        for pair, sample in samples.items():
+            percent = float(sample.get('percent') or 0)
+            gb = sample.get('gb')
+            pairrepgb = gb * percent / 100 if gb is not None else None
+            self.update(self.pairs.setdefault(group,{}).setdefault(pair,self.newseries()),at,percent,pairrepgb)
+            percents.append(percent)
+            if gb:
+                totalgb += gb
+                repgb += pairrepgb
+        if not percents:
+            return self.status(group)
+        percent = repgb / totalgb * 100 if totalgb else sum(percents) / len(percents)
+        series = self.update(self.groups.setdefault(group,self.newseries()),at,percent,repgb if totalgb else None)
+        series['totalgb'] = totalgb or None
+        return self.status(group)
+
+    def pairstatus(self,group: str) -> dict:
+        return { pair: self.summary(series) for pair, series in self.pairs.get(group,{}).items() }
+
+    def summary(self,series: dict) -> dict:
+        at, percent, repgb = series['samples'][-1]
+        return { 'percent': percent, 'repgb': repgb, 'rate': series['rate'], 'throughput': series['throughput'], 'eta': series['eta'], 'stalled': series['stalled'] }
+
+    def status(self,group: str) -> dict:
+        series = self.groups.get(group)
+        if series is None:
+            return None
+        status = self.summary(series)
+        pairs = self.pairs.get(group,{}).values()
+        etas = [pair['eta'] for pair in pairs]
+        status['eta'] = None if None in etas else max(etas,default=None)
+        status['stalledpairs'] = [pair for pair, pairseries in self.pairs.get(group,{}).items() if pairseries['stalled']]
+        status['stalled'] = bool(status['stalledpairs'])
+        status['totalgb'] = series.get('totalgb')
+        status['samples'] = len(series['samples'])
+        return status
+
+    def series(self,group: str,pair: str=None) -> list:
+        ''' [(monotonic time, %, replicated GB)] for group, or for one of its pairs '''
+        series = self.groups.get(group) if pair is None else self.pairs.get(group,{}).get(pair)
+        return list(series['samples']) if series else []
+
+class Pairmonitor():
+    '''
+    Wait for many copy groups at once from a single loop.\n
+    monitor = Pairmonitor(log=log,min_interval=5,max_interval=120)\n
+    monitor.watch('grp1',proc=cci.pairevtwaitexec('pairevtwait -g grp1 -I10 -s pair -t 8000'),progress=progress,oncomplete=done)\n
+    monitor.watch('grp2',progress=progress)     -> no pairevtwait, complete when progress reports it\n
+    results = monitor.run(timeout=8000)         -> { group: { 'group', 'returncode', 'completed', 'timedout', 'percent', 'eta', 'rate', 'throughput', 'stalled', 'stalledpairs', 'elapsed', 'output' } }\n
+    pairevtwait children are multiplexed with a selector on their output pipes and complete when they exit.\n
+    progress(group) -> ( percent or { pair: { 'percent', 'gb' } }, complete ) is called at most once per group interval, e.g. one pairdisplay.\n
+    Each answer is recorded in monitor.copyprogress ( Copyprogress ), whose smoothed ETA sets the interval: about half the time left,\n
+    between min_interval and max_interval. The interval doubles up to max_interval while the copy has no rate or is stalled.\n
+    monitor.status(group) is the current percent, rate, throughput, ETA and stall flag of a group.\n
+    oncomplete(group,result) is called as each group completes or times out.
+    '''
+    tick = 1
+
+    def __init__(self,log=logging,min_interval: float=5,max_interval: float=120,alpha: float=0.3,stall_seconds: float=600):
+        self.log = log
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.copyprogress = Copyprogress(alpha=alpha,stall_seconds=stall_seconds)
+        self.watches = {}
+        self.selector = selectors.DefaultSelector()
+
+    def watch(self,group: str,proc=None,progress=None,oncomplete=None,timeout: float=None) -> None:
+        '''
+        group: copy group name, the key of the results\n
+        proc: subprocess.Popen of pairevtwait with stdout=PIPE, the group completes when it exits\n
+        progress: callable(group) -> ( percent or { pair: { 'percent', 'gb' } } or None, complete ), without proc the group completes when complete is True\n
+        oncomplete: callable(group,result)\n
+        timeout: seconds for this group, defaults to run(timeout)
+        '''
+        if proc is None and progress is None:
+            raise Exception(f"Nothing to watch for group {group}, pass a pairevtwait proc, a progress callable or both")
+        now = time.monotonic()
+        watch = { 'group': group, 'proc': proc, 'progress': progress, 'oncomplete': oncomplete, 'timeout': timeout, 'start': now,
+                  'interval': self.min_interval, 'nextpoll': now, 'lastpoll': None, 'percent': None, 'stalled': False, 'output': [], 'selected': False, 'result': None }
+        if proc is not None and proc.stdout is not None:
+            try:
+                self.selector.register(proc.stdout,selectors.EVENT_READ,watch)
+                watch['selected'] = True
+            except (ValueError,OSError):
+                # Pipes cannot be selected on every platform, the process is polled every tick instead
+                pass
+        self.watches[group] = watch
+
+    def pending(self) -> list:
+        return [watch for watch in self.watches.values() if watch['result'] is None]
+
+    def complete(self,watch: dict,returncode=None,completed: bool=True,timedout: bool=False) -> None:
+        if watch['selected']:
+            self.selector.unregister(watch['proc'].stdout)
+            watch['selected'] = False
+        status = self.status(watch['group']) or {}
+        result = { 'group': watch['group'], 'returncode': returncode, 'completed': completed, 'timedout': timedout, 'percent': watch['percent'],
+                   'eta': status.get('eta'), 'rate': status.get('rate'), 'throughput': status.get('throughput'), 'stalled': status.get('stalled',False),
+                   'stalledpairs': status.get('stalledpairs',[]), 'elapsed': time.monotonic() - watch['start'], 'output': b''.join(watch['output']).decode(errors='replace') }
+        watch['result'] = result
+        self.log.info(f"Group '{watch['group']}' {('did not complete','completed')[completed]}{('',' timed out')[timedout]} returncode {returncode} after {round(result['elapsed'],1)}s")
+        if watch['oncomplete']:
+            watch['oncomplete'](watch['group'],result)
+
+    def readable(self,watch: dict) -> None:
+        ''' Drain a pairevtwait pipe, end of file is the process exiting '''
+        data = os.read(watch['proc'].stdout.fileno(),65536)
+        if data:
+            watch['output'].append(data)
+            return
+        returncode = watch['proc'].wait()
+        self.complete(watch,returncode=returncode,completed=not returncode)
+
+    def status(self,group: str) -> dict:
+        return self.copyprogress.status(group)
+
+    def nextinterval(self,watch: dict,status: dict) -> float:
+        ''' Poll sooner as the copy approaches completion at its smoothed rate, back off while it has no rate or is stalled '''
+        if status is None or status['eta'] is None or status['stalled']:
+            return min(watch['interval'] * 2,self.max_interval) if watch['lastpoll'] is not None else watch['interval']
+        return max(self.min_interval,min(status['eta'] / 2,self.max_interval))
+
+    def poll(self,watch: dict,now: float) -> None:
+        group = watch['group']
+        try:
+            progress, completed = watch['progress'](group)
+        except Exception as e:
+            self.log.warning(f"Progress check for group '{group}' failed: {e}")
+            progress, completed = None, False
+        status = None
+        if isinstance(progress,Mapping):
+            status = self.copyprogress.record(group,progress,now)
+        elif progress is not None:
+            status = self.copyprogress.record(group,{ group: { 'percent': progress } },now)
+        watch['interval'] = self.nextinterval(watch,status)
+        watch['lastpoll'], watch['nextpoll'] = now, now + watch['interval']
+        if status is not None:
+            watch['percent'] = status['percent']
+            if status['stalled'] and not watch['stalled']:
+                self.log.warning(f"Group '{group}' copy stalled, no progress for {self.copyprogress.stall_seconds}s on pairs {status['stalledpairs']}")
+            watch['stalled'] = status['stalled']
+            eta = 'unknown' if status['eta'] is None else f"{round(status['eta'])}s"
+            throughput = '' if status['throughput'] is None else f", {round(status['throughput'] * 1024,1)} MB/s"
+            self.log.info(f"Group '{group}' {round(status['percent'],1)}% eta {eta}{throughput}, next progress check in {round(watch['interval'],1)}s")
+        if completed and watch['proc'] is None:
+            self.complete(watch)
+
+    def run(self,timeout: float=None) -> dict:
+        ''' Block until every watched group has completed or timed out, returns { group: result } '''
+        for watch in self.watches.values():
+            if watch['timeout'] is None:
+                watch['timeout'] = timeout
+        while self.pending():
+            now = time.monotonic()
+            for watch in self.pending():
+                if watch['timeout'] is not None and now - watch['start'] > watch['timeout']:
+                    if watch['proc'] is not None and watch['proc'].poll() is None:
+                        watch['proc'].kill()
+                        watch['proc'].wait()
+                    self.complete(watch,returncode=watch['proc'] and watch['proc'].returncode,completed=False,timedout=True)
+                elif watch['proc'] is not None and not watch['selected'] and watch['proc'].poll() is not None:
+                    self.complete(watch,returncode=watch['proc'].returncode,completed=not watch['proc'].returncode)
+                elif watch['progress'] is not None and now >= watch['nextpoll']:
+                    self.poll(watch,now)
+            pending = self.pending()
+            if not pending:
+                break
+            wake = [watch['nextpoll'] for watch in pending if watch['progress'] is not None]
+            wake += [watch['start'] + watch['timeout'] for watch in pending if watch['timeout'] is not None]
+            wait = max(min(wake) - time.monotonic(),0) if wake else None
+            if any(watch['proc'] is not None and not watch['selected'] for watch in pending):
+                wait = self.tick if wait is None else min(wait,self.tick)
+            if self.selector.get_map():
+                for key, events in self.selector.select(wait):
+                    self.readable(key.data)
+            elif wait:
+                time.sleep(wait)
+        return { group: watch['result'] for group, watch in self.watches.items() }
+
+    def close(self) -> None:
+        self.selector.close()
+
+percent_regex = re.compile(r',\s*(\d{1,3})\s')
+
+def copypercent(stdout: str):
+    '''
+    Lowest copy % in pairdisplay -fcx / -fcxe output, None when there is none.\n
+    The % follows the fence column after a comma e.g. oradb  oradb1(L)  (CL1-A-0, 0, 0)64034  400.P-VOL COPY NEVER , 45  500 -
+    '''
+    percents = [int(percent) for percent in percent_regex.findall(stdout or '')]
+    return min(percents) if percents else None
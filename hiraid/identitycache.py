@@ -0,0 +1,60 @@
+import os
+import json
+import time
+import logging
+import threading
+
+class Identitycache():
+    '''
+    Persisted storage identity used by Raidcom(fast_start=True).\n
+    Holds what construction otherwise learns from raidqry, get resource, get port and horcctl:\n
+    v_id, model, micro_ver, per instance UNITID and cmd_device.\n
+    cache = Identitycache('/home/user/hiraid',53511)\n
+    record = cache.load([0,1])
+    '''
+    record_format = 1
+    identity_keys = ['v_id','vtype','model','micro_ver']
+    instance_keys = ['UNITID','cmd_device']
+
+    def __init__(self,cachedir: str,serial: str,log=logging):
+        self.cachedir = cachedir
+        self.serial = serial
+        self.log = log
+        self.cachefile = f"{self.cachedir}{os.sep}{self.serial}_identity.json"
+
+    def load(self,instances: list) -> dict:
+        ''' Return the record if there is one for this serial and exactly these horcm instances, otherwise None '''
+        try:
+            with open(self.cachefile) as json_file:
+                record = json.load(json_file)
+        except Exception as e:
+            self.log.debug(f"No usable identity record {self.cachefile}: {e}")
+            return None
+        if record.get('format') != self.record_format or str(record.get('serial')) != str(self.serial):
+            return None
+        if sorted(map(str,record.get('instances',{}))) != sorted(map(str,instances)):
+            self.log.debug(f"Identity record {self.cachefile} is for horcm instances {list(record.get('instances',{}))}, not {instances}")
+            return None
+        return record
+
+    def save(self,record: dict) -> None:
+        os.makedirs(self.cachedir,exist_ok=True)
+        record = { 'format': self.record_format, 'serial': str(self.serial), 'saved': time.time(), **record }
+        tmpfile = f"{self.cachefile}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmpfile,"w") as f:
+            f.write(json.dumps(record,indent=4))
+        os.replace(tmpfile,self.cachefile)
+        self.log.debug(f"Saved identity record {self.cachefile}")
+
+    def changes(self,record: dict,current: dict) -> list:
+        ''' Describe where current differs from record in the values fast start relies on '''
+        changed = []
+        for key in self.identity_keys:
+            if record.get('identity',{}).get(key) != current.get('identity',{}).get(key):
+                changed.append(f"{key} {record.get('identity',{}).get(key)} -> {current.get('identity',{}).get(key)}")
+        for instance, values in current.get('instances',{}).items():
+            for key in self.instance_keys:
+                cached = record.get('instances',{}).get(str(instance),{}).get(key)
+                if cached != values.get(key):
+                    changed.append(f"instance {instance} {key} {cached} -> {values.get(key)}")
+        return changed
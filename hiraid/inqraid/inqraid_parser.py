@@ -1,4 +1,5 @@
 import logging 
+from ..datafilter import compilefilter
 
 class Inqraid_parser():
 
@@ -16,22 +17,8 @@ class Inqraid_parser():
             cmdreturn.headers = cmdreturn.header.split()
 
     def applyfilter(self,row,_filter):
-        if _filter:
-            for key, val in _filter.items():
-                if key not in row and not callable(val) :
-                    return False
-            for key, val in _filter.items():
-                if isinstance(val,str):
-                    if row[key] != val:
-                        return False
-                elif isinstance(val,list):
-                    if row[key] not in val:
-                        return False
-                elif callable(val):
-                    return val(row)
-                else:
-                    return False
-        return True
+        ''' Single row check, parsers compile the datafilter once with compilefilter '''
+        return compilefilter(_filter)(row)
 
     def inqraidCli(self, cmdreturn: object, datafilter: dict={}, **kwargs ) -> object:
         self.initload(cmdreturn)
@@ -46,7 +33,7 @@ class Inqraid_parser():
             row = line.split(maxsplit=9)
             prefilter.append(dict(zip(cmdreturn.headers, row)))
         
-        cmdreturn.data = list(filter(lambda r: self.applyfilter(r,datafilter),prefilter))
+        cmdreturn.data = list(filter(compilefilter(datafilter),prefilter))
         createview(cmdreturn)
         return cmdreturn
 
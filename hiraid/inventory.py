@@ -0,0 +1,271 @@
+import time
+import logging
+import concurrent.futures
+from collections.abc import Mapping
+from .historutils.historutils import Ldevid
+
+class Inventory():
+    '''
+    Full array inventory streamed through a dependency graph rather than run as barriered phases.\n
+    ports -> hostgrps -> luns -> ldevs\n
+    ports -> portlogins\n
+    hostgrps -> hbawwns\n
+    A port's host groups are requested as soon as the port list arrives, a host group's luns and hba wwns as soon as its\n
+    port's host groups arrive and the ldevs behind those luns are coalesced into ranges and queued as they accumulate,\n
+    so one slow port only delays its own host groups. Each command is dispatched to a horcm instance by raidcom.scheduler,\n
+    results are merged into raidcom.views by the calling thread as they complete.\n
+    Only the stages asked for, and the stages they depend on, are run:\n
+    inventory = Inventory(storage,stages=['luns'])\n
+    report = inventory.run()\n
+    report['stages']['luns'] holds tasks, completed, failed, records, busy and elapsed seconds and throughput in records per second.
+    '''
+    stages = ['ports','hostgrps','portlogins','hbawwns','luns','ldevs']
+    dependencies = { 'ports': [], 'hostgrps': ['ports'], 'portlogins': ['ports'], 'hbawwns': ['hostgrps'], 'luns': ['hostgrps'], 'ldevs': ['luns'] }
+
+    def __init__(self,raidcom,stages: list=None,max_workers: int=30,range_size: int=256,max_gap: int=0,log=logging):
+        self.raidcom = raidcom
+        self.max_workers = max_workers
+        self.range_size = range_size
+        self.max_gap = max_gap
+        self.log = log
+        for stage in stages or []:
+            if stage not in self.dependencies:
+                raise Exception(f"Unknown inventory stage '{stage}', expected one or more of {self.stages}")
+        self.run_stages = self.resolve(stages or self.stages)
+
+    def resolve(self,stages: list) -> list:
+        ''' stages plus everything they depend on, in pipeline order '''
+        required = set()
+        def require(stage):
+            if stage not in required:
+                required.add(stage)
+                for dependency in self.dependencies[stage]:
+                    require(dependency)
+        for stage in stages:
+            require(stage)
+        return [stage for stage in self.stages if stage in required]
+
+    def timed(self,fn,**kwargs) -> tuple:
+        start = time.monotonic()
+        cmdreturn = self.raidcom.scheduler.dispatch(fn,update_view=False,**kwargs)
+        return cmdreturn, start, time.monotonic()
+
+    def run(self,ports: list=None,portgids: list=None,ldev_ids: list=None,follow: bool=True,raise_err: bool=True) -> dict:
+        '''
+        ports: inventory only these ports, the port list is then not fetched.\n
+        portgids, ldev_ids: also start the pipeline from these host groups ( cl1-a-1 ) and ldevs.\n
+        follow: queue the ldevs presented by the luns fetched, False fetches only the ldev_ids given.\n
+        raise_err: raise the first failure once the pipeline has drained, otherwise failures are only reported.
+        '''
+        raidcom = self.raidcom
+        metrics = { stage: { 'tasks': 0, 'completed': 0, 'failed': 0, 'records': 0, 'busy': 0.0, 'first_start': None, 'last_end': None } for stage in self.run_stages }
+        errors = []
+        pending = {}
+        queued_ldevs = set()
+        requested_ldevs = set()
+        ldev_backlog = set()
+        start = time.monotonic()
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+
+            def submit(stage,fn,item,**kwargs):
+                metrics[stage]['tasks'] += 1
+                pending[executor.submit(self.timed,fn,**kwargs)] = (stage,item)
+
+            def submitport(port):
+                if 'hostgrps' in metrics:
+                    submit('hostgrps',raidcom.gethostgrp_key_detail,port,port=port,hostgrp_usage=['_GIDS'])
+                if 'portlogins' in metrics:
+                    submit('portlogins',raidcom.getportlogin,port,port=port)
+
+            def submitportgid(portgid):
+                if 'luns' in metrics:
+                    submit('luns',raidcom.getlun,portgid,port=portgid)
+                if 'hbawwns' in metrics:
+                    submit('hbawwns',raidcom.gethbawwn,portgid,port=portgid)
+
+            def flushldevs():
+                for first, last in raidcom.ldevranges(ldev_backlog,range_size=self.range_size,max_gap=self.max_gap):
+                    ldevrange = (f"{first}-{last}",str(first))[first == last]
+                    submit('ldevs',raidcom.getldev,ldevrange,ldev_id=ldevrange)
+                ldev_backlog.clear()
+
+            if ports is None and portgids is None and ldev_ids is None:
+                submit('ports',raidcom.getport,None)
+            else:
+                metrics.pop('ports',None)
+                for port in dict.fromkeys(ports or []):
+                    submitport(raidcom.checkport(port))
+                for portgid in dict.fromkeys(portgids or []):
+                    submitportgid(raidcom.checkportgid(portgid))
+                if ldev_ids and 'ldevs' in metrics:
+                    for ldev_id in ldev_ids:
+                        ldev_id = Ldevid(ldev_id).decimal
+                        queued_ldevs.add(ldev_id)
+                        requested_ldevs.add(str(ldev_id))
+                        ldev_backlog.add(ldev_id)
+                    flushldevs()
+
+            while pending:
+                done, _ = concurrent.futures.wait(pending,return_when=concurrent.futures.FIRST_COMPLETED)
+                for future in done:
+                    stage, item = pending.pop(future)
+                    try:
+                        cmdreturn, started, ended = future.result()
+                    except Exception as e:
+                        metrics[stage]['failed'] += 1
+                        errors.append((stage,item,e))
+                        self.log.error(f"Inventory stage {stage} failed for {item}: {e}")
+                        continue
+                    stats = metrics[stage]
+                    stats['completed'] += 1
+                    stats['records'] += len(cmdreturn.data)
+                    stats['busy'] += ended - started
+                    stats['first_start'] = min(started,stats['first_start'] or started)
+                    stats['last_end'] = max(ended,stats['last_end'] or ended)
+
+                    if stage == 'ports':
+                        raidcom.updateview(raidcom.views,{'_ports':cmdreturn.view})
+                        raidcom.updateview(raidcom.data,{'_ports':cmdreturn.data})
+                        for port in cmdreturn.view:
+                            submitport(port)
+                    elif stage == 'hostgrps':
+                        raidcom.updateview(raidcom.views,{'_ports':cmdreturn.view})
+                        for port in cmdreturn.view:
+                            for gid in cmdreturn.view[port].get('_GIDS',{}):
+                                submitportgid(f"{port}-{gid}")
+                    elif stage in ('portlogins','hbawwns'):
+                        raidcom.updateview(raidcom.views,{'_ports':cmdreturn.view})
+                    elif stage == 'luns':
+                        raidcom.updateview(raidcom.views,{'_ports':cmdreturn.view})
+                        if 'ldevs' in metrics and follow:
+                            for lun in cmdreturn.data:
+                                if lun.get('LDEV') in (None,'','-'):
+                                    continue
+                                ldev_id = Ldevid(lun['LDEV']).decimal
+                                if ldev_id not in queued_ldevs:
+                                    queued_ldevs.add(ldev_id)
+                                    requested_ldevs.add(str(ldev_id))
+                                    ldev_backlog.add(ldev_id)
+                            if len(ldev_backlog) >= self.range_size:
+                                flushldevs()
+                    elif stage == 'ldevs':
+                        view = cmdreturn.view
+                        if self.max_gap:
+                            # Bridged ldevs which no lun presents are dropped
+                            view = { ldev_id: ldev for ldev_id, ldev in view.items() if ldev_id in requested_ldevs }
+                            stats['records'] -= len(cmdreturn.view) - len(view)
+                        raidcom.updateview(raidcom.views,{'_ldevs':view})
+
+                # Once no more luns can arrive the remaining ldevs are queued regardless of batch size
+                if ldev_backlog and not any(stage in ('ports','hostgrps','luns') for stage, item in pending.values()):
+                    flushldevs()
+
+        metrics = { stage: stats for stage, stats in metrics.items() if stats['tasks'] }
+        for stage, counters in (('ports','portcounters'),('hostgrps','hostgroupcounters'),('portlogins','portlogincounters'),('hbawwns','hbawwncounters'),('luns','luncounters'),('ldevs','ldevcounts')):
+            if stage in metrics:
+                getattr(raidcom.updatestats,counters)()
+
+        for stats in metrics.values():
+            stats['elapsed'] = (stats['last_end'] - stats['first_start']) if stats['first_start'] is not None else 0.0
+            stats['throughput'] = stats['records'] / stats['elapsed'] if stats['elapsed'] else 0.0
+            del stats['first_start'], stats['last_end']
+
+        report = { 'stages': metrics, 'elapsed': time.monotonic() - start, 'errors': errors }
+        self.log.info(f"Inventory of {raidcom.serial} took {round(report['elapsed'],3)}s: " + ", ".join(f"{stage} {stats['completed']}/{stats['tasks']} in {round(stats['elapsed'],3)}s" for stage, stats in metrics.items()))
+        if errors and raise_err:
+            raise errors[0][2]
+        return report
+
+    def fields(self,record) -> dict:
+        ''' A record's own values, without the nested _GIDS, _LUNS ... views '''
+        return { key: value for key, value in record.items() if not key.startswith('_') } if isinstance(record,Mapping) else {}
+
+    def compare(self,old: dict,new: dict) -> dict:
+        ''' added, removed and changed keys between two { key: fields } dicts, a record with no previous fields is not counted as changed '''
+        return { 'added': [key for key in new if key not in old], 'removed': [key for key in old if key not in new], 'changed': [key for key in new if key in old and old[key] and old[key] != new[key]] }
+
+    def refresh(self,since: dict=None,raise_err: bool=True) -> dict:
+        '''
+        Bring raidcom.views up to date with the array by re-querying only what changed since a previous inventory.\n
+        since: views from a previous inventory, default the views currently held ( e.g. after loadcache() ). When given they are merged into raidcom.views first.\n
+        Changes are found with summary commands:\n
+        raidcom get port                                  - ports added, removed or changed\n
+        raidcom get host_grp -key detail ( per port )     - host groups added, removed or changed\n
+        raidcom get ldev -ldev_list defined -key front_end - ldevs added, removed or changed, kept in views['_ldevsummary'] for the next refresh\n
+        Changed and added ldevs are re-queried, then luns and hba wwns of added and changed host groups and of every host group\n
+        a changed ldev was or is now presented to. Removed ports, host groups and ldevs are deleted from the views.\n
+        The first refresh of views without an _ldevsummary can only detect ldevs added or removed.\n
+        Returns the change set { 'ports': {'added','removed','changed'}, 'hostgrps': {...}, 'ldevs': {...}, 'requeried': {'portgids','ldevs'}, 'stages', 'elapsed' }
+        '''
+        raidcom = self.raidcom
+        views = raidcom.views
+        start = time.monotonic()
+        if since is None:
+            since = views
+        elif since is not views:
+            raidcom.updateview(views,since)
+            since = views
+
+        # Everything compared against is captured before the summaries overwrite it
+        old_ports = { port: self.fields(record) for port, record in since.get('_ports',{}).items() }
+        old_hostgrps = { f"{port}-{gid}": self.fields(record) for port, record in since.get('_ports',{}).items() for gid, record in record.get('_GIDS',{}).items() }
+        old_ldevs = { ldev_id: record for ldev_id, record in since.get('_ldevs',{}).items() if isinstance(record,Mapping) and record.get('VOL_TYPE') != 'NOT DEFINED' }
+        old_summary = since.get('_ldevsummary',{}).get('defined')
+        old_summary = dict(old_summary) if old_summary is not None else None
+        old_presented = { ldev_id: set(record['PORTs']) for ldev_id, record in old_ldevs.items() if isinstance(record.get('PORTs'),Mapping) }
+
+        ports = raidcom.scheduler.dispatch(raidcom.getport,refresh=True)
+        portchanges = self.compare(old_ports,{ port: self.fields(record) for port, record in ports.view.items() })
+        hostgrps = raidcom.concurrent_gethostgrps(ports=list(ports.view),max_workers=self.max_workers,hostgrp_usage=['_GIDS'],refresh=True)
+        hostgrpchanges = self.compare(old_hostgrps,{ f"{port}-{gid}": self.fields(record) for port, record in hostgrps.view.items() for gid, record in record.get('_GIDS',{}).items() })
+
+        views.deletepath(('_ldevsummary','defined'))
+        summary = raidcom.getldevlist('defined',key='front_end',view_keyname='_ldevsummary')
+        current = { str(Ldevid(ldev_id).decimal): self.fields(record) for ldev_id, record in summary.view.items() }
+        if old_summary is None:
+            self.log.warning(f"No ldev summary to refresh {raidcom.serial} against, only ldevs added or removed are detected this time")
+            ldevchanges = self.compare({ ldev_id: {} for ldev_id in old_ldevs },current)
+        else:
+            ldevchanges = self.compare({ str(Ldevid(ldev_id).decimal): self.fields(record) for ldev_id, record in old_summary.items() },current)
+
+        for port in portchanges['removed']:
+            views.deletepath(('_ports',port))
+            raidcom.viewcache.invalidate(('_ports',port))
+        for portgid in hostgrpchanges['removed']:
+            port, gid = portgid.rsplit('-',1)
+            views.deletepath(('_ports',port,'_GIDS',gid))
+            raidcom.invalidateport(portgid)
+        for ldev_id in ldevchanges['removed'] + ldevchanges['changed']:
+            views.deletepath(('_ldevs',ldev_id))
+            raidcom.invalidateldev(ldev_id)
+
+        stages = {}
+        requery_ldevs = ldevchanges['added'] + ldevchanges['changed']
+        if requery_ldevs:
+            report = Inventory(raidcom,stages=['ldevs'],max_workers=self.max_workers,range_size=self.range_size,max_gap=self.max_gap,log=self.log).run(ldev_ids=requery_ldevs,follow=False,raise_err=raise_err)
+            stages.update(report['stages'])
+
+        # Host groups whose luns may have changed, wherever a changed ldev was presented before or is presented now
+        portgids = set(hostgrpchanges['added'] + hostgrpchanges['changed'])
+        for ldev_id in ldevchanges['removed'] + ldevchanges['changed'] + ldevchanges['added']:
+            portgids.update(old_presented.get(ldev_id,()))
+            presented = views.getpath(('_ldevs',ldev_id,'PORTs'))
+            if isinstance(presented,Mapping):
+                portgids.update(presented)
+        portgids = sorted(portgid for portgid in portgids if portgid not in hostgrpchanges['removed'] and portgid.rsplit('-',1)[0] in ports.view)
+        for portgid in portgids:
+            port, gid = portgid.rsplit('-',1)
+            views.deletepath(('_ports',port,'_GIDS',gid,'_LUNS'))
+            views.deletepath(('_ports',port,'_GIDS',gid,'_WWNS'))
+            raidcom.invalidateport(portgid)
+        if portgids:
+            report = Inventory(raidcom,stages=['luns','hbawwns'],max_workers=self.max_workers,log=self.log).run(portgids=portgids,follow=False,raise_err=raise_err)
+            stages.update(report['stages'])
+
+        raidcom.updatestats.portcounters()
+        raidcom.updatestats.hostgroupcounters()
+        raidcom.updatestats.ldevcounts()
+        changes = { 'ports': portchanges, 'hostgrps': hostgrpchanges, 'ldevs': ldevchanges, 'requeried': { 'portgids': portgids, 'ldevs': requery_ldevs }, 'stages': stages, 'elapsed': time.monotonic() - start }
+        self.log.info(f"Refreshed inventory of {raidcom.serial} in {round(changes['elapsed'],3)}s, re-queried {len(requery_ldevs)} ldevs and {len(portgids)} host groups")
+        return changes
@@ -0,0 +1,225 @@
+import threading
+from array import array
+from collections.abc import Mapping
+from .historutils.historutils import Ldevid
+
+class Ldevallocator():
+    '''
+    Free ldev id allocator over a bitmap of 0..maxldevid, one bit per ldev id set when the id is defined or reserved.\n
+    allocator = storage.ldev_allocator\n
+    allocator.allocate(10,start=1000,end=1999)              -> the first 10 free ids in the range\n
+    allocator.allocate(10,start=1000,end=1999,contiguous=True) -> the first free run of 10 ids\n
+    allocator.match([100,101],start=1000,end=1999)          -> { '100': '100', '101': '1000' } same id when free, else from the range\n
+    allocator.offset([100,101],4096)                        -> { '100': '4196', '101': '4197' } all or nothing\n
+    Allocated ids stay reserved until commit() ( the ldev was created ) or release() ( it was not ).\n
+    Reservations are made under a lock so concurrent provisioning threads never share an id. Free space is found a 64 bit word\n
+    at a time, full words are skipped without looking at their bits.
+    '''
+    wordbits = 64
+    fullword = (1 << 64) - 1
+
+    def __init__(self,maxldevid: int,defined=(),views: dict=None,view_keyname: str='_ldevs'):
+        self.maxldevid = int(maxldevid)
+        self.lock = threading.RLock()
+        self.reserved = set()
+        self.seed(defined)
+        if views is not None:
+            views.addlistener((view_keyname,'*'),self.ldevdelta)
+
+    def seed(self,defined) -> None:
+        ''' Rebuild the bitmap from the defined ldev ids, e.g. the view of getldevlist('defined'), reservations in flight are kept '''
+        with self.lock:
+            self.bitmap = array('Q',bytes(8 * (self.maxldevid // self.wordbits + 1)))
+            # Bits beyond maxldevid are never free
+            tail = (self.maxldevid + 1) % self.wordbits
+            if tail:
+                self.bitmap[-1] = self.fullword ^ ((1 << tail) - 1)
+            for ldev_id in defined:
+                self.set(self.ldevid(ldev_id))
+            for ldev_id in self.reserved:
+                self.set(ldev_id)
+
+    def ldevid(self,ldev_id) -> int:
+        ldev_id = Ldevid(ldev_id).decimal
+        if not 0 <= ldev_id <= self.maxldevid:
+            raise Exception(f"ldev_id {ldev_id} is outside 0-{self.maxldevid}")
+        return ldev_id
+
+    def set(self,ldev_id: int) -> None:
+        self.bitmap[ldev_id >> 6] |= 1 << (ldev_id & 63)
+
+    def clear(self,ldev_id: int) -> None:
+        self.bitmap[ldev_id >> 6] &= self.fullword ^ (1 << (ldev_id & 63))
+
+    def used(self,ldev_id: int) -> bool:
+        return bool(self.bitmap[ldev_id >> 6] >> (ldev_id & 63) & 1)
+
+    def isfree(self,ldev_id) -> bool:
+        with self.lock:
+            return not self.used(self.ldevid(ldev_id))
+
+    def ldevdelta(self,path,old,new) -> None:
+        ''' Viewstore listener, ldevs seen defined are marked used, ldevs seen NOT DEFINED are freed unless reserved '''
+        try:
+            ldev_id = self.ldevid(path[-1])
+        except Exception:
+            return
+        if not isinstance(new,Mapping) or not new.get('VOL_TYPE'):
+            return
+        with self.lock:
+            if new['VOL_TYPE'] != 'NOT DEFINED':
+                self.set(ldev_id)
+            elif ldev_id not in self.reserved:
+                self.clear(ldev_id)
+
+    def bounds(self,start,end) -> tuple:
+        start = 0 if start is None else self.ldevid(start)
+        end = self.maxldevid if end is None else self.ldevid(end)
+        if start > end:
+            raise Exception(f"ldev range start {start} is after end {end}")
+        return start, end
+
+    def freeids(self,start: int,end: int):
+        ''' Free ids from start to end inclusive, in order '''
+        for word, usedbits in self.words(start,end):
+            free = ~usedbits & self.fullword
+            base = word << 6
+            while free:
+                low = free & -free
+                yield base + low.bit_length() - 1
+                free ^= low
+
+    def words(self,start: int,end: int):
+        ''' (word index, used bits) for the words covering start..end, bits outside the range read as used '''
+        bitmap = self.bitmap
+        first, last = start >> 6, end >> 6
+        for word in range(first,last + 1):
+            usedbits = bitmap[word]
+            if word == first:
+                usedbits |= (1 << (start & 63)) - 1
+            if word == last:
+                usedbits |= self.fullword ^ ((2 << (end & 63)) - 1)
+            yield word, usedbits
+
+    def freerun(self,count: int,start: int,end: int) -> int:
+        ''' First id of the first run of count free ids within start..end, None if there is none '''
+        run, first = 0, start
+        for word, usedbits in self.words(start,end):
+            if usedbits == self.fullword:
+                run = 0
+                continue
+            if usedbits == 0 and count - run > self.wordbits:
+                # A whole free word extends the run without looking at its bits
+                first = first if run else word << 6
+                run += self.wordbits
+                continue
+            for bit in range(self.wordbits):
+                if usedbits >> bit & 1:
+                    run = 0
+                    continue
+                if not run:
+                    first = (word << 6) + bit
+                run += 1
+                if run == count:
+                    return first
+        return None
+
+    def take(self,ldev_ids: list) -> list:
+        for ldev_id in ldev_ids:
+            self.set(ldev_id)
+            self.reserved.add(ldev_id)
+        return [str(ldev_id) for ldev_id in ldev_ids]
+
+    def allocate(self,count: int,start: int=None,end: int=None,contiguous: bool=False) -> list:
+        '''
+        Reserve count free ids within start..end, the lowest first. contiguous=True reserves the first run of count consecutive free ids.\n
+        Raises when the range cannot satisfy the request, nothing is reserved in that case.
+        '''
+        start, end = self.bounds(start,end)
+        with self.lock:
+            if contiguous:
+                first = self.freerun(count,start,end)
+                if first is None:
+                    raise Exception(f"No run of {count} free ldev ids in range {start}-{end}")
+                return self.take(range(first,first + count))
+            ldev_ids = []
+            for ldev_id in self.freeids(start,end):
+                if len(ldev_ids) == count:
+                    break
+                ldev_ids.append(ldev_id)
+            if len(ldev_ids) < count:
+                raise Exception(f"Only {len(ldev_ids)} free ldev ids in range {start}-{end}, {count} requested")
+            return self.take(ldev_ids)
+
+    def allocatefree(self,start: int=None,end: int=None) -> list:
+        ''' Reserve every free id within start..end '''
+        start, end = self.bounds(start,end)
+        with self.lock:
+            return self.take(list(self.freeids(start,end)))
+
+    def reserve(self,ldev_ids: list) -> tuple:
+        ''' Reserve the given ids which are free, returns ( reserved, unavailable ) preserving the order given '''
+        reserved, unavailable = [], []
+        with self.lock:
+            for ldev_id in ldev_ids:
+                decimal = self.ldevid(ldev_id)
+                if self.used(decimal):
+                    unavailable.append(str(decimal))
+                else:
+                    reserved.extend(self.take([decimal]))
+        return reserved, unavailable
+
+    def match(self,ldev_ids: list,start: int=None,end: int=None) -> dict:
+        '''
+        Reserve the same id for each source ldev_id when it is free, falling back to the lowest free id within start..end.\n
+        Returns { source ldev_id: reserved ldev_id }, raises without reserving anything when the range runs out.
+        '''
+        start, end = self.bounds(start,end)
+        with self.lock:
+            targets, fallback, matched = {}, [], set()
+            for ldev_id in ldev_ids:
+                decimal = self.ldevid(ldev_id)
+                if not self.used(decimal) and decimal not in matched:
+                    targets[str(decimal)] = decimal
+                    matched.add(decimal)
+                else:
+                    fallback.append(str(decimal))
+            spare = (ldev_id for ldev_id in self.freeids(start,end) if ldev_id not in matched)
+            for source in fallback:
+                target = next(spare,None)
+                if target is None:
+                    raise Exception(f"No free ldev id in range {start}-{end} for {len(fallback)} ldevs whose id is in use")
+                targets[source] = target
+            self.take(targets.values())
+            return { source: str(target) for source, target in targets.items() }
+
+    def offset(self,ldev_ids: list,offset: int) -> dict:
+        ''' Reserve ldev_id + offset for each ldev_id, returns { source ldev_id: reserved ldev_id }, raises without reserving if any is in use '''
+        with self.lock:
+            targets = { str(Ldevid(ldev_id).decimal): self.ldevid(Ldevid(ldev_id).decimal + int(offset)) for ldev_id in ldev_ids }
+            inuse = sorted(target for target in targets.values() if self.used(target))
+            if inuse:
+                raise Exception(f"Offset {offset} targets ldev ids already defined or reserved: {inuse}")
+            self.take(targets.values())
+            return { source: str(target) for source, target in targets.items() }
+
+    def commit(self,ldev_ids: list) -> None:
+        ''' The reserved ldevs were created, they stay used '''
+        with self.lock:
+            for ldev_id in ldev_ids:
+                self.reserved.discard(self.ldevid(ldev_id))
+
+    def release(self,ldev_ids: list) -> None:
+        ''' The reserved ldevs were not created, their ids are free again '''
+        with self.lock:
+            for ldev_id in ldev_ids:
+                ldev_id = self.ldevid(ldev_id)
+                if ldev_id in self.reserved:
+                    self.reserved.discard(ldev_id)
+                    self.clear(ldev_id)
+
+    def free(self,start: int=None,end: int=None) -> int:
+        ''' Number of free ids within start..end '''
+        start, end = self.bounds(start,end)
+        with self.lock:
+            return sum(bin(~usedbits & self.fullword).count('1') for word, usedbits in self.words(start,end))
@@ -0,0 +1,230 @@
+import heapq
+import threading
+from array import array
+from collections.abc import Mapping
+from .historutils.historutils import Storcapunits
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+class Ldevtable():
+    '''
+    Columnar copy of views['_ldevs'], one typed array per column rather than a dict per ldev.\n
+    ldev_id, pool, capacity, used and rsgid are integer columns, status and type are codes into a label list.\n
+    The table is filled from the view when created and kept in step by a Viewstore listener:\n
+    table = storage.ldev_table\n
+    table.aggregate('pool')             -> { '0': { 'ldevcount': 10, 'VOL_Capacity(BLK)': ..., 'Used_Block(BLK)': ..., 'VOL_Capacity(GB)': ... } }\n
+    table.aggregate('rsgid',where={'status':'NML'})\n
+    table.top(10,'used')                -> [('1000',209715200), ...]\n
+    table.select(pool=[0,1],type='OPEN-V-CVS',used=lambda blocks: blocks > 0)\n
+    A pool of -1 is an ldev without a pool ( B_POOLID NONE ), aggregate reports it under None.\n
+    With numpy installed, mask, aggregate and total work on the columns as int64 arrays once the table holds\n
+    numpy_rows ldevs, without numpy they loop over the rows.
+    '''
+    numeric = { 'ldev_id': 'LDEV', 'pool': 'B_POOLID', 'capacity': 'VOL_Capacity(BLK)', 'used': 'Used_Block(BLK)', 'rsgid': 'RSGID' }
+    coded = { 'status': 'STS', 'type': 'VOL_TYPE' }
+    columns = tuple(numeric) + tuple(coded)
+    numpy_rows = 1024
+
+    def __init__(self,views: dict,view_keyname: str='_ldevs'):
+        self.lock = threading.RLock()
+        self.view_keyname = view_keyname
+        self.data = { column: array('q') for column in self.columns }
+        self.labels = { column: [] for column in self.coded }
+        self.codes = { column: {} for column in self.coded }
+        self.rows = {}
+        views.addlistener((view_keyname,'*'),self.delta)
+        with self.lock:
+            for ldev_id, record in views.get(view_keyname,{}).items():
+                self.upsert(ldev_id,record)
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def __contains__(self,ldev_id) -> bool:
+        return str(ldev_id) in self.rows
+
+    def delta(self,path,old,new) -> None:
+        ''' Viewstore listener for (view_keyname,'*') '''
+        if isinstance(new,Mapping):
+            self.upsert(path[-1],new)
+        else:
+            self.remove(path[-1])
+
+    def integer(self,value) -> int:
+        try:
+            return int(value)
+        except (TypeError,ValueError):
+            return -1
+
+    def code(self,column: str,label) -> int:
+        codes = self.codes[column]
+        if label not in codes:
+            codes[label] = len(self.labels[column])
+            self.labels[column].append(label)
+        return codes[label]
+
+    def upsert(self,ldev_id: str,record: Mapping) -> None:
+        with self.lock:
+            # code() adds unseen labels, so the values are worked out under the lock too
+            values = [self.integer(record.get(field)) for field in self.numeric.values()]
+            values[0] = self.integer(ldev_id)
+            values += [self.code(column,record.get(field)) for column, field in self.coded.items()]
+            row = self.rows.get(ldev_id)
+            if row is None:
+                self.rows[ldev_id] = len(self.data['ldev_id'])
+                for column, value in zip(self.columns,values):
+                    self.data[column].append(value)
+            else:
+                for column, value in zip(self.columns,values):
+                    self.data[column][row] = value
+
+    def remove(self,ldev_id: str) -> None:
+        ''' Move the last row into the removed row's place so the columns stay dense '''
+        with self.lock:
+            row = self.rows.pop(ldev_id,None)
+            if row is None:
+                return
+            last = len(self.data['ldev_id']) - 1
+            if row != last:
+                for column in self.columns:
+                    self.data[column][row] = self.data[column][last]
+                self.rows[str(self.data['ldev_id'][row])] = row
+            for column in self.columns:
+                del self.data[column][last]
+
+    def label(self,column: str,value: int):
+        ''' Column value as reported, str for numeric columns ( None for -1 ), the label for coded columns '''
+        if column in self.coded:
+            return self.labels[column][value]
+        return None if value == -1 else str(value)
+
+    def wanted(self,column: str,condition) -> set:
+        ''' The column values matching condition, None for a callable on a numeric column which has to be called per value '''
+        if column not in self.columns:
+            raise Exception(f"Unknown ldev table column '{column}', expected one of {self.columns}")
+        if callable(condition):
+            if column in self.coded:
+                return { code for code, label in enumerate(self.labels[column]) if condition(label) }
+            return None
+        conditions = condition if isinstance(condition,(list,tuple,set,frozenset)) else [condition]
+        if column in self.coded:
+            return { self.codes[column][c] for c in conditions if c in self.codes[column] }
+        return { self.integer(c) for c in conditions }
+
+    def matcher(self,column: str,condition):
+        ''' Per value predicate for one column, condition is a value, a list of values or a callable '''
+        wanted = self.wanted(column,condition)
+        return condition if wanted is None else wanted.__contains__
+
+    def vectorized(self) -> bool:
+        return numpy is not None and len(self.data['ldev_id']) >= self.numpy_rows
+
+    def column(self,column: str):
+        ''' column as an int64 numpy array, copied from the array's buffer as an array exporting its buffer cannot grow '''
+        return numpy.array(self.data[column],dtype=numpy.int64)
+
+    def selection(self,where: dict):
+        ''' numpy row numbers matching every condition in where '''
+        selected = numpy.ones(len(self.data['ldev_id']),dtype=bool)
+        for column, condition in where.items():
+            wanted = self.wanted(column,condition)
+            if wanted is None:
+                selected &= numpy.fromiter(map(condition,self.data[column]),dtype=bool,count=len(selected))
+            else:
+                selected &= numpy.isin(self.column(column),numpy.fromiter(wanted,dtype=numpy.int64,count=len(wanted)))
+        return numpy.flatnonzero(selected)
+
+    def mask(self,where: dict=None) -> list:
+        ''' Row numbers matching every condition in where '''
+        if where and self.vectorized():
+            return self.selection(where).tolist()
+        rows = range(len(self.data['ldev_id']))
+        for column, condition in (where or {}).items():
+            ismatch = self.matcher(column,condition)
+            values = self.data[column]
+            rows = [row for row in rows if ismatch(values[row])]
+        return list(rows)
+
+    def select(self,**where) -> list:
+        ''' ldev ids, as in the view, of ldevs matching every column condition '''
+        with self.lock:
+            ldev_ids = self.data['ldev_id']
+            return [str(ldev_ids[row]) for row in self.mask(where)]
+
+    def aggregate(self,by: str,where: dict=None) -> dict:
+        ''' ldevcount, VOL_Capacity and Used_Block totals per value of column by, in BLK and MB, GB, TB, PB '''
+        if by not in self.columns:
+            raise Exception(f"Unknown ldev table column '{by}', expected one of {self.columns}")
+        with self.lock:
+            if self.vectorized():
+                totals = self.vectorizedtotals(by,where)
+                return { self.label(by,key): self.summary(*bucket) for key, bucket in totals.items() }
+            keys, capacity, used = self.data[by], self.data['capacity'], self.data['used']
+            totals = {}
+            rows = self.mask(where) if where else range(len(keys))
+            for row in rows:
+                bucket = totals.get(keys[row])
+                if bucket is None:
+                    bucket = totals[keys[row]] = [0,0,0]
+                bucket[0] += 1
+                bucket[1] += max(capacity[row],0)
+                bucket[2] += max(used[row],0)
+            result = {}
+            for key, (count, capacityblocks, usedblocks) in totals.items():
+                result[self.label(by,key)] = self.summary(count,capacityblocks,usedblocks)
+        return result
+
+    def vectorizedtotals(self,by: str,where: dict=None) -> dict:
+        ''' { key: [ldevcount,capacity,used] } as aggregate's row loop builds it, keys in order of first appearance '''
+        rows = self.selection(where) if where else slice(None)
+        keys = self.column(by)[rows]
+        if not len(keys):
+            return {}
+        capacity = numpy.maximum(self.column('capacity')[rows],0)
+        used = numpy.maximum(self.column('used')[rows],0)
+        order = numpy.argsort(keys,kind='stable')
+        keys = keys[order]
+        starts = numpy.concatenate(([0],numpy.flatnonzero(keys[1:] != keys[:-1]) + 1))
+        counts = numpy.diff(numpy.append(starts,len(keys)))
+        capacities = numpy.add.reduceat(capacity[order],starts)
+        useds = numpy.add.reduceat(used[order],starts)
+        groups = sorted(range(len(starts)),key=order[starts].__getitem__)
+        return { int(keys[starts[group]]): [int(counts[group]),int(capacities[group]),int(useds[group])] for group in groups }
+
+    def summary(self,count: int,capacityblocks: int,usedblocks: int) -> dict:
+        summary = { 'ldevcount': count, 'VOL_Capacity(BLK)': capacityblocks, 'Used_Block(BLK)': usedblocks }
+        vol_capacity = Storcapunits(capacityblocks,'blk')
+        used_capacity = Storcapunits(usedblocks,'blk')
+        for denom in ['MB','GB','TB','PB']:
+            summary[f'VOL_Capacity({denom})'] = getattr(vol_capacity,denom)
+            summary[f'Used_Block({denom})'] = getattr(used_capacity,denom)
+        return summary
+
+    def total(self,where: dict=None) -> dict:
+        with self.lock:
+            if self.vectorized():
+                rows = self.selection(where) if where else slice(None)
+                capacity, used = self.column('capacity')[rows], self.column('used')[rows]
+                return self.summary(len(capacity),int(numpy.maximum(capacity,0).sum()),int(numpy.maximum(used,0).sum()))
+            rows = self.mask(where)
+            capacity, used = self.data['capacity'], self.data['used']
+            return self.summary(len(rows),sum(max(capacity[row],0) for row in rows),sum(max(used[row],0) for row in rows))
+
+    def top(self,n: int=10,column: str='used',where: dict=None) -> list:
+        ''' The n ldevs with the largest value in a numeric column, [(ldev_id,value),...] largest first '''
+        if column not in self.numeric:
+            raise Exception(f"top needs a numeric ldev table column, one of {tuple(self.numeric)}")
+        with self.lock:
+            values, ldev_ids = self.data[column], self.data['ldev_id']
+            rows = self.mask(where) if where else range(len(values))
+            return [(str(ldev_ids[row]),values[row]) for row in heapq.nlargest(n,rows,key=values.__getitem__)]
+
+    def asnumpy(self) -> dict:
+        ''' A copy of the columns as int64 numpy arrays, for callers with numpy installed '''
+        if numpy is None:
+            raise Exception("asnumpy needs numpy installed")
+        with self.lock:
+            return { column: self.column(column) for column in self.columns }
@@ -0,0 +1,404 @@
+import re
+import time
+import logging
+import concurrent.futures
+from collections import deque
+from .cmdview import CmdviewConcurrent
+from .historutils.historutils import Ldevid
+
+class Provisioner():
+    '''
+    Bulk configuration changes submitted asynchronously ( -request_id auto ) and confirmed per batch rather than per command.\n
+    provisioner = Provisioner(storage)\n
+    luns = provisioner.addluns(plan)\n
+    Commands are grouped per host group, each group is submitted in order on the horcm instance chosen by raidcom.scheduler\n
+    and groups run concurrently. Each host group is read before and after the batch with one get lun and only mappings whose\n
+    command_status reports them complete and which were not there before are counted and undone.\n
+    ldevs = provisioner.addldevs('-pool 0 -capacity 2097152 -emulation OPEN-V',count=500,start=1000,end=2000,names=[...])\n
+    Free ldev ids are reserved from raidcom.ldev_allocator, creates are submitted across the instances and each ldev is\n
+    named as soon as command_status reports its create complete, the ldevs are then read back with ranged get ldev.\n
+    Requests are polled with one get command_status per instance per pass, whose REQID rows are matched against the batch's own\n
+    request ids, get command_status -request_id is only issued for a request missing from that output.
+    '''
+    reqid_regex = re.compile(r'^REQID\s*:\s*(\S+)',re.MULTILINE)
+    ldevoptions = ('capacity_saving','compression_acceleration','capacity_saving_mode','drs')
+
+    def __init__(self,raidcom,max_workers: int=8,log=logging,poll_interval: float=0.5,max_poll_interval: float=5,max_gap: int=64):
+        self.raidcom = raidcom
+        self.max_workers = max_workers
+        self.log = log
+        self.poll_interval = poll_interval
+        self.max_poll_interval = max_poll_interval
+        self.max_gap = max_gap
+
+    def requestid(self,cmdreturn) -> str:
+        reqid = self.reqid_regex.search(cmdreturn.stdout or '')
+        return reqid.group(1) if reqid else None
+
+    def submitgroups(self,groups: dict,command) -> list:
+        '''
+        Submit every item of each group, in order, on one instance per group. command(key,item,instance) returns the command line.\n
+        A group interrupted by an instance failure carries on from the failed item on the instance the scheduler retries on.\n
+        Returns [{ 'key', 'item', 'cmd', 'instance', 'reqid', 'cmdreturn', 'error' }] in submission order per group.
+        '''
+        raidcom = self.raidcom
+        scheduler = raidcom.scheduler
+
+        def submitgroup(key,pending,instance=None):
+            submitted = []
+            while pending:
+                item = pending[0]
+                cmd = command(key,item,instance)
+                entry = { 'key': key, 'item': item, 'cmd': cmd, 'instance': instance, 'reqid': None, 'cmdreturn': None, 'error': None }
+                try:
+                    entry['cmdreturn'] = raidcom.execute(cmd)
+                    entry['reqid'] = self.requestid(entry['cmdreturn'])
+                except scheduler.instance_errors:
+                    # Not submitted, the scheduler retries the rest of the group elsewhere
+                    results.extend(submitted)
+                    raise
+                except Exception as e:
+                    entry['error'] = str(e)
+                    self.log.error(f"Unable to submit '{cmd}': {e}")
+                pending.popleft()
+                submitted.append(entry)
+            return submitted
+
+        results = []
+        with concurrent.futures.ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            futures = {}
+            for key, items in groups.items():
+                pending = deque(items)
+                futures[executor.submit(scheduler.dispatch,submitgroup,key,pending)] = (key,pending)
+            for future in concurrent.futures.as_completed(futures):
+                try:
+                    results.extend(future.result())
+                except Exception as e:
+                    # Every instance failed, what was not submitted is reported rather than lost
+                    key, pending = futures[future]
+                    self.log.error(f"Unable to submit {len(pending)} remaining commands for {key}: {e}")
+                    results.extend({ 'key': key, 'item': item, 'cmd': command(key,item,raidcom.instance), 'instance': None, 'reqid': None, 'cmdreturn': None, 'error': str(e) } for item in pending)
+        return results
+
+    def hostgroup(self,mapping) -> tuple:
+        '''
+        Normalise a lun mapping, ('CL1-A-1',lun,ldev), { 'PORT':'CL1-A','GID':1,... } or { 'PORT':'CL1-A','host_grp_name':'name',... }\n
+        Returns the host group key ( port, cmdparam ), the port kwargs getlun and deletelun take for the host group, the lun ( None to let the storage choose ) and decimal ldev_id.
+        '''
+        raidcom = self.raidcom
+        if isinstance(mapping,(tuple,list)):
+            portgid, lun, ldev_id = mapping
+            mapping = { 'PORT': portgid, 'LUN': lun, 'LDEV': ldev_id }
+        port = str(mapping.get('PORT',mapping.get('port'))).upper()
+        gid = mapping.get('GID',mapping.get('gid'))
+        host_grp_name = mapping.get('host_grp_name')
+        lun = mapping.get('LUN',mapping.get('lun_id'))
+        ldev_id = str(Ldevid(mapping.get('LDEV',mapping.get('ldev_id'))).decimal)
+        lun = None if lun in (None,'') else str(lun)
+        if gid not in (None,''):
+            port = f"{port}-{gid}"
+        if host_grp_name and not re.search(r'-\d+$',port):
+            return (port,f" {host_grp_name}"), { 'port': port, 'host_grp_name': host_grp_name }, lun, ldev_id
+        raidcom.checkportgid(port)
+        return (port,''), { 'port': port }, lun, ldev_id
+
+    def readluns(self,keys: list,portargs: dict) -> dict:
+        ''' One get lun per host group, concurrently and bypassing the view cache, returns { key: luns } '''
+        raidcom = self.raidcom
+        with concurrent.futures.ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            futures = { key: executor.submit(raidcom.scheduler.dispatch,raidcom.getlun,update_view=False,refresh=True,**portargs[key]) for key in keys }
+            return { key: future.result() for key, future in futures.items() }
+
+    def addluns(self,plan: list,timeout: float=300,raise_err: bool=True) -> object:
+        '''
+        Map ldevs to host groups in bulk.\n
+        plan = [('CL1-A-1',0,1000),('CL1-A-1',1,1001),{'PORT':'CL2-A','GID':1,'LUN':0,'LDEV':1000},{'PORT':'CL3-A','host_grp_name':'esx01','LDEV':1002}]\n
+        A mapping without a LUN lets the storage choose it, the lun used is read back afterwards.\n
+        Returns CmdviewConcurrent with the resulting lun records in data and view, undocmds and undodefs for every mapping made\n
+        and stats requested, mapped, failed, hostgroups, errors ( requests not submitted or reported failed ) and elapsed.\n
+        A mapping counts as made when its request completed and the ldev is presented at a lun it was not at before the batch,\n
+        so ldevs already mapped are never undone. Mappings not made are listed in cmdreturn.failed and, with raise_err, raised once undo has been recorded.
+        '''
+        raidcom = self.raidcom
+        start = time.monotonic()
+        cmdreturn = CmdviewConcurrent(returncodes=[],stdout=[],stderr=[])
+        cmdreturn.serial = raidcom.serial
+        cmdreturn.failed = []
+
+        groups, portargs = {}, {}
+        for mapping in plan:
+            key, portargs[key], lun, ldev_id = self.hostgroup(mapping)
+            groups.setdefault(key,[]).append({ 'LUN': lun, 'LDEV': ldev_id, 'mapping': mapping })
+
+        def command(key,item,instance):
+            port, cmdparam = key
+            lunparam = f" -lun_id {item['LUN']}" if item['LUN'] is not None else ''
+            return f"{raidcom.path}raidcom add lun -port {port}{cmdparam} -ldev_id {item['LDEV']}{lunparam} -request_id auto -I{instance} -s {raidcom.serial}"
+
+        # What each host group presents before the batch, none of it is counted or undone
+        before = { key: { (row['LDEV'],row['LUN']) for row in luns.data } for key, luns in self.readluns(list(groups),portargs).items() }
+        submitted = self.submitgroups(groups,command)
+        self.awaitbatch(submitted,None,timeout)
+
+        for entry in submitted:
+            cmdreturn.cmds.append(entry['cmd'])
+            if entry['cmdreturn'] is not None:
+                cmdreturn.stdout.append(entry['cmdreturn'].stdout)
+                cmdreturn.stderr.append(entry['cmdreturn'].stderr)
+                cmdreturn.returncodes.append(entry['cmdreturn'].returncode)
+            else:
+                cmdreturn.stderr.append(entry['error'])
+                cmdreturn.returncodes.append(1)
+                cmdreturn.returncode += 1
+
+        for key in groups:
+            raidcom.invalidateport(key[0],'_LUNS')
+        for items in groups.values():
+            for item in items:
+                raidcom.invalidateldev(item['LDEV'])
+
+        # Read back each host group once to confirm the mappings and learn luns chosen by the storage
+        added = {}
+        for key, luns in self.readluns(list(groups),portargs).items():
+            raidcom.updateview(cmdreturn.view,luns.view)
+            for row in luns.data:
+                if (row['LDEV'],row['LUN']) not in before[key]:
+                    added.setdefault((key,row['LDEV']),[]).append(row)
+
+        for entry in submitted:
+            key, item = entry['key'], entry['item']
+            rows = [row for row in added.get((key,item['LDEV']),[]) if item['LUN'] is None or row['LUN'] == item['LUN']]
+            if not entry['completed'] or not rows:
+                if entry['error']:
+                    self.log.error(f"lun mapping {item['mapping']}: {entry['error']}")
+                cmdreturn.failed.append(item['mapping'])
+                continue
+            row = rows[0]
+            added[(key,item['LDEV'])].remove(row)
+            cmdreturn.data.append(row)
+            undodef = { 'undodef': 'deletelun', 'args': dict(portargs[key],ldev_id=item['LDEV'],lun_id=row['LUN']) }
+            raidcom.populateundo(undodef,cmdreturn.undocmds,cmdreturn.undodefs)
+
+        for undocmd in reversed(cmdreturn.undocmds):
+            raidcom.undocmds.insert(0,undocmd)
+            raidcom.undocmds.insert(0,f'echo "Executing: {undocmd}"')
+        for undodef in reversed(cmdreturn.undodefs):
+            raidcom.undodefs.insert(0,undodef)
+
+        raidcom.updateview(raidcom.views,{'_ports':cmdreturn.view})
+        raidcom.updatestats.luncounters()
+        cmdreturn.stats = { 'requested': len(plan), 'mapped': len(cmdreturn.data), 'failed': len(cmdreturn.failed), 'hostgroups': len(groups), 'errors': sum(bool(entry['error']) for entry in submitted), 'elapsed': time.monotonic() - start }
+        self.log.info(f"Mapped {cmdreturn.stats['mapped']} of {len(plan)} luns across {len(groups)} host groups in {round(cmdreturn.stats['elapsed'],3)}s")
+        if cmdreturn.failed and raise_err:
+            raise Exception(f"{len(cmdreturn.failed)} of {len(plan)} lun mappings were not made, undo recorded for the {cmdreturn.stats['mapped']} made: {cmdreturn.failed}")
+        return cmdreturn
+
+    def cmdoptions(self,**kwargs) -> str:
+        ''' add ldev options among ldevoptions as command parameters, True booleans become flags '''
+        options = ''
+        for arg in self.ldevoptions:
+            value = kwargs.get(arg)
+            if value is None or value is False:
+                continue
+            options += f" -{arg}" if value is True else f" -{arg} {value}"
+        return options
+
+    def reserveldevs(self,count: int=None,ldev_ids: list=None,start: int=None,end: int=None) -> tuple:
+        '''
+        Reserve ldev ids to create from raidcom.ldev_allocator.\n
+        ldev_ids: those still free, in the order given\n
+        start, end: the first count free ids in the range, every free id in it when count is None\n
+        Returns ( reserved, unavailable ), decimal ldev id strings. Reserved ids are committed or released by addldevs.
+        '''
+        allocator = self.raidcom.ldev_allocator
+        if ldev_ids is not None:
+            return allocator.reserve(ldev_ids)
+        if start is None or end is None:
+            raise Exception("reserveldevs needs either ldev_ids or start and end")
+        if count is None:
+            return allocator.allocatefree(start,end), []
+        return allocator.allocate(count,start,end), []
+
+    def requeststatus(self,instance,reqid: str) -> dict:
+        ''' get command_status -request_id, the REQID row with R ( Y complete, N failed, - in progress ), SSB1, SSB2 and ID '''
+        raidcom = self.raidcom
+        cmdreturn = raidcom.execute(f"{raidcom.path}raidcom get command_status -request_id {reqid} -I{instance} -s {raidcom.serial}")
+        raidcom.parser.getcommandstatus(cmdreturn)
+        return cmdreturn.data[0] if cmdreturn.data else {}
+
+    def instancestatus(self,instance) -> dict:
+        ''' get command_status for every request on instance, { REQID: row }, empty when the output carries no REQID rows '''
+        raidcom = self.raidcom
+        cmdreturn = raidcom.execute(f"{raidcom.path}raidcom get command_status -I{instance} -s {raidcom.serial}")
+        raidcom.parser.getcommandstatus(cmdreturn)
+        return { row['REQID']: row for row in cmdreturn.data if row.get('REQID') }
+
+    def awaitrequests(self,instance,entries: list,oncomplete,timeout: float) -> None:
+        '''
+        Poll the requests submitted on instance until they complete, calling oncomplete(entry,instance), when given, as each one does.\n
+        Each pass issues one get command_status for the instance and matches its REQID rows against entries only, requests missing\n
+        from that output, or every request when it fails, are looked up with get command_status -request_id.\n
+        Requests still in progress are polled again after poll_interval, doubling up to max_poll_interval, until timeout.
+        '''
+        pending = deque(entries)
+        interval = self.poll_interval
+        deadline = time.monotonic() + timeout
+        while pending:
+            try:
+                statuses = self.instancestatus(instance)
+            except Exception as e:
+                self.log.debug(f"Unable to get command_status on instance {instance}, polling requests individually: {e}")
+                statuses = {}
+            for _ in range(len(pending)):
+                entry = pending.popleft()
+                status = statuses.get(entry['reqid'])
+                if status is None:
+                    try:
+                        status = self.requeststatus(instance,entry['reqid'])
+                    except Exception as e:
+                        entry['error'] = f"Unable to get command_status for request {entry['reqid']}: {e}"
+                        continue
+                result = status.get('R')
+                if result == 'Y':
+                    entry['completed'] = entry['settled'] = True
+                    if oncomplete:
+                        oncomplete(entry,instance)
+                elif result == 'N':
+                    entry['settled'] = True
+                    entry['error'] = f"Request {entry['reqid']} failed SSB1 {status.get('SSB1')} SSB2 {status.get('SSB2')}"
+                else:
+                    pending.append(entry)
+            if pending:
+                if time.monotonic() > deadline:
+                    for entry in pending:
+                        entry['error'] = f"Request {entry['reqid']} not complete after {timeout}s"
+                    return
+                time.sleep(interval)
+                interval = min(interval * 2,self.max_poll_interval)
+
+    def awaitbatch(self,submitted: list,oncomplete,timeout: float) -> dict:
+        '''
+        Poll the request of every entry submitted by submitgroups on the instance it was submitted on, see awaitrequests.\n
+        Only the batch's own request ids are matched, so batches running at the same time do not see each other's errors.\n
+        Sets completed and settled ( the outcome is known ) on each entry and returns { instance: [entries polled] }.
+        '''
+        byinstance = {}
+        for entry in submitted:
+            entry.update({ 'completed': False, 'settled': entry['cmdreturn'] is None })
+            if entry['cmdreturn'] is None:
+                continue
+            if entry['reqid'] is None:
+                entry['error'] = entry['error'] or f"Unable to obtain REQID from stdout '{entry['cmdreturn'].stdout}'"
+                continue
+            byinstance.setdefault(entry['instance'],[]).append(entry)
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers=max(len(byinstance),1)) as executor:
+            futures = [executor.submit(self.awaitrequests,instance,entries,oncomplete,timeout) for instance, entries in byinstance.items()]
+            for future in concurrent.futures.as_completed(futures):
+                future.result()
+        return byinstance
+
+    def addldevs(self,params: str,count: int=None,ldev_ids: list=None,start: int=None,end: int=None,names: list=None,
+                 format_ldevs: bool=False,return_ldevs: bool=True,record: dict=None,timeout: float=300,raise_err: bool=True) -> object:
+        '''
+        Create ldevs in bulk.\n
+        params: the add ldev parameters shared by every ldev, e.g. '-pool 0 -capacity 2097152 -emulation OPEN-V' or '-parity_grp_id 1-1 -cylinder 10 -emulation 3390-A'\n
+        ldev_ids or start, end and count select the ids, see reserveldevs. names[i] is given to the i'th ldev id requested ( the i'th reserved in a range ), the names of unavailable ids are not used.\n
+        format_ldevs: start a quick format ( initialize ldev -operation qfmt ) of each ldev once it is created, the format is not waited for\n
+        record: fields of the row returned for each ldev, overlaid by get ldev when return_ldevs\n
+        Returns CmdviewConcurrent with the created ldevs in data and view ( keyed by decimal ldev id ), undocmds and undodefs deleting them,\n
+        unavailable_ldevs, failed [{ 'ldev_id', 'name', 'error' }] and stats requested, created, named, failed, unavailable, instances, elapsed.\n
+        With raise_err failures are raised once undo has been recorded for the ldevs which were created.
+        '''
+        raidcom = self.raidcom
+        start_time = time.monotonic()
+        cmdreturn = CmdviewConcurrent(returncodes=[],stdout=[],stderr=[])
+        cmdreturn.serial = raidcom.serial
+        cmdreturn.failed = []
+
+        reserved, cmdreturn.unavailable_ldevs = self.reserveldevs(count=count,ldev_ids=ldev_ids,start=start,end=end)
+        # Names follow the ids asked for, an id already defined takes its name with it
+        requested = [str(Ldevid(ldev_id).decimal) for ldev_id in ldev_ids] if ldev_ids is not None else reserved
+        available = set(reserved)
+        names = { ldev_id: name for ldev_id, name in zip(requested,names) if ldev_id in available } if names is not None else {}
+        width = max(min(self.max_workers,len(reserved)),1)
+        groups = { i: reserved[i::width] for i in range(width) if reserved[i::width] }
+
+        def command(key,ldev_id,instance):
+            return f"{raidcom.path}raidcom add ldev -ldev_id {ldev_id} {params} -request_id auto -I{instance} -s {raidcom.serial}"
+
+        submitted = self.submitgroups(groups,command)
+
+        def complete(entry,instance):
+            ''' The create has finished, name and format the ldev straight away on the instance which created it '''
+            entry['created'] = True
+            ldev_id, name = entry['item'], names.get(entry['item'])
+            followups = []
+            if name:
+                followups.append(f'{raidcom.path}raidcom modify ldev -ldev_id {ldev_id} -ldev_name "{name}" -I{instance} -s {raidcom.serial}')
+            if format_ldevs:
+                followups.append(f"{raidcom.path}raidcom initialize ldev -ldev_id {ldev_id} -operation qfmt -I{instance} -s {raidcom.serial}")
+            for cmd in followups:
+                try:
+                    entry['followups'].append(raidcom.execute(cmd))
+                except Exception as e:
+                    entry['error'] = f"'{cmd}' failed: {e}"
+                    return
+            entry['named'] = bool(name)
+
+        for entry in submitted:
+            entry.update({ 'created': False, 'named': False, 'followups': [] })
+            cmdreturn.cmds.append(entry['cmd'])
+            if entry['cmdreturn'] is None:
+                cmdreturn.stderr.append(entry['error'])
+                cmdreturn.returncodes.append(1)
+                cmdreturn.returncode += 1
+                continue
+            cmdreturn.stdout.append(entry['cmdreturn'].stdout)
+            cmdreturn.stderr.append(entry['cmdreturn'].stderr)
+            cmdreturn.returncodes.append(entry['cmdreturn'].returncode)
+        byinstance = self.awaitbatch(submitted,complete,timeout)
+
+        created, uncreated = [], []
+        for entry in submitted:
+            cmdreturn.cmds.extend(followup.cmd for followup in entry['followups'])
+            if entry['created']:
+                created.append(entry['item'])
+                raidcom.populateundo({ 'undodef': 'deleteldev', 'args': { 'ldev_id': entry['item'] } },cmdreturn.undocmds,cmdreturn.undodefs)
+            elif entry['settled']:
+                uncreated.append(entry['item'])
+            if entry['error']:
+                cmdreturn.failed.append({ 'ldev_id': entry['item'], 'name': names.get(entry['item']), 'error': entry['error'] })
+                self.log.error(f"ldev {entry['item']}: {entry['error']}")
+
+        # Ids whose create failed outright are free again, those still in doubt ( timed out ) stay reserved
+        raidcom.ldev_allocator.commit(created)
+        raidcom.ldev_allocator.release(uncreated)
+
+        for undocmd in reversed(cmdreturn.undocmds):
+            raidcom.undocmds.insert(0,undocmd)
+            raidcom.undocmds.insert(0,f'echo "Executing: {undocmd}"')
+        for undodef in reversed(cmdreturn.undodefs):
+            raidcom.undodefs.insert(0,undodef)
+
+        for ldev_id in created:
+            raidcom.invalidateldev(ldev_id)
+        details = {}
+        if return_ldevs and created:
+            first, last = min(map(int,created)), max(map(int,created))
+            details = raidcom.concurrent_getldevs(created,max_workers=self.max_workers,range_size=last - first + 1,max_gap=self.max_gap).view
+
+        for ldev_id in sorted(created,key=int):
+            row = dict(record or {},LDEV=ldev_id)
+            if names.get(ldev_id):
+                row['NAME'] = names[ldev_id]
+            row.update(details.get(ldev_id,{}))
+            cmdreturn.view[ldev_id] = row
+            cmdreturn.data.append(row)
+
+        cmdreturn.stats = { 'requested': len(reserved) + len(cmdreturn.unavailable_ldevs), 'created': len(created), 'named': sum(entry['named'] for entry in submitted), 'failed': len(cmdreturn.failed),
+                            'unavailable': len(cmdreturn.unavailable_ldevs), 'instances': len(byinstance), 'elapsed': time.monotonic() - start_time }
+        self.log.info(f"Created {len(created)} of {len(reserved)} ldevs across {len(byinstance)} instances in {round(cmdreturn.stats['elapsed'],3)}s, {len(cmdreturn.unavailable_ldevs)} requested ids already defined")
+        if cmdreturn.failed and raise_err:
+            raise Exception(f"{len(cmdreturn.failed)} of {len(reserved)} ldevs were not created or not named, undo recorded for the {len(created)} created: {cmdreturn.failed}")
+        return cmdreturn
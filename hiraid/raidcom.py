@@ -7,12 +7,26 @@
 # Author: Clive Meakin
 # GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
 
-import re, ast, time, json, logging, subprocess, collections, concurrent.futures, os
+import re, ast, time, json, copy, logging, subprocess, concurrent.futures, os, threading, itertools
 from .raidcomparser import Raidcomparser
 from .cmdview import Cmdview,CmdviewConcurrent
 from .raidcomstats import Raidcomstats
 from .storagecapabilities import Storagecapabilities
 from .hiraidexception import RaidcomException
+from .cmdserver import Cmdserverpool
+from .executor import getexecutor
+from .viewstore import Viewstore, mergeview
+from .identitycache import Identitycache
+from .snapshotcache import Snapshotcache
+from .viewcache import Viewcache
+from .scheduler import Instancescheduler
+from .governor import getgovernor, Governedexecutor
+from .inventory import Inventory
+from .ldevtable import Ldevtable
+from .viewindex import Viewindex
+from .provisioning import Provisioner
+from .ldevallocator import Ldevallocator
+from .raidcomrequest import Raidcomrequest
 
 from .horcctl import Horcctl
 from .inqraid import Inqraid
@@ -26,7 +40,7 @@ from typing import Union, Dict, List
 class Raidcom:
 	version = __version__
 	inqraidView = {}
-	def __init__(self,serial,instance,path="/usr/bin/",cciextension='.sh',log=logging,username=None,password=None,asyncmode=False,unlockOnException=True,cachedir=f"{os.path.expanduser('~')}{os.sep}hiraid"):
+	def __init__(self,serial,instance,path="/usr/bin/",cciextension='.sh',log=logging,username=None,password=None,asyncmode=False,unlockOnException=True,cachedir=f"{os.path.expanduser('~')}{os.sep}hiraid",cmdserver=False,cmdserver_workers=4,cmdserver_timeout=3600,executor=None,fast_start=False,revalidate='background',view_ttl=None,concurrency=None,concurrency_timeout=None,compact=False):
 
 		self.serial = serial
 		self.log = log
@@ -36,61 +50,187 @@ class Raidcom:
 		self.username = username
 		self.password = password
 		self.cmdoutput = False
-		self.views = {}
+		self.views = Viewstore()
 		self.data = {}
-		self.stats = {}
 		self.successfulcmds = []
 		self.undocmds = []
 		self.undodefs = []
-		self.parser = Raidcomparser(self,log=self.log)
+		# Lun, hba_wwn, port login and ldev rows as slotted Records rather than dicts, for arrays with very many paths
+		self.compact = compact
+		self.parser = Raidcomparser(self,log=self.log,compact=compact)
 		self.updatestats = Raidcomstats(self,log=self.log)
+		self._ldev_table = None
+		self._view_index = None
+		self._ldev_allocator = None
 		self.asyncmode = asyncmode
 		self.lock = None
 		self.cachedir = cachedir
 		self.cachefile = f"{self.cachedir}{os.sep}{self.serial}_cache.json"
+		self.snapshot = Snapshotcache(self.cachedir,self.serial,log=self.log)
+		# Opt in read-through cache of getters, seconds per view e.g. {'_ports':600,'_ldevs':30}
+		self.viewcache = Viewcache(view_ttl,log=self.log)
+		# concurrent_* methods dispatch to the least loaded, fastest horcm instance
+		self.scheduler = Instancescheduler(log=self.log)
+		# Long-lived shells per horcm instance instead of a shell fork per command
+		self.cmdserver = Cmdserverpool(workers=cmdserver_workers,log=self.log,timeout=cmdserver_timeout) if cmdserver else None
+		# Commands in flight against this serial are bounded process wide per command class, e.g. concurrency={'get':8,'write':2,'raidscan':4}
+		self.governor = getgovernor(self.serial,limits=concurrency,timeout=concurrency_timeout,log=self.log)
+		# inqraid reads every array's devices on the host, it runs outside this serial's limits
+		self.hostexecutor = executor or self.cmdserver or getexecutor()
+		self.executor = Governedexecutor(self.hostexecutor,self.governor)
+		self.identitycache = Identitycache(self.cachedir,self.serial,log=self.log)
+		self.identity_unverified = False
+		self.revalidation = None
+		self.statelock = threading.RLock()
+		if fast_start and self.faststart(instance,revalidate):
+			return
 		self.inqraid()
 		self.loadinstances(instance)
 		self.login()
 		self.identify()
 		self.limitations()
+		if fast_start:
+			self.identitycache.save(self.identityrecord())
+
+	def faststart(self,instances,revalidate='background') -> bool:
+		'''
+		Construct from the identity record in cachedir rather than inqraid, getport, horcctl, get resource and raidqry.\n
+		revalidate='background' checks the record in a thread, 'onfailure' on the first failing command, None never.\n
+		Returns False when there is no usable record.
+		'''
+		instances = list(instances) if isinstance(instances,(tuple,list)) else [instances]
+		record = self.identitycache.load(instances)
+		if not record:
+			return False
+		# Views which fast start does not fetch are loaded on first read
+		self.views.addloader('_inqraid',self.inqraid)
+		self.views.addloader('_resource_groups',self.concurrent_getresource)
+		self.views.addloader('_raidqry',self.raidqry)
+		self.instance = instances[0]
+		self.instances = { i:dict(record['instances'][str(i)]) for i in instances }
+		self.horcm_instance_list = list(self.instances.keys())
+		self.num_horcm_instances = len(self.horcm_instance_list)
+		self.scheduler.setinstances(self.instances)
+		horcctl = { i:{ 'unitid': self.instances[i]['UNITID'], 'current_control_device': self.instances[i]['cmd_device'], 'instance': i } for i in instances }
+		self.updateview(self.views,{'_horcctl':horcctl,'_identity':dict(record['identity'],horcm_inst=self.instance)})
+		for key, value in record['identity'].items():
+			if key not in ('serial','horcm_inst'):
+				setattr(self,key,value)
+		self.login()
+		self.limitations()
+		self.log.debug(f"Fast start from identity record {self.identitycache.cachefile}")
+		if revalidate == 'background':
+			self.revalidatebackground()
+		elif revalidate == 'onfailure':
+			self.identity_unverified = True
+		return True
+
+	def revalidatebackground(self) -> threading.Thread:
+		''' Start revalidate() in a daemon thread, unless one is already running '''
+		with self.statelock:
+			if self.revalidation is None or not self.revalidation.is_alive():
+				self.revalidation = threading.Thread(target=self.revalidate,kwargs={'raise_err':False},daemon=True)
+				self.revalidation.start()
+			return self.revalidation
+
+	def identityrecord(self) -> dict:
+		''' The identity record fast start is constructed from '''
+		return { 'identity': dict(self.views['_identity']), 'instances': { str(i):dict(self.instances[i]) for i in self.instances } }
+
+	def revalidate(self,raise_err: bool=True) -> list:
+		'''
+		Rediscover instances and identity as a normal start would and rewrite the identity record.\n
+		Discovery runs against a private copy of this Raidcom ( probe ) whose state is swapped in under statelock once complete,\n
+		so calls running meanwhile never see half discovered instances or views.\n
+		Returns the list of values which differed from the record.
+		'''
+		self.identity_unverified = False
+		try:
+			record = self.identityrecord()
+			probe = self.probe()
+			probe.loadinstances(list(self.instances))
+			probe.identify()
+			probe.limitations()
+			current = probe.identityrecord()
+			self.adopt(probe)
+			changes = self.identitycache.changes(record,current)
+			if changes:
+				self.log.warning(f"Identity record for {self.serial} was stale: {', '.join(changes)}")
+			self.identitycache.save(current)
+			return changes
+		except Exception as e:
+			if raise_err:
+				raise
+			self.log.warning(f"Unable to revalidate identity record for {self.serial}: {e}")
 	
+	def probe(self) -> 'Raidcom':
+		''' Copy of this Raidcom sharing its executor and scheduler but with its own views, parser and stats '''
+		probe = copy.copy(self)
+		probe.views = Viewstore()
+		probe.views.addloader('_inqraid',probe.inqraid)
+		probe.data = {}
+		probe.instances = dict(self.instances)
+		probe.parser = Raidcomparser(probe,log=self.log,compact=self.compact)
+		probe.updatestats = Raidcomstats(probe,log=self.log)
+		return probe
+
+	def adopt(self,probe: 'Raidcom') -> None:
+		''' Swap in the instances, identity attributes and identity views discovered by probe '''
+		identityviews = { key: dict.__getitem__(probe.views,key) for key in ('_horcctl','_identity','_resource_groups','_raidqry') if dict.__contains__(probe.views,key) }
+		attributes = [key for key in identityviews.get('_identity',{}) if key not in ('serial','horcm_inst')]
+		attributes += ['vtype','cache','horcm_ver','cmd_device','cmd_device_type','cmd_device_ldevid','cmd_device_culdev','cmd_device_port']
+		attributes += list(Storagecapabilities.default_limitations)
+		with self.statelock:
+			for attribute in attributes:
+				if hasattr(probe,attribute):
+					setattr(self,attribute,getattr(probe,attribute))
+			self.instances = probe.instances
+			self.horcm_instance_list = list(self.instances.keys())
+			self.num_horcm_instances = len(self.horcm_instance_list)
+			self.updateview(self.views,identityviews)
+
 	def loadinstances(self,instances,max_workers=10):
+		# Discovered into a new dict and swapped in at the end, a background revalidation must not expose a half built self.instances
 		if isinstance(instances, tuple) or isinstance(instances, list):
 			self.instance = instances[0]
-			self.instances = { i:{} for i in instances }
+			discovered = { i:{} for i in instances }
 		else:
 			self.instance = instances
-			self.instances[instances] = {}            
+			discovered = { i:{} for i in self.instances }
+			discovered[instances] = {}
 
 		# Obtain unitids concurrently by fetching ports using all instances
 		cmdreturn = CmdviewConcurrent()
 		with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
-			future_out = { executor.submit(self.getport,update_view=False,instance=instance): instance for instance in self.instances}
+			future_out = { executor.submit(self.getport,update_view=False,instance=i): i for i in discovered}
 			for future in concurrent.futures.as_completed(future_out):
-				self.instances[future.result().instance]['UNITID'] = future.result().data[0]['UNITID']
+				discovered[future.result().instance]['UNITID'] = future.result().data[0]['UNITID']
 				
 		with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
-			future_out = { executor.submit(self.horcctl,instance=instance,unitid=self.instances[instance]['UNITID']): instance for instance in self.instances}
+			future_out = { executor.submit(self.horcctl,instance=i,unitid=discovered[i]['UNITID']): i for i in discovered}
 			for future in concurrent.futures.as_completed(future_out):
 				self.update_concurrent_cmdreturn(cmdreturn,future)
 				
-		for i in self.instances:
+		for i in discovered:
 			cmd_device = self.views['_horcctl'][i]['current_control_device']
 			cmd_device_type = ('FIBRE','IP')['IPCMD' in cmd_device]
-			self.instances[i] = { 'cmd_device': cmd_device, 'cmd_device_type': cmd_device_type }
+			discovered[i] = { 'UNITID': discovered[i].get('UNITID'), 'cmd_device': cmd_device, 'cmd_device_type': cmd_device_type }
 			# if inqraid was successful, we can also return cmd_device_ldevid
 			try:
 				if cmd_device_type == "FIBRE":
 					device_file =  cmd_device.split('/')[-1]
-					self.instances[i]['cmd_device_ldevid'] = self.views['_inqraid'][device_file]['LDEV']
-					self.instances[i]['cmd_device_culdev'] = Ldevid(self.instances[i]['cmd_device_ldevid']).culdev
-					self.instances[i]['cmd_device_port'] = self.views['_inqraid'][device_file]['PORT']
+					discovered[i]['cmd_device_ldevid'] = self.views['_inqraid'][device_file]['LDEV']
+					discovered[i]['cmd_device_culdev'] = Ldevid(discovered[i]['cmd_device_ldevid']).culdev
+					discovered[i]['cmd_device_port'] = self.views['_inqraid'][device_file]['PORT']
 				else:
 					self.log.warn(f"Instance {i} is an IPCMD, expect poor performance from this instance")
 			except:
 				self.log.warn(f"Unable to derive cmd_device ldev_id for instance {i}")
-			self.horcm_instance_list = list(self.instances.keys())
-			self.num_horcm_instances = len(self.horcm_instance_list)
+
+		self.instances = discovered
+		self.horcm_instance_list = list(self.instances.keys())
+		self.num_horcm_instances = len(self.horcm_instance_list)
+		self.scheduler.setinstances(self.instances)
 
 	def updatetimer(self,cmdreturn):
 		elapsedtime = timer.timediff(cmdreturn.start)
@@ -103,29 +243,68 @@ class Raidcom:
 		if not os.path.exists(directory):
 			os.makedirs(directory)
 
-	def writecache(self):
-		self.createdir(self.cachedir)
-		file = open(self.cachefile,"w")
-		file.write(json.dumps(self.views,indent=4))
-		return Cmdview(cmd="writecache")
+	def writecache(self,keys: list=None):
+		'''
+		Write views to the snapshot cache in cachedir, one compressed segment per top level view\n
+		keys = <optional list of views to write, e.g. ['_ldevs','_ports']>
+		'''
+		cmdreturn = Cmdview(cmd="writecache")
+		cmdreturn.view = self.snapshot.write(self.views,keys=keys)
+		return cmdreturn
 
-	def loadcache(self):
+	def loadcache(self,keys: list=None,lazy: bool=True):
+		'''
+		Replace views with those in the snapshot cache\n
+		keys = <optional list of views to load, default all>\n
+		lazy = <read each segment on first use of its view, default True>\n
+		A json cachefile written by earlier versions is still read when there is no snapshot.
+		'''
+		cmdreturn = Cmdview(cmd="loadcache")
+		self.viewcache.clear()
+		if self.snapshot.exists():
+			self.log.debug(f'Reading snapshot {self.snapshot.snapshotdir}')
+			cmdreturn.view = self.snapshot.load(self.views,keys=keys,lazy=lazy)
+			return cmdreturn
 		self.log.debug(f'Reading cachefile {self.cachefile}')
 		try:
 			with open(self.cachefile) as json_file:
-				self.views = json.load(json_file)
+				views = json.load(json_file)
+			self.views.replace({ key:views[key] for key in (keys or views) if key in views })
 		except Exception as e:
 			raise Exception(f'Unable to load cachefile {self.cachefile}')
-		return Cmdview(cmd="loadcache")
+		return cmdreturn
 	
+	@property
+	def stats(self) -> dict:
+		''' Counters are maintained as the views change and only materialised here, on read '''
+		return self.updatestats.materialize()
+
+	@property
+	def ldev_table(self) -> Ldevtable:
+		''' Columnar copy of views['_ldevs'] for capacity aggregation, top-N and filters, built on first use and kept in step with the view '''
+		if self._ldev_table is None:
+			self._ldev_table = Ldevtable(self.views)
+		return self._ldev_table
+
+	@property
+	def view_index(self) -> Viewindex:
+		''' Wwn, ldev, host group name, resource group and pool indexes over views, built on first use and kept in step with the views '''
+		if self._view_index is None:
+			self._view_index = Viewindex(self.views)
+		return self._view_index
+
+	@property
+	def ldev_allocator(self) -> Ldevallocator:
+		''' Free ldev id bitmap over 0..maxldevid, seeded from get ldev -ldev_list defined on first use and kept in step with views['_ldevs'] '''
+		if self._ldev_allocator is None:
+			self._ldev_allocator = Ldevallocator(self.maxldevid,self.getldevlist('defined',update_view=False).view,views=self.views)
+		return self._ldev_allocator
+
 	def updateview(self,view: dict,viewupdate: dict) -> dict:
 		''' Update dict view with new dict data '''
-		for k, v in viewupdate.items():
-			if isinstance(v,collections.abc.Mapping):
-				view[k] = self.updateview(view.get(k,{}),v)
-			else:
-				view[k] = v
-		return view
+		if isinstance(view,Viewstore):
+			return view.merge(viewupdate)
+		return mergeview(view,viewupdate)
 
 	def login(self,**kwargs):
 		if self.username and self.password:
@@ -144,6 +323,34 @@ class Raidcom:
 		if not re.search(r'cl\w-\D+\d?-\d+',portgid,re.IGNORECASE): raise Exception('Malformed portgid: {}'.format(portgid))
 		return portgid
 
+	def ldevpath(self,ldev_id: str,view_keyname: str='_ldevs') -> tuple:
+		''' View path of a single ldev, None for ranges '''
+		try:
+			return (view_keyname,str(Ldevid(ldev_id).decimal))
+		except Exception:
+			return None
+
+	def portpath(self,port: str,view_keyname: str='_ports',**kwargs) -> tuple:
+		''' View path of a host group ( '_ports','CL1-A','_GIDS','1' ), the port's _GIDS when the gid is not known '''
+		portgid = re.search(r'^(cl\w-\D+\d?)-(\d+)$',port,re.IGNORECASE)
+		if portgid:
+			return (view_keyname,portgid.group(1).upper(),'_GIDS',portgid.group(2))
+		if kwargs.get('gid') not in (None,''):
+			return (view_keyname,port.upper(),'_GIDS',str(kwargs['gid']))
+		return (view_keyname,port.upper(),'_GIDS')
+
+	def portleafpath(self,port: str,leaf: str=None,**kwargs) -> tuple:
+		''' View path of a host group's leaf view, the port's _GIDS when the gid is not known '''
+		path = self.portpath(port,**kwargs)
+		return path + (leaf,) if leaf and len(path) == 4 else path
+
+	def invalidateport(self,port: str,leaf: str=None,**kwargs) -> None:
+		''' Drop view cache entries for a host group's leaf view, or for every host group on the port when the gid is not known '''
+		self.viewcache.invalidate(self.portleafpath(port,leaf,**kwargs))
+
+	def invalidateldev(self,ldev_id: str) -> None:
+		self.viewcache.invalidate(self.ldevpath(ldev_id) or ('_ldevs',))
+
 	def getcommandstatus(self,request_id: str=None, **kwargs) -> object:
 		'''
 		raidcom get command_status\n
@@ -189,7 +396,7 @@ class Raidcom:
 		return cmdreturn
 	
 	def horcctl(self, unitid: int, view_keyname: str='_horcctl', **kwargs) -> object:
-		cmdreturn = Horcctl(kwargs.get('instance',self.instance)).showControlDeviceOfHorcm(unitid)
+		cmdreturn = Horcctl(kwargs.get('instance',self.instance),executor=self.executor).showControlDeviceOfHorcm(unitid)
 		self.updateview(self.views,{view_keyname:cmdreturn.view})
 		self.log.debug(f"Storage horcctl (unitid:cmddevice): {cmdreturn.view}")
 		return cmdreturn
@@ -199,7 +406,7 @@ class Raidcom:
 			if getattr(self.inqraidView,'view',None) and not refresh:
 				cmdreturn = self.inqraidView
 			else:
-				cmdreturn = Inqraid().inqraidCli()
+				cmdreturn = Inqraid(executor=self.hostexecutor).inqraidCli()
 				self.__class__.inqraidView = cmdreturn
 			self.updateview(self.views,{view_keyname:cmdreturn.view})
 			return cmdreturn
@@ -235,23 +442,23 @@ class Raidcom:
 		rq.stdout\n
 		rq.stats\n
 		'''
-		cmd = f"{self.path}raidqry -l -I{self.instance}"
-		cmdreturn = self.execute(cmd,**kwargs)
-		self.parser.raidqry(cmdreturn,datafilter=kwargs.get('datafilter',{}))
-		self.updateview(self.views,{view_keyname:cmdreturn.view})
-		return cmdreturn
+		return self.runrequest(self.raidqryrequest(view_keyname,**kwargs))
+
+	def raidqryrequest(self, view_keyname: str='_raidqry', **kwargs) -> Raidcomrequest:
+		cmd = f"{self.path}raidqry -l -I{kwargs.get('instance',self.instance)}"
+		return self.getterrequest('raidqry',cmd,parse=lambda cmdreturn: self.parser.raidqry(cmdreturn,datafilter=kwargs.get('datafilter',{})),view_keyname=view_keyname,**kwargs)
 
 	def limitations(self):
 		for limitation in Storagecapabilities.default_limitations:
 			setattr(self,limitation,Storagecapabilities.limitations.get(self.v_id,{}).get(limitation,Storagecapabilities.default_limitations[limitation]))
    
 	def getresource(self, view_keyname: str='_resource_groups', key='opt', **kwargs) -> object:
+		return self.runrequest(self.getresourcerequest(view_keyname,key,**kwargs))
+
+	def getresourcerequest(self, view_keyname: str='_resource_groups', key='opt', **kwargs) -> Raidcomrequest:
 		optcmd = (f'-key {key}','')[not key or key == '']
-		cmd = f"{self.path}raidcom get resource {optcmd} -I{self.instance} -s {self.serial}"
-		cmdreturn = self.execute(cmd,**kwargs)
-		self.parser.getresource(cmdreturn,datafilter=kwargs.get('datafilter',{}))
-		self.updateview(self.views,{view_keyname:cmdreturn.view})
-		return cmdreturn
+		cmd = f"{self.path}raidcom get resource {optcmd} -I{kwargs.get('instance',self.instance)} -s {self.serial}"
+		return self.getterrequest('getresource',cmd,parse=lambda cmdreturn: self.parser.getresource(cmdreturn,datafilter=kwargs.get('datafilter',{})),view_keyname=view_keyname,**kwargs)
 	
 	def Xgetresource(self, view_keyname: str='_resource_groups', **kwargs) -> object:
 		cmd = f"{self.path}raidcom get resource -key opt -I{self.instance} -s {self.serial}"
@@ -263,14 +470,14 @@ class Raidcom:
 	def concurrent_getresource(self, max_workers: int=5, view_keyname: str='_resource_groups', **kwargs) -> object:
 
 		resource_outputs = []
-		def getresource(key=None):
+		def getresource(key=None,instance=None):
 			optcmd = (f'-key {key}','')[not key or key == '']
-			cmd = f"{self.path}raidcom get resource {optcmd} -I{self.instance} -s {self.serial}"
+			cmd = f"{self.path}raidcom get resource {optcmd} -I{instance} -s {self.serial}"
 			return self.execute(cmd,**kwargs)
 
 		cmdreturn = CmdviewConcurrent()
 		with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
-			future_out = { executor.submit(getresource,key=key): key for key in ['opt',None]}
+			future_out = { executor.submit(self.scheduler.dispatch,getresource,key=key): key for key in ['opt',None]}
 			for future in concurrent.futures.as_completed(future_out):
 				resource_outputs.append(future.result())
 		
@@ -291,15 +498,26 @@ class Raidcom:
 		getldev(ldev_id=1000-11000)
 		getldev(ldev_id=1000-11000,datafilter={'LDEV_NAMING':'Test_Label_1'})
 		getldev(ldev_id=1000-11000,datafilter={'Anykey_when_val_is_callable':lambda a : float(a.get('Used_Block(GB)',0)) > 10})
+		getldev(ldev_id=1000-11000,stream=True) - parse output as it arrives rather than holding the whole stdout, cmdreturn.stdout is empty.
+		The parsed ldevs are still collected in cmdreturn.data and view, use streamldevs to handle one ldev at a time
 		'''
+		return self.runrequest(self.getldevrequest(ldev_id,view_keyname,update_view,**kwargs))
+
+	def getldevrequest(self,ldev_id: str, view_keyname: str='_ldevs', update_view=True, **kwargs) -> Raidcomrequest:
 		cmd = f"{self.path}raidcom get ldev -ldev_id {ldev_id} -I{kwargs.get('instance',self.instance)} -s {self.serial}"
-		cmdreturn = self.execute(cmd)
-		self.parser.getldev(cmdreturn,datafilter=kwargs.get('datafilter',{}))
-		if update_view:
-			self.updateview(self.views,{view_keyname:cmdreturn.view})
-			self.updateview(self.data,{view_keyname:cmdreturn.data})
-			self.updatestats.ldevcounts()
-		return cmdreturn
+		parse = lambda cmdreturn: self.parser.getldev(cmdreturn,datafilter=kwargs.get('datafilter',{}))
+		return self.getterrequest('getldev',cmd,self.ldevpath(ldev_id,view_keyname),parse=parse,view_keyname=view_keyname,update_view=update_view,updatedata=True,counters='ldevcounts',execkwargs={'stream':kwargs.get('stream',False)},**kwargs)
+
+	def streamldevs(self,ldev_id: str, **kwargs):
+		'''
+		Yield each ldev of raidcom get ldev -ldev_id as it is parsed, nothing is collected and views are not updated.\n
+		Memory is bounded by one ldev record whatever the range size, the caller keeps what it needs:\n
+		for ldev in storage.streamldevs(ldev_id='0-65279',datafilter={'VOL_TYPE':'OPEN-V-CVS'}): ...\n
+		The command's returncode is checked once the last ldev has been yielded.
+		'''
+		cmd = f"{self.path}raidcom get ldev -ldev_id {ldev_id} -I{kwargs.get('instance',self.instance)} -s {self.serial}"
+		cmdreturn = self.execute(cmd,stream=True)
+		yield from self.parser.ldevrecords(cmdreturn,datafilter=kwargs.get('datafilter',{}))
 
 	def getldevlist(self, ldevtype: str, view_keyname: str='_ldevlist', update_view=True, key='', **kwargs) -> object:
 		'''
@@ -315,6 +533,9 @@ class Raidcom:
 			key_opt = f"-key {key}"
 			attr = f"_{key}"
 
+			# Only the default ldev list output can be parsed as a stream
+			kwargs.pop('stream',None)
+
 		cmd = f"{self.path}raidcom get ldev -ldev_list {ldevtype} {key_opt} -I{self.instance} -s {self.serial}"
 		cmdreturn = self.execute(cmd,**kwargs)
 		#self.parser.getldevlist(cmdreturn,datafilter=kwargs.get('datafilter',{}))
@@ -346,20 +567,16 @@ class Raidcom:
 		ports.stdout\n
 		ports.stats\n
 		'''
-		cmd = f"{self.path}raidcom get port -I{kwargs.get('instance',self.instance)} -s {self.serial}"
-		cmdreturn = self.execute(cmd,**kwargs)
-		#self.parser.getport(cmdreturn,datafilter=kwargs.get('datafilter',{}),**kwargs)
-		self.parser.getport(cmdreturn,**kwargs)
-		if update_view:
-			self.updateview(self.views,{view_keyname:cmdreturn.view})
-			self.updateview(self.data,{view_keyname:cmdreturn.data})
-			self.updatestats.portcounters()
+		return self.runrequest(self.getportrequest(view_keyname,update_view,**kwargs))
 
-		#self.portcounters()
-		#raidcomstats.portcounters(self)
-		#self.raidcomstats.portcounters()
-		cmdreturn.instance = kwargs.get('instance',self.instance)
-		return cmdreturn
+	def getportrequest(self,view_keyname: str='_ports', update_view=True, **kwargs) -> Raidcomrequest:
+		instance = kwargs.get('instance',self.instance)
+		cmd = f"{self.path}raidcom get port -I{instance} -s {self.serial}"
+		def parse(cmdreturn):
+			self.parser.getport(cmdreturn,**kwargs)
+			cmdreturn.instance = instance
+		# UNITID and cmdreturn.instance depend on the horcm instance queried
+		return self.getterrequest('getport',cmd,(view_keyname,),(instance,),parse=parse,view_keyname=view_keyname,update_view=update_view,updatedata=True,counters='portcounters',**kwargs)
 
 	def XXXgethostgrp(self,port: str, view_keyname: str='_ports', update_view: bool=True, **kwargs) -> object:
 		'''
@@ -445,28 +662,24 @@ class Raidcom:
 		Differs slightly from raidcom\n
 		If port format cl-port-gid or host_grp_name is supplied with cl-port host_grp is filtered.
 		'''
-		#cmdparam = ""
-		
+		return self.runrequest(self.gethostgrprequest(port,view_keyname,update_view,**kwargs))
+
+	def gethostgrprequest(self,port: str, view_keyname: str='_ports', update_view: bool=True, **kwargs) -> Raidcomrequest:
+		''' Request for gethostgrp_key_detail '''
+		cachepath = self.portpath(port,view_keyname)
+		cacheargs = (kwargs.get('host_grp_name'),kwargs.get('resource'),tuple(kwargs.get('hostgrp_usage',[])))
 		host_grp_name = kwargs.get('host_grp_name')
-		resourceparam = ""
+		datafilter = kwargs.get('datafilter',{})
 		if re.search(r'cl\w-\D+\d?-\d+',port,re.IGNORECASE):
 			if host_grp_name: raise Exception(f"Fully qualified port {port} does not require host_grp_name parameter: {host_grp_name}")
-			kwargs['datafilter'] = { 'HOST_GRP_ID': port.upper() } 
+			datafilter = { 'HOST_GRP_ID': port.upper() }
 		elif host_grp_name:
-			#cmdparam = f" -host_grp_name '{host_grp_name}' "
-			kwargs['datafilter'] = { 'GROUP_NAME': host_grp_name }
+			datafilter = { 'GROUP_NAME': host_grp_name }
 
 		resource_param = ("",f" -resource {kwargs.get('resource')} ")[kwargs.get('resource') is not None]
-		
 		cmd = f"{self.path}raidcom get host_grp -port {port} -key detail {resource_param} -I{kwargs.get('instance',self.instance)} -s {self.serial}"
-		cmdreturn = self.execute(cmd,**kwargs)
-		self.parser.gethostgrp_key_detail(cmdreturn,datafilter=kwargs.get('datafilter',{}),hostgrp_usage=kwargs.get('hostgrp_usage',['_GIDS','_GIDS_UNUSED']))
-
-		if update_view:
-			self.updateview(self.views,{view_keyname:cmdreturn.view})
-			self.updatestats.hostgroupcounters()
-
-		return cmdreturn
+		parse = lambda cmdreturn: self.parser.gethostgrp_key_detail(cmdreturn,datafilter=datafilter,hostgrp_usage=kwargs.get('hostgrp_usage',['_GIDS','_GIDS_UNUSED']))
+		return self.getterrequest('gethostgrp_key_detail',cmd,cachepath,cacheargs,parse=parse,view_keyname=view_keyname,update_view=update_view,counters='hostgroupcounters',execkwargs={**kwargs,'datafilter':datafilter},**kwargs)
 
 	def getlun(self,port: str,view_keyname: str='_ports', update_view=True, **kwargs) -> object:
 		'''
@@ -488,14 +701,35 @@ class Raidcom:
 		luns.stderr\n
 		luns.stdout\n
 		'''
+		return self.runrequest(self.getlunrequest(port,view_keyname,update_view,**kwargs))
+
+	def getlunrequest(self,port: str,view_keyname: str='_ports', update_view=True, **kwargs) -> Raidcomrequest:
 		cmdparam = self.cmdparam(port=port,**kwargs)
+		cachepath = self.portpath(port,view_keyname,**kwargs) + ('_LUNS',)
 		cmd = f"{self.path}raidcom get lun -port {port}{cmdparam} -I{kwargs.get('instance',self.instance)} -s {self.serial} -key opt"
-		cmdreturn = self.execute(cmd,**kwargs)
-		self.parser.getlun(cmdreturn,datafilter=kwargs.get('datafilter',{}))
-		if update_view:
-			self.updateview(self.views,{view_keyname:cmdreturn.view})
-			self.updatestats.luncounters()
-		return cmdreturn
+		parse = lambda cmdreturn: self.parser.getlun(cmdreturn,datafilter=kwargs.get('datafilter',{}))
+		return self.getterrequest('getlun',cmd,(None,cachepath)[len(cachepath) == 5],parse=parse,view_keyname=view_keyname,update_view=update_view,counters='luncounters',**kwargs)
+
+	def getterrequest(self,getter: str,cmd: str,cachepath: tuple=None,cacheargs: tuple=(),parse=None,view_keyname: str=None,update_view: bool=True,updatedata: bool=False,counters: str=None,execkwargs: dict=None,**kwargs) -> Raidcomrequest:
+		'''
+		Raidcomrequest for a getter: served from the view cache when fresh, otherwise complete() parses the output,\n
+		merges view ( and data when updatedata ) into view_keyname, updates the counters stat and stores it in the view cache.\n
+		execkwargs are passed to execute, default kwargs.
+		'''
+		def complete(cmdreturn):
+			parse(cmdreturn)
+			if update_view:
+				self.updateview(self.views,{view_keyname:cmdreturn.view})
+				if updatedata:
+					self.updateview(self.data,{view_keyname:cmdreturn.data})
+				if counters:
+					getattr(self.updatestats,counters)()
+			return self.viewcache.store(getter,cachepath,cmdreturn,cacheargs,update_view=update_view,**kwargs)
+		cached = self.viewcache.fetch(getter,cachepath,cacheargs,update_view=update_view,**kwargs)
+		return Raidcomrequest(cmd,cached=cached,completion=complete,**(kwargs if execkwargs is None else execkwargs))
+
+	def runrequest(self,request: Raidcomrequest) -> object:
+		return request.cached or request.complete(self.execute(request.cmd,request.undocmds,request.undodefs,**request.kwargs))
 
 	def cmdparam(self,**kwargs):
 		cmdparam = ""
@@ -524,14 +758,14 @@ class Raidcom:
 		hbawwns.stdout\n
 		'''
 
+		return self.runrequest(self.gethbawwnrequest(port,view_keyname,update_view,**kwargs))
+
+	def gethbawwnrequest(self,port,view_keyname: str='_ports', update_view=True, **kwargs) -> Raidcomrequest:
 		cmdparam = self.cmdparam(port=port,**kwargs)
+		cachepath = self.portpath(port,view_keyname,**kwargs) + ('_WWNS',)
 		cmd = f"{self.path}raidcom get hba_wwn -port {port}{cmdparam} -I{kwargs.get('instance',self.instance)} -s {self.serial}"
-		cmdreturn = self.execute(cmd,**kwargs)
-		self.parser.gethbawwn(cmdreturn,datafilter=kwargs.get('datafilter',{}))
-		if update_view:
-			self.updateview(self.views,{view_keyname:cmdreturn.view})
-			self.updatestats.hbawwncounters()
-		return cmdreturn
+		parse = lambda cmdreturn: self.parser.gethbawwn(cmdreturn,datafilter=kwargs.get('datafilter',{}))
+		return self.getterrequest('gethbawwn',cmd,(None,cachepath)[len(cachepath) == 5],parse=parse,view_keyname=view_keyname,update_view=update_view,counters='hbawwncounters',**kwargs)
 
 
 	def getportlogin(self,port: str, view_keyname: str='_ports', update_view=True, **kwargs) -> object:
@@ -540,15 +774,12 @@ class Raidcom:
 		Creates view: self.views['_ports'][port]['PORT_LOGINS'][logged_in_wwn_list].\n
 		View is refreshed each time the function is called.\n
 		'''
-		cmd = f"{self.path}raidcom get port -port {port} -I{kwargs.get('instance',self.instance)} -s {self.serial}"
-		cmdreturn = self.execute(cmd,**kwargs)
-		self.parser.getportlogin(cmdreturn,datafilter=kwargs.get('datafilter',{}))
-		
-		if update_view:
-			self.updateview(self.views,{view_keyname:cmdreturn.view})
-			self.updatestats.portlogincounters()
+		return self.runrequest(self.getportloginrequest(port,view_keyname,update_view,**kwargs))
 
-		return cmdreturn
+	def getportloginrequest(self,port: str, view_keyname: str='_ports', update_view=True, **kwargs) -> Raidcomrequest:
+		cmd = f"{self.path}raidcom get port -port {port} -I{kwargs.get('instance',self.instance)} -s {self.serial}"
+		parse = lambda cmdreturn: self.parser.getportlogin(cmdreturn,datafilter=kwargs.get('datafilter',{}))
+		return self.getterrequest('getportlogin',cmd,(view_keyname,port.upper(),'_PORT_LOGINS'),parse=parse,view_keyname=view_keyname,update_view=update_view,counters='portlogincounters',**kwargs)
 
 	def getpool(self, key: str=None, view_keyname: str='_pools', **kwargs) -> object:
 		'''
@@ -556,15 +787,13 @@ class Raidcom:
 		pools = getpool(datafilter={'POOL_NAME':'MyPool'})\n
 		pools = getpool(datafilter={'Anykey_when_val_is_callable':lambda a : a['PT'] == 'HDT' or a['PT'] == 'HDP'})\n
 		'''
-		
+		return self.runrequest(self.getpoolrequest(key,view_keyname,**kwargs))
+
+	def getpoolrequest(self, key: str=None, view_keyname: str='_pools', **kwargs) -> Raidcomrequest:
 		keyswitch = ("",f"-key {key}")[key is not None]
 		cmd = f"{self.path}raidcom get pool -I{self.instance} -s {self.serial} {keyswitch}"
-		cmdreturn = self.execute(cmd,**kwargs)
-		getattr(self.parser,f"getpool_key_{key}")(cmdreturn,datafilter=kwargs.get('datafilter',{}))
-		self.updateview(self.views,{view_keyname:cmdreturn.view})
-		self.updateview(self.data,{view_keyname:cmdreturn.data})
-		self.updatestats.poolcounters()
-		return cmdreturn
+		parse = lambda cmdreturn: getattr(self.parser,f"getpool_key_{key}")(cmdreturn,datafilter=kwargs.get('datafilter',{}))
+		return self.getterrequest('getpool',cmd,(view_keyname,),(key,),parse=parse,view_keyname=view_keyname,updatedata=True,counters='poolcounters',**kwargs)
 
 	def getcopygrp(self, view_keyname: str='_copygrps', **kwargs) -> object:
 		cmd = f"{self.path}raidcom get copy_grp -I{self.instance} -s {self.serial}"
@@ -858,6 +1087,7 @@ class Raidcom:
 			getcommandstatus = self.getcommandstatus(request_id=reqid[1])
 			self.parser.getcommandstatus(getcommandstatus)
 			auto_ldev_id = getcommandstatus.data[0]['ID']
+			self.invalidateldev(auto_ldev_id)
 			undocmd = f"{self.path}raidcom delete ldev -ldev_id {auto_ldev_id} -pool {poolid} -capacity {capacity} {ucmdparam} -I{self.instance} -s {self.serial}"
 			undodef = { 'undodef': 'deleteldev', 'args':{ 'ldev_id':auto_ldev_id }}
 			cmdreturn.undocmds.insert(0,undocmd)
@@ -1074,6 +1304,7 @@ class Raidcom:
 			getcommandstatus = self.getcommandstatus(request_id=reqid[1])
 			self.parser.getcommandstatus(getcommandstatus)
 			auto_ldev_id = getcommandstatus.data[0]['ID']
+			self.invalidateldev(auto_ldev_id)
 			undocmd = f"{self.path}raidcom delete ldev -ldev_id {auto_ldev_id} -pool {poolid} -capacity {capacity} {ucmdparam} -I{self.instance} -s {self.serial}"
 			undodef = { 'undodef': 'deleteldev', 'args':{ 'ldev_id':auto_ldev_id }}
 			cmdreturn.undocmds.insert(0, undocmd)
@@ -1187,11 +1418,21 @@ class Raidcom:
 		capacity = capacity in blk\n
 		Where 'capacity' will add specified blks to current capacity 
 		'''
-		#self.resetcommandstatus()
+		return self.runrequest(self.extendldevrequest(ldev_id,capacity,**kwargs))
+
+	def extendldevrequest(self, ldev_id: str, capacity: int, **kwargs) -> Raidcomrequest:
 		cmd = f"{self.path}raidcom extend ldev -ldev_id {ldev_id} -capacity {capacity} -I{self.instance} -s {self.serial}"
-		cmdreturn = self.execute(cmd,raidcom_asyncronous=True,**kwargs)
-		#self.getcommandstatus()
-		return cmdreturn
+		return self.writerequest(cmd,ldev_ids=[ldev_id],raidcom_asyncronous=True,**kwargs)
+
+	def writerequest(self,cmd: str,undocmds: list=None,undodefs: list=None,paths: list=[],ldev_ids: list=[],**kwargs) -> Raidcomrequest:
+		''' Raidcomrequest for a write, complete() drops the view cache entries of paths and ldev_ids it changed '''
+		def complete(cmdreturn):
+			for path in paths:
+				self.viewcache.invalidate(path)
+			for ldev_id in ldev_ids:
+				self.invalidateldev(ldev_id)
+			return cmdreturn
+		return Raidcomrequest(cmd,undocmds,undodefs,completion=complete,**kwargs)
 
 	def populateundo(self,undodef,undocmds,undodefs):
 		undocmds.insert(0,getattr(self,undodef['undodef'])(noexec=True,**undodef['args']).cmd)
@@ -1208,9 +1449,11 @@ class Raidcom:
 		return undocmds,undodefs,ldev
 			
 	def deleteldev(self,ldev_id: str, **kwargs) -> object:
+		return self.runrequest(self.deleteldevrequest(ldev_id,**kwargs))
+
+	def deleteldevrequest(self,ldev_id: str, **kwargs) -> Raidcomrequest:
 		cmd = f"{self.path}raidcom delete ldev -ldev_id {ldev_id} -I{self.instance} -s {self.serial}"
-		cmdreturn = self.execute(cmd,raidcom_asyncronous=True,**kwargs)
-		return cmdreturn
+		return self.writerequest(cmd,ldev_ids=[ldev_id],raidcom_asyncronous=True,**kwargs)
 
 	def addresource(self,resource_name: str,virtualSerialNumber: str=None,virtualModel: str=None, **kwargs) -> object:
 		undocmd = [f"{self.path}raidcom delete resource -resource_name '{resource_name}' -I{self.instance} -s {self.serial}"]
@@ -1275,15 +1518,19 @@ class Raidcom:
 		return cmdreturn
 
 	def addhostgrp(self,port: str,host_grp_name: str, **kwargs) -> object:
-		cmd = f"{self.path}raidcom add host_grp -host_grp_name '{host_grp_name}' -port {port} -I{self.instance} -s {self.serial}"
-		undocmd = [f"{self.path}raidcom delete host_grp -port {'-'.join(port.split('-')[:2])} '{host_grp_name}' -I{self.instance} -s {self.serial}"]
-		cmdreturn = self.execute(cmd,undocmd,**kwargs)
+		cmdreturn = self.runrequest(self.addhostgrprequest(port,host_grp_name,**kwargs))
 		if not kwargs.get('noexec') and (cmdreturn.returncode == cmdreturn.expectedreturn):
 			host_grp = self.gethostgrp_key_detail(port='-'.join(port.split('-')[:2]),host_grp_name=host_grp_name)
 			cmdreturn.data = host_grp.data
 			cmdreturn.view = host_grp.view
 		return cmdreturn
 
+	def addhostgrprequest(self,port: str,host_grp_name: str, **kwargs) -> Raidcomrequest:
+		baseport = '-'.join(port.split('-')[:2])
+		cmd = f"{self.path}raidcom add host_grp -host_grp_name '{host_grp_name}' -port {port} -I{self.instance} -s {self.serial}"
+		undocmd = [f"{self.path}raidcom delete host_grp -port {baseport} '{host_grp_name}' -I{self.instance} -s {self.serial}"]
+		return self.writerequest(cmd,undocmd,paths=[self.portpath(baseport)],**kwargs)
+
 	def addhostgroup(self,port: str,hostgroupname: str, **kwargs) -> object:
 		'''Deprecated in favour of addhostgrp'''
 		return self.addhostgrp(port=port,host_grp_name=hostgroupname,**kwargs)
@@ -1345,6 +1592,7 @@ class Raidcom:
 		cmd = f"{self.path}raidcom delete host_grp -port {port}{cmdparam} -I{self.instance} -s {self.serial}"    
 		if len(undocmds):
 			cmdreturn = self.execute(cmd,undocmds,undodefs,**kwargs)
+			self.invalidateport(port,**kwargs)
 		else:
 			self.log.warning(f"Host group does not appear to exist - port: '{port}', kwargs: '{kwargs}'. Returning quietly")
 			cmdreturn = self.execute(cmd,undocmds,undodefs,noexec=True)
@@ -1380,45 +1628,49 @@ class Raidcom:
 
 	def addlun(self, port: str, ldev_id: str, **kwargs) -> object:
 
-		cmdparam = self.cmdparam(port=port, ldev_id=ldev_id, **kwargs)
-		if kwargs.get('lun_id'):
-			lun_id = kwargs['lun_id']
-			cmd = f"{self.path}raidcom add lun -port {port}{cmdparam} -ldev_id {ldev_id} -lun_id {kwargs['lun_id']} -I{self.instance} -s {self.serial}"
-			
-			#echo = f'echo "Executing: {undocmd}"'
-			#self.undocmds.insert(0,undocmd)
-			#self.undocmds.insert(0,echo)
-			#cmdreturn.undocmds.insert(0,undocmd)
-			
-			cmdreturn = self.execute(cmd=cmd,**kwargs)
-		else:
-			cmd = f"{self.path}raidcom add lun -port {port}{cmdparam} -ldev_id {ldev_id} -I{self.instance} -s {self.serial}"
-			cmdreturn = self.execute(cmd=cmd,**kwargs)
-			lun = re.match('^raidcom: LUN \d+\((0x[0-9-af]+)\) will be used for adding',cmdreturn.stdout,re.I)
-			if lun:
-				lun_id = int(lun.group(1),16)
-			else:
-				raise Exception(f"Unable to extract lun information while mapping ldev_id {ldev_id} to {port}{cmdparam}")
-
-		undocmd = f"{self.path}raidcom delete lun -port {port}{cmdparam} -ldev_id {ldev_id} -lun_id {lun_id} -I{self.instance} -s {self.serial}"
-		echo = f'echo "Executing: {undocmd}"'
-		self.undocmds.insert(0,undocmd)
-		self.undocmds.insert(0,echo)
-		cmdreturn.undocmds.insert(0,undocmd)    
-		
+		request = self.addlunrequest(port,ldev_id,**kwargs)
+		cmdreturn = self.runrequest(request)
 		if not kwargs.get('noexec') and kwargs.get('return_lun'):
-			getlun = self.getlun(port=f"{port}",lun_filter={ 'LUN': str(lun_id) },**kwargs)
+			getlun = self.getlun(port=f"{port}",lun_filter={ 'LUN': str(request.lun_id) },**kwargs)
 			cmdreturn.data = getlun.data
 			cmdreturn.view = getlun.view
 
 		return cmdreturn
 
+	def addlunrequest(self, port: str, ldev_id: str, **kwargs) -> Raidcomrequest:
+		''' complete() sets request.lun_id, read from the output when no lun_id was given, and registers the delete lun undo '''
+		cmdparam = self.cmdparam(port=port, ldev_id=ldev_id, **kwargs)
+		lunparam = ('',f" -lun_id {kwargs.get('lun_id')}")[bool(kwargs.get('lun_id'))]
+		cmd = f"{self.path}raidcom add lun -port {port}{cmdparam} -ldev_id {ldev_id}{lunparam} -I{self.instance} -s {self.serial}"
+
+		def complete(cmdreturn):
+			request.lun_id = kwargs.get('lun_id')
+			if not request.lun_id:
+				if kwargs.get('noexec'):
+					return cmdreturn
+				lun = re.match(r'^raidcom: LUN \d+\((0x[0-9-af]+)\) will be used for adding',cmdreturn.stdout,re.I)
+				if not lun:
+					raise Exception(f"Unable to extract lun information while mapping ldev_id {ldev_id} to {port}{cmdparam}")
+				request.lun_id = int(lun.group(1),16)
+			self.invalidateport(port,'_LUNS',**kwargs)
+			self.invalidateldev(ldev_id)
+			undocmd = f"{self.path}raidcom delete lun -port {port}{cmdparam} -ldev_id {ldev_id} -lun_id {request.lun_id} -I{self.instance} -s {self.serial}"
+			self.undocmds.insert(0,undocmd)
+			self.undocmds.insert(0,f'echo "Executing: {undocmd}"')
+			cmdreturn.undocmds.insert(0,undocmd)
+			return cmdreturn
+
+		request = Raidcomrequest(cmd,completion=complete,**kwargs)
+		return request
+
 	def deletelun(self, port: str, ldev_id: str, lun_id: int='', host_grp_name: str='', gid: int='', **kwargs) -> object:
+		return self.runrequest(self.deletelunrequest(port,ldev_id,lun_id,host_grp_name,gid,**kwargs))
+
+	def deletelunrequest(self, port: str, ldev_id: str, lun_id: int='', host_grp_name: str='', gid: int='', **kwargs) -> Raidcomrequest:
 		cmd = f"{self.path}raidcom delete lun -port {port} {host_grp_name} -ldev_id {ldev_id} -lun_id {lun_id} -I{self.instance} -s {self.serial}"
 		undocmd = [f"{self.path}raidcom add lun -port {port} {host_grp_name} -ldev_id {ldev_id} -lun_id {lun_id} -I{self.instance} -s {self.serial}"]
 		undodef = [{'undodef':'addlun','args':{'port':port, 'host_grp_name':host_grp_name, 'ldev_id':ldev_id,'lun_id':lun_id}}]
-		cmdreturn = self.execute(cmd,undocmd,undodef,**kwargs)
-		return cmdreturn
+		return self.writerequest(cmd,undocmd,undodef,paths=[self.portleafpath(port,'_LUNS',gid=gid)],ldev_ids=[ldev_id],**kwargs)
 
 	def unmapldev(self,ldev_id: str,virtual_ldev_id: str, **kwargs) -> object:
 		cmd = f"{self.path}raidcom unmap resource -ldev_id {ldev_id} -virtual_ldev_id {virtual_ldev_id} -I{self.instance} -s {self.serial}"
@@ -1433,9 +1685,11 @@ class Raidcom:
 		return cmdreturn
 
 	def modifyldevname(self,ldev_id: str,ldev_name: str, **kwargs) -> object:
+		return self.runrequest(self.modifyldevnamerequest(ldev_id,ldev_name,**kwargs))
+
+	def modifyldevnamerequest(self,ldev_id: str,ldev_name: str, **kwargs) -> Raidcomrequest:
 		cmd = f'{self.path}raidcom modify ldev -ldev_id {ldev_id} -ldev_name "{ldev_name}" -I{self.instance} -s {self.serial}'
-		cmdreturn = self.execute(cmd,raidcom_asyncronous=False,**kwargs)
-		return cmdreturn
+		return self.writerequest(cmd,ldev_ids=[ldev_id],raidcom_asyncronous=False,**kwargs)
 
 	def commanddevice(self,ldev_id: str, security_level: int=0, **kwargs) -> object:
 		'''
@@ -1494,11 +1748,13 @@ class Raidcom:
 		addhbawwn.stderr\n
 		addhbawwn.stdout\n
 		'''
+		return self.runrequest(self.addhbawwnrequest(port,hba_wwn,**kwargs))
+
+	def addhbawwnrequest(self,port: str, hba_wwn: str, **kwargs) -> Raidcomrequest:
 		cmdparam = self.cmdparam(port=port,**kwargs)
 		cmd = f"{self.path}raidcom add hba_wwn -port {port}{cmdparam} -hba_wwn {hba_wwn} -I{self.instance} -s {self.serial}"
 		undocmd = [f"{self.path}raidcom delete hba_wwn -port {port}{cmdparam} -hba_wwn {hba_wwn} -I{self.instance} -s {self.serial}"]
-		cmdreturn = self.execute(cmd,undocmd,**kwargs)
-		return cmdreturn
+		return self.writerequest(cmd,undocmd,paths=[self.portleafpath(port,'_WWNS',**kwargs)],**kwargs)
 
 	def addwwnnickname(self,port: str, hba_wwn: str, wwn_nickname: str, **kwargs) -> object:
 		'''
@@ -1570,7 +1826,7 @@ class Raidcom:
 
 		if mu == None or mu not in validmu: raise Exception("Please specify valid mu for raidscanmu")
 		
-		cmd = f"{self.path}raidscan -p {port}{cmdarg} -I{mode}{self.instance} -s {self.serial} -CLI -mu {mu}"
+		cmd = f"{self.path}raidscan -p {port}{cmdarg} -I{mode}{kwargs.get('instance',self.instance)} -s {self.serial} -CLI -mu {mu}"
 		cmdreturn = self.execute(cmd,**kwargs)
 		getattr(self.parser,parser)(cmdreturn,mu)
 		self.updateview(self.views,{view_keyname:cmdreturn.view})
@@ -1670,6 +1926,7 @@ class Raidcom:
 	concurrent_{functions}
 	'''
 	def concurrent_zip(self,iterable):
+		''' Static round robin of iterable over horcm instances, concurrent_* methods now dispatch through self.scheduler '''
 		concurrent_instances = self.horcm_instance_list.copy()
 		while len(concurrent_instances) < len(iterable):
 			concurrent_instances.extend(self.horcm_instance_list.copy())
@@ -1683,7 +1940,8 @@ class Raidcom:
 		cmdreturn.undocmds.extend(future.result().undocmds)
 		cmdreturn.returncodes.append(future.result().returncode)
 		cmdreturn.returncode += future.result().returncode
-		self.updateview(cmdreturn.view,future.result().view)
+		# A cmdreturn held by the view cache is copied, any other is discarded after the merge so its view can be attached as is
+		mergeview(cmdreturn.view,future.result().view,copy=getattr(future.result(),'viewcached',False))
 
 	def concurrent_gethostgrps(self,ports: list=[], max_workers: int=30, view_keyname: str='_ports', **kwargs) -> object:
 		'''
@@ -1696,11 +1954,9 @@ class Raidcom:
 		for port in ports: self.checkport(port)
 		# With more horcm instances, we should be able to obtain our data more quickly.
 		# To round robin available horcm instances, the instance list must be greater than 
-		port_instances = self.concurrent_zip(ports)
-		
 		with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
 			#future_out = { executor.submit(self.gethostgrp_key_detail,port=port,update_view=False,**kwargs): port for port in ports}
-			future_out = { executor.submit(self.gethostgrp_key_detail,port=port,instance=port_instances[port],update_view=False,**kwargs): port for port in port_instances}
+			future_out = { executor.submit(self.scheduler.dispatch,self.gethostgrp_key_detail,port=port,update_view=False,**kwargs): port for port in dict.fromkeys(ports)}
 			for future in concurrent.futures.as_completed(future_out):
 				self.update_concurrent_cmdreturn(cmdreturn,future)
 				
@@ -1717,11 +1973,9 @@ class Raidcom:
 		ports=['cl1-a-3','cl1-a-4'] \n
 		'''
 		cmdreturn = CmdviewConcurrent()
-		portgids_instances = self.concurrent_zip(portgids)
-		
 		for portgid in portgids: self.checkportgid(portgid)
 		with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
-			future_out = { executor.submit(self.gethbawwn,port=portgid,instance=portgids_instances[portgid],update_view=False,**kwargs): portgid for portgid in portgids_instances}
+			future_out = { executor.submit(self.scheduler.dispatch,self.gethbawwn,port=portgid,update_view=False,**kwargs): portgid for portgid in dict.fromkeys(portgids)}
 			for future in concurrent.futures.as_completed(future_out):
 				self.update_concurrent_cmdreturn(cmdreturn,future)
 		cmdreturn.serial = self.serial
@@ -1738,9 +1992,8 @@ class Raidcom:
 		'''
 		cmdreturn = CmdviewConcurrent()
 		for portgid in portgids: self.checkportgid(portgid)
-		portgids_instances = self.concurrent_zip(portgids)
 		with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
-			future_out = { executor.submit(self.getlun,port=portgid,instance=portgids_instances[portgid],update_view=False,**kwargs): portgid for portgid in portgids_instances}
+			future_out = { executor.submit(self.scheduler.dispatch,self.getlun,port=portgid,update_view=False,**kwargs): portgid for portgid in dict.fromkeys(portgids)}
 			for future in concurrent.futures.as_completed(future_out):
 				self.update_concurrent_cmdreturn(cmdreturn,future)
 		cmdreturn.serial = self.serial
@@ -1751,17 +2004,41 @@ class Raidcom:
 		self.updatetimer(cmdreturn)
 		return cmdreturn
 
-	def concurrent_getldevs(self,ldev_ids: list=[], max_workers: int=30, view_keyname: str='_ldevs', **kwargs) -> object:
+	def ldevranges(self,ldev_ids: list, range_size: int=256, max_gap: int=0) -> list:
+		'''
+		Coalesce ldev_ids into contiguous (start,end) ranges of at most range_size ldevs.\n
+		max_gap: bridge holes of up to max_gap ldevs between requested ldevs, trading a few unwanted ldevs for fewer commands.\n
+		ldevranges([1,2,3,7,8,20]) -> [(1,3),(7,8),(20,20)]\n
+		ldevranges([1,2,3,7,8,20],max_gap=3) -> [(1,8),(20,20)]
+		'''
+		ranges = []
+		for ldev_id in sorted({ Ldevid(ldev_id).decimal for ldev_id in ldev_ids }):
+			if ranges and ldev_id - ranges[-1][1] <= max_gap + 1 and ldev_id - ranges[-1][0] < range_size:
+				ranges[-1][1] = ldev_id
+			else:
+				ranges.append([ldev_id,ldev_id])
+		return [tuple(ldevrange) for ldevrange in ranges]
+
+	def concurrent_getldevs(self,ldev_ids: list=[], max_workers: int=30, view_keyname: str='_ldevs', range_size: int=256, max_gap: int=0, **kwargs) -> object:
 		'''
 		ldev_ids = [1234,1235,1236]\n
+		ldev_ids are coalesced into ranges ( see ldevranges ) and each range is fetched with a single raidcom get ldev -ldev_id start-end\n
+		range_size: maximum ldevs per raidcom call, range_size=1 issues one call per ldev\n
+		max_gap: bridge holes of up to max_gap ldevs, ldevs which were not requested are dropped from the result\n
+		Ranges are parsed as their output streams in ( stream=True ), so no range's raw stdout is held, only the parsed ldevs
 		'''
+		kwargs.setdefault('stream',True)
 		cmdreturn = CmdviewConcurrent()
-		ldevids_instances = self.concurrent_zip(ldev_ids)
+		ldevranges = [(f"{start}-{end}",str(start))[start == end] for start,end in self.ldevranges(ldev_ids,range_size=range_size,max_gap=max_gap)]
 		with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
-			future_out = { executor.submit(self.getldev,ldev_id=ldev_id,instance=ldevids_instances[ldev_id],update_view=False,**kwargs): ldev_id for ldev_id in ldevids_instances}
+			future_out = { executor.submit(self.scheduler.dispatch,self.getldev,ldev_id=ldevrange,update_view=False,**kwargs): ldevrange for ldevrange in ldevranges}
 			for future in concurrent.futures.as_completed(future_out):
 				self.update_concurrent_cmdreturn(cmdreturn,future)
 		cmdreturn.serial = self.serial
+		if max_gap:
+			requested = { str(Ldevid(ldev_id).decimal) for ldev_id in ldev_ids }
+			cmdreturn.data = [ldev for ldev in cmdreturn.data if ldev.get('LDEV') in requested]
+			cmdreturn.view = { ldev_id: ldev for ldev_id, ldev in cmdreturn.view.items() if ldev_id in requested }
 		cmdreturn.view = dict(sorted(cmdreturn.view.items()))
 		
 		self.updateview(self.views,{view_keyname:cmdreturn.view})
@@ -1775,9 +2052,8 @@ class Raidcom:
 		'''
 		cmdreturn = CmdviewConcurrent()
 		for port in ports: self.checkport(port)
-		port_instances = self.concurrent_zip(ports)
 		with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
-			future_out = { executor.submit(self.getportlogin,port=port,instance=port_instances[port],update_view=False,**kwargs): port for port in port_instances}
+			future_out = { executor.submit(self.scheduler.dispatch,self.getportlogin,port=port,update_view=False,**kwargs): port for port in dict.fromkeys(ports)}
 			for future in concurrent.futures.as_completed(future_out):
 				self.update_concurrent_cmdreturn(cmdreturn,future)
 		cmdreturn.serial = self.serial
@@ -1796,9 +2072,8 @@ class Raidcom:
 		#def raidscanremote(self,port: str, gid=None, mode='TC', view_keyname='_remotereplication', **kwargs) -> object:
 		cmdreturn = CmdviewConcurrent()
 		for portgid in portgids: self.checkportgid(portgid)
-		portgid_instances = self.concurrent_zip(portgids)
 		with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
-			future_out = { executor.submit(self.raidscanremote,port=portgid,instance=portgid_instances[portgid],update_view=False,**kwargs): portgid for portgid in portgid_instances}
+			future_out = { executor.submit(self.scheduler.dispatch,self.raidscanremote,port=portgid,update_view=False,**kwargs): portgid for portgid in dict.fromkeys(portgids)}
 			for future in concurrent.futures.as_completed(future_out):
 				self.update_concurrent_cmdreturn(cmdreturn,future)
 		cmdreturn.serial = self.serial
@@ -1817,10 +2092,9 @@ class Raidcom:
 		#def raidscanremote(self,port: str, gid=None, mode='TC', view_keyname='_remotereplication', **kwargs) -> object:
 		cmdreturn = CmdviewConcurrent()
 		for portgid in portgids: self.checkportgid(portgid)
-		portgid_instances = self.concurrent_zip(portgids)
 		with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
 			for mu in mus:
-				future_out = { executor.submit(self.raidscanmu,port=portgid,mu=mu,instance=portgid_instances[portgid],update_view=False,view_keyname='_raidscanmuport',parser='raidscanmuport',**kwargs): portgid for portgid in portgid_instances}
+				future_out = { executor.submit(self.scheduler.dispatch,self.raidscanmu,port=portgid,mu=mu,update_view=False,view_keyname='_raidscanmuport',parser='raidscanmuport',**kwargs): portgid for portgid in dict.fromkeys(portgids)}
 				for future in concurrent.futures.as_completed(future_out):
 					self.update_concurrent_cmdreturn(cmdreturn,future)
 		cmdreturn.serial = self.serial
@@ -1833,7 +2107,27 @@ class Raidcom:
 
 
 
-	def concurrent_addluns(self,lun_data: list=[{}], max_workers=20) -> object:
+	def inventory(self,stages: list=None,ports: list=None,max_workers: int=30,range_size: int=256,max_gap: int=0,raise_err: bool=True) -> dict:
+		'''
+		Pipelined inventory of ports, host groups, port logins, hba wwns, luns and the ldevs they present into self.views\n
+		report = inventory()\n
+		report = inventory(stages=['luns','hbawwns'],ports=['cl1-a','cl2-a'])\n
+		stages: any of ports, hostgrps, portlogins, hbawwns, luns, ldevs, the stages they depend on are run too\n
+		Returns per stage tasks, completed, failed, records, busy, elapsed and throughput, see Inventory
+		'''
+		return Inventory(self,stages=stages,max_workers=max_workers,range_size=range_size,max_gap=max_gap,log=self.log).run(ports=ports,raise_err=raise_err)
+
+	def refresh_inventory(self,since: dict=None,max_workers: int=30,range_size: int=256,max_gap: int=0,raise_err: bool=True) -> dict:
+		'''
+		Re-query only the ports, host groups and ldevs which changed since a previous inventory\n
+		storage.loadcache()\n
+		changes = storage.refresh_inventory()\n
+		storage.writecache()\n
+		since: views of a previous inventory, default the views currently held. Returns the change set, see Inventory.refresh
+		'''
+		return Inventory(self,max_workers=max_workers,range_size=range_size,max_gap=max_gap,log=self.log).refresh(since=since,raise_err=raise_err)
+
+	def concurrent_addluns(self,lun_data: list=[{}], max_workers=20, raise_err: bool=True) -> object:
 		'''
 		lun_data: [{'PORT':CL1-A|CL1-A-1, 'GID':None|1, 'host_grp_name':'Name', 'LUN':0,'LDEV':1000}]
 		
@@ -1850,10 +2144,43 @@ class Raidcom:
 			{'PORT':'CL1-A', 'LUN':9, 'LDEV':46109, 'host_grp_name':'testing123'},
 			{'PORT':'CL1-A', 'LUN':10, 'LDEV':46110, 'host_grp_name':'testing123'}]
 		'''
-		with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
-			future_out = { executor.submit(self.addlun,port=lun['PORT'],lun_id=lun['LUN'],ldev_id=lun['LDEV'],host_grp_name=lun['host_grp_name']): lun for lun in lun_data}
-			for future in concurrent.futures.as_completed(future_out):
-				print(future.result().data)
+		return self.provisionluns(lun_data,max_workers=max_workers,raise_err=raise_err)
+
+	def provisionluns(self,plan: list,max_workers: int=8,raise_err: bool=True) -> object:
+		'''
+		Map ldevs to host groups in bulk, grouped per host group and submitted with -request_id auto\n
+		luns = provisionluns([('CL1-A-1',0,1000),('CL1-A-1',1,1001),{'PORT':'CL2-A','GID':1,'LUN':0,'LDEV':1000}])\n
+		Each host group is read before and after the batch, only mappings whose request completed and which were not there before are counted and undone.\n
+		Returns CmdviewConcurrent with the lun records, undocmds and undodefs of the mappings made, see Provisioner.addluns
+		'''
+		return Provisioner(self,max_workers=max_workers,log=self.log).addluns(plan,raise_err=raise_err)
+
+	def provisionldevs(self,params: str,count: int=None,ldev_ids: list=None,start: int=None,end: int=None,names: list=None,format_ldevs: bool=False,
+					   return_ldevs: bool=True,record: dict=None,max_workers: int=8,timeout: float=300,raise_err: bool=True,**kwargs) -> object:
+		'''
+		Create ldevs in bulk, ids are reserved from ldev_allocator and the creates submitted with -request_id auto across the horcm instances\n
+		ldevs = provisionldevs('-pool 0 -capacity 2097152 -emulation OPEN-V',count=100,start=1000,end=1999,names=[f'vol{n}' for n in range(100)])\n
+		ldevs = provisionldevs('-pool 0 -capacity 2097152',ldev_ids=[1000,1001],capacity_saving='compression')\n
+		Each ldev is named ( and quick formatted with format_ldevs ) as soon as get command_status reports its create complete\n
+		and the created ldevs are read back with ranged get ldev. Returns CmdviewConcurrent, see Provisioner.addldevs
+		'''
+		provisioner = Provisioner(self,max_workers=max_workers,log=self.log)
+		params = params + provisioner.cmdoptions(**kwargs)
+		return provisioner.addldevs(params,count=count,ldev_ids=ldev_ids,start=start,end=end,names=names,format_ldevs=format_ldevs,
+									return_ldevs=return_ldevs,record=record,timeout=timeout,raise_err=raise_err)
+
+	def prefixldevids(self,ldev_prefix: str,initial_hex: str,count: int) -> list:
+		''' prefixldevids('00:10:','0A',3) -> ['00:10:0A','00:10:0B','00:10:0C'] '''
+		return [f"{ldev_prefix}{hex(int(initial_hex, 16) + i)[2:].upper().zfill(2)}" for i in range(count)]
+
+	def prefixedldevs(self,cmdreturn,ldev_ids: list) -> object:
+		''' Key the ldevs returned by provisionldevs by the prefixed ids requested ( 00:10:0A ) rather than decimal, LDEV and LDEV_ID included '''
+		requested = { str(Ldevid(ldev_id).decimal): ldev_id for ldev_id in ldev_ids }
+		cmdreturn.view = {}
+		for ldev in cmdreturn.data:
+			ldev['LDEV'] = ldev['LDEV_ID'] = requested.get(str(ldev['LDEV']),ldev['LDEV'])
+			cmdreturn.view[ldev['LDEV']] = ldev
+		return cmdreturn
 
 	def concurrent_addldevs(self,ldev_data: list=[], return_ldevs: bool=True, max_workers=20) -> object:
 		'''
@@ -1882,6 +2209,10 @@ class Raidcom:
 				 emulation: str="3390-A", return_ldevs: bool=True, max_workers: int=10, **kwargs) -> object:
 		"""Add multiple mainframe volumes with specified parameters.
 		
+		LDEV ids already defined are skipped, the rest are created concurrently across the horcm instances
+		and each one is named as soon as its create completes, see provisionldevs.
+		The LDEVs returned are keyed, like LDEV and LDEV_ID, by the prefixed id requested (e.g., "00:10:0A").
+		
 		Args:
 			pool_name (str): Name of the pool to create volumes in
 			num_ldevs (int): Number of volumes to create
@@ -1893,7 +2224,7 @@ class Raidcom:
 			emulation (str): Emulation type for all volumes (e.g., "3390-A")
 			return_ldevs (bool): Whether to return the created LDEVs
 			max_workers (int): Maximum number of concurrent workers
-			**kwargs: Additional arguments to pass to the command
+			**kwargs: Additional add ldev options (capacity_saving, compression_acceleration, capacity_saving_mode, drs)
 			
 		Returns:
 			object: Command result containing the created LDEVs if return_ldevs is True
@@ -1913,141 +2244,14 @@ class Raidcom:
 		cylinder = validate_cylinder(cylinder)
 		emulation = validate_emulation(emulation)
 
-		# Create command return object
-		cmdreturn = CmdviewConcurrent()
+		ldev_ids = self.prefixldevids(ldev_prefix,initial_hex,num_ldevs)
+		record = { 'POOL': pool_name, 'CYLINDER': str(cylinder), 'EMULATION': emulation, 'TYPE': 'MF-VOL', 'CUT': '-', 'STATUS': 'NML' }
+		cmdreturn = self.provisionldevs(f"-pool {pool_name} -cylinder {cylinder} -emulation {emulation}",
+										ldev_ids=ldev_ids,
+										names=(f"{base_ldev_name}{name_start + i}" for i in itertools.count()),
+										return_ldevs=return_ldevs,record=record,max_workers=max_workers,raise_err=False,**kwargs)
 		cmdreturn.cmd = "addmfvvols"
-		cmdreturn.data = []  # Initialize data attribute
-		
-		# Store successful creations and their names
-		created_ldevs = {}
-
-		# Step 1: Create volumes one by one to ensure success
-		for i in range(num_ldevs):
-			# Generate LDEV ID by incrementing the hex value
-			current_hex = hex(int(initial_hex, 16) + i)[2:].upper().zfill(2)
-			ldev_id = f"{ldev_prefix}{current_hex}"
-			
-			# Generate LDEV name with incremental number
-			ldev_name = f"{base_ldev_name}{name_start + i}"
-			
-			# Create the LDEV using addvvolmf method
-			try:
-				result = self.addvvolmf(
-					ldev_id=ldev_id,
-					poolid=pool_name,
-					cylinder=cylinder,
-					emulation=emulation,
-					return_ldev=False,
-					**kwargs
-				)
-				
-				# If successful, store the LDEV info for later name setting
-				if result.returncode == 0:
-					created_ldevs[ldev_id] = ldev_name
-					
-					# Update the command return view
-					cmdreturn.view[ldev_id] = {
-						'LDEV': ldev_id,
-						'NAME': ldev_name,
-						'POOL': pool_name,
-						'CYLINDER': cylinder,
-						'EMULATION': emulation
-					}
-					
-					# Update command return with result
-					cmdreturn.stdout += result.stdout + "\n"
-					cmdreturn.stderr += result.stderr + "\n"
-					
-					self.log.info(f"Successfully created LDEV {ldev_id}")
-				else:
-					self.log.error(f"Failed to create LDEV {ldev_id}: {result.stderr}")
-			except Exception as e:
-				self.log.error(f"Error creating LDEV {ldev_id}: {str(e)}")
-				continue
-		
-		# Step 2: Now set the names for each LDEV with retry mechanism
-		# Wait for 2 seconds to allow storage system to fully process the LDEV creations
-		import time
-		time.sleep(2)
-		
-		for ldev_id, ldev_name in created_ldevs.items():
-			# Try up to 3 times to set the name
-			max_retries = 3
-			retry_delay = 2  # seconds
-			success = False
-			
-			for attempt in range(max_retries):
-				try:
-					# Construct direct command for naming
-					cmd = f"{self.path}raidcom modify ldev -ldev_id {ldev_id} -ldev_name {ldev_name} -I{self.instance}"
-					result = self.execute(cmd=cmd, **kwargs)
-					
-					if result.returncode == 0:
-						self.log.info(f"Successfully set name '{ldev_name}' for LDEV {ldev_id}")
-						success = True
-						break
-					else:
-						# If error is that LDEV is not installed, wait and retry
-						if "LDEV is not installed" in result.stderr:
-							self.log.warning(f"LDEV {ldev_id} not fully registered yet, waiting {retry_delay} seconds before retry {attempt+1}/{max_retries}")
-							time.sleep(retry_delay)
-							# Increase delay for next retry
-							retry_delay += 2
-						else:
-							self.log.error(f"Failed to set name for LDEV {ldev_id}: {result.stderr}")
-							break
-				except Exception as e:
-					self.log.error(f"Error setting name for LDEV {ldev_id}: {str(e)}")
-					break
-			
-			if not success:
-				self.log.error(f"Failed to set name for LDEV {ldev_id} after {max_retries} attempts")
-		
-		# Step 3: Get LDEV details and populate the data attribute
-		# Wait longer to ensure all operations have completed
-		time.sleep(5)
-		
-		# Populate data attribute with information about all created LDEVs
-		for ldev_id, ldev_name in created_ldevs.items():
-			# Create a basic LDEV data entry with the information we already have
-			ldev_data = {
-				'LDEV_ID': ldev_id,
-				'LDEV': ldev_id,
-				'NAME': ldev_name,
-				'POOL': pool_name,
-				'CYLINDER': str(cylinder),
-				'EMULATION': emulation,
-				'TYPE': 'MF-VOL',
-				'CUT': '-',
-				'STATUS': 'NML'
-			}
-			
-			# Try to get detailed information, but use our basic info if it fails
-			if return_ldevs:
-				try:
-					# Get detailed information for this LDEV
-					ldev_info = self.getldev(ldev_id=ldev_id, update_view=False, **kwargs)
-					if hasattr(ldev_info, 'data') and ldev_info.data:
-						# Use the detailed information
-						ldev_data.update(ldev_info.data)
-					elif hasattr(ldev_info, 'view') and ldev_id in ldev_info.view:
-						# Add the view data
-						detailed_data = ldev_info.view[ldev_id]
-						ldev_data.update(detailed_data)
-				except Exception as e:
-					#self.log.warning(f"Could not get detailed info for LDEV {ldev_id}, using basic info: {str(e)}")
-					# Don't log a warning - this is expected in some cases
-					# Just use the basic info we already have
-					self.log.debug(f"Using basic info for LDEV {ldev_id} - detailed info unavailable")
-					pass
-			
-			# Add the LDEV data to our data list
-			cmdreturn.data.append(ldev_data)
-		
-		# Return sorted view
-		cmdreturn.view = dict(sorted(cmdreturn.view.items()))
-		return cmdreturn
-
+		return self.prefixedldevs(cmdreturn,ldev_ids)
 	def obfuscatepwd(self,cmd):
 		if re.search(r' -login ',cmd):
 			c = cmd.split()
@@ -2057,6 +2261,13 @@ class Raidcom:
 		else:
 			return cmd
 		
+	def close(self):
+		''' Stop any command server shells, safe to call more than once '''
+		if self.revalidation and self.revalidation.is_alive():
+			self.revalidation.join()
+		if self.cmdserver:
+			self.cmdserver.close()
+
 	def exception_string(self,cmdreturn):
 		return json.dumps(ast.literal_eval(str(vars(cmdreturn))))
 
@@ -2080,15 +2291,29 @@ class Raidcom:
 		if kwargs.get('raidcom_asyncronous'):
 			self.resetcommandstatus()
 		self.log.debug(f"Executing: {self.obfuscatepwd(cmd)}")
-		proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, universal_newlines=True, shell=True)
-		cmdreturn.stdout, cmdreturn.stderr = proc.communicate()
-		cmdreturn.returncode = proc.returncode
+		if kwargs.get('stream'):
+			# stdout is consumed line by line through cmdreturn.lines, the command completes when lines is exhausted
+			cmdreturn.lines = self.executestream(cmdreturn,undocmds,undodefs,expectedreturn,raise_err,**kwargs)
+			return cmdreturn
+		cmdreturn.stdout, cmdreturn.stderr, cmdreturn.returncode = self.executor.run(cmd)
+		return self.completecmd(cmdreturn,undocmds,undodefs,expectedreturn,raise_err,**kwargs)
+
+	def executestream(self,cmdreturn,undocmds=[],undodefs=[],expectedreturn=0,raise_err=True,**kwargs):
+		yield from self.executor.stream(cmdreturn.cmd,cmdreturn)
+		del cmdreturn.lines
+		self.completecmd(cmdreturn,undocmds,undodefs,expectedreturn,raise_err,**kwargs)
+
+	def completecmd(self,cmdreturn,undocmds=[],undodefs=[],expectedreturn=0,raise_err=True,**kwargs) -> object:
 		cmdreturn.executed = True
 
-		if proc.returncode and proc.returncode != expectedreturn:
-			self.log.error("Return > "+str(proc.returncode))
+		if cmdreturn.returncode and cmdreturn.returncode != expectedreturn:
+			self.log.error("Return > "+str(cmdreturn.returncode))
 			self.log.error("Stdout > "+cmdreturn.stdout)
 			self.log.error("Stderr > "+cmdreturn.stderr)
+			if self.identity_unverified:
+				# Revalidated off the failing call, the caller gets this command's exception now rather than after a rediscovery
+				self.identity_unverified = False
+				self.revalidatebackground()
 			if raise_err:
 				raise self.return_cci_exception(cmdreturn)(self.exception_string(cmdreturn))
 			
@@ -2106,8 +2331,6 @@ class Raidcom:
 		if kwargs.get('raidcom_asyncronous'):
 			self.getcommandstatus()
 
-
-		
 		return cmdreturn
 		
 
@@ -2220,6 +2443,10 @@ class Raidcom:
 				 return_ldevs: bool=True, max_workers: int=10, **kwargs) -> object:
 		"""Add multiple mainframe physical volumes with specified parameters.
 		
+		LDEV ids already defined are skipped, the rest are created concurrently across the horcm instances
+		and each one is named and quick formatted as soon as its create completes, see provisionldevs.
+		The LDEVs returned are keyed, like LDEV and LDEV_ID, by the prefixed id requested (e.g., "00:10:0A").
+		
 		Args:
 			parity_grp_id (str): ID of the parity group to create volumes in (e.g., "1-1")
 			num_ldevs (int): Number of volumes to create
@@ -2233,7 +2460,7 @@ class Raidcom:
 			format_ldevs (bool): Whether to quick format the LDEVs after creation
 			return_ldevs (bool): Whether to return the created LDEVs
 			max_workers (int): Maximum number of concurrent workers
-			**kwargs: Additional arguments to pass to the command
+			**kwargs: Additional add ldev options (capacity_saving, compression_acceleration, capacity_saving_mode, drs)
 			
 		Returns:
 			object: Command result containing the created LDEVs if return_ldevs is True
@@ -2253,163 +2480,14 @@ class Raidcom:
 		cylinder = validate_cylinder(cylinder)
 		emulation = validate_emulation(emulation)
 
-		# Create command return object
-		cmdreturn = CmdviewConcurrent()
+		ldev_ids = self.prefixldevids(ldev_prefix,initial_hex,num_ldevs)
+		record = { 'PARITY_GRP': parity_grp_id, 'CYLINDER': str(cylinder), 'EMULATION': emulation, 'MP_BLADE_ID': mp_blade_id, 'TYPE': 'MF-PVOL', 'CUT': '-', 'STATUS': 'NML' }
+		cmdreturn = self.provisionldevs(f"-parity_grp_id {parity_grp_id} -cylinder {cylinder} -emulation {emulation} -mp_blade_id {mp_blade_id}",
+										ldev_ids=ldev_ids,
+										names=(f"{base_ldev_name}{name_start + i}" for i in itertools.count()),
+										format_ldevs=format_ldevs,return_ldevs=return_ldevs,record=record,max_workers=max_workers,raise_err=False,**kwargs)
 		cmdreturn.cmd = "addmfpvols"
-		cmdreturn.data = []  # Initialize data attribute
-		
-		# Store successful creations and their names
-		created_ldevs = {}
-
-		# Step 1: Create volumes one by one to ensure success
-		for i in range(num_ldevs):
-			# Generate LDEV ID by incrementing the hex value
-			current_hex = hex(int(initial_hex, 16) + i)[2:].upper().zfill(2)
-			ldev_id = f"{ldev_prefix}{current_hex}"
-			
-			# Generate LDEV name with incremental number
-			ldev_name = f"{base_ldev_name}{name_start + i}"
-			
-			# Create the LDEV using parity group
-			try:
-				cmd = f"{self.path}raidcom add ldev -parity_grp_id {parity_grp_id} -ldev_id {ldev_id} -cylinder {cylinder} -emulation {emulation} -mp_blade_id {mp_blade_id} -I{self.instance}"
-				result = self.execute(cmd=cmd, **kwargs)
-				
-				# If successful, store the LDEV info for later name setting and formatting
-				if result.returncode == 0:
-					created_ldevs[ldev_id] = ldev_name
-					
-					# Update the command return view
-					cmdreturn.view[ldev_id] = {
-						'LDEV': ldev_id,
-						'NAME': ldev_name,
-						'PARITY_GRP': parity_grp_id,
-						'CYLINDER': cylinder,
-						'EMULATION': emulation,
-						'MP_BLADE_ID': mp_blade_id
-					}
-					
-					# Update command return with result
-					cmdreturn.stdout += result.stdout + "\n"
-					cmdreturn.stderr += result.stderr + "\n"
-					
-					self.log.info(f"Successfully created LDEV {ldev_id}")
-				else:
-					self.log.error(f"Failed to create LDEV {ldev_id}: {result.stderr}")
-			except Exception as e:
-				self.log.error(f"Error creating LDEV {ldev_id}: {str(e)}")
-				continue
-		
-		# Step 2: Check command status and reset
-		try:
-			self.getcommandstatus()
-			self.resetcommandstatus()
-		except Exception as e:
-			self.log.error(f"Error checking/resetting command status: {str(e)}")
-		
-		# Step 3: Now set the names for each LDEV with retry mechanism
-		# Wait for 2 seconds to allow storage system to fully process the LDEV creations
-		import time
-		time.sleep(2)
-		
-		for ldev_id, ldev_name in created_ldevs.items():
-			# Try up to 3 times to set the name
-			max_retries = 3
-			retry_delay = 2  # seconds
-			success = False
-			
-			for attempt in range(max_retries):
-				try:
-					# Construct direct command for naming
-					cmd = f"{self.path}raidcom modify ldev -ldev_id {ldev_id} -ldev_name {ldev_name} -I{self.instance}"
-					result = self.execute(cmd=cmd, **kwargs)
-					
-					if result.returncode == 0:
-						self.log.info(f"Successfully set name '{ldev_name}' for LDEV {ldev_id}")
-						success = True
-						break
-					else:
-						# If error is that LDEV is not installed, wait and retry
-						if "LDEV is not installed" in result.stderr:
-							self.log.warning(f"LDEV {ldev_id} not fully registered yet, waiting {retry_delay} seconds before retry {attempt+1}/{max_retries}")
-							time.sleep(retry_delay)
-							# Increase delay for next retry
-							retry_delay += 2
-						else:
-							self.log.error(f"Failed to set name for LDEV {ldev_id}: {result.stderr}")
-							break
-				except Exception as e:
-					self.log.error(f"Error setting name for LDEV {ldev_id}: {str(e)}")
-					break
-			
-			if not success:
-				self.log.error(f"Failed to set name for LDEV {ldev_id} after {max_retries} attempts")
-		  
-		# Step 4: Quick format the LDEVs if requested
-		time.sleep(2)
-		if format_ldevs and created_ldevs:
-			for ldev_id in created_ldevs:
-				for attempt in range(3):
-					try:
-						cmd = f"{self.path}raidcom initialize ldev -ldev_id {ldev_id} -operation qfmt -I{self.instance}"
-						result = self.execute(cmd=cmd, **kwargs)
-						
-						if result.returncode == 0:
-							self.log.info(f"Successfully started quick format for LDEV {ldev_id}")
-							break
-						else:
-							self.log.warning(f"Retrying quick format for LDEV {ldev_id} (attempt {attempt + 1})")
-							time.sleep(3)
-							# self.log.error(f"Failed to start quick format for LDEV {ldev_id}: {result.stderr}")
-					except Exception as e:
-						self.log.error(f"Error during quick format for LDEV {ldev_id}: {str(e)}")
-				# except Exception as e:
-				# 	self.log.error(f"Error during quick format for LDEV {ldev_id}: {str(e)}")
-		
-		# Step 5: Get LDEV details and populate the data attribute
-		# Wait longer to ensure all operations have completed
-		time.sleep(5)
-		
-		# Populate data attribute with information about all created LDEVs
-		for ldev_id, ldev_name in created_ldevs.items():
-			# Create a basic LDEV data entry with the information we already have
-			ldev_data = {
-				'LDEV_ID': ldev_id,
-				'LDEV': ldev_id,
-				'NAME': ldev_name,
-				'PARITY_GRP': parity_grp_id,
-				'CYLINDER': str(cylinder),
-				'EMULATION': emulation,
-				'MP_BLADE_ID': mp_blade_id,
-				'TYPE': 'MF-PVOL',
-				'CUT': '-',
-				'STATUS': 'NML'
-			}
-			
-			# Try to get detailed information, but use our basic info if it fails
-			if return_ldevs:
-				try:
-					# Get detailed information for this LDEV
-					ldev_info = self.getldev(ldev_id=ldev_id, update_view=False, **kwargs)
-					if hasattr(ldev_info, 'data') and ldev_info.data:
-						# Use the detailed information
-						ldev_data.update(ldev_info.data)
-					elif hasattr(ldev_info, 'view') and ldev_id in ldev_info.view:
-						# Add the view data
-						detailed_data = ldev_info.view[ldev_id]
-						ldev_data.update(detailed_data)
-				except Exception as e:
-					# Don't log a warning - this is expected in some cases
-					self.log.debug(f"Using basic info for LDEV {ldev_id} - detailed info unavailable")
-					pass
-			
-			# Add the LDEV data to our data list
-			cmdreturn.data.append(ldev_data)
-		
-		# Return sorted view
-		cmdreturn.view = dict(sorted(cmdreturn.view.items()))
-		return cmdreturn
-		
+		return self.prefixedldevs(cmdreturn,ldev_ids)
 	def addmfdppool(self, pool_id: int, pool_name: str, ldev_id: Union[int, str, list], 
 					cnt: str=None, grp_opt: str=None, device_grp_name: str=None, 
 					user_threshold: str=None, return_pool: bool=True, **kwargs) -> object:
@@ -2534,6 +2612,9 @@ class Raidcom:
 				 return_ldevs: bool=True, max_workers: int=10, **kwargs) -> object:
 		"""Add multiple open system virtual volumes with specified parameters.
 		
+		The LDEV ids are reserved from ldev_allocator, the volumes are created concurrently
+		across the horcm instances and each one is named as soon as its create completes, see provisionldevs.
+		
 		Args:
 			poolid (int): ID of the pool to create volumes in
 			capacity (Union[int, str]): Capacity in blocks or size with unit (e.g., "1g", "100m")
@@ -2542,11 +2623,11 @@ class Raidcom:
 			base_ldev_name (str): Base name for the LDEVs
 			name_start (int): Starting number for the LDEV name suffix
 			emulation (str): Emulation type for all volumes (e.g., "OPEN-V")
-			start_ldev (int): Start of LDEV ID range to search if using auto assignment
-			end_ldev (int): End of LDEV ID range to search if using auto assignment
+			start_ldev (int): Start of LDEV ID range, a volume is created on every free LDEV ID in the range
+			end_ldev (int): End of LDEV ID range
 			return_ldevs (bool): Whether to return the created LDEVs
 			max_workers (int): Maximum number of concurrent workers
-			**kwargs: Additional arguments to pass to the command
+			**kwargs: Additional add ldev options (capacity_saving, compression_acceleration, capacity_saving_mode, drs)
 			
 		Returns:
 			object: Command result containing the created LDEVs if return_ldevs is True
@@ -2599,11 +2680,6 @@ class Raidcom:
 				return cmdreturn
 			raise
 
-		# Create command return object
-		cmdreturn = CmdviewConcurrent()
-		cmdreturn.cmd = "addmultipleopenvvols"
-		cmdreturn.data = []  # Initialize data attribute
-		
 		# Convert capacity if it has units
 		capacity_blocks = convert_capacity(capacity)
 		
@@ -2614,196 +2690,34 @@ class Raidcom:
 		if not use_auto_ldev and not use_range_prefix:
 			err_msg = "Either (start_ldev and end_ldev) or (ldev_prefix and initial_hex) must be provided"
 			if self.asyncmode:
+				cmdreturn = CmdviewConcurrent()
+				cmdreturn.cmd = "addmultipleopenvvols"
 				cmdreturn.returncode = 999
 				cmdreturn.stderr = err_msg
 				return cmdreturn
 			raise ValueError(err_msg)
 		
-		# Calculate max number of volumes to create based on either range or manual prefix
 		if use_auto_ldev:
 			max_ldevs = end_ldev - start_ldev + 1
-			self.log.info(f"Will try to create up to {max_ldevs} volumes in range {start_ldev}-{end_ldev}")
+			selection = { 'start': start_ldev, 'end': end_ldev }
+			self.log.info(f"Will create a volume on every free LDEV in range {start_ldev}-{end_ldev}")
 		else:
-			# If not auto, we rely on the range provided by initial_hex
-			# For now, limit to a reasonable number to prevent too many attempts
-			max_ldevs = 20  # Arbitrary limit for manual range
+			# Limit the manual prefix range to a reasonable number of ids
+			max_ldevs = 20
+			selection = { 'ldev_ids': self.prefixldevids(ldev_prefix,initial_hex,max_ldevs) }
 			self.log.info(f"Will try to create volumes using prefix {ldev_prefix} starting with hex {initial_hex}")
-		 
-		# Track which LDEVs were attempted but unavailable
-		unavailable_ldevs = []
-		created_ldevs = {}
-		
-		# Step 1: Create volumes based on the range
-		for i in range(max_ldevs):
-			try:
-				# Determine LDEV ID based on method
-				if use_auto_ldev:
-					# For auto LDEV assignment, we send the range and let the storage system choose
-					# But we also keep track of how many we've attempted to create to honor max_ldevs
-					
-					# Create command with auto-assignment from the range
-					cmd = f"{self.path}raidcom add ldev -ldev_id auto -request_id auto -ldev_range {start_ldev}-{end_ldev} -pool {poolid} -capacity {capacity_blocks} -emulation {emulation} -I{self.instance} -s {self.serial}"
-					result = self.execute(cmd, **kwargs)
-					
-					if result.returncode != 0:
-						err_msg = f"Failed to create VVOL in range {start_ldev}-{end_ldev}: {result.stderr}"
-						self.log.error(err_msg)
-						
-						# Check if we've exhausted the available LDEVs in the range
-						if "LDEV is already defined" in result.stderr or "All specified LDEVs are already assigned to volumes" in result.stderr:
-							self.log.warning(f"No more available LDEVs in range {start_ldev}-{end_ldev}")
-							break
-						
-						# For other errors, let's try the next attempt
-						continue
-					
-					# Get the request ID
-					reqid = result.stdout.rstrip().split(' : ')
-					if not re.search(r'REQID', reqid[0]):
-						err_msg = f"Unable to obtain REQID from stdout {result}"
-						self.log.error(err_msg)
-						continue
-					
-					# Get the automatically assigned LDEV ID
-					try:
-						cmd_status = self.getcommandstatus(request_id=reqid[1])
-						self.parser.getcommandstatus(cmd_status)
-						auto_ldev_id = cmd_status.data[0]['ID']
-						self.resetcommandstatus(request_id=reqid[1])
-						ldev_id = auto_ldev_id
-						
-						# Track which LDEV was used to avoid trying it again
-						if start_ldev <= int(ldev_id) <= end_ldev:
-							# Mark this specific ID as used by adding it to unavailable_ldevs
-							unavailable_ldevs.append(ldev_id)
-					except Exception as e:
-						self.log.error(f"Error getting command status: {str(e)}")
-						continue
-				else:
-					# Generate LDEV ID by incrementing the hex value
-					current_hex = hex(int(initial_hex, 16) + i)[2:].upper().zfill(2)
-					ldev_id = f"{ldev_prefix}{current_hex}"
-					
-					# Create the LDEV with specific ID
-					cmd = f"{self.path}raidcom add ldev -ldev_id {ldev_id} -pool {poolid} -capacity {capacity_blocks} -emulation {emulation} -I{self.instance} -s {self.serial}"
-					result = self.execute(cmd, **kwargs)
-					
-					if result.returncode != 0:
-						self.log.error(f"Failed to create LDEV {ldev_id}: {result.stderr}")
-						unavailable_ldevs.append(ldev_id)
-						continue
-				
-				# Generate LDEV name with incremental number
-				ldev_name = f"{base_ldev_name}_{name_start + i}"
-				created_ldevs[ldev_id] = ldev_name
-				
-				# Update the command return view
-				cmdreturn.view[ldev_id] = {
-					'LDEV': ldev_id,
-					'NAME': ldev_name,
-					'POOL': str(poolid),
-					'CAPACITY': capacity_blocks,
-					'EMULATION': emulation
-				}
-				
-				# Update command return with result
-				cmdreturn.stdout += result.stdout + "\n" if hasattr(result, 'stdout') else ""
-				cmdreturn.stderr += result.stderr + "\n" if hasattr(result, 'stderr') else ""
-				
-				self.log.info(f"Successfully created LDEV {ldev_id}")
-				
-			except Exception as e:
-				self.log.error(f"Error creating LDEV: {str(e)}")
-				continue
-		
-		# Report what we were able to create
-		self.log.info(f"Created {len(created_ldevs)} volumes out of {max_ldevs} maximum ({len(unavailable_ldevs)} unavailable)")
-		
-		# Step 2: Now set the names for each LDEV with retry mechanism
-		# Wait for 2 seconds to allow storage system to fully process the LDEV creations
-		# import time
-		time.sleep(2)
-		
-		for ldev_id, ldev_name in created_ldevs.items():
-			# Try up to 3 times to set the name
-			max_retries = 3
-			retry_delay = 2  # seconds
-			success = False
-			
-			for attempt in range(max_retries):
-				try:
-					# Construct direct command for naming
-					cmd = f"{self.path}raidcom modify ldev -ldev_id {ldev_id} -ldev_name {ldev_name} -I{self.instance}"
-					result = self.execute(cmd=cmd, **kwargs)
-					
-					if result.returncode == 0:
-						self.log.info(f"Successfully set name '{ldev_name}' for LDEV {ldev_id}")
-						success = True
-						break
-					else:
-						# If error is that LDEV is not installed, wait and retry
-						if "LDEV is not installed" in result.stderr:
-							self.log.warning(f"LDEV {ldev_id} not fully registered yet, waiting {retry_delay} seconds before retry {attempt+1}/{max_retries}")
-							time.sleep(retry_delay)
-							# Increase delay for next retry
-							retry_delay += 2
-						else:
-							self.log.error(f"Failed to set name for LDEV {ldev_id}: {result.stderr}")
-							break
-				except Exception as e:
-					self.log.error(f"Error setting name for LDEV {ldev_id}: {str(e)}")
-					break
-			
-			if not success:
-				self.log.error(f"Failed to set name for LDEV {ldev_id} after {max_retries} attempts")
-		
-		# Step 3: Get LDEV details and populate the data attribute
-		# Wait longer to ensure all operations have completed
-		time.sleep(3)
-		
-		# Store information about unavailable LDEVs
-		cmdreturn.unavailable_ldevs = unavailable_ldevs
-		
-		# Populate data attribute with information about all created LDEVs
-		for ldev_id, ldev_name in created_ldevs.items():
-			# Create a basic LDEV data entry with the information we already have
-			ldev_data = {
-				'LDEV': ldev_id,
-				'NAME': ldev_name,
-				'POOL': str(poolid),
-				'CAPACITY': capacity_blocks,
-				'EMULATION': emulation,
-				'TYPE': 'OPEN-VVOL',
-				'STATUS': 'NML'
-			}
-			
-			# Try to get detailed information, but use our basic info if it fails
-			if return_ldevs:
-				try:
-					# Get detailed information for this LDEV
-					ldev_info = self.getldev(ldev_id=ldev_id, update_view=False, **kwargs)
-					if hasattr(ldev_info, 'data') and ldev_info.data:
-						# Use the detailed information
-						ldev_data.update(ldev_info.data[0])
-					elif hasattr(ldev_info, 'view') and ldev_id in ldev_info.view:
-						# Add the view data
-						detailed_data = ldev_info.view[ldev_id]
-						ldev_data.update(detailed_data)
-				except Exception as e:
-					self.log.debug(f"Using basic info for LDEV {ldev_id} - detailed info unavailable")
-					pass
-			
-			# Add the LDEV data to our data list
-			cmdreturn.data.append(ldev_data)
-		
-		# Return sorted view
-		cmdreturn.view = dict(sorted(cmdreturn.view.items()))
+
+		record = { 'POOL': str(poolid), 'CAPACITY': capacity_blocks, 'EMULATION': emulation, 'TYPE': 'OPEN-VVOL', 'STATUS': 'NML' }
+		cmdreturn = self.provisionldevs(f"-pool {poolid} -capacity {capacity_blocks} -emulation {emulation}",
+										names=(f"{base_ldev_name}_{name_start + i}" for i in itertools.count()),
+										return_ldevs=return_ldevs,record=record,max_workers=max_workers,raise_err=False,**selection,**kwargs)
+		cmdreturn.cmd = "addmultipleopenvvols"
 		
 		# Add a summary of what was created vs what was attempted
 		cmdreturn.summary = {
 			'max_ldevs': max_ldevs,
-			'created_ldevs': len(created_ldevs),
-			'unavailable_ldevs': len(unavailable_ldevs)
+			'created_ldevs': cmdreturn.stats['created'],
+			'unavailable_ldevs': len(cmdreturn.unavailable_ldevs)
 		}
 		
 		return cmdreturn
@@ -2815,6 +2729,9 @@ class Raidcom:
 				 return_ldevs: bool=True, max_workers: int=10, **kwargs) -> object:
 		"""Add multiple open system physical volumes with specified parameters.
 		
+		The LDEV ids are reserved from ldev_allocator, the volumes are created concurrently
+		across the horcm instances and each one is named and quick formatted as soon as its create completes, see provisionldevs.
+		
 		Args:
 			parity_grp_id (str): ID of the parity group to create volumes in (e.g., "1-1")
 			capacity (Union[int, str]): Capacity in blocks or size with unit (e.g., "1g", "100m")
@@ -2823,13 +2740,13 @@ class Raidcom:
 			base_ldev_name (str): Base name for the LDEVs
 			name_start (int): Starting number for the LDEV name suffix
 			emulation (str): Emulation type for all volumes (e.g., "OPEN-V")
-			start_ldev (int): Start of LDEV ID range to search if using auto assignment
-			end_ldev (int): End of LDEV ID range to search if using auto assignment
+			start_ldev (int): Start of LDEV ID range, a volume is created on every free LDEV ID in the range
+			end_ldev (int): End of LDEV ID range
 			mp_blade_id (str): MP blade ID for the volumes
 			format_ldevs (bool): Whether to quick format the LDEVs after creation
 			return_ldevs (bool): Whether to return the created LDEVs
 			max_workers (int): Maximum number of concurrent workers
-			**kwargs: Additional arguments to pass to the command
+			**kwargs: Additional add ldev options (capacity_saving, compression_acceleration, capacity_saving_mode, drs)
 			
 		Returns:
 			object: Command result containing the created LDEVs if return_ldevs is True
@@ -2882,11 +2799,6 @@ class Raidcom:
 				return cmdreturn
 			raise
 
-		# Create command return object
-		cmdreturn = CmdviewConcurrent()
-		cmdreturn.cmd = "addmultipleopenpvols"
-		cmdreturn.data = []  # Initialize data attribute
-		
 		# Convert capacity if it has units
 		capacity_blocks = convert_capacity(capacity)
 		
@@ -2897,216 +2809,40 @@ class Raidcom:
 		if not use_auto_ldev and not use_range_prefix:
 			err_msg = "Either (start_ldev and end_ldev) or (ldev_prefix and initial_hex) must be provided"
 			if self.asyncmode:
+				cmdreturn = CmdviewConcurrent()
+				cmdreturn.cmd = "addmultipleopenpvols"
 				cmdreturn.returncode = 999
 				cmdreturn.stderr = err_msg
 				return cmdreturn
 			raise ValueError(err_msg)
 		
-		# Calculate max number of volumes to create based on either range or manual prefix
 		if use_auto_ldev:
 			max_ldevs = end_ldev - start_ldev + 1
-			self.log.info(f"Will try to create up to {max_ldevs} physical volumes in range {start_ldev}-{end_ldev}")
+			selection = { 'start': start_ldev, 'end': end_ldev }
+			self.log.info(f"Will create a physical volume on every free LDEV in range {start_ldev}-{end_ldev}")
 		else:
-			# If not auto, we rely on the range provided by initial_hex
-			# For now, limit to a reasonable number to prevent too many attempts
-			max_ldevs = 20  # Arbitrary limit for manual range
+			# Limit the manual prefix range to a reasonable number of ids
+			max_ldevs = 20
+			selection = { 'ldev_ids': self.prefixldevids(ldev_prefix,initial_hex,max_ldevs) }
 			self.log.info(f"Will try to create physical volumes using prefix {ldev_prefix} starting with hex {initial_hex}")
-		
-		# Track which LDEVs were attempted but unavailable
-		unavailable_ldevs = []
-		created_ldevs = {}
-		
-		# Step 1: Create volumes based on the range
-		for i in range(max_ldevs):
-			try:
-				# Determine LDEV ID based on method
-				if use_auto_ldev:
-					# For auto LDEV assignment, we calculate the next available LDEV in the range
-					current_ldev = start_ldev + i
-					if current_ldev > end_ldev:
-						self.log.warning(f"Reached end of specified LDEV range ({start_ldev}-{end_ldev})")
-						break
-						
-					# Check if this LDEV is already in unavailable_ldevs
-					if str(current_ldev) in unavailable_ldevs:
-						continue
-						
-					ldev_id = str(current_ldev)
-					
-					# Create the LDEV with parity group
-					cmd = f"{self.path}raidcom add ldev -parity_grp_id {parity_grp_id} -ldev_id {ldev_id} -capacity {capacity_blocks} -emulation {emulation} -mp_blade_id {mp_blade_id} -I{self.instance} -s {self.serial}"
-					result = self.execute(cmd, **kwargs)
-					
-					if result.returncode != 0:
-						err_msg = f"Failed to create PVOL with ID {ldev_id} in parity group {parity_grp_id}: {result.stderr}"
-						self.log.error(err_msg)
-						unavailable_ldevs.append(str(ldev_id))
-						continue
-				else:
-					# Generate LDEV ID by incrementing the hex value
-					current_hex = hex(int(initial_hex, 16) + i)[2:].upper().zfill(2)
-					ldev_id = f"{ldev_prefix}{current_hex}"
-					
-					# Create the LDEV with parity group
-					cmd = f"{self.path}raidcom add ldev -parity_grp_id {parity_grp_id} -ldev_id {ldev_id} -capacity {capacity_blocks} -emulation {emulation} -mp_blade_id {mp_blade_id} -I{self.instance} -s {self.serial}"
-					result = self.execute(cmd, **kwargs)
-					
-					if result.returncode != 0:
-						self.log.error(f"Failed to create PVOL {ldev_id}: {result.stderr}")
-						unavailable_ldevs.append(ldev_id)
-						continue
-				
-				# Generate LDEV name with incremental number
-				ldev_name = f"{base_ldev_name}_{name_start + i}"
-				created_ldevs[ldev_id] = ldev_name
-				
-				# Update the command return view
-				cmdreturn.view[ldev_id] = {
-					'LDEV': ldev_id,
-					'NAME': ldev_name,
-					'PARITY_GRP': parity_grp_id,
-					'CAPACITY': capacity_blocks,
-					'EMULATION': emulation,
-					'MP_BLADE_ID': mp_blade_id
-				}
-				
-				# Update command return with result
-				cmdreturn.stdout += result.stdout + "\n" if hasattr(result, 'stdout') else ""
-				cmdreturn.stderr += result.stderr + "\n" if hasattr(result, 'stderr') else ""
-				
-				self.log.info(f"Successfully created physical volume {ldev_id}")
-				
-			except Exception as e:
-				self.log.error(f"Error creating physical volume: {str(e)}")
-				continue
-		
-		# Report what we were able to create
-		self.log.info(f"Created {len(created_ldevs)} physical volumes out of {max_ldevs} maximum ({len(unavailable_ldevs)} unavailable)")
-		
-		# Step 2: Format the LDEVs if requested - FIXED IMPLEMENTATION
-		if format_ldevs and created_ldevs:
-			self.log.info(f"Starting quick format for {len(created_ldevs)} LDEVs")
-			# import time
-			
-			time.sleep(3)
-			# Start quick format for each LDEV - similar to how addmfpvols does it
-			for ldev_id in created_ldevs:
-				try:
-					cmd = f"{self.path}raidcom initialize ldev -ldev_id {ldev_id} -operation qfmt -I{self.instance} -s {self.serial}"
-					result = self.execute(cmd, **kwargs)
-					
-					if result.returncode == 0:
-						self.log.info(f"Successfully started quick format for LDEV {ldev_id}")
-					else:
-						self.log.error(f"Failed to start quick format for LDEV {ldev_id}: {result.stderr}")
-				except Exception as e:
-					self.log.error(f"Error during quick format for LDEV {ldev_id}: {str(e)}")
-			
-			# Let the format operations complete in the background
-			# The status will be checked when we get the LDEV details later
-			# For now, just give some time for the format to progress
-			self.log.info(f"Waiting for quick format operations to make progress...")
-			time.sleep(3)  # Wait 30 seconds for formats to make progress
-		else:
-			self.log.info("Quick format not requested or no LDEVs to format")
-		
-		# Step 3: Now set the names for each LDEV with retry mechanism
-		# Wait for 2 seconds to allow storage system to fully process the LDEV creations
-		time.sleep(2)
-		
-		for ldev_id, ldev_name in created_ldevs.items():
-			# Try up to 3 times to set the name
-			max_retries = 3
-			retry_delay = 2  # seconds
-			success = False
-			
-			for attempt in range(max_retries):
-				try:
-					# Construct direct command for naming
-					cmd = f"{self.path}raidcom modify ldev -ldev_id {ldev_id} -ldev_name {ldev_name} -I{self.instance} -s {self.serial}"
-					result = self.execute(cmd=cmd, **kwargs)
-					
-					if result.returncode == 0:
-						self.log.info(f"Successfully set name '{ldev_name}' for LDEV {ldev_id}")
-						success = True
-						break
-					else:
-						# If error is that LDEV is not installed, wait and retry
-						if "LDEV is not installed" in result.stderr:
-							self.log.warning(f"LDEV {ldev_id} not fully registered yet, waiting {retry_delay} seconds before retry {attempt+1}/{max_retries}")
-							time.sleep(retry_delay)
-							# Increase delay for next retry
-							retry_delay += 2
-						else:
-							self.log.error(f"Failed to set name for LDEV {ldev_id}: {result.stderr}")
-							break
-				except Exception as e:
-					self.log.error(f"Error setting name for LDEV {ldev_id}: {str(e)}")
-					break
-			
-			if not success:
-				self.log.error(f"Failed to set name for LDEV {ldev_id} after {max_retries} attempts")
-		
-		# Step 4: Wait longer to ensure all operations have completed, particularly the quick format
-		# This approach mirrors the addmfpvols function which doesn't poll for format completion
-		# but allows enough time for most formats to complete
-		time.sleep(5)  # Increased wait time from 5 to 60 seconds
-		
-		# Store information about unavailable LDEVs
-		cmdreturn.unavailable_ldevs = unavailable_ldevs
-		
-		# Populate data attribute with information about all created LDEVs
-		for ldev_id, ldev_name in created_ldevs.items():
-			# Create a basic LDEV data entry with the information we already have
-			ldev_data = {
-				'LDEV': ldev_id,
-				'NAME': ldev_name,
-				'PARITY_GRP': parity_grp_id,
-				'CAPACITY': capacity_blocks,
-				'EMULATION': emulation,
-				'MP_BLADE_ID': mp_blade_id,
-				'TYPE': 'OPEN-PVOL',
-				'STATUS': 'NML'  # Default to NML, will be updated if we get actual status
-			}
-			
-			# Try to get detailed information, but use our basic info if it fails
-			if return_ldevs:
-				try:
-					# Get detailed information for this LDEV
-					ldev_info = self.getldev(ldev_id=ldev_id, update_view=False, **kwargs)
-					if hasattr(ldev_info, 'data') and ldev_info.data:
-						# Use the detailed information
-						ldev_data.update(ldev_info.data[0])
-						
-						# Check if the LDEV is still in BLK status
-						if ldev_info.data[0].get('STATUS') == 'BLK':
-							self.log.warning(f"LDEV {ldev_id} is still in BLK status after waiting - format may still be in progress")
-							
-					elif hasattr(ldev_info, 'view') and ldev_id in ldev_info.view:
-						# Add the view data
-						detailed_data = ldev_info.view[ldev_id]
-						ldev_data.update(detailed_data)
-						
-						# Check if the LDEV is still in BLK status
-						if detailed_data.get('STATUS') == 'BLK':
-							self.log.warning(f"LDEV {ldev_id} is still in BLK status after waiting - format may still be in progress")
-				except Exception as e:
-					self.log.debug(f"Using basic info for LDEV {ldev_id} - detailed info unavailable: {str(e)}")
-					pass
-			
-			# Add the LDEV data to our data list
-			cmdreturn.data.append(ldev_data)
-		
-		# Return sorted view
-		cmdreturn.view = dict(sorted(cmdreturn.view.items()))
+
+		record = { 'PARITY_GRP': parity_grp_id, 'CAPACITY': capacity_blocks, 'EMULATION': emulation, 'MP_BLADE_ID': mp_blade_id, 'TYPE': 'OPEN-PVOL', 'STATUS': 'NML' }
+		cmdreturn = self.provisionldevs(f"-parity_grp_id {parity_grp_id} -capacity {capacity_blocks} -emulation {emulation} -mp_blade_id {mp_blade_id}",
+										names=(f"{base_ldev_name}_{name_start + i}" for i in itertools.count()),
+										format_ldevs=format_ldevs,return_ldevs=return_ldevs,record=record,max_workers=max_workers,raise_err=False,**selection,**kwargs)
+		cmdreturn.cmd = "addmultipleopenpvols"
+
+		for ldev in cmdreturn.data:
+			if ldev.get('STS') == 'BLK':
+				self.log.warning(f"LDEV {ldev['LDEV']} is still in BLK status - quick format may still be in progress")
 		
 		# Add a summary of what was created vs what was attempted
 		cmdreturn.summary = {
 			'max_ldevs': max_ldevs,
-			'created_ldevs': len(created_ldevs),
-			'unavailable_ldevs': len(unavailable_ldevs),
+			'created_ldevs': cmdreturn.stats['created'],
+			'unavailable_ldevs': len(cmdreturn.unavailable_ldevs),
 			'format_note': "Quick format operations continue asynchronously and may not be complete when this command returns"
 		}
 		
 		return cmdreturn
-		
\ No newline at end of file
+		
@@ -1,6 +1,6 @@
 #!/usr/bin/python3.6
 # -----------------------------------------------------------------------------------------------------------------------------------
-# Version v1.1.06
+# Version v1.1.11
 # -----------------------------------------------------------------------------------------------------------------------------------
 #
 # License Terms
@@ -30,53 +30,85 @@
 #
 # 24/07/2024    v1.1.06     Bugfix concurrent_getresource - allow names with spaces
 #
+# 18/10/2026    v1.1.07     getldev parses a line stream one ldev at a time, removed print of every ldev
+#
+# 18/10/2026    v1.1.08     Module level compiled patterns and header cache, no per line regex compiles in the port, host group, lun, hba_wwn and pool parsers
+#                           Bug fix, getportlogin gave every login in _PORT_LOGINS the Serial# of the last line parsed, each login now carries its own
+#                           Bug fix, gethostgrp filtered the undefined filter_unused_grps ( NameError ), it now filters the parsed host groups and drops unused ones
+#
+# 18/10/2026    v1.1.09     compact=True builds lun, hba_wwn, port login and ldev rows as slotted Records
+#
+# 18/10/2026    v1.1.10     getldev capacity unit strings are cached per block count rather than converted per ldev
+#
+# 18/10/2026    v1.1.11     ldevrecords yields parsed ldevs without collecting them, getldev is built on it
+#
 # -----------------------------------------------------------------------------------------------------------------------------------
 
+import io
 import re
-import collections
+import functools
 from typing import Callable
 from .historutils.historutils import Storcapunits
 from .historutils.historutils import Ldevid
 from .cmdview import Cmdview
 from .v_id import VId
 import copy
+from .datafilter import compilefilter
+from .viewstore import Viewstore, mergeview
+from .records import rowfactory, fromdict
+
+quoted_regex = re.compile(r'"([^"]*)"')
+elun_header_regex = re.compile(r'^PORT\s+WWN')
+hmo_tail_regex = re.compile(r'(.*?)([\s\d]+$)')
+
+def stripunitid(port: str) -> str:
+    ''' CL1-A1 -> CL1-A, raidcom suffixes ports with the unit id '''
+    return port.rstrip('0123456789')
+
+def between(line: str, head: int, tail: int) -> str:
+    ''' Free text between the first head and the last tail columns of line, e.g. a host group name containing spaces '''
+    parts = line.split(None,head)
+    if len(parts) <= head:
+        return ''
+    parts = parts[head].rsplit(None,tail)
+    return parts[0].strip() if len(parts) > tail else ''
+
+@functools.lru_cache(maxsize=None)
+def headerschema(header: str, maxsplit: int=-1) -> tuple:
+    return tuple(header.split(maxsplit=maxsplit))
+
+@functools.lru_cache(maxsize=4096)
+def blockunits(blocks: str) -> tuple:
+    ''' BLK, MB, GB and TB strings for a block count, ldevs are mostly a handful of sizes so the conversions are cached '''
+    capacity = Storcapunits(blocks,'blk')
+    return tuple(str(getattr(capacity,denom)) for denom in ('BLK','MB','GB','TB'))
+
+@functools.lru_cache(maxsize=None)
+def hbawwnregex(serial: str):
+    ''' PORT GID GROUP_NAME HWWN Serial# NICK_NAME, group and nick names may contain spaces so the wwn and serial anchor the row '''
+    return re.compile(r'^(\S+)\s+(\S+)\s+(.*?)\s+(\w{16})\s{3,4}(' + re.escape(serial) + r')\s+(.*)$')
 
         
 class Raidcomparser:
-    def __init__(self,raidcom,log):
+    def __init__(self,raidcom,log,compact: bool=False):
         self.log = log
         self.raidcom = raidcom
+        # lun, hba_wwn, port login and ldev rows as Records rather than dicts
+        self.compact = compact
     
     def updateview(self,view: dict,viewupdate: dict) -> dict:
         ''' Update dict view with new dict data '''
-        for k, v in viewupdate.items():
-            if isinstance(v,collections.abc.Mapping):
-                view[k] = self.updateview(view.get(k,{}),v)
-            else:
-                view[k] = v
-        return view
+        if isinstance(view,Viewstore):
+            return view.merge(viewupdate)
+        return mergeview(view,viewupdate)
 
     def altview(self,cmdreturn,altview):
         if altview:
             self.updateview(self.raidcom.views,{altview(cmdreturn):cmdreturn.altview})
 
     def applyfilter(self,row,_filter):
-        if _filter:
-            for key, val in _filter.items():
-                if key not in row and not callable(val) :
-                    return False
-            for key, val in _filter.items():
-                if isinstance(val,str):
-                    if row[key] != val:
-                        return False
-                elif isinstance(val,list):
-                    if row[key] not in val:
-                        return False
-                elif callable(val):
-                    return val(row)
-                else:
-                    return False
-        return True
+        ''' Single row check, parsers compile the datafilter once with compilefilter '''
+        return compilefilter(_filter)(row)
             
     #def initload(self,cmdreturn,header='',keys=[],replaceHeaderChars={}):
     def initload(self,cmdreturn,header='',keys=[],maxsplit=-1):
@@ -88,7 +120,7 @@ class Raidcomparser:
         else:
             cmdreturn.header = cmdreturn.rawdata.pop(0)
             #cmdreturn.headers = [header.translate(str.maketrans(replaceHeaderChars)) for header in cmdreturn.header.split()]
-            cmdreturn.headers = cmdreturn.header.split(maxsplit=maxsplit)
+            cmdreturn.headers = list(headerschema(cmdreturn.header,maxsplit))
 
     def translate_headers(self,replaceHeaderChars={}):
         corrected_dict = { k.replace(':', ''): v for k, v in ori_dict.items() }
@@ -163,7 +195,7 @@ class Raidcomparser:
             row = line.split()
             prefilter.append(dict(zip(cmdreturn.headers, row)))
         
-        cmdreturn.data = list(filter(lambda r: self.applyfilter(r,datafilter),prefilter))
+        cmdreturn.data = list(filter(compilefilter(datafilter),prefilter))
         createview(cmdreturn)
         return cmdreturn
 
@@ -187,7 +219,7 @@ class Raidcomparser:
             row = line.rsplit(maxsplit=5)
             prefilter.append(dict(zip(cmdreturn.headers, row)))
 
-        cmdreturn.data = list(filter(lambda r: self.applyfilter(r,datafilter),prefilter))
+        cmdreturn.data = list(filter(compilefilter(datafilter),prefilter))
         createview(cmdreturn)
         self.altview(cmdreturn,altview)
         return cmdreturn
@@ -223,7 +255,7 @@ class Raidcomparser:
                 prefilter_dict[rgid][k] = v
 
         prefilter = [value for value in prefilter_dict.values()]
-        newcmdreturn.data = list(filter(lambda r: self.applyfilter(r,datafilter),prefilter))
+        newcmdreturn.data = list(filter(compilefilter(datafilter),prefilter))
         createview(newcmdreturn)
         return newcmdreturn
 
@@ -248,7 +280,7 @@ class Raidcomparser:
             row = line.rsplit(maxsplit=5)
             prefilter.append(dict(zip(cmdreturn.headers, row)))
 
-        cmdreturn.data = list(filter(lambda r: self.applyfilter(r,datafilter),prefilter))
+        cmdreturn.data = list(filter(compilefilter(datafilter),prefilter))
         createview(cmdreturn)
         return cmdreturn
 
@@ -273,37 +305,62 @@ class Raidcomparser:
         prefilter = []
         for line in cmdreturn.rawdata:
             row = line.split()
-            #row[0] = re.sub(r'\d+$','',row[0])
-            port = re.sub(r'\d+$','',row[0])
-            unitid = (row[0].replace(port,''),'0')[row[0].replace(port,'') == '']
+            port = stripunitid(row[0])
+            unitid = row[0][len(port):] or '0'
             row[0] = port
             row.append(unitid)
             prefilter.append(dict(zip(cmdreturn.headers, row)))
             
-        cmdreturn.data = list(filter(lambda r: self.applyfilter(r,datafilter),prefilter))
+        cmdreturn.data = list(filter(compilefilter(datafilter),prefilter))
         createview(cmdreturn)
         return cmdreturn
 
     def splitportgid(self,hsd):
         clport,gid = hsd.rsplit(maxsplit=1)
-        clport = re.sub(r'\d+$','',clport)
+        clport = stripunitid(clport)
         return clport,gid
 
     def cleanhsd(self,hsd):
         cl,port,gid = hsd.split('-')
-        port = re.sub(r'\d+$','',port)
-        return f"{cl}-{port}-{gid}"
+        return f"{cl}-{stripunitid(port)}-{gid}"
+
+    def iterldevs(self,lines) -> dict:
+        '''
+        Yield each raw ldev record from raidcom get ldev output as soon as its terminating blank line is read.
+        '''
+        ldev = {}
+        for line in lines:
+            row = line.strip()
+            if not row:
+                if ldev:
+                    yield ldev
+                    ldev = {}
+                continue
+            if ':' in row:
+                key, value = row.split(':', 1)
+                ldev[key.strip()] = value.strip()
+        if ldev:
+            yield ldev
 
     def getldev(self,cmdreturn: object,datafilter: dict={}) -> object:
-        ldevdata = [dict(map(str.strip, row.split(':', 1)) for row in list(filter(None,ldev.split('\n')))) for ldev in cmdreturn.stdout.split('\n\n')]
-        prefilter = []
+        '''
+        Parses cmdreturn.lines when the command was executed with stream=True, otherwise cmdreturn.stdout.\n
+        Records are filtered and added to the view one ldev at a time.
+        '''
+        cmdreturn.stats = { 'ldevcount':0 }
+        for ldevout in self.ldevrecords(cmdreturn,datafilter):
+            cmdreturn.data.append(ldevout)
+            cmdreturn.view[ldevout['LDEV']] = ldevout
+            cmdreturn.stats['ldevcount'] += 1
+        return cmdreturn
 
-        def createview(cmdreturn):
-            cmdreturn.stats = { 'ldevcount':0 }
-            for datadict in cmdreturn.data:
-                ldev_id = datadict['LDEV']
-                cmdreturn.view[ldev_id] = datadict
-                cmdreturn.stats['ldevcount'] += 1
+    def ldevrecords(self,cmdreturn: object,datafilter: dict={}):
+        '''
+        Yield each parsed ldev matching datafilter without collecting them on cmdreturn.\n
+        Over cmdreturn.lines ( stream=True ) only the ldev being parsed is held, the caller decides what to keep.
+        '''
+        lines = getattr(cmdreturn,'lines',None) or io.StringIO(cmdreturn.stdout)
+        datafilter = compilefilter(datafilter)
 
         def PORTs(**kwargs):
             port_data = {}
@@ -334,14 +391,12 @@ class Raidcomparser:
             kwargs['ldevout']['VOL_ATTR'] = kwargs['value'].split(' : ')
 
         def VOL_Capacity(**kwargs):
-            capacity = Storcapunits(kwargs['value'],'blk')
-            for denom in ['BLK','MB','GB','TB']:
-                kwargs['ldevout'][f'VOL_Capacity({denom})'] = str(getattr(capacity,denom))
+            for denom, value in zip(('BLK','MB','GB','TB'),blockunits(kwargs['value'])):
+                kwargs['ldevout'][f'VOL_Capacity({denom})'] = value
 
         def Used_Block(**kwargs):
-            capacity = Storcapunits(kwargs['value'],'blk')
-            for denom in ['BLK','MB','GB','TB']:
-                kwargs['ldevout'][f'Used_Block({denom})'] = str(getattr(capacity,denom))
+            for denom, value in zip(('BLK','MB','GB','TB'),blockunits(kwargs['value'])):
+                kwargs['ldevout'][f'Used_Block({denom})'] = value
 
         def LDEV(**kwargs):
             l = kwargs['value'].split()
@@ -354,45 +409,19 @@ class Raidcomparser:
             kwargs['ldevout']['RS_GROUP'] = self.raidcom.views['_resource_groups'][kwargs['value']]['RS_GROUP']
 
         specialfields = {'LDEV': LDEV, 'PORTs': PORTs,'VOL_ATTR': VOL_ATTR, 'VOL_Capacity(BLK)': VOL_Capacity, 'Used_Block(BLK)': Used_Block, 'RSGID': RSGID }
-        for ldev in ldevdata:
+        for ldev in self.iterldevs(lines):
             ldevout = {}
-            print(f"LDEV: {ldev}")
             for k, v in ldev.items():
                 if k in specialfields:
                     specialfields[k](key=k,value=v,ldevdata=ldev,ldevout=ldevout)
                 else:
                     ldevout[k] = v
-            prefilter.append(ldevout)
-        
-        cmdreturn.data = list(filter(lambda r: self.applyfilter(r,datafilter),prefilter))
-        
-        createview(cmdreturn)
-        return cmdreturn
+            if datafilter(ldevout):
+                yield fromdict(ldevout) if self.compact else ldevout
         
         
     def getldevlist(self,cmdreturn: object, datafilter: dict={}, **kwargs) -> object:
-        
-
-        def createview(cmdreturn):
-            cmdreturn.stats = { 'ldevcount':0 }
-            for datadict in cmdreturn.data:
-                #self.log.info(datadict)
-                ldev_id = datadict['LDEV']
-                cmdreturn.view[ldev_id] = datadict
-                cmdreturn.stats['ldevcount'] += 1
-
-        prefilter = []
-        listofldevs = list(filter(None,cmdreturn.stdout.split('\n\n')))
-        for ldev in listofldevs:
-            ldevobj = type('obj', (object,), {'stdout' : ldev, 'view': {}})
-            parsedldev = self.getldev(ldevobj)
-            #self.updateview(cmdreturn.view,parsedldev.view)
-            #cmdreturn.data.extend(parsedldev.data)
-            prefilter.extend(parsedldev.data)
-            
-        cmdreturn.data = list(filter(lambda r: self.applyfilter(r,datafilter),prefilter))
-        createview(cmdreturn)
-        return cmdreturn
+        return self.getldev(cmdreturn,datafilter=datafilter)
 
     def getldevlist_front_end(self,cmdreturn: object, datafilter: dict={}, **kwargs) -> object:
 
@@ -407,11 +436,12 @@ class Raidcomparser:
                 cmdreturn.stats['ldev_count'] += 1
 
         prefilter = []
+        makerow = rowfactory(cmdreturn.headers,self.compact)
         for line in cmdreturn.rawdata:
             row = line.rsplit(maxsplit=9)
-            prefilter.append(dict(zip(cmdreturn.headers, row)))
+            prefilter.append(makerow(row))
 
-        cmdreturn.data = list(filter(lambda r: self.applyfilter(r,datafilter),prefilter))
+        cmdreturn.data = list(filter(compilefilter(datafilter),prefilter))
         createview(cmdreturn)
         return cmdreturn
 
@@ -432,7 +462,7 @@ class Raidcomparser:
             row = line.split(maxsplit=11)
             prefilter.append(dict(zip(cmdreturn.headers, row)))
 
-        cmdreturn.data = list(filter(lambda r: self.applyfilter(r,datafilter),prefilter))
+        cmdreturn.data = list(filter(compilefilter(datafilter),prefilter))
         createview(cmdreturn)
         return cmdreturn
 
@@ -461,11 +491,11 @@ class Raidcomparser:
         prefiltered_host_grps = []
         cmdreturn.headers.insert(0,"HOST_GRP_ID")
         for line in cmdreturn.rawdata:
-            hostgroupName = re.findall(r'"([^"]*)"', line)
+            hostgroupName = quoted_regex.findall(line) if '"' in line else None
             if hostgroupName:
                 line = line.replace(f'"{hostgroupName[0]}"','-')
             port,gid,rgid,nameSpace,serial,hostmode,host_mode_options = line.split()
-            port = re.sub(r'\d+$','', port)
+            port = stripunitid(port)
             host_grp_id = f"{port}-{gid}"
 
             if hostgroupName:
@@ -480,7 +510,7 @@ class Raidcomparser:
             
             prefiltered_host_grps.append(dict(zip(cmdreturn.headers, values)))
 
-        filtered_host_grps = list(filter(lambda l: self.applyfilter(l,datafilter),filter_unused_grps))
+        filtered_host_grps = list(filter(compilefilter(datafilter),prefiltered_host_grps))
         #filtered_host_grps = list(filter(filter_host_grps,prefiltered_host_grps))
         used_host_grps = list(filter(lambda x: (x['GROUP_NAME'] != '-'),filtered_host_grps))
         #unused_host_grps = list(filter(lambda x: (x['GROUP_NAME'] == '-'),filtered_host_grps))
@@ -514,11 +544,11 @@ class Raidcomparser:
         prefiltered_host_grps = []
         cmdreturn.headers.insert(0,"HOST_GRP_ID")
         for line in cmdreturn.rawdata:
-            hostgroupName = re.findall(r'"([^"]*)"', line)
+            hostgroupName = quoted_regex.findall(line) if '"' in line else None
             if hostgroupName:
                 line = line.replace(f'"{hostgroupName[0]}"','-')
             port,gid,rgid,nameSpace,serial,hostmode,host_mode_options = line.split()
-            port = re.sub(r'\d+$','', port)
+            port = stripunitid(port)
             host_grp_id = f"{port}-{gid}"
 
             if hostgroupName:
@@ -533,7 +563,7 @@ class Raidcomparser:
             
             prefiltered_host_grps.append(dict(zip(cmdreturn.headers, values)))
 
-        filtered_host_grps = list(filter(lambda l: self.applyfilter(l,datafilter),prefiltered_host_grps))
+        filtered_host_grps = list(filter(compilefilter(datafilter),prefiltered_host_grps))
         host_grps_usage = { '_GIDS': list(filter(lambda x: (x['GROUP_NAME'] != '-'),filtered_host_grps)), '_GIDS_UNUSED': list(filter(lambda x: (x['GROUP_NAME'] == '-'),filtered_host_grps)) }
 
         for usage in hostgrp_usage:    
@@ -560,6 +590,7 @@ class Raidcomparser:
 
         prefiltered_luns = []
         cmdreturn.headers.insert(0,"HOST_GRP_ID")
+        makerow = rowfactory(cmdreturn.headers,self.compact)
         for line in cmdreturn.rawdata:
             #self.log.info(f"{line}")
             values = line.strip().split(maxsplit=9)
@@ -568,13 +599,13 @@ class Raidcomparser:
                 values[9] = [str(inthmo) for inthmo in sorted([int(hmo) for hmo in values[9].split()])]
             else:
                 values.append([])
-            port = values[0] = re.sub(r'\d+$','', values[0])
+            port = values[0] = stripunitid(values[0])
             gid = values[1]
             host_grp_id = f"{port}-{gid}"            
             values.insert(0,host_grp_id)
 
-            prefiltered_luns.append(dict(zip(cmdreturn.headers, values)))
-        cmdreturn.data = list(filter(lambda l: self.applyfilter(l,datafilter),prefiltered_luns))
+            prefiltered_luns.append(makerow(values))
+        cmdreturn.data = list(filter(compilefilter(datafilter),prefiltered_luns))
         createview(cmdreturn.data)
 
         return cmdreturn
@@ -585,7 +616,7 @@ class Raidcomparser:
         cmdreturn.stats = { 'hbawwncount':0 }
 
         # Quick fix for when hba_wwn is requested from ELUN port
-        if not len(cmdreturn.rawdata) or re.search(r'^PORT\s+WWN',cmdreturn.header):
+        if not len(cmdreturn.rawdata) or elun_header_regex.search(cmdreturn.header):
             return cmdreturn
         
         def createview(data):
@@ -599,8 +630,7 @@ class Raidcomparser:
                 #cmdreturn.view[port]['_GIDS'][gid]['_WWNS'][wwn] = {}
                 #cmdreturn.stats['hbawwncount'] += 1
 
-                cmdreturn.view[port] = cmdreturn.view.get(port,{ '_GIDS': { gid:{'_WWNS':{}}} })
-                cmdreturn.view[port]['_GIDS'][gid]['_WWNS'][wwn] = datadict
+                cmdreturn.view.setdefault(port,{'_GIDS':{}})['_GIDS'].setdefault(gid,{'_WWNS':{}})['_WWNS'][wwn] = datadict
                 cmdreturn.stats['hbawwncount'] += 1
 #                for value,head in zip(values,cmdreturn.headers):
 #                    cmdreturn.view[port]['_GIDS'][gid]['_WWNS'][wwn][head] = value
@@ -612,27 +642,21 @@ class Raidcomparser:
         
         prefiltered = []
         cmdreturn.headers.insert(0,"HOST_GRP_ID")
+        rowregex = hbawwnregex(str(self.raidcom.serial))
+        makerow = rowfactory(cmdreturn.headers,self.compact)
         for line in cmdreturn.rawdata:
-            sline = line.strip()
-            regex = r'\s(\w{16}\s{3,4}'+str(self.raidcom.serial)+r')(?:\s+)(.*$)'
-            capture = re.search(regex,sline)
-            wwn,serial = capture.group(1).split()
+            port,gid,hostgroupName,wwn,serial,wwn_nickname = rowregex.match(line.strip()).groups()
             wwn = wwn.lower()
-            wwn_nickname = capture.group(2)
-            row = sline.split()
-            port,gid = row[0],row[1]
-            extractHostGroupNameRegex = r'(?:^'+port+r'\s+'+gid+r'\s+)(.*?)(?:\s+'+capture.group(1)+r'\s+'+capture.group(2)+r')'
-            hostgroupName = re.search(extractHostGroupNameRegex,sline).group(1)
-            port = re.sub(r'\d+$','', port)
+            port = stripunitid(port)
             host_grp_id = f"{port}-{gid}"
             values = (host_grp_id,port,gid,hostgroupName,wwn,serial,wwn_nickname)
             
             #cmdreturn.view[port] = cmdreturn.view.get(port,{ '_GIDS': { gid:{'_WWNS':{}}} })
             #cmdreturn.view[port]['_GIDS'][gid]['_WWNS'][wwn] = {}
             #cmdreturn.stats['hbawwncount'] += 1
-            prefiltered.append(dict(zip(cmdreturn.headers, values)))
+            prefiltered.append(makerow(values))
 
-        cmdreturn.data = list(filter(lambda l: self.applyfilter(l,datafilter),prefiltered))
+        cmdreturn.data = list(filter(compilefilter(datafilter),prefiltered))
             #for value,head in zip(values,cmdreturn.headers):
             #    cmdreturn.view[port]['_GIDS'][gid]['_WWNS'][wwn][head] = value
         createview(cmdreturn.data)
@@ -644,23 +668,25 @@ class Raidcomparser:
         cmdreturn.stats = { 'loggedinhostcount':0 }
 
         def createview(data):
+            loginrow = rowfactory(["Serial#"],self.compact)
             for datadict in data:
                 #self.log.info(datadict)
                 port = datadict['PORT']
                 login_wwn = datadict['LOGIN_WWN']
-                cmdreturn.view[port]['_PORT_LOGINS'][login_wwn] = { "Serial#": serial }
+                cmdreturn.view[port]['_PORT_LOGINS'][login_wwn] = loginrow((datadict['Serial#'],))
                 cmdreturn.stats['loggedinhostcount'] += 1
 
         prefiltered = []
+        makerow = rowfactory(cmdreturn.headers,self.compact)
         for line in cmdreturn.rawdata:
             col = line.split()
-            port = re.sub(r'\d+$','',col[0])
+            port = stripunitid(col[0])
             cmdreturn.view[port] = cmdreturn.view.get(port,{'_PORT_LOGINS':{}})
             login_wwn,serial,dash = col[1],col[2],col[3]
             values = (port,login_wwn,serial,dash)
-            prefiltered.append(dict(zip(cmdreturn.headers, values)))
+            prefiltered.append(makerow(values))
 
-        cmdreturn.data = list(filter(lambda l: self.applyfilter(l,datafilter),prefiltered))
+        cmdreturn.data = list(filter(compilefilter(datafilter),prefiltered))
         createview(cmdreturn.data)
         return cmdreturn
     
@@ -679,7 +705,7 @@ class Raidcomparser:
         for line in cmdreturn.rawdata:
             values = line.split()
             prefiltered.append(dict(zip(cmdreturn.headers,values)))
-        cmdreturn.data = list(filter(lambda l: self.applyfilter(l,datafilter),prefiltered))
+        cmdreturn.data = list(filter(compilefilter(datafilter),prefiltered))
         createview(cmdreturn.data)
         return cmdreturn
 
@@ -698,12 +724,11 @@ class Raidcomparser:
         for line in cmdreturn.rawdata:
             values = line.split()
             pid,pols,u,seq,num,ldev,h,vcap,typ,pm,pt,auto_add_plv = values[0],values[1],values[2],values[-9],values[-8],values[-7],values[-6],values[-5],values[-4],values[-3],values[-2],values[-1]
-            revealpoolnameregex = r'(?:^'+pid+r'\s+'+pols+r'\s+'+u+r'\s+)(.*?)(?:\s'+seq+r'\s+'+num+r'\s+'+ldev+r'\s+'+h+r'\s+'+vcap+r'\s+'+typ+r'\s+'+pm+r'\s+'+pt+r'\s+'+auto_add_plv+r')'
-            poolname = re.search(revealpoolnameregex,line).group(1).strip()
+            poolname = between(line,3,9)
             values = (pid,pols,u,poolname,seq,num,ldev,h,vcap,typ,pm,pt,auto_add_plv)
 
             prefiltered.append(dict(zip(cmdreturn.headers,values)))
-        cmdreturn.data = list(filter(lambda l: self.applyfilter(l,datafilter),prefiltered))
+        cmdreturn.data = list(filter(compilefilter(datafilter),prefiltered))
         createview(cmdreturn.data)
         return cmdreturn
 
@@ -731,7 +756,7 @@ class Raidcomparser:
             values = line.split(maxsplit=22)
             prefiltered.append(dict(zip(cmdreturn.headers,values)))
 
-        cmdreturn.data = list(filter(lambda l: self.applyfilter(l,datafilter),prefiltered))
+        cmdreturn.data = list(filter(compilefilter(datafilter),prefiltered))
         createview(cmdreturn.data)
         return cmdreturn
 
@@ -772,7 +797,7 @@ class Raidcomparser:
             if len(values) != len(cmdreturn.headers): raise("header and data length mismatch, unable to support copy_grps with spaces, especially if device_grp also has spaces")
             prefiltered.append(dict(zip(cmdreturn.headers,values)))
 
-        cmdreturn.data = list(filter(lambda l: self.applyfilter(l,datafilter),prefiltered))
+        cmdreturn.data = list(filter(compilefilter(datafilter),prefiltered))
         createview(cmdreturn.data)
         return cmdreturn
 
@@ -804,7 +829,7 @@ class Raidcomparser:
             if len(values) != len(cmdreturn.headers): raise("header and data length mismatch, unable to support copy_grps with spaces, especially if device_grp also has spaces")
             prefiltered.append(dict(zip(cmdreturn.headers,values)))
 
-        cmdreturn.data = list(filter(lambda l: self.applyfilter(l,datafilter),prefiltered))
+        cmdreturn.data = list(filter(compilefilter(datafilter),prefiltered))
         createview(cmdreturn.data)
         return cmdreturn
 
@@ -834,7 +859,7 @@ class Raidcomparser:
             row = line.split()
             prefilter.append(dict(zip(cmdreturn.headers, row)))
             
-        cmdreturn.data = list(filter(lambda r: self.applyfilter(r,datafilter),prefilter))
+        cmdreturn.data = list(filter(compilefilter(datafilter),prefilter))
         createview(cmdreturn)
         return cmdreturn
 
@@ -858,7 +883,7 @@ class Raidcomparser:
             row = line.split()
             prefilter.append(dict(zip(cmdreturn.headers, row)))
             
-        cmdreturn.data = list(filter(lambda r: self.applyfilter(r,datafilter),prefilter))
+        cmdreturn.data = list(filter(compilefilter(datafilter),prefilter))
         createview(cmdreturn)
         return cmdreturn
 
@@ -886,7 +911,7 @@ class Raidcomparser:
             row.append(cmdreturn.serial)
             prefilter.append(dict(zip(cmdreturn.headers, row)))
             
-        cmdreturn.data = list(filter(lambda r: self.applyfilter(r,datafilter),prefilter))
+        cmdreturn.data = list(filter(compilefilter(datafilter),prefilter))
         createview(cmdreturn)
         return cmdreturn
 
@@ -968,7 +993,7 @@ class Raidcomparser:
             values = (port,login_wwn,serial,dash)
             prefiltered.append(dict(zip(cmdreturn.headers, values)))
 
-        cmdreturn.data = list(filter(lambda l: self.applyfilter(l,datafilter),prefiltered))
+        cmdreturn.data = list(filter(compilefilter(datafilter),prefiltered))
         createview(cmdreturn.data)
         return cmdreturn'''
 
@@ -990,18 +1015,18 @@ class Raidcomparser:
 
         for headingIndex in range(0, len(cmdreturn.headers)):
             if cmdreturn.headers[headingIndex] == '/ALPA/C':
-                x = re.split(r'/', cmdreturn.headers[headingIndex])
+                x = cmdreturn.headers[headingIndex].split('/')
                 cmdreturn.headers[headingIndex] = x[1]
                 cmdreturn.headers.insert(headingIndex+1, x[2]) 
 
         for line in cmdreturn.rawdata:
             values = line.split()
             hsdkeys = values[0].split('-')
-            hsdkeys[1] = re.sub(r'\d+$','',hsdkeys[1])
+            hsdkeys[1] = stripunitid(hsdkeys[1])
             values[0] = '-'.join(hsdkeys)
             if len(values) != len(cmdreturn.headers): raise("header and data length mismatch")
             prefiltered.append(dict(zip(cmdreturn.headers, values)))
-        cmdreturn.data = list(filter(lambda l: self.applyfilter(l,datafilter),prefiltered))
+        cmdreturn.data = list(filter(compilefilter(datafilter),prefiltered))
         createview(cmdreturn)
         return cmdreturn
    
@@ -1014,7 +1039,7 @@ class Raidcomparser:
         self.initload(cmdreturn)
         for headingIndex in range(0, len(cmdreturn.headers)):
             if cmdreturn.headers[headingIndex] == '/ALPA/C':
-                x = re.split(r'/', cmdreturn.headers[headingIndex])
+                x = cmdreturn.headers[headingIndex].split('/')
                 cmdreturn.headers[headingIndex] = x[1]
                 cmdreturn.headers.insert(headingIndex+1, x[2])  
 
@@ -1024,7 +1049,7 @@ class Raidcomparser:
             values = line.split()
             values.append(mu)
             hsdkeys = values[0].split('-')
-            hsdkeys[1] = re.sub(r'\d+$','',hsdkeys[1])
+            hsdkeys[1] = stripunitid(hsdkeys[1])
             values[0] = portgid = '-'.join(hsdkeys)
             if len(values) != len(cmdreturn.headers): raise("header and data length mismatch")
             prikey = portgid 
@@ -1048,7 +1073,7 @@ class Raidcomparser:
         self.initload(cmdreturn)
         for headingIndex in range(0, len(cmdreturn.headers)):
             if cmdreturn.headers[headingIndex] == '/ALPA/C':
-                x = re.split(r'/', cmdreturn.headers[headingIndex])
+                x = cmdreturn.headers[headingIndex].split('/')
                 cmdreturn.headers[headingIndex] = x[1]
                 cmdreturn.headers.insert(headingIndex+1, x[2])  
 
@@ -1058,7 +1083,7 @@ class Raidcomparser:
             values = line.split()
             values.append(mu)
             hsdkeys = values[0].split('-')
-            hsdkeys[1] = re.sub(r'\d+$','',hsdkeys[1])
+            hsdkeys[1] = stripunitid(hsdkeys[1])
             values[0] = '-'.join(hsdkeys)
             if len(values) != len(cmdreturn.headers): raise("header and data length mismatch")
             prikey = ldevid = values[7]
@@ -1102,8 +1127,7 @@ class Raidcomparser:
             hmos = ""
             hmolist = []
             sline = line.strip()
-            hmoregex = r'(.*?)([\s\d]+$)'
-            capture = re.search(hmoregex,sline)
+            capture = hmo_tail_regex.search(sline)
             try:
                 hmos = str(capture.group(2).strip())
                 sline = capture.group(1)
@@ -1112,9 +1136,8 @@ class Raidcomparser:
                 pass
             row = sline.split()
             port,gid,serial,hmd = row[0],row[1],row[-2],row[-1]
-            revealHostGroupNameRegex = r'(?:^'+port+r'\s+'+gid+r'\s+)(.*?)(?:\s+'+serial+r'\s+'+hmd+r')'
-            hostgroupName = re.search(revealHostGroupNameRegex,sline).group(1)
-            port = re.sub(r'\d+$','', port)
+            hostgroupName = between(sline,2,2)
+            port = stripunitid(port)
             
             values = (port,gid,hostgroupName,serial,hmd,sorted(hmolist),resource_group_id)
             cmdreturn.headers.append('RSGID')
@@ -1133,7 +1156,7 @@ class Raidcomparser:
         self.initload(cmdreturn)
         cmdreturn.stats = { 'quorumcount':0 }
         quorum_prefilter = [dict(map(str.strip, row.split(':', 1)) for row in list(filter(None,quorum.split('\n')))) for quorum in cmdreturn.stdout.split('\n\n')]
-        cmdreturn.data = list(filter(lambda q: self.applyfilter(q,datafilter),quorum_prefilter))
+        cmdreturn.data = list(filter(compilefilter(datafilter),quorum_prefilter))
 
         def createview(data):
             for datadict in data:
@@ -1161,7 +1184,7 @@ class Raidcomparser:
             row = line.split()
             prefilter.append(dict(zip(cmdreturn.headers, row)))
 
-        cmdreturn.data = list(filter(lambda l: self.applyfilter(l,datafilter),prefilter))
+        cmdreturn.data = list(filter(compilefilter(datafilter),prefilter))
         createview(cmdreturn.data)
 
         return cmdreturn
@@ -1185,7 +1208,7 @@ class Raidcomparser:
             values = (NVMSS_ID,RGID,NVMSS_NAME,SECURITY,T10PI,HMD,HMO_BITs,V_NDMSS_ID)
             prefiltered.append(dict(zip(cmdreturn.headers,values)))
         
-        cmdreturn.data = list(filter(lambda l: self.applyfilter(l,datafilter),prefiltered))
+        cmdreturn.data = list(filter(compilefilter(datafilter),prefiltered))
         createview(cmdreturn.data)
         return cmdreturn
 
@@ -1199,8 +1222,7 @@ class Raidcomparser:
             hmolist = []
             sline = line.strip()
             self.log.debug(sline)
-            hmoregex = r'(.*?)([\s\d]+$)'
-            capture = re.search(hmoregex,sline)
+            capture = hmo_tail_regex.search(sline)
             try:
                 hmos = str(capture.group(2).strip())
                 sline = capture.group(1)
@@ -1209,9 +1231,8 @@ class Raidcomparser:
                 pass
             row = sline.split()
             port,gid,serial,hmd = row[0],row[1],row[-2],row[-1]
-            revealHostGroupNameRegex = r'(?:^'+port+r'\s+'+gid+r'\s+)(.*?)(?:\s+'+serial+r'\s+'+hmd+r')'
-            hostgroupName = re.search(revealHostGroupNameRegex,sline).group(1)
-            port = re.sub(r'\d+$','', port)
+            hostgroupName = between(sline,2,2)
+            port = stripunitid(port)
             self.log.debug("Port: '"+port+"', Gid: '"+gid+"', HostgroupName: '"+hostgroupName+"', serial: '"+serial+"', hostmode: '"+hmd+"', hmos: '"+hmos+"', RSGID: '"+str(resourcegroupid)+"'" )
             values = (port,gid,hostgroupName,serial,hmd,sorted(hmolist),resourcegroupid)
             cmdreturn.headers.append('RSGID')
@@ -0,0 +1,19 @@
+class Raidcomrequest():
+    '''
+    One raidcom command as both Raidcom and AsyncRaidcom issue it, they differ only in how the command runs.\n
+    cmd, undocmds, undodefs and kwargs are passed to execute, cached is the view cache hit when there is one.\n
+    complete(cmdreturn) runs once the command has returned: parsing, view and stats updates and the view cache store\n
+    for getters, view cache invalidation for writes.\n
+    request = raidcom.getlunrequest(port='cl1-a-1')\n
+    luns = request.cached or request.complete(raidcom.execute(request.cmd,request.undocmds,request.undodefs,**request.kwargs))
+    '''
+    def __init__(self,cmd: str,undocmds: list=None,undodefs: list=None,cached: object=None,completion=None,**kwargs):
+        self.cmd = cmd
+        self.undocmds = undocmds or []
+        self.undodefs = undodefs or []
+        self.cached = cached
+        self.completion = completion
+        self.kwargs = kwargs
+
+    def complete(self,cmdreturn: object) -> object:
+        return self.completion(cmdreturn) if self.completion else cmdreturn
@@ -1,96 +1,200 @@
 #from .storage_utils import StorageCapacity
+import threading
+from collections import Counter
+from collections.abc import Mapping
 from .historutils.historutils import Storcapunits
 
 class Raidcomstats():
+    '''
+    Counters over raidcom.views.\n
+    Ldev capacity, lun, hba wwn and port login counts are maintained as deltas by Viewstore listeners as records are inserted,\n
+    replaced or removed. The counter methods only enable and flag their group, raidcom.stats is materialised on first read after a change.
+    '''
     def __init__(self,raidcom,log):
         self.log = log
         self.raidcom = raidcom
         self.views = self.raidcom.views
-        self.stats = self.raidcom.stats
+        self.stats = {}
         self.updateview = self.raidcom.updateview
+        self.lock = threading.RLock()
+        self.enabled = set()
+        self.dirty = set()
+        self.reset()
+        self.views.addlistener(('_ldevs','*'),self.ldevdelta)
+        self.views.addlistener(('_ldevlist','*','*'),self.ldevdelta)
+        self.views.addlistener(('_ports','*'),self.portdelta)
+        self.views.addlistener(('_ports','*','_GIDS','*'),self.hostgroupdelta)
+        self.views.addlistener(('_ports','*','_GIDS','*','_LUNS','*'),self.lundelta)
+        self.views.addlistener(('_ports','*','_GIDS','*','_WWNS','*'),self.hbawwndelta)
+        self.views.addlistener(('_ports','*','_PORT_LOGINS','*'),self.portlogindelta)
+        self.views.addlistener(('_pools','*'),self.pooldelta)
+        self.views.addlistener(('_nvm','*'),self.nvmdelta)
+
+    def reset(self) -> None:
+        with self.lock:
+            self.ldevs = {}
+            self.luns = Counter()
+            self.hbawwns = Counter()
+            self.uniquehbawwns = Counter()
+            self.portlogins = Counter()
+            self.uniqueportlogins = Counter()
+
+    def rebuild(self) -> None:
+        ''' Recount everything from the current views '''
+        with self.lock:
+            self.reset()
+            self.views.replay()
+            self.dirty.update(self.enabled)
+
+    def materialize(self) -> dict:
+        with self.lock:
+            for group in [group for group in self.dirty if group in self.enabled]:
+                getattr(self,f"build_{group}")()
+            self.dirty.clear()
+        return self.stats
+
+    def flag(self,*groups) -> None:
+        with self.lock:
+            self.enabled.update(groups)
+            self.dirty.update(groups)
+
+    # Deltas, called by the view store with ( path, old record, new record )
+
+    def ldevdelta(self,path,old,new) -> None:
+        with self.lock:
+            bucket = self.ldevs.setdefault(path[-2],{'VOL_Capacity(BLK)':0, 'Used_Block(BLK)':0, 'ldevcount':0})
+            for record, sign in ((old,-1),(new,1)):
+                if isinstance(record,Mapping):
+                    bucket['VOL_Capacity(BLK)'] += sign * int(record.get('VOL_Capacity(BLK)',0))
+                    bucket['Used_Block(BLK)'] += sign * int(record.get('Used_Block(BLK)',0))
+                    bucket['ldevcount'] += sign
+            self.dirty.add('ldevcounts')
+
+    def portdelta(self,path,old,new) -> None:
+        self.dirty.update(('portcounters','hostgroupcounters','portlogincounters','hbawwncounters','luncounters'))
+
+    def hostgroupdelta(self,path,old,new) -> None:
+        self.dirty.add('hostgroupcounters')
+
+    def countdelta(self,counter,key,old,new,unique=None,uniquekey=None) -> None:
+        change = (new is not None) - (old is not None)
+        if not change:
+            return
+        with self.lock:
+            counter[key] += change
+            if unique is not None:
+                unique[uniquekey] += change
+                if unique[uniquekey] <= 0:
+                    del unique[uniquekey]
+
+    def lundelta(self,path,old,new) -> None:
+        self.countdelta(self.luns,path[1],old,new)
+        self.dirty.add('luncounters')
+
+    def hbawwndelta(self,path,old,new) -> None:
+        self.countdelta(self.hbawwns,path[1],old,new,self.uniquehbawwns,path[-1].lower())
+        self.dirty.add('hbawwncounters')
+
+    def portlogindelta(self,path,old,new) -> None:
+        self.countdelta(self.portlogins,path[1],old,new,self.uniqueportlogins,path[-1])
+        self.dirty.add('portlogincounters')
+
+    def pooldelta(self,path,old,new) -> None:
+        self.dirty.add('poolcounters')
+
+    def nvmdelta(self,path,old,new) -> None:
+        self.dirty.add('nvmcounters')
+
+    # Enable and flag a counter group, kept under their original names
 
     def portcounters(self) -> None:
-        portcounters = { 'portcounters':{'portcount':len(self.views.get('_ports',{}))} }
-        self.raidcom.updateview(self.stats,portcounters)
+        self.flag('portcounters')
 
     def hostgroupcounters(self) -> None:
+        self.flag('hostgroupcounters')
+
+    def ldevcounts(self) -> None:
+        self.flag('ldevcounts')
+
+    def portlogincounters(self) -> None:
+        self.flag('portlogincounters')
+
+    def hbawwncounters(self) -> None:
+        self.flag('hbawwncounters')
+
+    def luncounters(self) -> None:
+        self.flag('luncounters')
+
+    def poolcounters(self) -> None:
+        self.flag('poolcounters')
+
+    def nvmcounters(self) -> None:
+        self.flag('nvmcounters')
+
+    # Materialise counter groups into self.stats
+
+    def build_portcounters(self) -> None:
+        portcounters = { 'portcounters':{'portcount':len(self.views.get('_ports',{}))} }
+        self.updateview(self.stats,portcounters)
+
+    def build_hostgroupcounters(self) -> None:
         hgcounters = { 'ports':{}, 'hostGroupsTotal':0 }
-        for port in self.raidcom.views.get('_ports',{}):
+        for port in self.views.get('_ports',{}):
             hgcounters['ports'][port] = { 'hostgroups':len(self.views['_ports'][port].get('_GIDS',{}).keys()) }
             hgcounters['hostGroupsTotal'] += hgcounters['ports'][port]['hostgroups']
-        self.raidcom.updateview(self.raidcom.stats,{'portcounters':hgcounters})
+        self.updateview(self.stats,{'portcounters':hgcounters})
 
-    def ldevcounts(self) -> None:
+    def build_ldevcounts(self) -> None:
 
-        def ldev_sum(ldev_view,stats_root):
-            for ldevid in ldev_view:
-                stats_root['VOL_Capacity(BLK)'] += int(ldev_view[ldevid].get('VOL_Capacity(BLK)',0))
-                stats_root['Used_Block(BLK)'] += int(ldev_view[ldevid].get('Used_Block(BLK)',0))
+        def ldev_sum(bucket):
+            stats_root = dict(self.ldevs.get(bucket,{'VOL_Capacity(BLK)':0, 'Used_Block(BLK)':0, 'ldevcount':0}))
             vol_capacity = Storcapunits(stats_root['VOL_Capacity(BLK)'],'blk')
             used_capacity = Storcapunits(stats_root['Used_Block(BLK)'],'blk')
             for denom in ['MB','GB','TB','PB']:
                 stats_root[f'VOL_Capacity({denom})'] = getattr(vol_capacity,denom)
                 stats_root[f'Used_Block({denom})'] = getattr(used_capacity,denom)
+            return stats_root
 
         self.stats['ldevcounters'] = {}
-        self.stats['ldevcounters']['_ldevs'] = {'VOL_Capacity(BLK)':0, 'Used_Block(BLK)':0, 'ldevcount':len(self.views.get('_ldevs',{})) }
-        stats_root = self.stats['ldevcounters']['_ldevs']
-        ldev_view = self.views.get('_ldevs',{})
-        ldev_sum(ldev_view,stats_root)
-
+        self.stats['ldevcounters']['_ldevs'] = ldev_sum('_ldevs')
         for ldevlist in self.views.get('_ldevlist',{}):
-            self.stats['ldevcounters'][ldevlist] = {'VOL_Capacity(BLK)':0, 'Used_Block(BLK)':0, 'ldevcount':len(self.views['_ldevlist'][ldevlist])}
-            stats_root = self.stats['ldevcounters'][ldevlist]
-            ldev_view = self.views['_ldevlist'][ldevlist]
-            ldev_sum(ldev_view,stats_root)
+            self.stats['ldevcounters'][ldevlist] = ldev_sum(ldevlist)
 
-    def portlogincounters(self) -> None:
+    def build_portlogincounters(self) -> None:
         portlogins = { 'ports':{}, 'portLoginsTotal':0 }
-        wwns = set()
         for port in self.views.get('_ports',{}):
-            portlogins['ports'][port] = { 'portlogins':len(self.views['_ports'][port].get('_PORT_LOGINS',[])) }
-            wwns.update(self.views['_ports'][port].get('_PORT_LOGINS',[]))
+            portlogins['ports'][port] = { 'portlogins':self.portlogins.get(port,0) }
             portlogins['portLoginsTotal'] += portlogins['ports'][port]['portlogins']
-        portlogins['uniquePortLoginsTotal'] = len(wwns)
+        portlogins['uniquePortLoginsTotal'] = len(self.uniqueportlogins)
         self.updateview(self.stats,{'portcounters':portlogins})
 
-    def hbawwncounters(self) -> None:
-        hbawwncount = { 'ports':{}, 'hbaWwnTotal':0 }
-        wwns = set()
+    def build_hbawwncounters(self) -> None:
+        hbawwncount = { 'ports':{}, 'hbaWwnTotal':len(self.uniquehbawwns) }
         for port in self.views.get('_ports',{}):
-            hbawwncount['ports'][port] = { 'hbaWwnCount': 0 }
-            for gid in self.views['_ports'][port].get('_GIDS',{}):
-                hbawwncount['ports'][port]['hbaWwnCount'] += len(self.views['_ports'][port]['_GIDS'][gid].get('_WWNS',[]))
-                wwns.update([wwn.lower() for wwn in self.views['_ports'][port]['_GIDS'][gid].get('_WWNS',{}).keys()])
-        hbawwncount['hbaWwnTotal'] += len(wwns)
+            hbawwncount['ports'][port] = { 'hbaWwnCount': self.hbawwns.get(port,0) }
         self.updateview(self.stats,{'portcounters':hbawwncount})
-    
-    def luncounters(self) -> None:
+
+    def build_luncounters(self) -> None:
         luncounters = { 'ports':{}, 'lunsTotal':0 }
         for port in self.views.get('_ports',{}):
-            luncounters['ports'][port] = { 'lunCount': 0 }
-            for gid in self.views['_ports'][port].get('_GIDS',{}):
-                luncounters['ports'][port]['lunCount'] += len(self.views['_ports'][port]['_GIDS'][gid].get('_LUNS',{}).keys())
+            luncounters['ports'][port] = { 'lunCount': self.luns.get(port,0) }
             luncounters['lunsTotal'] += luncounters['ports'][port]['lunCount']
         self.updateview(self.stats,{'portcounters': luncounters})
 
-    def poolcounters(self) -> None:
-        counters = { 'pools': len(self.views['_pools']) }        
-        for poolid in self.views['_pools']:
+    def build_poolcounters(self) -> None:
+        counters = { 'pools': len(self.views.get('_pools',{})) }
+        for poolid in self.views.get('_pools',{}):
             pt = self.views['_pools'][poolid].get('PT')
             if pt:
                 counters['pool_types'] = counters.get('pool_types',{})
                 counters['pool_types'][pt] = counters['pool_types'].get(pt,{ 'count':0, 'Available(MB)':0, 'Capacity(MB)':0 })
                 counters['pool_types'][pt]['count'] += 1
-                #counters['pool_types'][pt]['Available(MB)'] += int(self.views['_pools'][poolid]['Available(MB)'])
-                #counters['pool_types'][pt]['Capacity(MB)'] += int(self.views['_pools'][poolid]['Capacity(MB)'])
             if self.views['_pools'][poolid].get('Available(MB)'):
                 for cap in ['Available(MB)','Capacity(MB)']:
                     counters[cap] = counters.get(cap,0)
                     counters[cap] += int(self.views['_pools'][poolid][cap])
-        self.updateview(self.stats,{'poolcounters': counters})        
+        self.updateview(self.stats,{'poolcounters': counters})
 
-    def nvmcounters(self) -> None:
-        counters = { 'nvm_subsystems': len(self.views['_nvm']) }
-        self.updateview(self.stats,{'nvmcounters': counters}) 
-        
\ No newline at end of file
+    def build_nvmcounters(self) -> None:
+        counters = { 'nvm_subsystems': len(self.views.get('_nvm',{})) }
+        self.updateview(self.stats,{'nvmcounters': counters})
@@ -0,0 +1,126 @@
+import functools
+from collections.abc import Mapping, MutableMapping
+
+class Record(MutableMapping):
+    '''
+    Compact parsed row, a mapping over per schema __slots__ rather than a dict per row.\n
+    One Record subclass is created per distinct header tuple so the field names are held once, by the class:\n
+    lunrecord = recordtype(('HOST_GRP_ID','PORT','GID','HMD','LUN','NUM','LDEV','CM','Serial#','HMO_BITs'))\n
+    lun = lunrecord(values)\n
+    lun['LDEV'], lun.get('CM'), dict(lun), json.dumps(lun,default=jsondefault)\n
+    Fields without a value ( a short row ) are missing as they would be from dict(zip(headers,values)),\n
+    keys outside the schema are accepted and kept in a small per record dict.
+    '''
+    __slots__ = ('_extra',)
+    _fields = ()
+    _slots = {}
+    _positions = ()
+
+    def __init__(self,values: tuple=(),extra: dict=None):
+        for slot, value in zip(self._positions,values):
+            slot.__set__(self,value)
+        self._extra = extra
+
+    def __getitem__(self,key):
+        slot = self._slots.get(key)
+        if slot is not None:
+            try:
+                return slot.__get__(self)
+            except AttributeError:
+                raise KeyError(key) from None
+        if self._extra and key in self._extra:
+            return self._extra[key]
+        raise KeyError(key)
+
+    def __setitem__(self,key,value):
+        slot = self._slots.get(key)
+        if slot is not None:
+            slot.__set__(self,value)
+        else:
+            if self._extra is None:
+                self._extra = {}
+            self._extra[key] = value
+
+    def __delitem__(self,key):
+        slot = self._slots.get(key)
+        if slot is not None:
+            try:
+                slot.__delete__(self)
+            except AttributeError:
+                raise KeyError(key) from None
+        elif self._extra and key in self._extra:
+            del self._extra[key]
+        else:
+            raise KeyError(key)
+
+    def __iter__(self):
+        for key, slot in self._slots.items():
+            try:
+                slot.__get__(self)
+            except AttributeError:
+                continue
+            yield key
+        if self._extra:
+            yield from self._extra
+
+    def __len__(self) -> int:
+        return sum(1 for key in self)
+
+    def __contains__(self,key) -> bool:
+        try:
+            self[key]
+        except KeyError:
+            return False
+        return True
+
+    def get(self,key,default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def __eq__(self,other) -> bool:
+        if not isinstance(other,Mapping):
+            return NotImplemented
+        return dict(self.items()) == dict(other.items())
+
+    __hash__ = None
+
+    def __repr__(self) -> str:
+        return repr(dict(self))
+
+    def __reduce__(self):
+        return (fromdict,(dict(self),))
+
+    def copy(self) -> 'Record':
+        return fromdict(dict(self))
+
+@functools.lru_cache(maxsize=256)
+def recordtype(headers: tuple) -> type:
+    ''' The Record subclass for a header tuple, repeated headers keep the last value as dict(zip(headers,values)) would '''
+    fields = tuple(dict.fromkeys(headers))
+    slotnames = { field: f"_{i}" for i, field in enumerate(fields) }
+    cls = type('Record',(Record,),{ '__slots__': tuple(slotnames.values()), '_fields': fields })
+    cls._slots = { field: getattr(cls,slotname) for field, slotname in slotnames.items() }
+    cls._positions = tuple(cls._slots[header] for header in headers)
+    return cls
+
+def fromdict(row: Mapping) -> Record:
+    ''' Compact an existing dict row, e.g. an ldev assembled key by key '''
+    return recordtype(tuple(row))(tuple(row.values()))
+
+def rowfactory(headers: list,compact: bool=False):
+    '''
+    Row constructor for one parse, called with the row values.\n
+    compact=False returns dict(zip(headers,values)) rows, compact=True Records sharing one schema.
+    '''
+    if compact:
+        return recordtype(tuple(headers))
+    headers = tuple(headers)
+    return lambda values: dict(zip(headers,values))
+
+def jsondefault(obj):
+    ''' json.dumps(views,default=jsondefault) for views holding Records '''
+    if isinstance(obj,Record):
+        return dict(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
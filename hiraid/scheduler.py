@@ -0,0 +1,133 @@
+import time
+import asyncio
+import logging
+import threading
+import subprocess
+from typing import Callable
+from hicciexceptions.cci_exceptions import EX_ATTHOR, EX_ATTDBG, EX_COMERR
+
+class Instancescheduler():
+    '''
+    Dispatch commands to the horcm instance expected to answer soonest.\n
+    Each instance keeps an exponentially weighted average of its command latency and a count of commands in flight,\n
+    a command goes to the instance with the lowest (inflight + 1) * latency * weight, where IPCMD command devices\n
+    carry ipcmd_weight. An instance left idle for probe_interval seconds is scored as if it were as fast as the fastest\n
+    so a single slow sample does not starve it. An instance failing with EX_ATTHOR, EX_ATTDBG, EX_COMERR or a timeout is backed off for\n
+    backoff seconds, doubling with each consecutive failure up to max_backoff, and the command is retried elsewhere.\n
+    scheduler = Instancescheduler(storage.instances)\n
+    cmdreturn = scheduler.dispatch(storage.getlun,port='cl1-a-1')\n
+    cmdreturn = await scheduler.adispatch(asyncstorage.getlun,port='cl1-a-1')
+    '''
+    instance_errors = (EX_ATTHOR, EX_ATTDBG, EX_COMERR, TimeoutError, subprocess.TimeoutExpired)
+
+    def __init__(self,instances: dict={},alpha: float=0.3,ipcmd_weight: float=3.0,backoff: float=5,max_backoff: float=120,probe_interval: float=10,log=logging):
+        self.alpha = alpha
+        self.ipcmd_weight = ipcmd_weight
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.probe_interval = probe_interval
+        self.log = log
+        self.lock = threading.Lock()
+        self.state = {}
+        self.setinstances(instances)
+
+    def setinstances(self,instances: dict) -> None:
+        ''' Track instances ( Raidcom.instances ), keeping what has been learnt about instances already known '''
+        with self.lock:
+            self.state = { instance: self.state.get(instance) or { 'latency': None, 'inflight': 0, 'failures': 0, 'backoff_until': 0, 'commands': 0, 'last_used': 0 } for instance in instances }
+            for instance, detail in instances.items():
+                self.state[instance]['weight'] = (1,self.ipcmd_weight)[detail.get('cmd_device_type') == 'IP']
+
+    def score(self,state: dict,default_latency: float,now: float) -> float:
+        latency = state['latency'] if state['latency'] and now - state['last_used'] < self.probe_interval else default_latency
+        return (state['inflight'] + 1) * latency * state['weight']
+
+    def acquire(self,exclude: tuple=()) -> str:
+        ''' Choose an instance and count a command in flight against it '''
+        with self.lock:
+            if not self.state:
+                raise Exception("No horcm instances to schedule on")
+            now = time.monotonic()
+            candidates = [instance for instance in self.state if instance not in exclude] or list(self.state)
+            available = [instance for instance in candidates if self.state[instance]['backoff_until'] <= now]
+            if not available:
+                # Everything is backing off, use whichever recovers first
+                available = [min(candidates,key=lambda instance: self.state[instance]['backoff_until'])]
+            known = [self.state[instance]['latency'] for instance in self.state if self.state[instance]['latency']]
+            # Untried instances are assumed as fast as the fastest so they get sampled
+            default_latency = min(known) if known else 1.0
+            instance = min(available,key=lambda instance: self.score(self.state[instance],default_latency,now))
+            self.state[instance]['inflight'] += 1
+            self.state[instance]['last_used'] = now
+            return instance
+
+    def release(self,instance: str,elapsed: float,failed: bool=False) -> None:
+        with self.lock:
+            state = self.state.get(instance)
+            if not state:
+                return
+            state['inflight'] -= 1
+            state['commands'] += 1
+            if failed:
+                state['failures'] += 1
+                wait = min(self.max_backoff,self.backoff * 2 ** (state['failures'] - 1))
+                state['backoff_until'] = time.monotonic() + wait
+                self.log.warning(f"Horcm instance {instance} failed {state['failures']} time(s) in a row, backing off for {wait}s")
+            else:
+                state['failures'] = 0
+                state['backoff_until'] = 0
+                state['latency'] = elapsed if state['latency'] is None else self.alpha * elapsed + (1 - self.alpha) * state['latency']
+
+    def dispatch(self,fn: Callable,*args,retries: int=None,**kwargs) -> object:
+        '''
+        Call fn(*args,instance=<instance>,**kwargs) on the chosen instance.\n
+        Instance failures are retried on other instances, up to one attempt per instance unless retries is given.
+        '''
+        retries = len(self.state) - 1 if retries is None else retries
+        tried = []
+        while True:
+            instance = self.acquire(exclude=tuple(tried))
+            start = time.monotonic()
+            try:
+                result = fn(*args,instance=instance,**kwargs)
+            except self.instance_errors as e:
+                self.release(instance,time.monotonic() - start,failed=True)
+                tried.append(instance)
+                if len(tried) > retries:
+                    raise
+                self.log.warning(f"Retrying on another horcm instance after {type(e).__name__} from instance {instance}")
+                continue
+            except Exception:
+                # The command failed, the instance answered
+                self.release(instance,time.monotonic() - start)
+                raise
+            self.release(instance,time.monotonic() - start)
+            return result
+
+    async def adispatch(self,fn: Callable,*args,retries: int=None,**kwargs) -> object:
+        ''' dispatch() for a coroutine function fn '''
+        retries = len(self.state) - 1 if retries is None else retries
+        tried = []
+        while True:
+            instance = self.acquire(exclude=tuple(tried))
+            start = time.monotonic()
+            try:
+                result = await fn(*args,instance=instance,**kwargs)
+            except self.instance_errors + (asyncio.TimeoutError,) as e:
+                self.release(instance,time.monotonic() - start,failed=True)
+                tried.append(instance)
+                if len(tried) > retries:
+                    raise
+                self.log.warning(f"Retrying on another horcm instance after {type(e).__name__} from instance {instance}")
+                continue
+            except BaseException:
+                # Failed or cancelled, the instance answered or was never asked
+                self.release(instance,time.monotonic() - start)
+                raise
+            self.release(instance,time.monotonic() - start)
+            return result
+
+    def snapshot(self) -> dict:
+        ''' Current per instance latency, inflight and backoff, for logging '''
+        with self.lock:
+            return { instance: dict(state) for instance, state in self.state.items() }
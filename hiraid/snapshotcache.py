@@ -0,0 +1,112 @@
+import os
+import re
+import json
+import gzip
+import time
+import logging
+import threading
+from .records import jsondefault
+
+class Snapshotcache():
+    '''
+    On disk cache of raidcom views, one gzip compressed json segment per top level view plus a manifest.\n
+    {cachedir}/{serial}_snapshot/manifest.json\n
+    {cachedir}/{serial}_snapshot/_ldevs.<generation>.json.gz\n
+    Each segment carries the serial, view name and the time it was written. Segments are written to a temporary file\n
+    and renamed, the manifest is renamed into place last so a reader always sees a complete set.\n
+    cache = Snapshotcache('/home/user/hiraid',53511)\n
+    cache.write(storage.views,keys=['_ldevs'])\n
+    cache.load(storage.views,keys=['_ldevs','_ports'])
+    '''
+    snapshot_format = 1
+
+    def __init__(self,cachedir: str,serial: str,compresslevel: int=6,log=logging):
+        self.cachedir = cachedir
+        self.serial = serial
+        self.compresslevel = compresslevel
+        self.log = log
+        self.snapshotdir = f"{self.cachedir}{os.sep}{self.serial}_snapshot"
+        self.manifestfile = f"{self.snapshotdir}{os.sep}manifest.json"
+        self.lock = threading.Lock()
+
+    def exists(self) -> bool:
+        return os.path.exists(self.manifestfile)
+
+    def manifest(self) -> dict:
+        try:
+            with open(self.manifestfile) as json_file:
+                manifest = json.load(json_file)
+        except FileNotFoundError:
+            return { 'format': self.snapshot_format, 'serial': str(self.serial), 'segments': {} }
+        if manifest.get('format') != self.snapshot_format:
+            raise Exception(f"Snapshot {self.manifestfile} is format {manifest.get('format')}, expected {self.snapshot_format}")
+        if manifest.get('serial') != str(self.serial):
+            raise Exception(f"Snapshot {self.manifestfile} is for serial {manifest.get('serial')}, expected {self.serial}")
+        return manifest
+
+    def segmentfile(self,key: str,generation: int) -> str:
+        name = re.sub(r'[^\w.-]','_',key)
+        return f"{self.snapshotdir}{os.sep}{name}.{generation}.json.gz"
+
+    def atomicwrite(self,filename: str,data: bytes) -> None:
+        tmpfile = f"{filename}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmpfile,"wb") as f:
+            f.write(data)
+        os.replace(tmpfile,filename)
+
+    def write(self,views: dict,keys: list=None) -> dict:
+        '''
+        Write the top level views named in keys, default every view currently held.\n
+        Segments for other views already in the snapshot are kept. Returns the manifest.
+        '''
+        os.makedirs(self.snapshotdir,exist_ok=True)
+        keys = [key for key in (keys or list(dict.keys(views))) if dict.__contains__(views,key)]
+        with self.lock:
+            manifest = self.manifest()
+            superseded = []
+            for key in keys:
+                timestamp = time.time()
+                generation = time.time_ns()
+                segment = { 'format': self.snapshot_format, 'serial': str(self.serial), 'view': key, 'timestamp': timestamp, 'data': dict.__getitem__(views,key) }
+                segmentfile = self.segmentfile(key,generation)
+                self.atomicwrite(segmentfile,gzip.compress(json.dumps(segment,separators=(',',':'),default=jsondefault).encode(),compresslevel=self.compresslevel))
+                if key in manifest['segments']:
+                    superseded.append(manifest['segments'][key]['file'])
+                manifest['segments'][key] = { 'file': os.path.basename(segmentfile), 'timestamp': timestamp, 'serial': str(self.serial), 'bytes': os.path.getsize(segmentfile) }
+            manifest['timestamp'] = time.time()
+            self.atomicwrite(self.manifestfile,json.dumps(manifest,indent=4).encode())
+            for segmentfile in superseded:
+                try:
+                    os.remove(f"{self.snapshotdir}{os.sep}{segmentfile}")
+                except OSError:
+                    pass
+        self.log.debug(f"Wrote snapshot segments {keys} to {self.snapshotdir}")
+        return manifest
+
+    def read(self,key: str,manifest: dict=None) -> dict:
+        ''' Return the view held in one segment '''
+        manifest = manifest or self.manifest()
+        if key not in manifest['segments']:
+            raise Exception(f"View {key} is not in snapshot {self.manifestfile}")
+        segmentfile = f"{self.snapshotdir}{os.sep}{manifest['segments'][key]['file']}"
+        with gzip.open(segmentfile,'rb') as f:
+            segment = json.loads(f.read())
+        if segment.get('serial') != str(self.serial) or segment.get('view') != key:
+            raise Exception(f"Snapshot segment {segmentfile} holds view {segment.get('view')} for serial {segment.get('serial')}, expected {key} for {self.serial}")
+        self.log.debug(f"Read snapshot segment {segmentfile}")
+        return segment['data']
+
+    def load(self,views,keys: list=None,lazy: bool=True) -> dict:
+        '''
+        Replace views with the snapshot views named in keys, default every view in the snapshot.\n
+        lazy=True registers each segment as a Viewstore loader so it is only read when the view is first used.
+        '''
+        manifest = self.manifest()
+        keys = [key for key in (keys or manifest['segments']) if key in manifest['segments']]
+        if lazy:
+            views.replace({})
+            for key in keys:
+                views.addloader(key,lambda key=key: views.merge({key:self.read(key)}))
+        else:
+            views.replace({ key:self.read(key,manifest) for key in keys })
+        return manifest
@@ -38,6 +38,7 @@ from .storageexception import StorageException
 import random
 import uuid
 from .messaging import Gadmessaging as messaging
+from .horcm.pairmonitor import Pairmonitor, copypercent
 import copy
 
 class requiredcustomviews:
@@ -1257,9 +1258,16 @@ class StorageMigration:
         return { "requests":requests, "pairevtwaits":pairevtwaits }
 
     def monitorpairevtwaits(self,storage,pairevtwaits,status,taskid,horcm_inst=None,pairevtwaitvolumerole='-s'):
-        procs = {}
+        return self.watchpairevtwaits(pairevtwaits,status,taskid,horcm_inst=horcm_inst,pairevtwaitvolumerole=pairevtwaitvolumerole,storage=storage)
+
+    def watchpairevtwaits(self,pairevtwaits,status,taskid,horcm_inst=None,pairevtwaitvolumerole='-s',storage=None):
+        '''
+        Start a pairevtwait per copy group and wait for them all from one Pairmonitor loop, each group's task ends as its pairevtwait exits.\n
+        pairevtwaits: { copy_grp_name: { 'host', 'storage' ( optional, defaults to storage ) } }\n
+        pairdisplay progress is printed every pairevtwaitpollseconds at most, less often while a copy is far from complete or not moving.
+        '''
         log = self.log
-        returncode = 0
+        outcome = { 'returncode': 0 }
         taskname = inspect.currentframe().f_code.co_name
         pairevtwaittimeout = self.config['pairevtwaittimeout']
         pairevtwaitpollseconds = self.config['pairevtwaitpollseconds']
@@ -1267,54 +1275,46 @@ class StorageMigration:
         if horcm_inst:
             horcminst = horcm_inst
 
+        def pairdisplay(copy_grp_name):
+            storagearray = pairevtwaits[copy_grp_name].get('storage', storage)
+            return storagearray.pairdisplay(inst=horcminst,group=copy_grp_name,opts='-fcxe')['stdout']
+
+        def progress(copy_grp_name):
+            stdout = pairdisplay(copy_grp_name)
+            print(stdout)
+            return copypercent(stdout), False
+
+        def oncomplete(copy_grp_name,result):
+            pairevtwaits[copy_grp_name]['returncode'] = result['returncode']
+            print(pairdisplay(copy_grp_name))
+            if result['completed']:
+                groupstatus = 'completed'
+            else:
+                groupstatus = 'Error copy_grp_name \'{}\' pairevtwait returned: {}'.format(copy_grp_name,result['returncode'])
+                log.warn(groupstatus)
+                outcome['returncode'] = 1
+                self.warnings = 1
+                self.warningmessages.append(groupstatus)
+                self.endmessage = "Warning!"
+            log.info('copy_grp \'{}\' status: {}'.format(copy_grp_name,groupstatus))
+            self.logendtask(host=pairevtwaits[copy_grp_name]['host'],taskid=taskid,status=groupstatus)
+
         if len(pairevtwaits):
+            monitor = Pairmonitor(log=log,min_interval=pairevtwaitpollseconds,max_interval=pairevtwaitpollseconds * 10)
             for copy_grp_name in pairevtwaits:
                 storagearray = pairevtwaits[copy_grp_name].get('storage', storage)
                 pairevtwaits[copy_grp_name]['cmd'] = 'pairevtwait -g {} -I{} {} {} -t {}'.format(copy_grp_name,horcminst,pairevtwaitvolumerole,status,pairevtwaittimeout)
                 self.logtaskstart(taskname,host=pairevtwaits[copy_grp_name]['host'],taskid=taskid)
                 pairevtwaits[copy_grp_name]['proc'] = storagearray.pairevtwaitexec(pairevtwaits[copy_grp_name]['cmd'])
-                procs[copy_grp_name] = 1
-
-            time.sleep(pairevtwaitpollseconds)
-
-            log.info('Number of pairevtwait processes to monitor: {}'.format(len(procs)))
-            while len(procs):
-                for copy_grp_name in pairevtwaits:
-                    poll = pairevtwaits[copy_grp_name]['proc'].poll()
-                    log.info('Polled pairevtwait for horcm group {} - result {}'.format(copy_grp_name,poll))
-                    
-    
-                    if poll is not None:
-                        log.info('pairevtwait completed for copy_grp \'{}\' return {}'.format(copy_grp_name,poll))
-                        procs.pop(copy_grp_name, None)
-                        log.info('Popped copy_grp_name \'{}\' from procs list'.format(copy_grp_name))
-                        pairevtwaits[copy_grp_name]['returncode'] = poll
-                        pairdisplay = storagearray.pairdisplay(inst=horcminst,group=copy_grp_name,opts='-fcxe')
-                        print(pairdisplay['stdout'])
-                        if not pairevtwaits[copy_grp_name]['returncode']:
-                            status = 'completed'
-                        else:
-                            status = 'Error copy_grp_name \'{}\' pairevtwait returned: {}'.format(copy_grp_name,pairevtwaits[copy_grp_name]['returncode'])
-                            log.warn(status)
-                            returncode = 1
-                            self.warnings = 1
-                            self.warningmessages.append(status)
-                            self.endmessage = "Warning!"
-
-                        log.info('copy_grp \'{}\' status: {}'.format(copy_grp_name,status))
-
-                        self.logendtask(host=pairevtwaits[copy_grp_name]['host'],taskid=taskid,status=status)
-                    else:
-                        print(storagearray.pairdisplay(inst=horcminst,group=copy_grp_name,opts='-fcxe')['stdout'])
-                        log.info('Poll returned None, continuing to loop')
+                monitor.watch(copy_grp_name,proc=pairevtwaits[copy_grp_name]['proc'],progress=progress,oncomplete=oncomplete)
 
-                if len(procs):
-                    log.info('Number of pairevtwait processes left to monitor: {}'.format(len(procs)))
-                    time.sleep(pairevtwaitpollseconds)
+            log.info('Number of pairevtwait processes to monitor: {}'.format(len(pairevtwaits)))
+            monitor.run()
+            monitor.close()
 
         log.info('returning from monitorpairevtwaits')
 
-        return returncode
+        return outcome['returncode']
 
     def pairsplitS(self,storage,taskid,horcminst,copygrpkey,storageserialkey,messagekey):
 
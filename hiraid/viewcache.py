@@ -0,0 +1,139 @@
+import time
+import heapq
+import logging
+import threading
+
+class Viewcache():
+    '''
+    Read-through cache of getter results with a time to live per view.\n
+    cache = Viewcache({'_ports':600,'_ldevs':30})\n
+    Entries are keyed on the getter, the view path the getter fills and any arguments which change its output:\n
+    cache.store('getldev',('_ldevs','1000'),cmdreturn)\n
+    cmdreturn = cache.fetch('getldev',('_ldevs','1000'))\n
+    Writes invalidate a view path and every entry beneath it, e.g. after add lun:\n
+    cache.invalidate(('_ports','CL1-A','_GIDS','1','_LUNS'))\n
+    Views without a ttl, calls with a datafilter, update_view=False or refresh=True are never served from cache.\n
+    Entries are indexed by view path, invalidate and age only visit the entries on or beneath the path.\n
+    Expired entries are evicted as new ones are stored, so the cache holds at most one ttl's worth of results.
+    '''
+    def __init__(self,ttl: dict={},log=logging):
+        self.ttl = dict(ttl or {})
+        self.log = log
+        self.entries = {}
+        # { path key: { None: set(entry keys), child key: {...} } }
+        self.paths = {}
+        # ( expiry, sequence, entry key ), entries replaced or invalidated before expiring are skipped when popped
+        self.expiries = []
+        self.sequence = 0
+        self.lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def cacheable(self,path: tuple,update_view: bool=True,**kwargs) -> bool:
+        return bool(path and self.ttl.get(path[0]) and update_view and not kwargs.get('datafilter'))
+
+    def fetch(self,getter: str,path: tuple,args: tuple=(),update_view: bool=True,**kwargs) -> object:
+        ''' Return the cached cmdreturn if it is still fresh, otherwise None '''
+        if kwargs.get('refresh') or not self.cacheable(path,update_view,**kwargs):
+            return None
+        with self.lock:
+            entry = self.entries.get((getter,path,args))
+        if not entry or time.monotonic() - entry[0] > self.ttl[path[0]]:
+            return None
+        self.log.debug(f"Serving {getter} {path} from view cache, age {round(time.monotonic() - entry[0],3)}s")
+        return entry[1]
+
+    def store(self,getter: str,path: tuple,cmdreturn: object,args: tuple=(),update_view: bool=True,**kwargs) -> object:
+        if self.cacheable(path,update_view,**kwargs):
+            now = time.monotonic()
+            key = (getter,path,args)
+            with self.lock:
+                self.evict(now)
+                self.entries[key] = (now,cmdreturn)
+                self.node(path).setdefault(None,set()).add(key)
+                self.sequence += 1
+                heapq.heappush(self.expiries,(now + self.ttl[path[0]],self.sequence,key,now))
+            # Merges must copy from a cached cmdreturn rather than adopt its dicts
+            cmdreturn.viewcached = True
+        return cmdreturn
+
+    def node(self,path: tuple,create: bool=True) -> dict:
+        node = self.paths
+        for key in path:
+            child = node.get(key)
+            if child is None:
+                if not create:
+                    return None
+                child = node[key] = {}
+            node = child
+        return node
+
+    def remove(self,key: tuple) -> None:
+        ''' Drop one entry and prune its now empty index nodes, called holding the lock '''
+        self.entries.pop(key,None)
+        path = key[1]
+        nodes = [self.paths]
+        for part in path:
+            nodes.append(nodes[-1].get(part))
+            if nodes[-1] is None:
+                return
+        nodes[-1].get(None,set()).discard(key)
+        for depth in range(len(path),0,-1):
+            node = nodes[depth]
+            if node.get(None):
+                break
+            node.pop(None,None)
+            if node:
+                break
+            del nodes[depth - 1][path[depth - 1]]
+
+    def evict(self,now: float) -> None:
+        ''' Drop entries whose ttl has passed, called holding the lock '''
+        expiries = self.expiries
+        while expiries and expiries[0][0] < now:
+            expiry, sequence, key, fetched = heapq.heappop(expiries)
+            entry = self.entries.get(key)
+            if entry is not None and entry[0] == fetched:
+                self.remove(key)
+
+    def age(self,path: tuple) -> float:
+        ''' Seconds since path, or the view holding it, was last fetched. None if it is not cached '''
+        now = time.monotonic()
+        ages = []
+        with self.lock:
+            node = self.paths
+            for part in (None,) + tuple(path):
+                if part is not None:
+                    node = node.get(part)
+                    if node is None:
+                        break
+                ages.extend(now - self.entries[key][0] for key in node.get(None,()))
+        return min(ages) if ages else None
+
+    def fresh(self,path: tuple) -> bool:
+        age = self.age(path)
+        return age is not None and age <= self.ttl.get(path[0],0)
+
+    def invalidate(self,path: tuple) -> None:
+        ''' Drop entries for path and everything beneath it '''
+        with self.lock:
+            node = self.node(path,create=False)
+            if node is None:
+                return
+            keys, pending = [], [node]
+            while pending:
+                node = pending.pop()
+                for part, child in node.items():
+                    if part is None:
+                        keys.extend(child)
+                    else:
+                        pending.append(child)
+            for key in keys:
+                self.remove(key)
+
+    def clear(self) -> None:
+        with self.lock:
+            self.entries.clear()
+            self.paths.clear()
+            self.expiries.clear()
@@ -0,0 +1,123 @@
+import threading
+from collections.abc import Mapping
+from .historutils.historutils import Ldevid
+
+class Viewindex():
+    '''
+    Secondary indexes over raidcom.views, kept up to date by Viewstore listeners as the parsers' views are merged.\n
+    index = storage.view_index\n
+    index.hostgroups(wwn='10000000c9000001')  -> ['CL1-A-1','CL2-A-1']\n
+    index.hostgroups(name='esx01')\n
+    index.hostgroups(rgid='0')\n
+    index.lunpaths(1000)                       -> [('CL1-A-1','0'),('CL2-A-1','0')]\n
+    index.ldevs(wwn='10000000c9000001')        -> ldevs presented to the host groups holding the wwn\n
+    index.ldevs(rsgid='0'), index.ldevs(pool='1')\n
+    index.presented()                          -> every ldev with a lun path\n
+    Lookups are a dict access, host groups are 'PORT-GID' as used by getlun(port=...) and concurrent_getluns(portgids=...).
+    '''
+    def __init__(self,views: dict):
+        self.views = views
+        self.lock = threading.RLock()
+        self.wwns = {}
+        self.names = {}
+        self.rgids = {}
+        self.ldevpaths = {}
+        self.rsgids = {}
+        self.pools = {}
+        views.addlistener(('_ports','*','_GIDS','*'),self.hostgroupdelta)
+        views.addlistener(('_ports','*','_GIDS','*','_WWNS','*'),self.hbawwndelta)
+        views.addlistener(('_ports','*','_GIDS','*','_LUNS','*'),self.lundelta)
+        views.addlistener(('_ldevs','*'),self.ldevdelta)
+        self.build()
+
+    def build(self) -> None:
+        ''' Index the records currently held, listeners keep the indexes current from here on '''
+        with self.lock:
+            for port, portdata in self.views.get('_ports',{}).items():
+                for gid, hostgroup in portdata.get('_GIDS',{}).items():
+                    path = ('_ports',port,'_GIDS',gid)
+                    self.hostgroupdelta(path,None,hostgroup)
+                    for wwn, record in hostgroup.get('_WWNS',{}).items():
+                        self.hbawwndelta(path + ('_WWNS',wwn),None,record)
+                    for lun, record in hostgroup.get('_LUNS',{}).items():
+                        self.lundelta(path + ('_LUNS',lun),None,record)
+            for ldev_id, record in self.views.get('_ldevs',{}).items():
+                self.ldevdelta(('_ldevs',ldev_id),None,record)
+
+    def move(self,index: dict,old,new,member) -> None:
+        ''' Move member from index[old] to index[new], None on either side is no key '''
+        if old == new:
+            return
+        if old is not None:
+            members = index.get(old)
+            if members is not None:
+                members.discard(member)
+                if not members:
+                    del index[old]
+        if new is not None:
+            index.setdefault(new,set()).add(member)
+
+    def field(self,record,key: str):
+        return record.get(key) if isinstance(record,Mapping) else None
+
+    # Deltas, called by the view store with ( path, old record, new record )
+
+    def hostgroupdelta(self,path,old,new) -> None:
+        portgid = f"{path[1]}-{path[3]}"
+        with self.lock:
+            self.move(self.names,self.field(old,'GROUP_NAME'),self.field(new,'GROUP_NAME'),portgid)
+            self.move(self.rgids,self.field(old,'RGID'),self.field(new,'RGID'),portgid)
+
+    def hbawwndelta(self,path,old,new) -> None:
+        wwn = path[-1].lower()
+        with self.lock:
+            self.move(self.wwns,old is not None and wwn or None,new is not None and wwn or None,f"{path[1]}-{path[3]}")
+
+    def lundelta(self,path,old,new) -> None:
+        with self.lock:
+            self.move(self.ldevpaths,self.field(old,'LDEV'),self.field(new,'LDEV'),(f"{path[1]}-{path[3]}",path[-1]))
+
+    def ldevdelta(self,path,old,new) -> None:
+        ldev_id = path[-1]
+        with self.lock:
+            self.move(self.rsgids,self.field(old,'RSGID'),self.field(new,'RSGID'),ldev_id)
+            self.move(self.pools,self.field(old,'B_POOLID'),self.field(new,'B_POOLID'),ldev_id)
+
+    # Queries
+
+    def ldevkey(self,ldev_id) -> str:
+        return str(Ldevid(ldev_id).decimal)
+
+    def hostgroups(self,wwn: str=None,name: str=None,rgid: str=None) -> list:
+        ''' Host groups holding wwn, named name or in resource group rgid, give one '''
+        index, key = next(((index, key) for index, key in ((self.wwns,wwn and wwn.lower()),(self.names,name),(self.rgids,None if rgid is None else str(rgid))) if key is not None),(None,None))
+        if index is None:
+            raise Exception("hostgroups() needs one of wwn, name or rgid")
+        with self.lock:
+            return sorted(index.get(key,()))
+
+    def lunpaths(self,ldev_id) -> list:
+        ''' (host group, lun) paths presenting ldev_id, any ldev_id format Ldevid accepts '''
+        with self.lock:
+            return sorted(self.ldevpaths.get(self.ldevkey(ldev_id),()))
+
+    def ldevs(self,wwn: str=None,rsgid: str=None,pool: str=None) -> list:
+        ''' Ldevs presented to the host groups holding wwn, in resource group rsgid or backed by pool, give one '''
+        with self.lock:
+            if wwn is not None:
+                presented = set()
+                for portgid in self.wwns.get(wwn.lower(),()):
+                    port, gid = portgid.rsplit('-',1)
+                    for lun in self.views.getpath(('_ports',port,'_GIDS',gid,'_LUNS'),{}).values():
+                        presented.add(lun['LDEV'])
+                return sorted(presented,key=int)
+            if rsgid is not None:
+                return sorted(self.rsgids.get(str(rsgid),()),key=int)
+            if pool is not None:
+                return sorted(self.pools.get(str(pool),()),key=int)
+        raise Exception("ldevs() needs one of wwn, rsgid or pool")
+
+    def presented(self) -> list:
+        ''' Every ldev with at least one lun path '''
+        with self.lock:
+            return sorted(self.ldevpaths,key=int)
@@ -0,0 +1,175 @@
+import threading
+from copy import copy as shallowcopy
+from collections.abc import Mapping, MutableMapping
+from typing import Any, Callable
+
+_missing = object()
+
+def copyview(view: dict) -> dict:
+    ''' Copy every dict level of view, compact records are copied as records, leaves are shared '''
+    view = dict(view) if isinstance(view,dict) else shallowcopy(view)
+    for k, v in view.items():
+        if isinstance(v,Mapping):
+            view[k] = copyview(v)
+    return view
+
+def mergeview(view: dict,viewupdate: dict,copy: bool=True) -> dict:
+    '''
+    Merge viewupdate into view, mapping levels present in both ( dicts or compact Records ) are merged, everything else is replaced.\n
+    Subtrees missing from view are attached in one step rather than walked key by key,\n
+    copy=False attaches them as is and should only be used when viewupdate is discarded afterwards.
+    '''
+    for k, v in viewupdate.items():
+        if isinstance(v,Mapping):
+            existing = view.get(k,_missing)
+            if isinstance(existing,MutableMapping):
+                mergeview(existing,v,copy)
+            else:
+                view[k] = copyview(v) if copy else v
+        else:
+            view[k] = v
+    return view
+
+
+class Viewstore(dict):
+    '''
+    Nested dict behind raidcom.views, so storage.views['_ports'][port]['_GIDS'] and json.dumps(storage.views) work as before.\n
+    Records can also be addressed by tuple path:\n
+    views.upsert(('_ports','CL1-A','_GIDS','1','_LUNS','0'),lun)\n
+    views.getpath(('_ldevs','1000'))\n
+    views.deletepath(('_ports','CL1-A','_GIDS','1'))\n
+    Listeners are called with (path, old, new) for each record matching their pattern which is inserted, replaced or removed\n
+    by merge, upsert or deletepath. '*' matches any key, old is a shallow copy of the record before the change, None when inserted.\n
+    views.addlistener(('_ports','*','_GIDS','*','_LUNS','*'),callback)\n
+    A top level view can be deferred until first read by registering a loader, the loader is expected to merge the view in\n
+    and is only tried once.\n
+    views.addloader('_inqraid',raidcom.inqraid)
+    '''
+    def __init__(self,*args,**kwargs):
+        super().__init__(*args,**kwargs)
+        self.listeners = {}
+        self.loaders = {}
+        self.loaderlock = threading.RLock()
+
+    def addloader(self,key: str,loader: Callable):
+        self.loaders[key] = loader
+
+    def __missing__(self,key):
+        if key not in self.loaders:
+            raise KeyError(key)
+        with self.loaderlock:
+            # Popped before calling, so a loader reading its own view gets a KeyError rather than recursing
+            loader = self.loaders.pop(key,None)
+            if loader and not dict.__contains__(self,key):
+                loader()
+        return dict.__getitem__(self,key)
+
+    def get(self,key,default: Any=None) -> Any:
+        if not dict.__contains__(self,key) and key in self.loaders:
+            try:
+                return self[key]
+            except KeyError:
+                return default
+        return dict.get(self,key,default)
+
+    def addlistener(self,pattern: tuple,callback: Callable):
+        node = self.listeners
+        for key in pattern:
+            node = node.setdefault(key,{})
+        node.setdefault(None,[]).append(callback)
+
+    def listenernode(self,path: tuple) -> dict:
+        node = self.listeners
+        for key in path:
+            node = node.get(key,node.get('*'))
+            if node is None:
+                return None
+        return node
+
+    def container(self,path: tuple) -> dict:
+        view = self
+        for key in path:
+            view = view.setdefault(key,{})
+        return view
+
+    def getpath(self,path: tuple,default: Any=None) -> Any:
+        view = self
+        for key in path:
+            try:
+                view = view[key]
+            except (KeyError,TypeError):
+                return default
+        return view
+
+    def upsert(self,path: tuple,record: dict,replace: bool=False) -> dict:
+        ''' Insert record at path, an existing record is merged with record unless replace=True '''
+        if replace:
+            self.deletepath(path)
+        self.merge({path[-1]:record},path[:-1])
+        return self.getpath(path)
+
+    def deletepath(self,path: tuple) -> Any:
+        container = self.getpath(path[:-1])
+        if not isinstance(container,dict) or path[-1] not in container:
+            return None
+        removed = container.pop(path[-1])
+        node = self.listenernode(path)
+        if node:
+            self.notify(removed,node,path,removed=True)
+        return removed
+
+    def merge(self,viewupdate: dict,path: tuple=()) -> dict:
+        ''' Merge a nested view, e.g. views.merge({'_ldevs':cmdreturn.view}) or views.merge(cmdreturn.view,path=('_ldevs',)) '''
+        view = self.container(path)
+        node = self.listenernode(path)
+        if not node:
+            return mergeview(view,viewupdate)
+        return self.mergenotify(view,viewupdate,node,path)
+
+    def mergenotify(self,view: dict,viewupdate: dict,node: dict,path: tuple) -> dict:
+        for k, v in viewupdate.items():
+            child = node.get(k,node.get('*'))
+            if child is None:
+                mergeview(view,{k:v})
+                continue
+            existing = view.get(k,_missing)
+            callbacks = child.get(None,[])
+            old = None
+            if callbacks and existing is not _missing:
+                old = dict(existing) if isinstance(existing,Mapping) else existing
+            if isinstance(v,Mapping) and isinstance(existing,MutableMapping):
+                self.mergenotify(existing,v,child,path + (k,))
+            else:
+                if isinstance(existing,dict):
+                    self.notify(existing,child,path + (k,),removed=True,callbacks=False)
+                view[k] = copyview(v) if isinstance(v,Mapping) else v
+                if isinstance(v,dict):
+                    self.notify(view[k],child,path + (k,),callbacks=False)
+            for callback in callbacks:
+                callback(path + (k,),old,view[k])
+        return view
+
+    def notify(self,value: Any,node: dict,path: tuple,removed: bool=False,callbacks: bool=True):
+        ''' Call listeners for value at path and every matching record beneath it, as inserted or as removed '''
+        if callbacks:
+            for callback in node.get(None,[]):
+                callback(path,*((value,None) if removed else (None,value)))
+        if not isinstance(value,dict):
+            return
+        for key, child in node.items():
+            if key is None:
+                continue
+            items = value.items() if key == '*' else ((key,value[key]),) if key in value else ()
+            for k, v in items:
+                self.notify(v,child,path + (k,),removed)
+
+    def replay(self):
+        ''' Call listeners as if every record currently held had just been inserted '''
+        self.notify(self,self.listeners,(),callbacks=False)
+
+    def replace(self,views: dict):
+        ''' Swap in a complete set of views ( e.g. from cache ) keeping this object, and references to it, in place '''
+        self.notify(self,self.listeners,(),removed=True,callbacks=False)
+        self.clear()
+        self.update(views)
+        self.replay()
@@ -0,0 +1,56 @@
+import pytest
+from collections import deque
+from hiraid.raidcom import Raidcom
+from hiraid.executor import Replayexecutor, fixturekey
+
+SERIAL = 53511
+
+class Countingexecutor(Replayexecutor):
+    ''' Replayexecutor recording every command it is asked to run '''
+    def __init__(self,*args,**kwargs):
+        super().__init__(*args,**kwargs)
+        self.calls = []
+        self.sequences = {}
+
+    def addsequence(self,cmd: str,*stdouts):
+        ''' Serve each stdout in turn for cmd, the last one from then on '''
+        self.sequences[fixturekey(cmd)] = deque(stdouts)
+
+    def fixture(self,cmd: str) -> dict:
+        sequence = self.sequences.get(fixturekey(cmd))
+        if sequence:
+            self.add(cmd,sequence.popleft() if len(sequence) > 1 else sequence[0])
+        return super().fixture(cmd)
+
+    def run(self,cmd: str) -> tuple:
+        self.calls.append(cmd)
+        return super().run(cmd)
+
+    async def arun(self,cmd: str) -> tuple:
+        self.calls.append(cmd)
+        return await super().arun(cmd)
+
+def addconstruction(replay,micro: str='88-08-01-60/00'):
+    ''' Output of the commands a Raidcom issues while it is constructed '''
+    replay.add("ls /dev/sd* | inqraid -CLI","DEVICE_FILE PORT SERIAL LDEV CTG H/M/12 SSID R:Group PRODUCT_ID\nsdb CL1-A 353511 1023 - - 0004 - OPEN-V-CM\n")
+    replay.add(f"raidcom get port -s {SERIAL}","PORT TYPE ATTR SPD LPID FAB CONN SSW SL Serial# WWN PHY_PORT\nCL1-A FIBRE TAR AUT EF N FCAL N 0 353511 50060e8012345600 -\n")
+    replay.add("horcctl -D -u 0","Current control device = /dev/sdb\n")
+    replay.add(f"raidcom get resource -key opt -s {SERIAL}","RS_GROUP RGID V_Serial# V_ID V_IF Serial#\nmeta_resource 0 353511 R8 Y 353511\n")
+    replay.add(f"raidcom get resource -s {SERIAL}","RS_GROUP RGID stat Lock_status Serial# Lock_owner\nmeta_resource 0 Unlocked - 353511 -\n")
+    replay.add("raidqry -l",f"No Group Hostname HORCM_ver Uid Serial# Micro_ver Cache(MB)\n1 --- host 01-70-03/00 0 {SERIAL} {micro} 512000\n")
+    return replay
+
+@pytest.fixture
+def replay():
+    return addconstruction(Countingexecutor())
+
+@pytest.fixture
+def raidcomfactory(replay,tmp_path):
+    ''' raidcomfactory(**kwargs) -> Raidcom constructed offline against the replay fixtures '''
+    def factory(**kwargs):
+        return Raidcom(SERIAL,0,path='',executor=replay,cachedir=str(tmp_path),**kwargs)
+    return factory
+
+@pytest.fixture
+def raidcom(raidcomfactory):
+    return raidcomfactory()
@@ -0,0 +1,57 @@
+import time
+import asyncio
+from hiraid.asyncraidcom import AsyncRaidcom
+from conftest import SERIAL
+
+HOSTGRP = "PORT GID RGID GROUP_NAME Serial# HMD HMO_BITs\nCL1-A 0 0 1A-G00 353511 LINUX/IRIX -\nCL1-A 1 0 host1 353511 LINUX/IRIX -\n"
+LDEV = "LDEV : 1000\nVOL_TYPE : OPEN-V-CVS\nVOL_Capacity(BLK) : 2097152\nNUM_PORT : 1\nPORTs : CL1-A-1 0 host1\nRSGID : 0\n\n"
+
+async def maxstall(coroutine,tick: float=0.01) -> tuple:
+    ''' Await coroutine while measuring the longest gap between ticks of the event loop '''
+    gaps = []
+    async def ticker():
+        while True:
+            last = time.monotonic()
+            await asyncio.sleep(tick)
+            gaps.append(time.monotonic() - last - tick)
+    task = asyncio.ensure_future(ticker())
+    try:
+        result = await coroutine
+        # Let the ticker record the gap of a stall ending with the coroutine
+        await asyncio.sleep(tick * 2)
+    finally:
+        task.cancel()
+    return result, max(gaps,default=0)
+
+def test_getldev_lookups_do_not_stall_the_loop(raidcom,replay):
+    ''' The PORTs handler looks up host groups synchronously and _resource_groups loads on first read, neither on the loop '''
+    replay.add(f"raidcom get ldev -ldev_id 1000 -s {SERIAL}",LDEV)
+    replay.add(f"raidcom get host_grp -port CL1-A -key detail -s {SERIAL}",HOSTGRP)
+    replay.latency = 0.3
+    storage = AsyncRaidcom(raidcom)
+    ldev, stall = asyncio.run(maxstall(storage.getldev(ldev_id=1000)))
+    assert ldev.view['1000']['PORTs']['CL1-A-1']['hostGroupName'] == 'host1'
+    assert ldev.view['1000']['RS_GROUP'] == 'meta_resource'
+    assert stall < 0.2
+
+def test_getters_share_commands_and_view_cache_with_raidcom(raidcomfactory,replay):
+    raidcom = raidcomfactory(view_ttl={'_ports':600})
+    replay.add(f"raidcom get host_grp -port CL1-A -key detail -s {SERIAL}",HOSTGRP)
+    replay.add(f"raidcom get lun -port CL1-A-1 -s {SERIAL} -key opt","PORT GID HMD LUN NUM LDEV CM Serial# HMO_BITs\nCL1-A 1 LINUX/IRIX 0 1 1000 - 353511 -\n")
+    storage = AsyncRaidcom(raidcom)
+    luns = asyncio.run(storage.getlun(port='CL1-A-1'))
+    assert luns.cmd == raidcom.getlunrequest('CL1-A-1').cmd
+    assert raidcom.views['_ports']['CL1-A']['_GIDS']['1']['_LUNS']['0']['LDEV'] == '1000'
+    calls = len(replay.calls)
+    assert raidcom.getlun(port='CL1-A-1') is luns
+    assert len(replay.calls) == calls
+
+def test_addlun_registers_undo_and_invalidates(raidcomfactory,replay):
+    raidcom = raidcomfactory(view_ttl={'_ports':600})
+    replay.add(f"raidcom get lun -port CL1-A-1 -s {SERIAL} -key opt","PORT GID HMD LUN NUM LDEV CM Serial# HMO_BITs\n")
+    replay.add(f"raidcom add lun -port CL1-A-1 -ldev_id 1000 -s {SERIAL}","raidcom: LUN 0(0x0) will be used for adding.\n")
+    storage = AsyncRaidcom(raidcom)
+    asyncio.run(storage.getlun(port='CL1-A-1'))
+    cmdreturn = asyncio.run(storage.addlun(port='CL1-A-1',ldev_id=1000))
+    assert cmdreturn.undocmds == [f"raidcom delete lun -port CL1-A-1 -ldev_id 1000 -lun_id 0 -I0 -s {SERIAL}"]
+    assert raidcom.viewcache.age(('_ports','CL1-A','_GIDS','1','_LUNS')) is None
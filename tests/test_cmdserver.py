@@ -0,0 +1,43 @@
+import os
+import time
+import pytest
+from hiraid.cmdserver import Cmdserver, Cmdserverpool
+
+def running(pid: int) -> bool:
+    ''' True while pid exists and is not a zombie waiting to be reaped '''
+    try:
+        with open(f"/proc/{pid}/stat") as f:
+            return f.read().rsplit(')',1)[1].split()[0] != 'Z'
+    except FileNotFoundError:
+        return False
+
+def test_commands_keep_their_returncode_and_stderr():
+    server = Cmdserver()
+    try:
+        assert server.run("echo out; echo err >&2; exit 3") == ('out\n','err\n',3)
+        # A line the shell cannot parse fails on its own, the worker carries on
+        assert server.run("echo 'unbalanced")[2] != 0
+        assert server.run("echo again") == ('again\n','',0)
+    finally:
+        server.close()
+
+def test_timeout_kills_the_command_with_the_worker(tmp_path):
+    pidfile = tmp_path / 'pid'
+    server = Cmdserver(timeout=0.5)
+    with pytest.raises(Exception):
+        server.run(f"echo $$ > {pidfile}; exec sleep 30")
+    pid = int(pidfile.read_text())
+    deadline = time.monotonic() + 5
+    while running(pid) and time.monotonic() < deadline:
+        time.sleep(0.05)
+    assert not running(pid)
+    assert not server.alive()
+
+def test_pool_closes_busy_shells_and_reuses_idle_ones():
+    pool = Cmdserverpool(workers=1)
+    assert pool.run("echo one -I3")[0] == 'one -I3\n'
+    assert pool.run("echo two -I3")[0] == 'two -I3\n'
+    assert pool.started == { '3': 1 }
+    servers = list(pool.servers)
+    pool.close()
+    assert not any(server.alive() for server in servers)
@@ -0,0 +1,41 @@
+import logging
+from hiraid.cmdview import Cmdview
+from hiraid.datafilter import compilefilter
+from hiraid.raidcomparser import Raidcomparser
+from hiraid.records import fromdict
+
+ROWS = [
+    { 'PORT': 'CL1-A', 'TYPE': 'FIBRE', 'ATTR': 'TAR', 'HMO_BITs': ['2','54'] },
+    { 'PORT': 'CL2-A', 'TYPE': 'FIBRE', 'ATTR': 'MCU', 'HMO_BITs': [] },
+    { 'PORT': 'CL3-A', 'TYPE': 'ISCSI', 'ATTR': 'TAR' },
+]
+
+def matches(datafilter: dict) -> list:
+    predicate = compilefilter(datafilter)
+    ports = [row['PORT'] for row in ROWS if predicate(row)]
+    # compact Records filter the same as dict rows
+    assert ports == [row['PORT'] for row in map(fromdict,ROWS) if predicate(row)]
+    return ports
+
+def test_every_key_must_match():
+    assert matches({}) == ['CL1-A','CL2-A','CL3-A']
+    assert matches({ 'TYPE': 'FIBRE' }) == ['CL1-A','CL2-A']
+    assert matches({ 'TYPE': 'FIBRE', 'ATTR': 'TAR' }) == ['CL1-A']
+    assert matches({ 'PORT': ['CL1-A','CL3-A'], 'ATTR': ('TAR',) }) == ['CL1-A','CL3-A']
+    assert matches({ 'ATTR': 'TAR', 'Anykey_when_val_is_callable': lambda row: row['TYPE'] == 'ISCSI' }) == ['CL3-A']
+    # a callable no longer short circuits the keys after it
+    assert matches({ 'Anykey_when_val_is_callable': lambda row: True, 'TYPE': 'ISCSI' }) == ['CL3-A']
+
+def test_missing_keys_unhashable_values_and_other_types():
+    assert matches({ 'HMO_BITs': [[],['2','54']] }) == ['CL1-A','CL2-A']
+    assert matches({ 'HMO_BITs': [[]], 'TYPE': 'FIBRE' }) == ['CL2-A']
+    assert matches({ 'MISSING': 'x' }) == [] and matches({ 'MISSING': ['x'] }) == []
+    assert matches({ 'PORT': 1 }) == []
+
+def test_parsers_apply_the_compiled_filter():
+    cmdreturn = Cmdview(cmd='raidcom get port')
+    cmdreturn.stdout = ("PORT TYPE ATTR SPD LPID FAB CONN SSW SL Serial# WWN PHY_PORT\n"
+                        "CL1-A FIBRE TAR AUT EF N FCAL N 0 353511 50060e8012345600 -\n"
+                        "CL2-A FIBRE MCU AUT E8 N FCAL N 0 353511 50060e8012345610 -\n")
+    Raidcomparser(None,log=logging).getport(cmdreturn,datafilter={ 'ATTR': ['MCU'] })
+    assert [row['PORT'] for row in cmdreturn.data] == ['CL2-A'] and list(cmdreturn.view) == ['CL2-A']
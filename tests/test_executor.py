@@ -0,0 +1,35 @@
+import sys
+import asyncio
+import pytest
+from hiraid.executor import Executor, Replayexecutor, Recordexecutor, normalizecmd
+
+def test_an_executor_without_run_cannot_be_created():
+    class Incomplete(Executor):
+        pass
+    with pytest.raises(TypeError):
+        Incomplete()
+
+def test_recorded_output_replays_through_any_instance(tmp_path):
+    cmd = f"{sys.executable} -c \"import sys; print('port'); sys.stderr.write('warn'); sys.exit(2)\" -I0"
+    recorded = Recordexecutor(str(tmp_path)).run(cmd)
+    assert recorded == ('port\n','warn',2)
+    replay = Replayexecutor(str(tmp_path))
+    assert replay.run(cmd.replace('-I0','-I12')) == recorded
+    assert asyncio.run(replay.arun(cmd)) == recorded
+
+def test_commands_are_normalized_and_unrecorded_ones_raise():
+    assert normalizecmd("/HORCM/usr/bin/raidcom get port   -I10 -login user pass -s 1") == "raidcom get port -login -s 1"
+    replay = Replayexecutor()
+    replay.add("raidcom get port -I0 -s 1","PORT\n")
+    assert replay.run("/usr/bin/raidcom  get port -IH3 -s 1") == ("PORT\n",'',0)
+    with pytest.raises(Exception):
+        replay.run("raidcom get port -s 2")
+
+def test_stream_yields_lines_then_sets_returncode():
+    replay = Replayexecutor()
+    replay.add("raidcom get ldev -ldev_id 1 -s 1","LDEV : 1\nVOL_TYPE : OPEN-V\n",returncode=0)
+    class Cmdreturn:
+        pass
+    cmdreturn = Cmdreturn()
+    assert list(replay.stream("raidcom get ldev -ldev_id 1 -s 1",cmdreturn)) == ["LDEV : 1\n","VOL_TYPE : OPEN-V\n"]
+    assert cmdreturn.returncode == 0 and cmdreturn.stdout == ''
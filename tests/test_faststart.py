@@ -0,0 +1,36 @@
+from hiraid.raidcom import Raidcom
+from hiraid.identitycache import Identitycache
+from conftest import SERIAL, addconstruction
+
+def test_fast_start_constructs_from_the_identity_record(raidcomfactory,replay):
+    first = raidcomfactory(fast_start=True)
+    assert first.identitycache.load([0])['instances']['0']['cmd_device'] == '/dev/sdb'
+    replay.calls.clear()
+    storage = raidcomfactory(fast_start=True,revalidate=None)
+    assert replay.calls == []
+    assert storage.instances[0]['UNITID'] == first.instances[0]['UNITID'] and storage.micro_ver == first.micro_ver
+    # views fast start does not fetch are loaded on first read, once
+    assert not dict.__contains__(storage.views,'_inqraid') and not dict.__contains__(storage.views,'_raidqry')
+    assert storage.views['_inqraid']['sdb']['LDEV'] == '1023'
+    assert storage.views.get('_raidqry')[str(SERIAL)]['Micro_ver'] == '88-08-01-60/00'
+    storage.views['_raidqry']
+    assert replay.calls == ['raidqry -l -I0']
+
+def test_revalidate_reports_and_saves_a_stale_record(raidcomfactory,replay):
+    raidcomfactory(fast_start=True)
+    addconstruction(replay,micro='88-08-02-60/00')
+    storage = raidcomfactory(fast_start=True,revalidate=None)
+    assert storage.micro_ver == '88-08-01-60/00'
+    changes = storage.revalidate()
+    assert [change for change in changes if change.startswith('micro_ver')] == ['micro_ver 88-08-01-60/00 -> 88-08-02-60/00']
+    assert storage.micro_ver == '88-08-02-60/00' and storage.views['_identity']['micro_ver'] == '88-08-02-60/00'
+    assert storage.identitycache.load([0])['identity']['micro_ver'] == '88-08-02-60/00'
+    assert storage.revalidate() == []
+
+def test_a_record_for_other_instances_is_not_used(raidcomfactory,replay,tmp_path):
+    raidcomfactory(fast_start=True)
+    assert Identitycache(str(tmp_path),SERIAL).load([0,1]) is None
+    replay.calls.clear()
+    storage = Raidcom(SERIAL,[0,1],path='',executor=replay,cachedir=str(tmp_path),fast_start=True,revalidate=None)
+    assert sorted(cmd for cmd in replay.calls if 'get port' in cmd) == [f"raidcom get port -I0 -s {SERIAL}",f"raidcom get port -I1 -s {SERIAL}"]
+    assert sorted(storage.identitycache.load([0,1])['instances']) == ['0','1']
@@ -0,0 +1,28 @@
+from conftest import SERIAL
+
+def ldevoutput(*ldev_ids) -> str:
+    return ''.join(f"LDEV : {ldev_id}\nSL : 0\nCL : 0\nVOL_TYPE : OPEN-V-CVS\nVOL_Capacity(BLK) : 2097152\nB_POOLID : 0\nSTS : NML\nLDEV_NAMING : vol{ldev_id}\n\n" for ldev_id in ldev_ids)
+
+def getldevcalls(replay) -> list:
+    return sorted(cmd.split('-ldev_id ')[1].split()[0] for cmd in replay.calls if 'get ldev -ldev_id' in cmd)
+
+def test_ldevranges_coalesce_and_bridge_gaps(raidcom):
+    assert raidcom.ldevranges([1,2,3,7,8,20]) == [(1,3),(7,8),(20,20)]
+    assert raidcom.ldevranges([1,2,3,7,8,20],max_gap=3) == [(1,8),(20,20)]
+    assert raidcom.ldevranges(['00:00:05',4,'6'],range_size=2) == [(4,5),(6,6)]
+
+def test_concurrent_getldevs_fetches_ranges_and_drops_unrequested_ldevs(raidcom,replay):
+    replay.add(f"raidcom get ldev -ldev_id 1000-1004 -s {SERIAL}",ldevoutput(1000,1001,1002,1003,1004))
+    replay.add(f"raidcom get ldev -ldev_id 2000 -s {SERIAL}",ldevoutput(2000))
+    ldevs = raidcom.concurrent_getldevs([1004,1000,1001,1003,2000],max_gap=1)
+    assert getldevcalls(replay) == ['1000-1004','2000']
+    assert list(ldevs.view) == ['1000','1001','1003','1004','2000']
+    assert sorted(ldev['LDEV'] for ldev in ldevs.data) == ['1000','1001','1003','1004','2000']
+    assert raidcom.views['_ldevs']['1003']['LDEV_NAMING'] == 'vol1003' and '1002' not in raidcom.views['_ldevs']
+
+def test_concurrent_getldevs_splits_ranges_at_range_size(raidcom,replay):
+    replay.add(f"raidcom get ldev -ldev_id 1000-1001 -s {SERIAL}",ldevoutput(1000,1001))
+    replay.add(f"raidcom get ldev -ldev_id 1002 -s {SERIAL}",ldevoutput(1002))
+    ldevs = raidcom.concurrent_getldevs([1000,1001,1002],range_size=2)
+    assert getldevcalls(replay) == ['1000-1001','1002']
+    assert list(ldevs.view) == ['1000','1001','1002']
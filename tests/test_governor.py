@@ -0,0 +1,78 @@
+import time
+import asyncio
+import threading
+import pytest
+from hiraid.governor import Governor
+
+WRITE = "raidcom add ldev -ldev_id 1000 -pool 0 -capacity 1g"
+
+def test_aslot_enforces_the_class_limit_shared_with_threads():
+    governor = Governor('53511',limits={ 'write': 2 })
+    inflight, peak = [0], [0]
+    lock = threading.Lock()
+    def enter():
+        with lock:
+            inflight[0] += 1
+            peak[0] = max(peak[0],inflight[0])
+    def leave():
+        with lock:
+            inflight[0] -= 1
+    def thread():
+        with governor.slot(WRITE):
+            enter()
+            time.sleep(0.05)
+            leave()
+    async def coroutine():
+        async with governor.aslot(WRITE):
+            enter()
+            await asyncio.sleep(0.01)
+            leave()
+    async def main():
+        threads = [threading.Thread(target=thread) for _ in range(2)]
+        for t in threads:
+            t.start()
+        await asyncio.gather(*[coroutine() for _ in range(8)])
+        for t in threads:
+            t.join()
+    asyncio.run(main())
+    metrics = governor.metrics()['write']
+    assert peak[0] == 2
+    assert metrics['acquired'] == 10 and metrics['inflight'] == 0 and metrics['waiting'] == 0
+
+def test_nested_aslot_does_not_take_a_second_slot():
+    governor = Governor('53511',limits={ 'get': 1, 'write': 1 })
+    async def main():
+        async with governor.aslot(WRITE) as outer:
+            async with governor.aslot("raidcom get ldev -ldev_id 1000") as inner:
+                return outer, inner
+    assert asyncio.run(asyncio.wait_for(main(),timeout=5)) == ('write',None)
+    assert governor.metrics()['write']['acquired'] == 1 and governor.metrics()['get']['acquired'] == 0
+
+def test_aslot_times_out_and_a_cancelled_waiter_gives_its_slot_back():
+    governor = Governor('53511',limits={ 'write': 1 },timeout=0.05)
+    held, release = threading.Event(), threading.Event()
+    def holder():
+        with governor.slot(WRITE):
+            held.set()
+            release.wait()
+    thread = threading.Thread(target=holder)
+    thread.start()
+    held.wait()
+    async def timesout():
+        async with governor.aslot(WRITE):
+            pass
+    with pytest.raises(Exception,match='Timed out'):
+        asyncio.run(timesout())
+    governor.timeout = None
+    async def cancelled():
+        task = asyncio.ensure_future(timesout())
+        await asyncio.sleep(0.05)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+    asyncio.run(cancelled())
+    release.set()
+    thread.join()
+    time.sleep(0.1)
+    assert governor.metrics()['write']['timeouts'] == 1 and governor.metrics()['write']['waiting'] == 0
+    assert governor.semaphores['write'].acquire(blocking=False)
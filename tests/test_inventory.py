@@ -0,0 +1,94 @@
+from collections.abc import Mapping
+from hiraid.inventory import Inventory
+from conftest import SERIAL
+
+HOSTGRP = "PORT GID RGID GROUP_NAME Serial# HMD HMO_BITs\nCL1-A 0 0 1A-G00 353511 LINUX/IRIX -\nCL1-A 1 0 host1 353511 LINUX/IRIX -\n"
+SUMMARY = "Serial# LDEV# SL CL VOL_TYPE VOL_Cap(BLK) PID ATTRIBUTE Ports PORT_No:LU#:GRPNAME\n353511 1000 0 0 OPEN-V-CVS {capacity} 0 CVS {ports} {presented}\n"
+LDEV = "LDEV : 1000\nVOL_TYPE : OPEN-V-CVS\nVOL_Capacity(BLK) : {capacity}\nNUM_PORT : {ports}\n{presented}RSGID : 0\n\n"
+
+def test_refresh_requeries_changed_compact_records(raidcomfactory,replay):
+    ''' Compact ldev Records are Mappings, the host groups a changed ldev was presented to are re-queried '''
+    raidcom = raidcomfactory(compact=True)
+    replay.add(f"raidcom get host_grp -port CL1-A -key detail -s {SERIAL}",HOSTGRP)
+    replay.add(f"raidcom get ldev -ldev_list defined -key front_end -s {SERIAL}",SUMMARY.format(capacity=2097152,ports=1,presented='CL1-A-1:0:host1'))
+    replay.add(f"raidcom get ldev -ldev_id 1000 -s {SERIAL}",LDEV.format(capacity=2097152,ports=1,presented='PORTs : CL1-A-1 0 host1\n'))
+    raidcom.getldev(ldev_id=1000)
+    assert isinstance(raidcom.views['_ldevs']['1000'],Mapping) and not isinstance(raidcom.views['_ldevs']['1000'],dict)
+    inventory = Inventory(raidcom)
+    assert inventory.refresh()['ldevs'] == { 'added': [], 'removed': [], 'changed': [] }
+
+    # Expanded and unmapped, CL1-A-1 is only found through the previous PORTs of the compact record
+    replay.add(f"raidcom get ldev -ldev_list defined -key front_end -s {SERIAL}",SUMMARY.format(capacity=4194304,ports=0,presented='-'))
+    replay.add(f"raidcom get ldev -ldev_id 1000 -s {SERIAL}",LDEV.format(capacity=4194304,ports=0,presented=''))
+    replay.add(f"raidcom get lun -port CL1-A-1 -s {SERIAL} -key opt","PORT GID HMD LUN NUM LDEV CM Serial# HMO_BITs\n")
+    replay.add(f"raidcom get hba_wwn -port CL1-A-1 -s {SERIAL}","PORT GID GROUP_NAME HWWN Serial# NICK_NAME\n")
+    changes = inventory.refresh()
+    assert changes['ldevs']['changed'] == ['1000']
+    assert changes['requeried'] == { 'portgids': ['CL1-A-1'], 'ldevs': ['1000'] }
+    assert raidcom.views['_ldevs']['1000']['VOL_Capacity(BLK)'] == '4194304'
+
+LUNS = "PORT GID HMD LUN NUM LDEV CM Serial# HMO_BITs\n"
+
+def addarray(replay):
+    ''' One port, an empty host group and host1 presenting ldevs 1000, 1001 and 1005 '''
+    replay.add(f"raidcom get host_grp -port CL1-A -key detail -s {SERIAL}",HOSTGRP)
+    replay.add(f"raidcom get port -port CL1-A -s {SERIAL}","PORT LOGIN_WWN Serial# -\nCL1-A 100000109b123456 353511 -\n")
+    replay.add(f"raidcom get lun -port CL1-A-0 -s {SERIAL} -key opt",LUNS)
+    replay.add(f"raidcom get lun -port CL1-A-1 -s {SERIAL} -key opt",LUNS + "".join(f"CL1-A 1 LINUX/IRIX {lun} 1 {ldev_id} - 353511 -\n" for lun, ldev_id in enumerate((1000,1001,1005))))
+    replay.add(f"raidcom get hba_wwn -port CL1-A-0 -s {SERIAL}","PORT GID GROUP_NAME HWWN Serial# NICK_NAME\n")
+    replay.add(f"raidcom get hba_wwn -port CL1-A-1 -s {SERIAL}","PORT GID GROUP_NAME HWWN Serial# NICK_NAME\nCL1-A 1 host1 100000109b123456   53511 -\n")
+    replay.add(f"raidcom get ldev -ldev_id 1000-1001 -s {SERIAL}","".join(LDEV.format(capacity=2097152,ports=1,presented='').replace('1000',str(ldev_id)) for ldev_id in (1000,1001)))
+    replay.add(f"raidcom get ldev -ldev_id 1005 -s {SERIAL}",LDEV.format(capacity=2097152,ports=1,presented='').replace('1000','1005'))
+
+def test_run_streams_ports_to_ldevs(raidcom,replay):
+    addarray(replay)
+    report = Inventory(raidcom).run()
+    stages = report['stages']
+    assert list(stages) == Inventory.stages and report['errors'] == []
+    assert { stage: (stats['tasks'],stats['completed'],stats['records']) for stage, stats in stages.items() } == {
+        'ports': (1,1,1), 'hostgrps': (1,1,2), 'portlogins': (1,1,1), 'hbawwns': (2,2,1), 'luns': (2,2,3), 'ldevs': (2,2,3) }
+    assert sorted(cmd.split('-ldev_id ')[1].split()[0] for cmd in replay.calls if 'get ldev -ldev_id' in cmd) == ['1000-1001','1005']
+    port = raidcom.views['_ports']['CL1-A']
+    assert list(port['_GIDS']['1']['_LUNS']) == ['0','1','2'] and list(port['_GIDS']['1']['_WWNS']) == ['100000109b123456']
+    assert sorted(raidcom.views['_ldevs']) == ['1000','1001','1005']
+    assert raidcom.stats['portcounters']['lunsTotal'] == 3 and raidcom.stats['ldevcounters']['_ldevs']['ldevcount'] == 3
+
+def test_run_only_the_stages_asked_for_and_report_failures(raidcom,replay):
+    addarray(replay)
+    replay.add(f"raidcom get lun -port CL1-A-0 -s {SERIAL} -key opt",stderr="raidcom: [EX_ENOOBJ] No such Object in the RAID\n",returncode=227)
+    inventory = Inventory(raidcom,stages=['luns'])
+    assert inventory.run_stages == ['ports','hostgrps','luns']
+    report = inventory.run(raise_err=False)
+    assert [(stage,item) for stage, item, error in report['errors']] == [('luns','CL1-A-0')]
+    assert report['stages']['luns']['failed'] == 1 and report['stages']['luns']['completed'] == 1
+    assert not [cmd for cmd in replay.calls if 'get ldev' in cmd or 'hba_wwn' in cmd]
+
+def summaryrow(ldev_id: int,presented: str) -> str:
+    return f"353511 {ldev_id} 0 0 OPEN-V-CVS 2097152 0 CVS 1 {presented}\n"
+
+def test_refresh_requeries_only_what_changed(raidcom,replay):
+    addarray(replay)
+    replay.add(f"raidcom get ldev -ldev_id 1005 -s {SERIAL}",LDEV.format(capacity=2097152,ports=1,presented='PORTs : CL1-A-1 2 host1\n').replace('1000','1005'))
+    Inventory(raidcom).run()
+    replay.add(f"raidcom get ldev -ldev_list defined -key front_end -s {SERIAL}",SUMMARY.split('\n')[0] + '\n' + ''.join(summaryrow(ldev_id,f'CL1-A-1:{lun}:host1') for lun, ldev_id in enumerate((1000,1001,1005))))
+    inventory = Inventory(raidcom)
+    first = inventory.refresh()
+    assert first['ldevs'] == first['hostgrps'] == first['ports'] == { 'added': [], 'removed': [], 'changed': [] }
+    assert first['requeried'] == { 'portgids': [], 'ldevs': [] }
+
+    # host group 0 removed, host2 added presenting the new ldev 1006, 1005 deleted
+    replay.calls.clear()
+    replay.add(f"raidcom get host_grp -port CL1-A -key detail -s {SERIAL}",HOSTGRP.replace("CL1-A 0 0 1A-G00 353511 LINUX/IRIX -\n","") + "CL1-A 2 0 host2 353511 LINUX/IRIX -\n")
+    replay.add(f"raidcom get ldev -ldev_list defined -key front_end -s {SERIAL}",SUMMARY.split('\n')[0] + '\n' + summaryrow(1000,'CL1-A-1:0:host1') + summaryrow(1001,'CL1-A-1:1:host1') + summaryrow(1006,'CL1-A-2:0:host2'))
+    replay.add(f"raidcom get ldev -ldev_id 1006 -s {SERIAL}",LDEV.format(capacity=2097152,ports=1,presented='PORTs : CL1-A-2 0 host2\n').replace('1000','1006'))
+    replay.add(f"raidcom get lun -port CL1-A-1 -s {SERIAL} -key opt",LUNS + "".join(f"CL1-A 1 LINUX/IRIX {lun} 1 {ldev_id} - 353511 -\n" for lun, ldev_id in enumerate((1000,1001))))
+    replay.add(f"raidcom get lun -port CL1-A-2 -s {SERIAL} -key opt",LUNS + "CL1-A 2 LINUX/IRIX 0 1 1006 - 353511 -\n")
+    replay.add(f"raidcom get hba_wwn -port CL1-A-2 -s {SERIAL}","PORT GID GROUP_NAME HWWN Serial# NICK_NAME\n")
+    changes = inventory.refresh()
+    assert changes['hostgrps'] == { 'added': ['CL1-A-2'], 'removed': ['CL1-A-0'], 'changed': [] }
+    assert changes['ldevs'] == { 'added': ['1006'], 'removed': ['1005'], 'changed': [] }
+    assert changes['requeried'] == { 'portgids': ['CL1-A-1','CL1-A-2'], 'ldevs': ['1006'] }
+    assert not [cmd for cmd in replay.calls if 'get ldev -ldev_id 100' in cmd and '1006' not in cmd]
+    port = raidcom.views['_ports']['CL1-A']
+    assert sorted(port['_GIDS']) == ['1','2'] and sorted(raidcom.views['_ldevs']) == ['1000','1001','1006']
+    assert list(port['_GIDS']['1']['_LUNS']) == ['0','1'] and port['_GIDS']['2']['_LUNS']['0']['LDEV'] == '1006'
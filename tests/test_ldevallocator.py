@@ -0,0 +1,58 @@
+from hiraid.ldevallocator import Ldevallocator
+from conftest import SERIAL
+
+DEFINED = "".join(f"LDEV : {ldev_id}\nVOL_TYPE : OPEN-V-CVS\n\n" for ldev_id in (1000,1001,1003,1064))
+
+def allocator(raidcom,replay):
+    replay.add(f"raidcom get ldev -ldev_list defined -s {SERIAL}",DEFINED)
+    return raidcom.ldev_allocator
+
+def test_allocate_lowest_free_and_contiguous(raidcom,replay):
+    ldevs = allocator(raidcom,replay)
+    assert ldevs.allocate(3,start=1000,end=1100) == ['1002','1004','1005']
+    # 1006-1063 is the first free run long enough, it crosses a word boundary
+    assert ldevs.allocate(40,start=1000,end=1100,contiguous=True) == [str(ldev_id) for ldev_id in range(1006,1046)]
+    assert ldevs.free(1000,1100) == 101 - 4 - 43
+
+def test_allocate_raises_without_reserving(raidcom,replay):
+    ldevs = allocator(raidcom,replay)
+    for kwargs in ({},{ 'contiguous': True }):
+        try:
+            ldevs.allocate(3,start=1000,end=1003,**kwargs)
+        except Exception:
+            pass
+        else:
+            raise AssertionError(f"allocate {kwargs} should have raised")
+    assert ldevs.free(1000,1003) == 1 and not ldevs.reserved
+
+def test_reserve_match_and_offset(raidcom,replay):
+    ldevs = allocator(raidcom,replay)
+    assert ldevs.reserve(['03:E8','03:E9','03:EA']) == (['1002'],['1000','1001'])
+    assert ldevs.match([1000,2000],start=1004,end=1100) == { '1000': '1004', '2000': '2000' }
+    assert ldevs.offset([1000,1001],4096) == { '1000': '5096', '1001': '5097' }
+    try:
+        ldevs.offset([1000],64)
+    except Exception:
+        pass
+    else:
+        raise AssertionError("offset onto defined ldev 1064 should have raised")
+    assert ldevs.isfree(1065)
+
+def test_commit_release_and_view_updates(raidcom,replay):
+    ldevs = allocator(raidcom,replay)
+    created, failed = ldevs.allocate(2,start=1002,end=1010)
+    ldevs.commit([created])
+    ldevs.release([failed])
+    assert not ldevs.isfree(created) and ldevs.isfree(failed) and not ldevs.reserved
+    # Ldevs seen deleted are freed, unless reserved
+    raidcom.updateview(raidcom.views,{ '_ldevs': { '1000': { 'VOL_TYPE': 'NOT DEFINED' }, created: { 'VOL_TYPE': 'NOT DEFINED' } } })
+    assert ldevs.isfree(1000) and ldevs.isfree(created)
+    reserved = ldevs.reserve([1000])[0]
+    raidcom.updateview(raidcom.views,{ '_ldevs': { '1000': { 'VOL_TYPE': 'NOT DEFINED' } } })
+    assert reserved == ['1000'] and not ldevs.isfree(1000)
+
+def test_bits_beyond_maxldevid_are_never_free():
+    ldevs = Ldevallocator(69)
+    assert ldevs.free() == 70
+    assert ldevs.allocate(2,start=68) == ['68','69']
+    assert ldevs.free(60,69) == 8
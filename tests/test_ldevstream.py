@@ -0,0 +1,31 @@
+import pytest
+from conftest import SERIAL
+
+LDEVS = ("LDEV : 1000\nSL : 0\nCL : 0\nVOL_TYPE : OPEN-V-CVS\nVOL_ATTR : CVS : HDP\nVOL_Capacity(BLK) : 2097152\nUsed_Block(BLK) : 1024\nB_POOLID : 0\nSTS : NML\n\n"
+         "LDEV : 1001\nSL : 0\nCL : 0\nVOL_TYPE : NOT DEFINED\n\n"
+         "LDEV : 1002\nSL : 0\nCL : 0\nVOL_TYPE : OPEN-V-CVS\nVOL_ATTR : CVS : HDP\nVOL_Capacity(BLK) : 4194304\nUsed_Block(BLK) : 0\nB_POOLID : 1\nSTS : BLK")
+
+def test_streamed_getldev_parses_as_the_whole_stdout_does(raidcomfactory,replay):
+    replay.add(f"raidcom get ldev -ldev_id 1000-1002 -s {SERIAL}",LDEVS)
+    collected = raidcomfactory().getldev(ldev_id='1000-1002')
+    streamed = raidcomfactory().getldev(ldev_id='1000-1002',stream=True)
+    assert streamed.data == collected.data and streamed.view == collected.view
+    assert list(streamed.view) == ['1000','1001','1002'] and streamed.stdout == ''
+    ldev = streamed.view['1000']
+    assert ldev['VOL_ATTR'] == ['CVS','HDP'] and ldev['VOL_Capacity(GB)'] == '1.0' and ldev['Used_Block(BLK)'] == '1024'
+    assert streamed.view['1002']['STS'] == 'BLK'
+
+def test_streamldevs_yields_filtered_ldevs_without_touching_views(raidcom,replay):
+    replay.add(f"raidcom get ldev -ldev_id 1000-1002 -s {SERIAL}",LDEVS)
+    ldevs = raidcom.streamldevs('1000-1002',datafilter={ 'VOL_TYPE': 'OPEN-V-CVS' })
+    assert next(ldevs)['LDEV'] == '1000'
+    assert [ldev['LDEV'] for ldev in ldevs] == ['1002']
+    assert '_ldevs' not in raidcom.views or '1000' not in raidcom.views['_ldevs']
+
+def test_streamldevs_checks_the_returncode_after_the_last_ldev(raidcom,replay):
+    replay.add(f"raidcom get ldev -ldev_id 1000-1002 -s {SERIAL}",LDEVS,"raidcom: [EX_CMDRJE] An order to the control/command device was rejected\n",221)
+    ldevs = raidcom.streamldevs('1000-1002')
+    # 1002 has no terminating blank line, it would only be complete once the failed command's output is exhausted
+    assert [ldev['LDEV'] for ldev in (next(ldevs),next(ldevs))] == ['1000','1001']
+    with pytest.raises(Exception,match='EX_CMDRJE'):
+        next(ldevs)
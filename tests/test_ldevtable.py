@@ -0,0 +1,59 @@
+import random
+import pytest
+from hiraid import ldevtable
+from hiraid.ldevtable import Ldevtable
+from hiraid.viewstore import Viewstore
+
+def ldevs(count: int=500) -> dict:
+    rng = random.Random(53511)
+    view = {}
+    for ldev_id in range(count):
+        capacity = rng.choice([2097152,4194304,'-'])
+        view[str(ldev_id)] = { 'LDEV': str(ldev_id), 'B_POOLID': rng.choice(['0','1','2','NONE']), 'VOL_Capacity(BLK)': str(capacity),
+                               'Used_Block(BLK)': str(rng.randrange(0,2097152)), 'RSGID': str(rng.randrange(3)), 'STS': rng.choice(['NML','BLK']),
+                               'VOL_TYPE': rng.choice(['OPEN-V-CVS','OPEN-V']) }
+    return view
+
+def blocks(value) -> int:
+    return max(int(value),0) if str(value).lstrip('-').isdigit() else 0
+
+def dicttotals(view: dict,field: str,where=lambda ldev: True) -> dict:
+    totals = {}
+    for ldev in view.values():
+        if where(ldev):
+            key = None if ldev[field] == 'NONE' else ldev[field]
+            bucket = totals.setdefault(key,[0,0,0])
+            bucket[0] += 1
+            bucket[1] += blocks(ldev['VOL_Capacity(BLK)'])
+            bucket[2] += blocks(ldev['Used_Block(BLK)'])
+    return totals
+
+def tabletotals(aggregate: dict) -> dict:
+    return { key: [summary['ldevcount'],summary['VOL_Capacity(BLK)'],summary['Used_Block(BLK)']] for key, summary in aggregate.items() }
+
+@pytest.fixture(params=['rows','numpy'])
+def vectorize(request,monkeypatch):
+    if request.param == 'numpy':
+        pytest.importorskip('numpy')
+        monkeypatch.setattr(Ldevtable,'numpy_rows',0)
+    else:
+        monkeypatch.setattr(ldevtable,'numpy',None)
+    return request.param
+
+def test_aggregate_and_total_match_a_dict_based_calculation(vectorize):
+    views = Viewstore({ '_ldevs': ldevs() })
+    table = Ldevtable(views)
+    # kept in step with the view
+    views.merge({ '_ldevs': { '500': { 'LDEV': '500', 'B_POOLID': '1', 'VOL_Capacity(BLK)': '1024', 'Used_Block(BLK)': '512', 'RSGID': '0', 'STS': 'NML', 'VOL_TYPE': 'OPEN-V-CVS' } } })
+    views.deletepath(('_ldevs','7'))
+    view = views['_ldevs']
+    assert tabletotals(table.aggregate('pool')) == dicttotals(view,'B_POOLID')
+    assert list(table.aggregate('pool')) == list(dicttotals(view,'B_POOLID'))
+    assert tabletotals(table.aggregate('rsgid',where={ 'status': 'NML', 'type': lambda label: label.endswith('CVS') })) == \
+        dicttotals(view,'RSGID',lambda ldev: ldev['STS'] == 'NML' and ldev['VOL_TYPE'] == 'OPEN-V-CVS')
+    expected = dicttotals(view,'STS',lambda ldev: ldev['B_POOLID'] in ('0','1') and int(ldev['Used_Block(BLK)']) > 1000000)
+    assert tabletotals(table.aggregate('status',where={ 'pool': [0,1], 'used': lambda value: value > 1000000 })) == expected
+    total = table.total(where={ 'pool': [0,1], 'used': lambda value: value > 1000000 })
+    assert [total['ldevcount'],total['VOL_Capacity(BLK)'],total['Used_Block(BLK)']] == [sum(column) for column in zip(*expected.values())]
+    assert sorted(table.select(pool=2,status='BLK'),key=int) == [ldev_id for ldev_id, ldev in view.items() if ldev['B_POOLID'] == '2' and ldev['STS'] == 'BLK']
+    assert table.aggregate('pool',where={ 'status': 'missing' }) == {}
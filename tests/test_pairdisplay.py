@@ -0,0 +1,70 @@
+import pytest
+from hiraid.horcm.horcm_cci import Cci
+from hiraid.horcm.pairdisplay_parser import Pairdisplayparser
+
+CLI = "Group PairVol L/R Port# TID LU Seq# LDEV# P/S Status Fence % P-LDEV# M CTG JID AP EM E-Seq# E-LDEV# R/W\n"
+DEFAULT = "Group   PairVol(L/R) (Port#,TID, LU),Seq#,LDEV#.P/S,Status,Fence,   %, P-LDEV# M CTG JID AP EM       E-Seq# E-LDEV# R/W\n"
+
+def clirows(pairvol,ldev,pldev,percent,status='COPY'):
+    return (f"oradb {pairvol} L CL1-A-0 0 0 64034 {ldev} P-VOL {status} NEVER {percent} {pldev} - - - 1 - - - -/-\n"
+            f"oradb {pairvol} R CL2-A-0 0 0 64035 {pldev} S-VOL {status} NEVER {percent} {ldev} - - - 1 - - - -/-\n")
+
+def defaultrows(pairvol,ldev,pldev,percent,status='COPY'):
+    return (f"oradb   {pairvol}(L)    (CL1-A-0, 0,   0)64034   {ldev}.P-VOL {status} NEVER ,   {percent}   {pldev} -   -   -  1 -            -       -  -/-\n"
+            f"oradb   {pairvol}(R)    (CL2-A-0, 0,   0)64035   {pldev}.S-VOL {status} NEVER ,   {percent}   {ldev} -   -   -  1 -            -       -  -/-\n")
+
+@pytest.fixture
+def cci(replay,tmp_path):
+    return Cci(horcm_dir=str(tmp_path),path='',executor=replay)
+
+def test_default_and_cli_layouts_parse_to_the_same_rows():
+    cli = Pairdisplayparser().parse(CLI + clirows('oradb1',400,500,45))
+    default = Pairdisplayparser().parse(DEFAULT + defaultrows('oradb1',400,500,45))
+    assert default.headings == cli.headings
+    assert [dict(row) for row in default.rows] == [dict(row) for row in cli.rows]
+    row = cli.index[(64034,400)]
+    assert (row['PairVol'],row['L/R'],row['Port#'],row['P/S'],row['Status'],row['%'],row['P-LDEV#']) == ('oradb1','L','CL1-A-0','P-VOL','COPY','45','500')
+    assert cli.view()['pairs']['oradb']['oradb1']['R'] is cli.index[(64035,500)]
+
+def test_hex_ldevs_are_indexed_decimal():
+    pairdisplay = Pairdisplayparser(hexldev=True).parse(DEFAULT + defaultrows('oradb1','190','1F4',45))
+    assert pairdisplay.index[(64034,400)]['LDEV#'] == '190'
+    assert (64035,500) in pairdisplay.index
+
+def test_repeated_seq_heading_is_named_partner_seq():
+    parser = Pairdisplayparser()
+    headings, split = parser.headings("Group PairVol(L/R) (Port#,TID,LU),Seq#,LDEV#.P/S,Status,Seq#,P-LDEV# M")
+    assert headings == ('Group','PairVol','L/R','Port#','TID','LU','Seq#','LDEV#','P/S','Status','P-Seq#','P-LDEV#','M')
+    with pytest.raises(Exception):
+        parser.headings("PORT GID GROUP_NAME")
+
+def test_pairdisplayx_diffs_each_pairdisplay_against_the_last(cci,replay):
+    replay.addsequence("pairdisplay -g oradb -I1 -fce -CLI",
+                       CLI + clirows('oradb1',400,500,45),
+                       CLI + clirows('oradb1',400,500,80) + clirows('oradb2',401,501,0),
+                       CLI + clirows('oradb2',401,501,0))
+    first = cci.pairdisplayx(1,'oradb',print_pairdisplay=False)['pairdisplaydata']
+    assert set(first['changes']['added']) == {(64034,400),(64035,500)} and not first['changes']['changed']
+
+    second = cci.pairdisplayx(1,'oradb',print_pairdisplay=False)['pairdisplaydata']
+    changed = second['changes']['changed']
+    assert set(changed) == {(64034,400),(64035,500)}
+    old, new = changed[(64034,400)]
+    assert (old['%'],new['%']) == ('45','80')
+    assert set(second['changes']['added']) == {(64034,401),(64035,501)} and not second['changes']['removed']
+
+    third = cci.pairdisplayx(1,'oradb',print_pairdisplay=False)['pairdisplaydata']
+    assert set(third['changes']['removed']) == {(64034,400),(64035,500)} and not third['changes']['changed']
+    # Unchanged lines reuse the row parsed the time before
+    assert third['index'][(64034,401)] is second['index'][(64034,401)]
+
+def test_parsers_are_kept_per_instance_and_group(cci,replay):
+    replay.add("pairdisplay -g oradb -I1 -fce -CLI",CLI + clirows('oradb1',400,500,45))
+    replay.add("pairdisplay -g oradb -IH1 -fce -CLI",CLI + clirows('oradb1',400,500,45))
+    cci.pairdisplayx(1,'oradb',print_pairdisplay=False)
+    other = cci.pairdisplayx(1,'oradb',mode='H',print_pairdisplay=False)['pairdisplaydata']
+    assert set(other['changes']['added']) == {(64034,400),(64035,500)}
+
+def test_mismatched_row_raises():
+    with pytest.raises(Exception):
+        Pairdisplayparser().parse(CLI + "oradb oradb1 L CL1-A-0 0 0 64034 400 P-VOL COPY\n")
@@ -0,0 +1,114 @@
+import sys
+import subprocess
+import pytest
+from hiraid.horcm.horcm_cci import Cci
+from hiraid.horcm.pairmonitor import Pairmonitor, Copyprogress
+
+CLI = "Group PairVol L/R Port# TID LU Seq# LDEV# P/S Status Fence % P-LDEV# M CTG JID AP EM E-Seq# E-LDEV# R/W\n"
+
+def pairrows(percent,status='COPY'):
+    return (f"oradb oradb1 L CL1-A-0 0 0 64034 400 P-VOL {status} NEVER {percent} 500 - - - 1 - - - -/-\n"
+            f"oradb oradb1 R CL2-A-0 0 0 64035 500 S-VOL {status} NEVER {percent} 400 - - - 1 - - - -/-\n")
+
+@pytest.fixture
+def cci(replay,tmp_path):
+    return Cci(horcm_dir=str(tmp_path),path='',executor=replay)
+
+def python(code: str) -> subprocess.Popen:
+    return subprocess.Popen([sys.executable,'-c',code],stdout=subprocess.PIPE,stderr=subprocess.STDOUT)
+
+def test_pairmonitor_completes_once_pairdisplay_reaches_complete(cci,replay):
+    replay.addsequence("pairdisplay -g oradb -I1 -fce -CLI",CLI + pairrows(45),CLI + pairrows(80),CLI + pairrows(100,'PAIR'))
+    assert cci.pairmonitor(1,['oradb'],interval_seconds=0,timeout_seconds=10,acceptable_states=['PAIR'])
+    assert len([cmd for cmd in replay.calls if cmd.startswith('pairdisplay')]) == 3
+
+def test_pairmonitor_times_out_a_copy_that_never_completes(cci,replay):
+    replay.add("pairdisplay -g oradb -I1 -fce -CLI",CLI + pairrows(45))
+    assert not cci.pairmonitor(1,['oradb'],interval_seconds=0.05,timeout_seconds=0.3)
+
+def test_progress_groups_complete_and_time_out_independently():
+    answers = { 'done': iter([(50,False),(100,True)]), 'stuck': iter([]) }
+    completions = []
+    monitor = Pairmonitor(min_interval=0,max_interval=0.05)
+    monitor.watch('done',progress=lambda group: next(answers[group]),oncomplete=lambda group, result: completions.append(group))
+    monitor.watch('stuck',progress=lambda group: (10,False),timeout=0.2,oncomplete=lambda group, result: completions.append(group))
+    results = monitor.run(timeout=10)
+    monitor.close()
+    assert completions == ['done','stuck']
+    assert results['done']['completed'] and not results['done']['timedout'] and results['done']['percent'] == 100
+    assert not results['stuck']['completed'] and results['stuck']['timedout'] and results['stuck']['percent'] == 10
+
+def test_failing_progress_check_is_retried():
+    answers = iter([Exception('pairdisplay failed'),(100,True)])
+    def progress(group):
+        answer = next(answers)
+        if isinstance(answer,Exception):
+            raise answer
+        return answer
+    monitor = Pairmonitor(min_interval=0,max_interval=0.05)
+    monitor.watch('grp1',progress=progress)
+    assert monitor.run(timeout=10)['grp1']['completed']
+
+def test_pairevtwait_processes_complete_on_exit_and_are_killed_on_timeout():
+    monitor = Pairmonitor(min_interval=0,max_interval=0.05)
+    monitor.watch('ok',proc=python("print('pairevtwait : Wait status done.')"))
+    monitor.watch('failed',proc=python("import sys; sys.exit(232)"))
+    monitor.watch('hung',proc=python("import time; time.sleep(30)"),timeout=0.3)
+    results = monitor.run(timeout=10)
+    monitor.close()
+    assert results['ok']['completed'] and results['ok']['returncode'] == 0 and 'Wait status done' in results['ok']['output']
+    assert not results['failed']['completed'] and results['failed']['returncode'] == 232
+    assert results['hung']['timedout'] and not results['hung']['completed'] and results['hung']['returncode'] is not None
+
+def test_watch_needs_a_process_or_progress():
+    with pytest.raises(Exception):
+        Pairmonitor().watch('grp1')
+
+def test_copyprogress_rate_eta_and_capacity_weighting():
+    progress = Copyprogress(alpha=0.5)
+    progress.record('grp1',{ 'vol1': { 'percent': 10, 'gb': 300 }, 'vol2': { 'percent': 50, 'gb': 100 } },at=0)
+    status = progress.record('grp1',{ 'vol1': { 'percent': 20, 'gb': 300 }, 'vol2': { 'percent': 60, 'gb': 100 } },at=10)
+    assert status['percent'] == pytest.approx(30)
+    assert status['totalgb'] == 400 and status['repgb'] == pytest.approx(120)
+    assert status['rate'] == pytest.approx(1) and status['throughput'] == pytest.approx(4)
+    # The group finishes with its slowest pair, vol1 has 80% left at 1%/s
+    assert status['eta'] == pytest.approx(80)
+    status = progress.record('grp1',{ 'vol1': { 'percent': 40, 'gb': 300 }, 'vol2': { 'percent': 100, 'gb': 100 } },at=20)
+    assert progress.pairstatus('grp1')['vol1']['rate'] == pytest.approx(1.5)
+    assert progress.pairstatus('grp1')['vol2']['eta'] == 0 and status['eta'] == pytest.approx(40)
+    assert [sample[1] for sample in progress.series('grp1','vol1')] == [10,20,40]
+
+def test_copyprogress_flags_stalled_pairs_and_unknown_eta():
+    progress = Copyprogress(stall_seconds=30)
+    progress.record('grp1',{ 'vol1': { 'percent': 10 }, 'vol2': { 'percent': 10 } },at=0)
+    progress.record('grp1',{ 'vol1': { 'percent': 20 }, 'vol2': { 'percent': 10 } },at=10)
+    status = progress.record('grp1',{ 'vol1': { 'percent': 30 }, 'vol2': { 'percent': 10 } },at=40)
+    assert status['stalled'] and status['stalledpairs'] == ['vol2']
+    assert status['eta'] is None and status['totalgb'] is None
+    status = progress.record('grp1',{ 'vol1': { 'percent': 40 }, 'vol2': { 'percent': 15 } },at=50)
+    assert not status['stalled'] and status['eta'] is not None
+
+def test_poll_interval_follows_eta_and_backs_off_without_progress():
+    monitor = Pairmonitor(min_interval=5,max_interval=120)
+    watch = { 'interval': 5, 'lastpoll': None }
+    assert monitor.nextinterval(watch,None) == 5
+    watch['lastpoll'] = 0
+    assert monitor.nextinterval(watch,None) == 10
+    watch['interval'] = 100
+    assert monitor.nextinterval(watch,{ 'eta': None, 'stalled': False }) == 120
+    assert monitor.nextinterval(watch,{ 'eta': 60, 'stalled': False }) == 30
+    assert monitor.nextinterval(watch,{ 'eta': 4, 'stalled': False }) == 5
+    assert monitor.nextinterval(watch,{ 'eta': 60, 'stalled': True }) == 120
+
+def test_pairmonitor_tracks_throughput_with_volume_capacities(cci,replay):
+    replay.addsequence("pairdisplay -g oradb -I1 -fce -CLI",CLI + pairrows(40),CLI + pairrows(100,'PAIR'))
+    # 4194304 blocks, 2 GB
+    capacities = { 64034: { '400': '4194304' }, 64035: { '500': '4194304' } }
+    results = []
+    monitor = Pairmonitor(min_interval=0,max_interval=0)
+    def progress(group):
+        return cci.pairprogress(cci.pairdisplayx(1,group,volume_capacities=capacities,print_pairdisplay=False)['pairdisplaydata'])
+    monitor.watch('oradb',progress=progress,oncomplete=lambda group, result: results.append(result))
+    monitor.run(timeout=10)
+    assert results[0]['completed'] and results[0]['percent'] == 100
+    assert monitor.status('oradb')['totalgb'] == 2 and monitor.status('oradb')['repgb'] == 2
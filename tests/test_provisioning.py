@@ -0,0 +1,83 @@
+import threading
+from hiraid.provisioning import Provisioner
+from conftest import SERIAL
+
+LUNS = "PORT GID HMD LUN NUM LDEV CM Serial# HMO_BITs\n"
+STATUS = "REQID R SSB1 SSB2 Serial# ID Description\n"
+STATUSCMD = f"raidcom get command_status -s {SERIAL}"
+
+def lunrow(lun,ldev_id):
+    return f"CL1-A 1 LINUX/IRIX {lun} 1 {ldev_id} - 353511 -\n"
+
+def statusrow(reqid,result='Y'):
+    ssb = ('B958','0B2B') if result == 'N' else ('-','-')
+    return f"{reqid} {result} {ssb[0]} {ssb[1]} 353511 - -\n"
+
+def addrequest(replay,cmd,reqid):
+    ''' An asynchronous command returning reqid '''
+    replay.add(f"{cmd} -request_id auto -s {SERIAL}",f"REQID : {reqid}\n")
+
+def statuscalls(replay) -> tuple:
+    ''' ( instance wide get command_status calls, get command_status -request_id calls ) '''
+    calls = [cmd for cmd in replay.calls if 'get command_status' in cmd]
+    return [cmd for cmd in calls if '-request_id' not in cmd], [cmd for cmd in calls if '-request_id' in cmd]
+
+def test_addluns_counts_and_undoes_only_new_completed_mappings(raidcom,replay):
+    # 1000 is already presented at lun 0, 1003 at lun 3
+    replay.addsequence(f"raidcom get lun -port CL1-A-1 -s {SERIAL} -key opt",LUNS + lunrow(0,1000) + lunrow(3,1003),
+                       LUNS + lunrow(0,1000) + lunrow(1,1001) + lunrow(3,1003))
+    addrequest(replay,"raidcom add lun -port CL1-A-1 -ldev_id 1000",'00000001')
+    addrequest(replay,"raidcom add lun -port CL1-A-1 -ldev_id 1001 -lun_id 1",'00000002')
+    replay.add(f"raidcom add lun -port CL1-A-1 -ldev_id 1002 -lun_id 2 -request_id auto -s {SERIAL}",stderr="raidcom: [EX_CMDRJE] An order to the control/command device was rejected\n",returncode=221)
+    addrequest(replay,"raidcom add lun -port CL1-A-1 -ldev_id 1003 -lun_id 3",'00000004')
+    # 00000004 is still in progress on the first pass
+    replay.addsequence(STATUSCMD,STATUS + statusrow('00000001','N') + statusrow('00000002') + statusrow('00000004','-'),
+                       STATUS + statusrow('00000001','N') + statusrow('00000002') + statusrow('00000004'))
+    plan = [('CL1-A-1',None,1000),('CL1-A-1',1,1001),('CL1-A-1',2,1002),('CL1-A-1',3,1003)]
+    luns = Provisioner(raidcom,poll_interval=0).addluns(plan,raise_err=False)
+    assert [row['LDEV'] for row in luns.data] == ['1001']
+    assert [' '.join(undocmd.split()) for undocmd in luns.undocmds] == [f"raidcom delete lun -port CL1-A-1 -ldev_id 1001 -lun_id 1 -I0 -s {SERIAL}"]
+    assert luns.failed == [plan[0],plan[2],plan[3]]
+    assert luns.stats['mapped'] == 1 and luns.stats['failed'] == 3 and luns.stats['errors'] == 2
+    assert raidcom.undocmds.count(luns.undocmds[0]) == 1
+    # one get command_status per pass on the one instance, no per request lookups
+    assert statuscalls(replay) == ([f"raidcom get command_status -I0 -s {SERIAL}"] * 2,[])
+
+def test_concurrent_batches_poll_only_their_own_requests(raidcomfactory,replay):
+    raidcom = raidcomfactory()
+    replay.add(f"raidcom get ldev -ldev_list defined -s {SERIAL}","")
+    params = "-pool 0 -capacity 2097152"
+    for ldev_id in range(1000,1004):
+        addrequest(replay,f"raidcom add ldev -ldev_id {ldev_id} {params}",f"{ldev_id:08}")
+    # the instance reports both batches' requests, each batch only matches its own
+    replay.add(STATUSCMD,STATUS + ''.join(statusrow(f"{ldev_id:08}",'N' if ldev_id == 1003 else 'Y') for ldev_id in range(1000,1004)))
+    results = {}
+    def batch(name,ldev_ids):
+        results[name] = Provisioner(raidcom,poll_interval=0).addldevs(params,ldev_ids=ldev_ids,return_ldevs=False,raise_err=False)
+    threads = [threading.Thread(target=batch,args=('first',[1000,1001])),threading.Thread(target=batch,args=('second',[1002,1003]))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert not [cmd for cmd in replay.calls if 'reset command_status' in cmd]
+    instancewide, byrequest = statuscalls(replay)
+    assert len(instancewide) == 2 and byrequest == []
+    assert results['first'].stats['created'] == 2 and results['first'].failed == []
+    assert results['second'].stats['created'] == 1 and [failure['ldev_id'] for failure in results['second'].failed] == ['1003']
+    assert raidcom.ldev_allocator.isfree(1003) and not raidcom.ldev_allocator.isfree(1002)
+
+def test_addmfvvols_names_follow_requested_ids_and_keep_prefixed_keys(raidcom,replay):
+    # 00:10:0B is already defined, it keeps AUTO_LDEV2 from being given to 00:10:0C
+    replay.add(f"raidcom get ldev -ldev_list defined -s {SERIAL}","LDEV : 4107\nVOL_TYPE : 3390-A\n\n")
+    params = "-pool mfpool -cylinder 10 -emulation 3390-A"
+    for ldev_id, name in ((4106,'AUTO_LDEV1'),(4108,'AUTO_LDEV3')):
+        addrequest(replay,f"raidcom add ldev -ldev_id {ldev_id} {params}",f"{ldev_id:08}")
+        replay.add(f"raidcom get command_status -request_id {ldev_id:08} -s {SERIAL}",STATUS + statusrow(f"{ldev_id:08}"))
+        replay.add(f'raidcom modify ldev -ldev_id {ldev_id} -ldev_name "{name}" -s {SERIAL}')
+    # the instance wide output has rolled over, each request falls back to get command_status -request_id
+    replay.add(STATUSCMD,STATUS)
+    ldevs = raidcom.addmfvvols('mfpool',num_ldevs=3,return_ldevs=False)
+    assert ldevs.failed == [] and ldevs.unavailable_ldevs == ['4107']
+    assert list(ldevs.view) == ['00:10:0A','00:10:0C']
+    assert [(ldev['LDEV'],ldev['LDEV_ID'],ldev['NAME']) for ldev in ldevs.data] == [('00:10:0A','00:10:0A','AUTO_LDEV1'),('00:10:0C','00:10:0C','AUTO_LDEV3')]
+    assert len(statuscalls(replay)[0]) == 1 and len(statuscalls(replay)[1]) == 2
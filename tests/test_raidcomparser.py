@@ -0,0 +1,27 @@
+import logging
+from hiraid.cmdview import Cmdview
+from hiraid.raidcomparser import Raidcomparser
+
+PORTLOGIN = "PORT LOGIN_WWN Serial# -\nCL1-A 100000109b123456 353511 -\nCL1-A 100000109b654321 412345 -\n"
+
+def test_getportlogin_keeps_each_logins_serial():
+    for compact in (False,True):
+        cmdreturn = Cmdview(cmd='raidcom get port -port CL1-A')
+        cmdreturn.stdout = PORTLOGIN
+        Raidcomparser(None,log=logging,compact=compact).getportlogin(cmdreturn)
+        logins = cmdreturn.view['CL1-A']['_PORT_LOGINS']
+        assert logins['100000109b123456']['Serial#'] == '353511'
+        assert logins['100000109b654321']['Serial#'] == '412345'
+        assert cmdreturn.stats['loggedinhostcount'] == 2
+
+HOSTGRP = 'PORT GID RGID GROUP_NAME Serial# HMD HMO_BITs\nCL1-A 0 0 1A-G00 353511 LINUX/IRIX -\nCL1-A 1 0 "host one" 353511 VMWARE_EX 54:2\nCL1-A 2 0 - 353511 LINUX/IRIX -\n'
+
+def test_gethostgrp_drops_unused_host_groups():
+    cmdreturn = Cmdview(cmd='raidcom get host_grp -port CL1-A -key detail')
+    cmdreturn.stdout = HOSTGRP
+    Raidcomparser(None,log=logging).gethostgrp(cmdreturn)
+    assert list(cmdreturn.view['CL1-A']['_GIDS']) == ['0','1']
+    assert cmdreturn.view['CL1-A']['_GIDS']['1']['GROUP_NAME'] == 'host one'
+    assert cmdreturn.view['CL1-A']['_GIDS']['1']['HMO_BITs'] == ['2','54']
+    assert [row['HOST_GRP_ID'] for row in cmdreturn.data] == ['CL1-A-0','CL1-A-1']
+    assert cmdreturn.stats == { '_GIDS': 2, '_GIDS_UNUSED': 0 }
@@ -0,0 +1,38 @@
+from conftest import SERIAL
+
+def ldev(capacity: int,used: int) -> dict:
+    return { 'VOL_Capacity(BLK)': str(capacity), 'Used_Block(BLK)': str(used) }
+
+def test_ldev_counters_follow_view_changes(raidcom,replay):
+    replay.add(f"raidcom get ldev -ldev_id 1000-1001 -s {SERIAL}",
+               "LDEV : 1000\nVOL_TYPE : OPEN-V-CVS\nVOL_Capacity(BLK) : 2097152\nUsed_Block(BLK) : 1024\n\n"
+               "LDEV : 1001\nVOL_TYPE : OPEN-V-CVS\nVOL_Capacity(BLK) : 4194304\nUsed_Block(BLK) : 0\n\n")
+    raidcom.getldev(ldev_id='1000-1001')
+    counters = raidcom.stats['ldevcounters']['_ldevs']
+    assert (counters['ldevcount'],counters['VOL_Capacity(BLK)'],counters['Used_Block(BLK)']) == (2,6291456,1024)
+    assert counters['VOL_Capacity(GB)'] == 3.0
+    # a replaced record swaps its old values for the new ones, a removed one takes them away
+    raidcom.views.upsert(('_ldevs','1000'),ldev(2097152,2097152))
+    raidcom.views.deletepath(('_ldevs','1001'))
+    counters = raidcom.stats['ldevcounters']['_ldevs']
+    assert (counters['ldevcount'],counters['VOL_Capacity(BLK)'],counters['Used_Block(BLK)']) == (1,2097152,2097152)
+    before = raidcom.stats['ldevcounters']
+    raidcom.updatestats.rebuild()
+    assert raidcom.stats['ldevcounters'] == before
+
+def test_port_counters_are_counted_from_deltas(raidcom):
+    views = raidcom.views
+    views.merge({ '_ports': { 'CL1-A': { '_GIDS': { '1': { '_LUNS': { '0': {}, '1': {} }, '_WWNS': { '10000000C9000001': {} } },
+                                                    '2': { '_LUNS': { '0': {} }, '_WWNS': { '10000000c9000001': {}, '10000000C9000002': {} } } },
+                                         '_PORT_LOGINS': { '10000000C9000001': {} } } } })
+    for counters in ('luncounters','hbawwncounters','portlogincounters','hostgroupcounters'):
+        getattr(raidcom.updatestats,counters)()
+    stats = raidcom.stats['portcounters']
+    assert stats['lunsTotal'] == 3 and stats['ports']['CL1-A']['lunCount'] == 3
+    # the same wwn in two host groups is counted once in the total
+    assert stats['ports']['CL1-A']['hbaWwnCount'] == 3 and stats['hbaWwnTotal'] == 2
+    assert stats['portLoginsTotal'] == 1 and stats['uniquePortLoginsTotal'] == 1
+    assert stats['hostGroupsTotal'] == 2
+    views.deletepath(('_ports','CL1-A','_GIDS','2'))
+    stats = raidcom.stats['portcounters']
+    assert stats['lunsTotal'] == 2 and stats['hbaWwnTotal'] == 1 and stats['ports']['CL1-A']['hostgroups'] == 1
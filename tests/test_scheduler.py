@@ -0,0 +1,68 @@
+import time
+import asyncio
+import pytest
+from hicciexceptions.cci_exceptions import EX_ATTHOR, EX_COMERR
+from hiraid.raidcom import Raidcom
+from hiraid.scheduler import Instancescheduler
+from conftest import SERIAL, Countingexecutor, addconstruction
+
+class Failinginstance(Countingexecutor):
+    ''' Replay where get ldev on instance 0 fails as a horcm instance which lost its command device would '''
+    def run(self,cmd: str) -> tuple:
+        if 'get ldev' in cmd and ' -I0 ' in cmd:
+            self.calls.append(cmd)
+            return '', 'raidcom: [EX_ATTHOR] Can not attach to horcm instance\n', 251
+        return super().run(cmd)
+
+def instances(count: int) -> dict:
+    return { instance: { 'cmd_device_type': 'FIBRE' } for instance in range(count) }
+
+def test_failing_instance_is_backed_off_doubling_up_to_max_backoff():
+    scheduler = Instancescheduler(instances(2),backoff=5,max_backoff=12)
+    def getlun(instance):
+        if instance == 0:
+            raise EX_COMERR('no answer')
+        return instance
+    scheduler.state[0].update(latency=0.001,last_used=time.monotonic())
+    scheduler.state[1].update(latency=1.0,last_used=time.monotonic())
+    assert scheduler.dispatch(getlun) == 1
+    state = scheduler.snapshot()[0]
+    assert state['failures'] == 1 and 4 < state['backoff_until'] - time.monotonic() <= 5 and state['inflight'] == 0
+    # backing off, the faster instance is passed over
+    assert scheduler.acquire() == 1
+    scheduler.release(1,1.0)
+    for wait in (10,12):
+        scheduler.state[0]['backoff_until'] = 0
+        assert scheduler.dispatch(getlun) == 1
+        assert wait - 1 < scheduler.state[0]['backoff_until'] - time.monotonic() <= wait
+    # an answer, even a failed command, resets the backoff
+    scheduler.state[0]['backoff_until'] = 0
+    assert scheduler.state[0]['failures'] == 3
+    with pytest.raises(ValueError) as failed:
+        scheduler.dispatch(lambda instance: (_ for _ in ()).throw(ValueError(instance)))
+    assert failed.value.args == (0,)
+    assert scheduler.state[0]['failures'] == 0 and scheduler.state[0]['backoff_until'] == 0
+
+def test_every_instance_failing_raises_and_adispatch_retries():
+    scheduler = Instancescheduler(instances(2))
+    with pytest.raises(EX_ATTHOR):
+        scheduler.dispatch(lambda instance: (_ for _ in ()).throw(EX_ATTHOR(instance)))
+    assert [state['failures'] for state in scheduler.state.values()] == [1,1]
+    scheduler = Instancescheduler(instances(2))
+    async def getlun(instance):
+        if instance == 0:
+            raise asyncio.TimeoutError()
+        return instance
+    scheduler.state[1]['latency'] = 5.0
+    assert asyncio.run(scheduler.adispatch(getlun)) == 1 and scheduler.state[0]['failures'] == 1
+
+def test_raidcom_retries_ex_atthor_on_another_instance(tmp_path):
+    replay = addconstruction(Failinginstance())
+    replay.add(f"raidcom get ldev -ldev_id 1000 -s {SERIAL}","LDEV : 1000\nVOL_TYPE : OPEN-V-CVS\n\n")
+    raidcom = Raidcom(SERIAL,[0,1],path='',executor=replay,cachedir=str(tmp_path))
+    raidcom.scheduler.state[0].update(latency=0.001,last_used=time.monotonic())
+    raidcom.scheduler.state[1].update(latency=1.0,last_used=time.monotonic())
+    ldevs = raidcom.concurrent_getldevs([1000])
+    assert list(ldevs.view) == ['1000']
+    assert [cmd for cmd in replay.calls if 'get ldev' in cmd] == [f"raidcom get ldev -ldev_id 1000 -I0 -s {SERIAL}",f"raidcom get ldev -ldev_id 1000 -I1 -s {SERIAL}"]
+    assert raidcom.scheduler.state[0]['failures'] == 1 and raidcom.scheduler.state[0]['backoff_until'] > time.monotonic()
@@ -0,0 +1,35 @@
+import os
+from hiraid.records import fromdict
+from hiraid.snapshotcache import Snapshotcache
+
+LDEVS = { '1000': fromdict({ 'LDEV': '1000', 'STS': 'NML' }), '1001': { 'LDEV': '1001', 'STS': 'BLK' } }
+PORTS = { 'CL1-A': { 'TYPE': 'FIBRE', '_GIDS': {} } }
+
+def test_loadcache_reads_each_view_on_first_use(raidcomfactory,monkeypatch):
+    first = raidcomfactory()
+    first.views.merge({ '_ldevs': LDEVS, '_ports': PORTS })
+    first.writecache(keys=['_ldevs','_ports'])
+    reads = []
+    read = Snapshotcache.read
+    monkeypatch.setattr(Snapshotcache,'read',lambda cache, key, manifest=None: reads.append(key) or read(cache,key,manifest))
+    storage = raidcomfactory()
+    storage.loadcache()
+    assert reads == [] and not dict.__contains__(storage.views,'_ldevs')
+    assert storage.views['_ldevs']['1000'] == { 'LDEV': '1000', 'STS': 'NML' }
+    assert storage.views.get('_ldevs')['1001']['STS'] == 'BLK'
+    assert reads == ['_ldevs']
+    assert storage.views['_ports'] == PORTS and reads == ['_ldevs','_ports']
+    assert '_identity' not in storage.views
+
+def test_partial_write_keeps_other_segments_and_eager_load(raidcom,tmp_path):
+    cache = Snapshotcache(str(tmp_path),raidcom.serial)
+    raidcom.views.merge({ '_ldevs': LDEVS, '_ports': PORTS })
+    cache.write(raidcom.views,keys=['_ldevs','_ports'])
+    ldevfile = cache.manifest()['segments']['_ldevs']['file']
+    raidcom.views.upsert(('_ldevs','1000'),{ 'STS': 'BLK' })
+    manifest = cache.write(raidcom.views,keys=['_ldevs'])
+    assert manifest['segments']['_ldevs']['file'] != ldevfile and not os.path.exists(f"{cache.snapshotdir}{os.sep}{ldevfile}")
+    assert sorted(segment for segment in os.listdir(cache.snapshotdir) if segment.endswith('.gz')) == sorted(segment['file'] for segment in manifest['segments'].values())
+    views = raidcom.probe().views
+    cache.load(views,keys=['_ldevs'],lazy=False)
+    assert dict(views) == { '_ldevs': { '1000': { 'LDEV': '1000', 'STS': 'BLK' }, '1001': { 'LDEV': '1001', 'STS': 'BLK' } } }
@@ -0,0 +1,53 @@
+from hiraid import viewcache
+from hiraid.cmdview import Cmdview
+from hiraid.viewcache import Viewcache
+from conftest import SERIAL
+
+class Clock():
+    def __init__(self):
+        self.now = 1000.0
+    def monotonic(self) -> float:
+        return self.now
+
+def test_entries_expire_after_their_views_ttl(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(viewcache,'time',clock)
+    cache = Viewcache({ '_ports': 600, '_ldevs': 30 })
+    ports, ldev = Cmdview(cmd='getport'), Cmdview(cmd='getldev')
+    cache.store('getport',('_ports',),ports)
+    cache.store('getldev',('_ldevs','1000'),ldev)
+    cache.store('getpool',('_pools',),Cmdview(cmd='getpool'))
+    cache.store('getldev',('_ldevs','1001'),Cmdview(cmd='getldev'),datafilter={ 'STS': 'NML' })
+    assert len(cache) == 2 and ports.viewcached
+    assert cache.fetch('getldev',('_ldevs','1000')) is ldev and cache.fetch('getldev',('_ldevs','1000'),refresh=True) is None
+    assert cache.fetch('getldev',('_ldevs','1000'),update_view=False) is None
+    clock.now += 31
+    assert cache.fetch('getldev',('_ldevs','1000')) is None and cache.fetch('getport',('_ports',)) is ports
+    assert cache.age(('_ports',)) == 31 and cache.fresh(('_ports',)) and not cache.fresh(('_ldevs','1000'))
+    # expired entries are evicted as new ones are stored
+    cache.store('getport',('_ports','CL1-A','_GIDS'),Cmdview(cmd='gethostgrp'))
+    assert len(cache) == 2 and cache.age(('_ldevs','1000')) is None
+
+def test_invalidate_drops_the_path_and_everything_beneath_it():
+    cache = Viewcache({ '_ports': 600 })
+    for path in (('_ports',),('_ports','CL1-A','_GIDS'),('_ports','CL1-A','_GIDS','1','_LUNS'),('_ports','CL2-A','_GIDS')):
+        cache.store('get',path,Cmdview(cmd='get'))
+    cache.invalidate(('_ports','CL1-A'))
+    assert cache.fetch('get',('_ports','CL1-A','_GIDS')) is None and cache.fetch('get',('_ports','CL1-A','_GIDS','1','_LUNS')) is None
+    assert cache.fetch('get',('_ports',)) and cache.fetch('get',('_ports','CL2-A','_GIDS'))
+    assert 'CL1-A' not in cache.paths['_ports']
+    cache.invalidate(('_ports',))
+    assert len(cache) == 0 and cache.paths == {}
+
+def test_getters_are_served_from_cache_until_a_write_invalidates(raidcomfactory,replay):
+    raidcom = raidcomfactory(view_ttl={ '_ldevs': 30 })
+    replay.add(f"raidcom get ldev -ldev_id 1000 -s {SERIAL}","LDEV : 1000\nVOL_TYPE : OPEN-V-CVS\nLDEV_NAMING : old\n\n")
+    replay.add(f'raidcom modify ldev -ldev_id 1000 -ldev_name "new" -s {SERIAL}')
+    getldevs = lambda: len([cmd for cmd in replay.calls if 'get ldev' in cmd])
+    raidcom.getldev(ldev_id=1000)
+    assert raidcom.getldev(ldev_id=1000).view['1000']['LDEV_NAMING'] == 'old' and getldevs() == 1
+    raidcom.getldev(ldev_id=1000,refresh=True)
+    assert getldevs() == 2
+    raidcom.modifyldevname(1000,'new')
+    raidcom.getldev(ldev_id=1000)
+    assert getldevs() == 3
@@ -0,0 +1,41 @@
+import pytest
+from hiraid.viewindex import Viewindex
+from hiraid.viewstore import Viewstore
+from conftest import SERIAL
+
+def hostgroup(name: str,wwns: list,luns: dict) -> dict:
+    return { 'GROUP_NAME': name, 'RGID': '0', '_WWNS': { wwn: { 'HWWN': wwn.lower() } for wwn in wwns }, '_LUNS': { lun: { 'LDEV': ldev_id } for lun, ldev_id in luns.items() } }
+
+def test_indexes_built_from_existing_views_follow_changes():
+    views = Viewstore({ '_ports': { 'CL1-A': { '_GIDS': { '1': hostgroup('esx01',['10000000C9000001'],{ '0': '1000', '1': '1001' }) } } },
+                        '_ldevs': { '1000': { 'RSGID': '0', 'B_POOLID': '1' }, '1001': { 'RSGID': '1', 'B_POOLID': '1' } } })
+    index = Viewindex(views)
+    views.merge({ '_ports': { 'CL2-A': { '_GIDS': { '1': hostgroup('esx01',['10000000c9000001'],{ '0': '1000' }) } } } })
+    assert index.hostgroups(wwn='10000000c9000001') == ['CL1-A-1','CL2-A-1'] == index.hostgroups(name='esx01')
+    assert index.hostgroups(rgid=0) == ['CL1-A-1','CL2-A-1']
+    assert index.lunpaths('00:03:E8') == [('CL1-A-1','0'),('CL2-A-1','0')] and index.presented() == ['1000','1001']
+    assert index.ldevs(wwn='10000000C9000001') == ['1000','1001']
+    assert index.ldevs(pool=1) == ['1000','1001'] and index.ldevs(rsgid='1') == ['1001']
+
+    # renamed, unmapped, moved and removed records leave the old keys
+    views.upsert(('_ports','CL2-A','_GIDS','1'),{ 'GROUP_NAME': 'esx02' })
+    views.deletepath(('_ports','CL1-A','_GIDS','1','_LUNS','1'))
+    views.upsert(('_ldevs','1000'),{ 'B_POOLID': '2' })
+    views.deletepath(('_ports','CL1-A'))
+    assert index.hostgroups(name='esx01') == [] and index.hostgroups(name='esx02') == ['CL2-A-1']
+    assert index.hostgroups(wwn='10000000c9000001') == ['CL2-A-1']
+    assert index.lunpaths(1000) == [('CL2-A-1','0')] and index.lunpaths(1001) == [] and index.presented() == ['1000']
+    assert index.ldevs(pool='1') == ['1001'] and index.ldevs(pool='2') == ['1000']
+    assert index.names == { 'esx02': {'CL2-A-1'} } and index.rgids == { '0': {'CL2-A-1'} }
+    with pytest.raises(Exception):
+        index.hostgroups()
+
+def test_view_index_follows_getlun(raidcom,replay):
+    index = raidcom.view_index
+    replay.add(f"raidcom get lun -port CL1-A-1 -s {SERIAL} -key opt","PORT GID HMD LUN NUM LDEV CM Serial# HMO_BITs\nCL1-A 1 LINUX/IRIX 0 1 1000 - 353511 -\nCL1-A 1 LINUX/IRIX 1 1 1001 - 353511 -\n")
+    raidcom.getlun(port='CL1-A-1')
+    assert index.lunpaths(1001) == [('CL1-A-1','1')] and index.presented() == ['1000','1001']
+    replay.add(f"raidcom get lun -port CL1-A-1 -s {SERIAL} -key opt","PORT GID HMD LUN NUM LDEV CM Serial# HMO_BITs\nCL1-A 1 LINUX/IRIX 0 1 1002 - 353511 -\n")
+    raidcom.views.deletepath(('_ports','CL1-A','_GIDS','1','_LUNS'))
+    raidcom.getlun(port='CL1-A-1')
+    assert index.presented() == ['1002'] and index.lunpaths(1000) == []
@@ -0,0 +1,47 @@
+from hiraid.records import Record, fromdict
+from hiraid.viewstore import Viewstore
+
+def test_partial_refresh_of_a_compact_record_keeps_its_other_fields():
+    views = Viewstore()
+    ldev = fromdict({ 'LDEV': '1000', 'VOL_TYPE': 'OPEN-V-CVS', 'LDEV_NAMING': 'old', 'STS': 'NML' })
+    views.merge({ '_ldevs': { '1000': ldev } })
+    stored = views['_ldevs']['1000']
+    assert stored is not ldev
+    views.merge({ '_ldevs': { '1000': fromdict({ 'LDEV': '1000', 'LDEV_NAMING': 'new' }) } })
+    views.upsert(('_ldevs','1000'),{ 'STS': 'BLK' })
+    assert views['_ldevs']['1000'] is stored and isinstance(stored,Record)
+    assert dict(stored) == { 'LDEV': '1000', 'VOL_TYPE': 'OPEN-V-CVS', 'LDEV_NAMING': 'new', 'STS': 'BLK' }
+    assert ldev['LDEV_NAMING'] == 'old'
+
+def test_listeners_get_old_and_new_records():
+    views = Viewstore()
+    events = []
+    views.addlistener(('_ports','*','_GIDS','*'),lambda path, old, new: events.append((path,old,new and dict(new))))
+    views.merge({ '_ports': { 'CL1-A': { 'TYPE': 'FIBRE', '_GIDS': { '1': { 'GROUP_NAME': 'g1', 'HMD': 'LINUX/IRIX' } } } } })
+    assert events == [(('_ports','CL1-A','_GIDS','1'),None,{ 'GROUP_NAME': 'g1', 'HMD': 'LINUX/IRIX' })]
+    events.clear()
+    views.merge({ '1': { 'GROUP_NAME': 'renamed' } },path=('_ports','CL1-A','_GIDS'))
+    assert events == [(('_ports','CL1-A','_GIDS','1'),{ 'GROUP_NAME': 'g1', 'HMD': 'LINUX/IRIX' },{ 'GROUP_NAME': 'renamed', 'HMD': 'LINUX/IRIX' })]
+    events.clear()
+    views.merge({ '_ports': { 'CL1-A': { 'TYPE': 'FIBRE' } } })
+    assert events == []
+    views.upsert(('_ports','CL1-A','_GIDS','1'),{ 'HMD': 'VMWARE_EX' })
+    assert events == [(('_ports','CL1-A','_GIDS','1'),{ 'GROUP_NAME': 'renamed', 'HMD': 'LINUX/IRIX' },{ 'GROUP_NAME': 'renamed', 'HMD': 'VMWARE_EX' })]
+    events.clear()
+    views.upsert(('_ports','CL1-A','_GIDS','2'),{ 'GROUP_NAME': 'g2' })
+    # removing the port removes every host group beneath it
+    views.deletepath(('_ports','CL1-A'))
+    assert events == [(('_ports','CL1-A','_GIDS','2'),None,{ 'GROUP_NAME': 'g2' }),
+                      (('_ports','CL1-A','_GIDS','1'),{ 'GROUP_NAME': 'renamed', 'HMD': 'VMWARE_EX' },None),
+                      (('_ports','CL1-A','_GIDS','2'),{ 'GROUP_NAME': 'g2' },None)]
+
+def test_replace_and_loaders():
+    views = Viewstore({ '_ldevs': { '1000': { 'STS': 'NML' } } })
+    events = []
+    views.addlistener(('_ldevs','*'),lambda path, old, new: events.append((path[-1],old and dict(old),new and dict(new))))
+    views.replace({ '_ldevs': { '1001': { 'STS': 'BLK' } } })
+    assert events == [('1000',{ 'STS': 'NML' },None),('1001',None,{ 'STS': 'BLK' })]
+    loads = []
+    views.addloader('_inqraid',lambda: loads.append(views.merge({ '_inqraid': { 'sdb': {} } })))
+    assert '_inqraid' not in views and views.get('_inqraid') == { 'sdb': {} } and views['_inqraid'] == { 'sdb': {} }
+    assert len(loads) == 1